@@ -94,6 +94,12 @@ done
 # Install mavlink interfacing dependencies
 sudo pip3 install pymavlink pyserial
 
+# Install TAK script dependencies (breadcrumb trail simplification)
+sudo pip3 install numpy
+
+# Install camera trigger daemon dependencies (libgpiod v2 bindings)
+sudo pip3 install gpiod
+
 # make sure we are in the correct directory
 cd "$USER_DIR"
 
@@ -131,6 +137,8 @@ if [ "$INSTALL_PHOTO" = true ]; then
         sudo systemctl link /home/droneman/oi-cm4-toolkit/system-services/photogram.service
         sudo systemctl enable photogram.service
     fi
+    # linked only: enable to fire the camera on the flight controller trigger (cam-control.sh devtest runs it by hand)
+    sudo systemctl link /home/droneman/oi-cm4-toolkit/system-services/cam-trigger.service
 fi
 
 cd "$USER_DIR" 
@@ -167,6 +175,9 @@ cd "$USER_DIR"
 
 # PyTak client setup
 if [ "$INSTALL_TAK" = true ]; then
+    # telemetry CSV for the CoT senders, READY once the first row is written
+    sudo systemctl link /home/droneman/oi-cm4-toolkit/system-services/mavlink-reader.service
+    sudo systemctl enable mavlink-reader.service
     sudo systemctl link /home/droneman/oi-cm4-toolkit/system-services/pytak-client.service
     sudo systemctl enable pytak-client.service
 fi
@@ -188,6 +199,9 @@ fi
 if [ "$INSTALL_TIME" = true ]; then
     sudo systemctl link /home/droneman/oi-cm4-toolkit/system-services/set-datetime.service
     sudo systemctl enable set-datetime.service
+    # keep the clock disciplined to GPS after the one-shot set (step once, then slew)
+    sudo systemctl link /home/droneman/oi-cm4-toolkit/system-services/gps-timed.service
+    sudo systemctl enable gps-timed.service
 
     # Stop and disable systemd-timesyncd.service
     if systemctl is-enabled systemd-timesyncd.service &>/dev/null; then
@@ -356,6 +370,10 @@ RetryTimeout = 5
 EOF"
 fi
 
+# Service status daemon (system-services.sh status, metrics on port 9107)
+sudo systemctl link /home/droneman/oi-cm4-toolkit/system-services/service-statusd.service
+sudo systemctl enable service-statusd.service
+
 echo "Adding droneman user to tty group"
 sudo usermod -aG tty droneman
 
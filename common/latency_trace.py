@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Latency tracing of telemetry samples from MAVLink receive to CoT on the wire.
+
+mavlink-reader.py stamps every position sample with CLOCK_MONOTONIC when it
+comes off the UDP socket (rx_monotonic) and again when the CSV is written
+(write_monotonic). The monotonic clock is shared by all processes on the
+CM4, so the CoT senders can continue the trace from the CSV row:
+
+    rx -> update -> CSV write -> poll -> build -> sent (per sink)
+
+Each stage goes into the telemetry_stage_seconds{component,stage} histogram
+and the total age of the sample when it left each sink into
+telemetry_age_seconds{component,sink}.
+"""
+import time
+from datetime import datetime, timezone
+
+# custom modules
+import metrics
+
+# stage and age buckets in seconds, the CSV hop alone can take seconds
+STAGE_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0, 30.0)
+
+_histograms = {}
+
+
+def observe_stage(component: str, stage: str, seconds: float):
+    """Record the duration of one stage of the telemetry path."""
+    histogram = _histograms.get((component, stage))
+    if histogram is None:
+        histogram = _histograms[(component, stage)] = metrics.histogram(
+            "telemetry_stage_seconds", "Duration of each stage from MAVLink receive to CoT on the wire",
+            {"component": component, "stage": stage}, buckets=STAGE_BUCKETS)
+    histogram.observe(seconds)
+
+
+def observe_age(component: str, sink: str, seconds: float):
+    """Record the age of a sample when its CoT event was sent to a sink."""
+    histogram = _histograms.get((component, sink, "age"))
+    if histogram is None:
+        histogram = _histograms[(component, sink, "age")] = metrics.histogram(
+            "telemetry_age_seconds", "Age of the position sample when its CoT event left the sink",
+            {"component": component, "sink": sink}, buckets=STAGE_BUCKETS)
+    histogram.observe(seconds)
+
+
+class TelemetryTrace:
+    """Monotonic timestamps of one telemetry sample through a CoT sender."""
+
+    __slots__ = ("component", "rx", "write", "poll", "build")
+
+    def __init__(self, component: str, rx: float, write: float = None, poll: float = None):
+        self.component = component
+        self.rx = rx          # MAVLink receive (mavlink-reader)
+        self.write = write    # CSV write (mavlink-reader)
+        self.poll = poll      # CSV read by the sender
+        self.build = None     # CoT event built
+
+    @classmethod
+    def from_row(cls, row: dict, component: str):
+        """
+        Start a trace from a telemetry CSV row and record the write -> poll stage.
+
+        Returns:
+            TelemetryTrace: The trace, or None if the row has no rx_monotonic (older mavlink-reader)
+        """
+        rx = row.get("rx_monotonic")
+        if not isinstance(rx, float) or not rx:
+            return None
+        poll = time.monotonic()
+        write = row.get("write_monotonic")
+        write = write if isinstance(write, float) and write else None
+        if write is not None:
+            observe_stage(component, "write_poll", poll - write)
+        return cls(component, rx, write, poll)
+
+    def mark_built(self):
+        """The CoT event for this sample has been built."""
+        self.build = time.monotonic()
+        observe_stage(self.component, "poll_build", self.build - self.poll)
+
+    def mark_sent(self, sink: str):
+        """The event has been written (and drained) to a sink."""
+        now = time.monotonic()
+        if self.build is not None:
+            observe_stage(self.component, "build_sent", now - self.build)
+        observe_age(self.component, sink, now - self.rx)
+
+    def source_age(self, now: float = None) -> float:
+        """Seconds since the sample was received from the autopilot."""
+        return (time.monotonic() if now is None else now) - self.rx
+
+    def sample_time(self) -> str:
+        """Wall clock time of the MAVLink receive as a CoT time string."""
+        wall = time.time() - self.source_age()
+        return datetime.fromtimestamp(wall, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Lightweight metrics for the toolkit daemons.
+
+Counters, gauges and fixed-bucket histograms in a process-wide registry,
+exposed in the Prometheus text format over a localhost HTTP port and/or a
+Unix socket:
+
+    curl -s localhost:9101/metrics
+    socat - UNIX-CONNECT:/tmp/oi-metrics/mavlink_reader.sock
+
+The hot path takes no locks. Every thread updates its own shard (a plain
+list only that thread writes to, found by thread id), the scrape sums the
+shards. A gauge is a single assignment, or a function evaluated at scrape
+time, which is the cheapest way to export queue depths and existing counters.
+"""
+import bisect
+import logging
+import os
+import socket
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRICS_HOST = "127.0.0.1"
+METRICS_SOCKET_DIR = "/tmp/oi-metrics"
+# latency buckets in seconds, 0.5 ms to 10 s
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+logger = logging.getLogger("metrics")
+
+_servers = {}  # daemon name -> started servers
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    pairs = (f'{k}="{_escape(v)}"' for k, v in labels.items())
+    return "{" + ",".join(pairs) + "}"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Sharded:
+    """Per-thread shards, written without locks and summed on scrape."""
+
+    def __init__(self, width: int):
+        self._width = width
+        self._shards = {}
+
+    def _shard(self) -> list:
+        ident = threading.get_ident()
+        shard = self._shards.get(ident)
+        if shard is None:
+            # setdefault is atomic, a racing thread can only be another ident
+            shard = self._shards.setdefault(ident, [0.0] * self._width)
+        return shard
+
+    def _totals(self) -> list:
+        totals = [0.0] * self._width
+        for shard in list(self._shards.values()):
+            for i, value in enumerate(shard):
+                totals[i] += value
+        return totals
+
+
+class Counter(_Sharded):
+    """Monotonic counter."""
+
+    kind = "counter"
+
+    def __init__(self):
+        super().__init__(1)
+        self._function = None
+
+    def inc(self, amount: float = 1.0):
+        self._shard()[0] += amount
+
+    def set_function(self, function):
+        """Read the value from `function()` at scrape time (e.g. an existing stats attribute)."""
+        self._function = function
+
+    def value(self) -> float:
+        if self._function is not None:
+            return float(self._function())
+        return self._totals()[0]
+
+    def samples(self, name: str, labels: dict):
+        yield name, labels, self.value()
+
+
+class Gauge:
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def __init__(self):
+        self._value = 0.0
+        self._function = None
+
+    def set(self, value: float):
+        self._value = value
+
+    def set_function(self, function):
+        """Read the value from `function()` at scrape time (e.g. queue.qsize)."""
+        self._function = function
+
+    def value(self) -> float:
+        if self._function is not None:
+            return float(self._function())
+        return float(self._value)
+
+    def samples(self, name: str, labels: dict):
+        yield name, labels, self.value()
+
+
+class Histogram(_Sharded):
+    """Fixed-bucket histogram, each shard holds the bucket counts, the sum and the count."""
+
+    kind = "histogram"
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.bounds = tuple(sorted(buckets))
+        super().__init__(len(self.bounds) + 3)  # buckets, +Inf, sum, count
+
+    def observe(self, value: float):
+        shard = self._shard()
+        shard[bisect.bisect_left(self.bounds, value)] += 1
+        shard[-2] += value
+        shard[-1] += 1
+
+    def time(self):
+        """Context manager observing the elapsed time of the block in seconds."""
+        return _Timer(self)
+
+    def samples(self, name: str, labels: dict):
+        totals = self._totals()
+        cumulative = 0.0
+        for bound, count in zip(self.bounds + (float("inf"),), totals):
+            cumulative += count
+            yield name + "_bucket", dict(labels, le=_format_value(bound)), cumulative
+        yield name + "_sum", labels, totals[-2]
+        yield name + "_count", labels, totals[-1]
+
+
+class _Timer:
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+
+class MetricsRegistry:
+    """Get-or-create store of metrics keyed by name and labels."""
+
+    def __init__(self):
+        self._metrics = {}   # (name, sorted label items) -> metric
+        self._help = {}      # name -> (kind, help text)
+        self._lock = threading.Lock()  # registration only, never on the update path
+
+    def _get(self, cls, name: str, help_text: str, labels: dict, **kwargs):
+        key = (name, tuple(sorted((labels or {}).items())))
+        metric = self._metrics.get(key)
+        if metric is not None:
+            return metric
+        with self._lock:
+            metric = self._metrics.get(key)
+            if metric is None:
+                known = self._help.get(name)
+                if known is not None and known[0] != cls.kind:
+                    raise ValueError(f"Metric {name} already registered as a {known[0]}")
+                self._help.setdefault(name, (cls.kind, help_text))
+                metric = self._metrics[key] = cls(**kwargs)
+        return metric
+
+    def counter(self, name: str, help_text: str = "", labels: dict = None) -> Counter:
+        return self._get(Counter, name, help_text, labels)
+
+    def gauge(self, name: str, help_text: str = "", labels: dict = None) -> Gauge:
+        return self._get(Gauge, name, help_text, labels)
+
+    def histogram(self, name: str, help_text: str = "", labels: dict = None,
+                  buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help_text, labels, buckets=buckets)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        by_name = {}
+        for (name, label_items), metric in list(self._metrics.items()):
+            by_name.setdefault(name, []).append((dict(label_items), metric))
+        for name in sorted(by_name):
+            kind, help_text = self._help[name]
+            if help_text:
+                lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, metric in by_name[name]:
+                try:
+                    for sample_name, sample_labels, value in metric.samples(name, labels):
+                        lines.append(f"{sample_name}{_format_labels(sample_labels)} {_format_value(value)}")
+                except Exception as e:
+                    logger.debug("Metric %s failed: %s", name, e)
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+def counter(name: str, help_text: str = "", labels: dict = None) -> Counter:
+    return REGISTRY.counter(name, help_text, labels)
+
+
+def gauge(name: str, help_text: str = "", labels: dict = None) -> Gauge:
+    return REGISTRY.gauge(name, help_text, labels)
+
+
+def histogram(name: str, help_text: str = "", labels: dict = None, buckets=LATENCY_BUCKETS) -> Histogram:
+    return REGISTRY.histogram(name, help_text, labels, buckets)
+
+
+class _MetricsHTTPHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # no access log in the journal
+
+
+class _MetricsUnixHandler(socketserver.BaseRequestHandler):
+    registry = REGISTRY
+
+    def handle(self):
+        self.request.sendall(self.registry.render().encode())
+
+
+def start_metrics_server(name: str, port: int = None, socket_dir: str = METRICS_SOCKET_DIR,
+                         registry: MetricsRegistry = REGISTRY) -> list:
+    """
+    Serve the registry on localhost:port (HTTP) and on socket_dir/name.sock in daemon threads.
+
+    Failures (port in use, no permission on the socket dir) are logged and the
+    daemon keeps running without that endpoint. Calling it again for the same
+    name returns the servers already started.
+
+    Args:
+        name: Daemon name, used for the Unix socket file
+        port: HTTP port on 127.0.0.1, None for no HTTP endpoint
+        socket_dir: Directory for the Unix socket, None for no socket endpoint
+        registry: Registry to serve
+
+    Returns:
+        list: The started servers
+    """
+    if name in _servers:
+        return _servers[name]
+    servers = _servers[name] = []
+    if port:
+        try:
+            handler = type("Handler", (_MetricsHTTPHandler,), {"registry": registry})
+            server = ThreadingHTTPServer((METRICS_HOST, port), handler)
+            server.daemon_threads = True
+            servers.append(server)
+            logger.info("Metrics for %s on http://%s:%d/metrics", name, METRICS_HOST, port)
+        except OSError as e:
+            logger.warning("Metrics HTTP endpoint for %s not started: %s", name, e)
+    if socket_dir and hasattr(socket, "AF_UNIX"):
+        path = os.path.join(socket_dir, f"{name}.sock")
+        try:
+            os.makedirs(socket_dir, exist_ok=True)
+            if os.path.exists(path):
+                os.unlink(path)
+            handler = type("Handler", (_MetricsUnixHandler,), {"registry": registry})
+            server = socketserver.ThreadingUnixStreamServer(path, handler)
+            server.daemon_threads = True
+            servers.append(server)
+            logger.info("Metrics for %s on unix:%s", name, path)
+        except OSError as e:
+            logger.warning("Metrics socket for %s not started: %s", name, e)
+    for server in servers:
+        threading.Thread(target=server.serve_forever, name=f"metrics-{name}", daemon=True).start()
+    return servers
@@ -0,0 +1,469 @@
+#!/usr/bin/env python3
+"""
+Checksummed NMEA / Inertial Sense $PINS sentence parser on raw bytes.
+
+Streaming, for a UART read loop: partial reads are buffered, garbage
+(binary packets, line noise) between sentences is skipped, sentences with a
+missing or wrong checksum are counted and dropped, and each known sentence
+becomes a typed record (a namedtuple per type):
+
+    parser = SentenceParser()
+    for record in parser.feed(ser.read(4096)):
+        if record.kind == "PINS1":
+            print(record.week, record.tow, record.lat, record.lon)
+
+    record = parse_sentence(b"$PINS1,...*4F\\r\\n")   # one complete line, None if invalid
+
+The field layout of every type is in FIELDS and compiled once at import
+into the record classes and converter tuples. Standard NMEA sentences are
+looked up without their talker id (GPGGA, GNGGA -> GGA), unknown types come
+back as a generic Sentence with the raw fields. Missing trailing fields and
+empty fields are None.
+
+Batch, for recorded data: parse_batch() finds and checks all sentences of a
+buffer with NumPy (no Python loop per sentence for the framing and the
+checksums) and returns one array per field, parse_capture() does that over a
+test-uart capture file in chunks and adds the receive time of each sentence.
+sensor-testing/bench_nmea_parser.py measures sentences per second of both.
+
+GPS time, shared by set-time.py and gps-timed.py so they agree on UTC:
+pins1_time() takes the week and time of week of a $PINS1, gps_to_unix()
+converts them with the GPS-UTC leap seconds, transmit_time() is the time
+a line spent on the UART.
+"""
+from collections import namedtuple
+
+MAX_SENTENCE = 256  # bytes, NMEA allows 82, Inertial Sense sentences are longer
+
+GPS_EPOCH = 315964800           # 1980-01-06 00:00:00 UTC as unix time
+GPS_UTC_LEAP_SECONDS = 18       # GPS - UTC since 2017-01-01
+SECONDS_IN_WEEK = 604800
+MIN_GPS_WEEK = 2295             # 2024-01-07, earlier weeks mean no fix yet
+MAX_GPS_WEEK = 5000
+BITS_PER_BYTE = 10              # 8N1: start bit, 8 data bits, stop bit
+
+
+def _int(value: bytes) -> int:
+    """Decimal or 0x-prefixed hex (Inertial Sense status words)."""
+    return int(value, 16) if value[:2] in (b"0x", b"0X") else int(value)
+
+
+def _str(value: bytes) -> str:
+    return value.decode("ascii", "replace")
+
+
+# sentence type -> (field name, converter) in sentence order
+FIELDS = {
+    # Inertial Sense INS output, attitude in rad, velocity in body frame m/s, NED offset from the reference
+    "PINS1": (("tow", float), ("week", int), ("ins_status", _int), ("hdw_status", _int),
+              ("roll", float), ("pitch", float), ("yaw", float), ("u", float), ("v", float), ("w", float),
+              ("lat", float), ("lon", float), ("alt", float), ("north", float), ("east", float), ("down", float)),
+    "PINS2": (("tow", float), ("week", int), ("ins_status", _int), ("hdw_status", _int),
+              ("qw", float), ("qx", float), ("qy", float), ("qz", float), ("u", float), ("v", float), ("w", float),
+              ("lat", float), ("lon", float), ("alt", float)),
+    # standard NMEA, lat/lon as ddmm.mmmm with hemisphere, see nmea_degrees()
+    "GGA": (("utc", _str), ("lat", float), ("lat_dir", _str), ("lon", float), ("lon_dir", _str),
+            ("quality", int), ("satellites", int), ("hdop", float), ("altitude", float), ("altitude_unit", _str),
+            ("geoid_separation", float), ("geoid_unit", _str), ("dgps_age", float), ("dgps_station", _str)),
+    "RMC": (("utc", _str), ("status", _str), ("lat", float), ("lat_dir", _str), ("lon", float), ("lon_dir", _str),
+            ("speed_knots", float), ("course", float), ("date", _str), ("magnetic_variation", float),
+            ("variation_dir", _str), ("mode", _str)),
+    "ZDA": (("utc", _str), ("day", int), ("month", int), ("year", int), ("zone_hours", int), ("zone_minutes", int)),
+}
+
+Sentence = namedtuple("Sentence", ("kind", "fields"))  # types not in FIELDS
+
+
+def _compile(fields: dict) -> dict:
+    table = {}
+    for kind, spec in fields.items():
+        names = tuple(name for name, _ in spec)
+        record = namedtuple(kind, names)
+        record.kind = kind
+        table[kind] = (record, tuple(converter for _, converter in spec), len(spec))
+    return table
+
+
+_TABLE = _compile(FIELDS)
+
+
+def checksum(body: bytes) -> int:
+    """
+    XOR of the bytes between '$' and '*'.
+
+    The body is read as one integer and folded in halves, a few big-int
+    operations instead of a Python loop per byte.
+    """
+    bits = 8 << (len(body) - 1).bit_length() if len(body) > 1 else 8
+    value = int.from_bytes(body, "little")
+    while bits > 8:
+        bits >>= 1
+        value = (value >> bits) ^ (value & ((1 << bits) - 1))
+    return value
+
+
+def build_sentence(body: str) -> bytes:
+    """'PINS1,...' -> b'$PINS1,...*CS\\r\\n', for test data."""
+    return f"${body}*{checksum(body.encode('ascii')):02X}\r\n".encode("ascii")
+
+
+def nmea_degrees(value: float, hemisphere: str) -> float:
+    """ddmm.mmmm and N/S/E/W to signed decimal degrees."""
+    if value is None:
+        return None
+    degrees = int(value // 100)
+    decimal = degrees + (value - degrees * 100) / 60
+    return -decimal if hemisphere in ("S", "W") else decimal
+
+
+def lookup_kind(address: str) -> str:
+    """The FIELDS key of a sentence address: PINS1 stays, GPGGA / GNGGA become GGA."""
+    if address in _TABLE:
+        return address
+    if len(address) == 5 and address[2:] in _TABLE:
+        return address[2:]
+    return address
+
+
+def _convert(address: bytes, fields: list):
+    kind = lookup_kind(address.decode("ascii", "replace"))
+    entry = _TABLE.get(kind)
+    if entry is None:
+        return Sentence(kind, tuple(_str(f) for f in fields))
+    record, converters, count = entry
+    values = [converter(field) if field else None for converter, field in zip(converters, fields)]
+    if len(values) < count:
+        values += [None] * (count - len(values))
+    return record(*values)
+
+
+def parse_sentence(line: bytes, require_checksum: bool = True):
+    """
+    Parse one complete sentence.
+
+    Args:
+        line: The sentence, with or without the line ending, anything before the last '$' is ignored
+        require_checksum: Reject sentences without '*hh' (they are always rejected if it is wrong)
+
+    Returns:
+        The typed record, a Sentence for unknown types, or None if the line is not a valid sentence
+    """
+    start = line.rfind(b"$")
+    if start < 0:
+        return None
+    line = line[start + 1:].rstrip(b"\r\n")
+    body, star, given = line.partition(b"*")
+    if star:
+        try:
+            if int(given[:2], 16) != checksum(body):
+                return None
+        except ValueError:
+            return None
+    elif require_checksum:
+        return None
+    fields = body.split(b",")
+    try:
+        return _convert(fields[0], fields[1:])
+    except ValueError:
+        return None
+
+
+def pins1_time(line: bytes, require_checksum: bool = True):
+    """
+    Parse the time fields of a $PINS1 sentence.
+
+    Args:
+        line: Raw line from the UART
+        require_checksum: Reject sentences without '*hh' (they are always rejected if it is wrong)
+
+    Returns:
+        tuple: (gps_week, time_of_week) or None if it is not a valid $PINS1 sentence
+    """
+    record = parse_sentence(line, require_checksum)
+    if record is None or record.kind != "PINS1" or record.week is None or record.tow is None:
+        return None
+    return record.week, record.tow
+
+
+def valid_gps_time(gps_week: int, time_of_week: float) -> bool:
+    """False for the week 0 / out of range times sent before the GPS fix."""
+    return MIN_GPS_WEEK <= gps_week <= MAX_GPS_WEEK and 0 <= time_of_week < SECONDS_IN_WEEK
+
+
+def gps_to_unix(gps_week: int, time_of_week: float, leap_seconds: int = GPS_UTC_LEAP_SECONDS) -> float:
+    """GPS week and time of week to UTC unix time."""
+    return GPS_EPOCH + gps_week * SECONDS_IN_WEEK + time_of_week - leap_seconds
+
+
+def transmit_time(line: bytes, baud: int) -> float:
+    """Seconds from the first to the last byte of a line on the UART."""
+    return len(line) * BITS_PER_BYTE / baud
+
+
+class SentenceParser:
+    """
+    Incremental parser: feed() it whatever the port returned, get the complete valid sentences back.
+
+    Counters: sentences (valid), bad_checksum, invalid (malformed fields or no
+    checksum), skipped (bytes of unterminated data dropped: noise without '$',
+    or more than max_length without a line end).
+    """
+
+    def __init__(self, kinds=None, require_checksum: bool = True, max_length: int = MAX_SENTENCE):
+        self.kinds = {lookup_kind(k) for k in kinds} if kinds else None
+        self.require_checksum = require_checksum
+        self.max_length = max_length
+        self.partial = b""
+        self.sentences = 0
+        self.bad_checksum = 0
+        self.invalid = 0
+        self.skipped = 0
+
+    def feed(self, data) -> list:
+        """
+        Args:
+            data: bytes, bytearray or memoryview from the port
+
+        Returns:
+            list: Records of the sentences completed by this data
+        """
+        buffer = self.partial + bytes(data)
+        end = buffer.rfind(b"\n")
+        if end < 0:
+            self.partial = self._trim(buffer)
+            return []
+        self.partial = self._trim(buffer[end + 1:])
+        records = []
+        for line in buffer[:end].split(b"\n"):
+            start = line.rfind(b"$")
+            if start < 0:
+                continue
+            line = line[start + 1:].rstrip(b"\r")
+            body, star, given = line.partition(b"*")
+            if self.kinds is not None:
+                address = body[:body.find(b",")] if b"," in body else body
+                if lookup_kind(address.decode("ascii", "replace")) not in self.kinds:
+                    continue
+            if star:
+                try:
+                    valid = int(given[:2], 16) == checksum(body)
+                except ValueError:
+                    valid = False
+                if not valid:
+                    self.bad_checksum += 1
+                    continue
+            elif self.require_checksum:
+                self.invalid += 1
+                continue
+            fields = body.split(b",")
+            try:
+                records.append(_convert(fields[0], fields[1:]))
+            except ValueError:
+                self.invalid += 1
+                continue
+            self.sentences += 1
+        return records
+
+    def _trim(self, partial: bytes) -> bytes:
+        """Keep only the start of the next sentence, and not more than max_length of it."""
+        start = partial.rfind(b"$")
+        if start < 0:
+            self.skipped += len(partial)
+            return b""
+        if len(partial) - start > self.max_length:
+            self.skipped += len(partial)
+            return b""
+        self.skipped += start
+        return partial[start:]
+
+
+def _addresses(kind: str) -> list:
+    """Sentence addresses of a FIELDS key, with the talker ids for standard NMEA."""
+    if len(kind) == 3:
+        return [talker + kind.encode() for talker in (b"GP", b"GN", b"GL", b"GA", b"GB")]
+    return [kind.encode()]
+
+
+def _hex_table():
+    import numpy as np
+    table = np.full(256, 255, dtype=np.int16)
+    for i, char in enumerate(b"0123456789ABCDEF"):
+        table[char] = i
+    for i, char in enumerate(b"abcdef"):
+        table[char] = 10 + i
+    return table
+
+
+def _column(values: list, converter, hex_table):
+    """
+    Convert one field column (list of bytes) to an array.
+
+    Numbers go through numpy's C text parser in one call, fixed width 0x status
+    words through the hex digit table, only columns with other content (empty
+    fields, mixed formats) fall back to a conversion per value.
+    """
+    import numpy as np
+    if converter is _str:
+        return np.array(values, dtype=bytes)
+    if converter is _int:
+        joined = b"".join(values)
+        width = len(values[0])
+        if width > 2 and len(joined) == width * len(values) and joined[:2] == b"0x" \
+                and joined.count(b"0x") == len(values):
+            digits = hex_table[np.frombuffer(joined, dtype=np.uint8).reshape(-1, width)[:, 2:]].astype(np.int64)
+            if (digits < 16).all():
+                return digits @ (16 ** np.arange(width - 3, -1, -1, dtype=np.int64))
+        return np.array([_int(v) if v else -1 for v in values], dtype=np.int64)
+    try:
+        numbers = np.fromstring(b",".join(values), sep=",")
+        if len(numbers) != len(values):
+            raise ValueError
+    except ValueError:
+        numbers = np.array([float(v) if v else np.nan for v in values])
+    if converter is int and not np.isnan(numbers).any():
+        return numbers.astype(np.int64)
+    return numbers
+
+
+def parse_batch(data: bytes, kinds=("PINS1",)) -> dict:
+    """
+    Parse every complete sentence of the given types in a buffer at once.
+
+    Sentence framing ('$', '*', line end), the checksums (bitwise_xor.reduceat
+    over all bodies) and the type match are vectorized. Each type's fields
+    are split with one bytes.split and converted per column.
+
+    Args:
+        data: Raw stream bytes, only sentences ending in '\\n' are parsed
+        kinds: Sentence types to return (FIELDS keys)
+
+    Returns:
+        dict: kind -> {field name -> numpy array, "_offsets" -> end offset of each sentence in data},
+        and "_stats" -> {"sentences", "bad_checksum", "other"}
+    """
+    import numpy as np
+    arr = np.frombuffer(data, dtype=np.uint8)
+    ends = np.flatnonzero(arr == ord("\n"))
+    dollars = np.flatnonzero(arr == ord("$"))
+    stars = np.flatnonzero(arr == ord("*"))
+    result = {"_stats": {"sentences": 0, "bad_checksum": 0, "other": 0}}
+    if not len(ends) or not len(dollars) or not len(stars):
+        return result
+
+    # last '$' and '*' before each line end, both after the previous line end
+    line_starts = np.concatenate(([0], ends[:-1] + 1))
+    d_index = np.searchsorted(dollars, ends) - 1
+    s_index = np.searchsorted(stars, ends) - 1
+    start = dollars[np.maximum(d_index, 0)]
+    star = stars[np.maximum(s_index, 0)]
+    ok = (d_index >= 0) & (s_index >= 0) & (start >= line_starts) & (star > start + 1) & (star + 2 < ends)
+    start, star, ends = start[ok], star[ok], ends[ok]
+    if not len(start):
+        return result
+
+    # checksums of all bodies in one reduceat, the ranges [start + 1, star) are ordered and disjoint
+    bounds = np.empty(2 * len(start), dtype=np.int64)
+    bounds[0::2] = start + 1
+    bounds[1::2] = star
+    calculated = np.bitwise_xor.reduceat(arr, bounds)[0::2]
+    hex_table = _hex_table()
+    given = hex_table[arr[star + 1]] * 16 + hex_table[arr[star + 2]]
+    valid = given == calculated
+    result["_stats"]["bad_checksum"] = int((~valid).sum())
+    start, star, ends = start[valid], star[valid], ends[valid]
+
+    matched = np.zeros(len(start), dtype=bool)
+    for kind in kinds:
+        record, converters, count = _TABLE[kind]
+        hits = np.zeros(len(start), dtype=bool)
+        for address in _addresses(kind):
+            # address followed by the first comma, compared byte by byte across all sentences
+            match = start + 1 + len(address) < star
+            for i, char in enumerate(address + b","):
+                match &= arr[np.minimum(start + 1 + i, len(arr) - 1)] == char
+            hits |= match
+        matched |= hits
+        if not hits.any():
+            continue
+        # one split for all sentences of the type, the field counts only need a loop when they differ
+        bodies = [data[s:e] for s, e in zip((start[hits] + 1).tolist(), star[hits].tolist())]
+        fields = b",".join(bodies).split(b",")
+        offsets = ends[hits]
+        if len(fields) != len(bodies) * (count + 1):
+            # sentences with another field count (other firmware) are left to the incremental parser
+            full = np.array([body.count(b",") == count for body in bodies])
+            result["_stats"]["other"] += int((~full).sum())
+            bodies = [body for body, keep in zip(bodies, full) if keep]
+            fields = b",".join(bodies).split(b",")
+            offsets = offsets[full]
+        if not bodies:
+            continue
+        columns = {name: _column(fields[i + 1::count + 1], converter, hex_table)
+                   for i, (name, converter) in enumerate(zip(record._fields, converters))}
+        columns["_offsets"] = offsets
+        result[kind] = columns
+        result["_stats"]["sentences"] += len(bodies)
+    result["_stats"]["other"] += int((~matched).sum())
+    return result
+
+
+def _concat(parts: list) -> dict:
+    import numpy as np
+    merged = {}
+    for part in parts:
+        for kind, columns in part.items():
+            if kind == "_stats":
+                stats = merged.setdefault("_stats", {"sentences": 0, "bad_checksum": 0, "other": 0})
+                for key, value in columns.items():
+                    stats[key] += value
+                continue
+            merged.setdefault(kind, []).append(columns)
+    for kind, chunks in merged.items():
+        if kind != "_stats":
+            merged[kind] = {name: np.concatenate([c[name] for c in chunks]) for name in chunks[0]}
+    merged.setdefault("_stats", {"sentences": 0, "bad_checksum": 0, "other": 0})
+    return merged
+
+
+def parse_capture(path: str, kinds=("PINS1",), chunk_size: int = 1 << 22) -> dict:
+    """
+    parse_batch over a test-uart capture file, chunk by chunk.
+
+    Records are joined into chunks of about chunk_size bytes, the bytes after
+    the last line end of a chunk are carried into the next one. Every
+    sentence gets "rx_time", the unix time of the read that delivered its
+    line end.
+
+    Returns:
+        dict: As parse_batch, with an "rx_time" column per kind and without "_offsets"
+    """
+    import numpy as np
+    from uart_capture import read_capture
+
+    parts = []
+    carry = b""
+
+    def flush(buffers, times, ends, final=False):
+        nonlocal carry
+        data = carry + b"".join(buffers)
+        offsets = np.array(ends, dtype=np.int64) + len(carry)
+        cut = data.rfind(b"\n") + 1 if not final else len(data)
+        part = parse_batch(data[:cut], kinds)
+        for kind, columns in part.items():
+            if kind != "_stats":
+                columns["rx_time"] = np.array(times)[np.searchsorted(offsets, columns.pop("_offsets"), side="right")]
+        parts.append(part)
+        carry = data[cut:]
+
+    buffers, times, ends, size = [], [], [], 0
+    for timestamp, data in read_capture(path):
+        buffers.append(data)
+        size += len(data)
+        times.append(timestamp)
+        ends.append(size)
+        if size >= chunk_size:
+            flush(buffers, times, ends)
+            buffers, times, ends, size = [], [], [], 0
+    if buffers or carry:
+        flush(buffers, times or [0.0], ends or [0], final=True)
+    return _concat(parts)
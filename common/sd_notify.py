@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Minimal systemd service notification (sd_notify) without libsystemd.
+
+    import sd_notify
+    sd_notify.ready("Time set from uart")    # Type=notify units become active here
+    sd_notify.status("Waiting for GPS fix")
+
+    watchdog = sd_notify.Watchdog()            # WatchdogSec= in the unit
+    while True:
+        ...
+        watchdog.ping()                        # from the loop that has to stay alive
+
+When the process was not started by systemd (no NOTIFY_SOCKET) every call is
+a no-op that returns False, so the daemons run unchanged from a terminal.
+"""
+import os
+import socket
+import time
+
+
+def notify(state: str) -> bool:
+    """
+    Send a state string ("READY=1", "STATUS=...", ...) to the service manager.
+
+    Args:
+        state: Newline separated VARIABLE=value assignments
+
+    Returns:
+        bool: True if the message was sent
+    """
+    address = os.environ.get("NOTIFY_SOCKET")
+    if not address:
+        return False
+    if address.startswith("@"):
+        address = "\0" + address[1:]  # abstract namespace socket
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM | socket.SOCK_CLOEXEC) as sock:
+            sock.sendto(state.encode(), address)
+        return True
+    except OSError:
+        return False
+
+
+def ready(status: str = None) -> bool:
+    """Tell systemd that startup is finished, optionally with a status line."""
+    return notify("READY=1" + (f"\nSTATUS={status}" if status else ""))
+
+
+def status(text: str) -> bool:
+    """Free-form status shown by `systemctl status`."""
+    return notify(f"STATUS={text}")
+
+
+def stopping() -> bool:
+    return notify("STOPPING=1")
+
+
+def watchdog_interval() -> float:
+    """
+    Seconds within which systemd expects a WATCHDOG=1, or None when the watchdog is off.
+
+    Returns:
+        float: WatchdogSec= of the unit if it applies to this process, else None
+    """
+    usec = os.environ.get("WATCHDOG_USEC")
+    pid = os.environ.get("WATCHDOG_PID")
+    if not usec or (pid and int(pid) != os.getpid()):
+        return None
+    return int(usec) / 1e6
+
+
+class Watchdog:
+    """
+    Keep-alive pings for WatchdogSec=, rate limited to half the interval.
+
+    ping() is cheap enough to call on every iteration of a hot loop. Ping
+    from the loop whose progress proves the daemon works, not from a side
+    thread, or a hung main loop stays alive.
+    """
+
+    def __init__(self):
+        interval = watchdog_interval()
+        self.period = interval / 2 if interval else None
+        self.last = 0.0
+
+    def ping(self) -> bool:
+        if self.period is None:
+            return False
+        now = time.monotonic()
+        if now - self.last < self.period:
+            return False
+        self.last = now
+        return notify("WATCHDOG=1")
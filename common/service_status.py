@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Client of the service status daemon (system-services/service-statusd.py).
+
+The daemon answers on a Unix socket: the client sends one command line and
+reads one JSON document until the daemon closes the connection.
+
+    status    every unit: state, restarts, cpu, memory, recent journal errors
+    summary   counts and the names of units that are not active
+
+    import service_status
+    summary = service_status.query("summary")      # None if the daemon is not running
+
+Run as a script it prints the status as text, system-services.sh uses that
+before falling back to one systemctl/journalctl call per service:
+
+    python3 service_status.py            # exit status 2 if the daemon is not reachable
+"""
+import json
+import socket
+import sys
+import threading
+import time
+from datetime import datetime
+from xml.sax.saxutils import quoteattr
+
+STATUS_SOCKET = "/run/oi-cm4-toolkit/status.sock"
+QUERY_TIMEOUT = 1.0    # seconds
+CACHE_INTERVAL = 10.0  # seconds a cached summary is reused by cached_summary()
+
+_cache = {}          # path -> (monotonic time of the last query, summary)
+_refreshing = set()  # paths with a query running in the background
+_cache_lock = threading.Lock()
+
+
+def query(command: str = "status", path: str = STATUS_SOCKET, timeout: float = QUERY_TIMEOUT):
+    """
+    Send a command to the status daemon.
+
+    Args:
+        command: "status" or "summary"
+        path: Unix socket of the daemon
+        timeout: Seconds to wait for the answer
+
+    Returns:
+        dict: The decoded answer, or None if the daemon is not reachable
+    """
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(path)
+            sock.sendall(command.encode() + b"\n")
+            chunks = []
+            while True:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+        return json.loads(b"".join(chunks))
+    except (OSError, ValueError):
+        return None
+
+
+def cached_summary(path: str = STATUS_SOCKET, interval: float = CACHE_INTERVAL):
+    """
+    The latest query("summary"), without waiting for the daemon.
+
+    Once the cached summary is older than interval, a background thread asks
+    the daemon again and the caller gets the previous one (None until the
+    first answer). Safe on a per-event path and on an asyncio loop.
+    """
+    now = time.monotonic()
+    with _cache_lock:
+        queried, summary = _cache.get(path, (None, None))
+        if (queried is None or now - queried >= interval) and path not in _refreshing:
+            _refreshing.add(path)
+            threading.Thread(target=_refresh_summary, args=(path,), name="status-query", daemon=True).start()
+    return summary
+
+
+def _refresh_summary(path: str):
+    summary = query("summary", path)
+    with _cache_lock:
+        _cache[path] = (time.monotonic(), summary)
+        _refreshing.discard(path)
+
+
+def cot_detail(summary: dict) -> str:
+    """
+    <__oi_status> CoT detail element for a summary, empty string without one.
+
+    Args:
+        summary: Answer of query("summary")
+
+    Returns:
+        str: e.g. <__oi_status ok="false" active="6" units="7" down="photogram" errors="2"/>
+    """
+    if not summary:
+        return ""
+    return (f'<__oi_status ok="{str(summary["ok"]).lower()}" active="{summary["active"]}" '
+            f'units="{summary["units"]}" down={quoteattr(",".join(summary["down"]))} '
+            f'errors="{summary["recent_errors"]}"/>')
+
+
+def format_status(status: dict) -> str:
+    """Human readable status, the layout of `system-services.sh status`."""
+    lines = []
+    for name, unit in status["units"].items():
+        lines.append("=" * 40)
+        lines.append(f"Service: {name}")
+        lines.append("-" * 40)
+        if unit["load_state"] == "not-found":
+            lines.append("Status: not installed")
+            lines.append("")
+            continue
+        lines.append(f"Status: {unit['active_state']} ({unit['sub_state']})")
+        lines.append(f"Enabled: {unit['enabled']}")
+        if unit["pids"]:
+            lines.append(f"PIDs: {unit['pids']}  CPU: {unit['cpu_seconds']:.1f}s  "
+                         f"Memory: {unit['memory_bytes'] / 1e6:.1f} MB  Restarts: {unit['restarts']}")
+        lines.append(f"Recent errors ({unit['errors_total']} since the daemon started):")
+        for entry in unit["errors"]:
+            when = datetime.fromtimestamp(entry["time"]).strftime("%b %d %H:%M:%S")
+            lines.append(f"{when} [{entry['priority']}] {entry['message']}")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else "text"
+    status = query("summary" if command == "summary" else "status")
+    if status is None:
+        print(f"Service status daemon not reachable on {STATUS_SOCKET}", file=sys.stderr)
+        sys.exit(2)
+    print(format_status(status) if command == "text" else json.dumps(status, indent=2))
+
+
+if __name__ == "__main__":
+    main()
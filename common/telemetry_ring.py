@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Shared-memory ring of recent telemetry samples, from mavlink-reader.py to
+other processes on the CM4.
+
+mavlink-reader appends every GLOBAL_POSITION_INT and ATTITUDE it accepts,
+stamped with the CLOCK_MONOTONIC receive time, to a fixed-size ring in a
+/dev/shm file. Readers map the same file and look the aircraft state up at
+any recent monotonic time (a GPIO edge timestamp, for example) without a
+socket round trip and without parsing the 1 Hz telemetry CSV:
+
+    writer = TelemetryRingWriter()                      # mavlink-reader
+    writer.append(POSITION, time.monotonic(), (lat, lon, alt, relative_alt, vn, ve, vd, agl))
+
+    ring = TelemetryRing()                              # cam-trigger.py
+    state = ring.state_at(edge_monotonic)               # None until mavlink-reader runs
+
+The header count is advanced before a slot is written and the slot's own
+sequence number is set after it, so a reader that copies the ring while the
+writer is running drops the slots that may be torn instead of locking.
+
+position_at() / attitude_at() are the vectorized lookups (numpy searchsorted
+and linear interpolation, dead reckoning past the newest sample) used by the
+live path and by the batch geotagger alike.
+"""
+import mmap
+import os
+import struct
+
+TELEMETRY_RING = "/dev/shm/oi-cm4-telemetry.ring"
+CAPACITY = 4096                 # slots, about two minutes of ATTITUDE + GLOBAL_POSITION_INT
+MAX_EXTRAPOLATION = 2.0         # seconds a sample is dead reckoned past its time
+EARTH_RADIUS_M = 6371000.0
+
+HEADER = struct.Struct("<8sIIQ")  # magic, version, capacity, count (samples written, the newest may be in progress)
+MAGIC = b"OITELEM1"
+VERSION = 1
+SLOT = struct.Struct("<QIId8d")   # sequence number (0 while written), kind, padding, monotonic, values
+SLOT_SEQ = struct.Struct("<Q")
+SLOT_HEAD = struct.Struct("<QIId")  # the slot without its values
+
+POSITION = 1
+ATTITUDE = 2
+FIELDS = {
+    # degrees, meters AMSL / above home, m/s NED, meters above terrain (nan without TERRAIN_REPORT)
+    POSITION: ("lat", "lon", "alt", "relative_alt", "vn", "ve", "vd", "agl"),
+    # degrees, degrees/s
+    ATTITUDE: ("roll", "pitch", "yaw", "roll_rate", "pitch_rate", "yaw_rate"),
+}
+
+
+class TelemetryRingWriter:
+    """Creates the ring file (replacing an old one) and appends samples to it."""
+
+    def __init__(self, path: str = TELEMETRY_RING, capacity: int = CAPACITY):
+        self.capacity = capacity
+        self.count = 0
+        size = HEADER.size + capacity * SLOT.size
+        # build the new ring beside the old one, readers notice the new inode and reopen
+        tmp = f"{path}.{os.getpid()}"
+        fd = os.open(tmp, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.ftruncate(fd, size)
+            self.map = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        HEADER.pack_into(self.map, 0, MAGIC, VERSION, capacity, 0)
+        os.replace(tmp, path)
+
+    def append(self, kind: int, monotonic: float, values):
+        self.count += 1
+        offset = HEADER.size + (self.count - 1) % self.capacity * SLOT.size
+        HEADER.pack_into(self.map, 0, MAGIC, VERSION, self.capacity, self.count)
+        values = tuple(values) + (0.0,) * (8 - len(values))
+        SLOT.pack_into(self.map, offset, 0, kind, 0, monotonic, *values)  # sequence number 0 while written
+        SLOT_SEQ.pack_into(self.map, offset, self.count)
+
+    def close(self):
+        self.map.close()
+
+
+class TelemetryRing:
+    """Read side: maps the ring on first use and again whenever mavlink-reader recreated it."""
+
+    def __init__(self, path: str = TELEMETRY_RING):
+        self.path = path
+        self.map = None
+        self.inode = None
+
+    def _open(self) -> bool:
+        try:
+            inode = os.stat(self.path).st_ino
+        except FileNotFoundError:
+            return self.map is not None
+        if inode == self.inode:
+            return True
+        try:
+            with open(self.path, "rb") as f:
+                ring = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return self.map is not None
+        magic, version, _, _ = HEADER.unpack_from(ring, 0)
+        if magic != MAGIC or version != VERSION:
+            ring.close()
+            return self.map is not None
+        if self.map is not None:
+            self.map.close()
+        self.map, self.inode = ring, inode
+        return True
+
+    def samples(self, kind: int):
+        """
+        The samples of one kind currently in the ring, oldest first.
+
+        Returns:
+            tuple: (monotonic times, values with one column per FIELDS[kind]) as numpy arrays,
+            None if there is no ring
+        """
+        import numpy as np
+        if not self._open():
+            return None
+        _, _, capacity, before = HEADER.unpack_from(self.map, 0)
+        raw = self.map[HEADER.size:HEADER.size + capacity * SLOT.size]
+        _, _, _, after = HEADER.unpack_from(self.map, 0)
+        slots = np.frombuffer(raw, dtype=np.dtype([("seq", "<u8"), ("kind", "<u4"), ("pad", "<u4"),
+                                                   ("time", "<f8"), ("values", "<f8", (8,))]))
+        # complete before the copy started and not overwritten while it ran
+        keep = (slots["seq"] != 0) & (slots["seq"] <= before) & (slots["seq"] + capacity > after) \
+            & (slots["kind"] == kind)
+        slots = slots[keep]
+        slots = slots[np.argsort(slots["seq"])]
+        return slots["time"], slots["values"][:, :len(FIELDS[kind])]
+
+    def state_at(self, monotonic: float, max_extrapolation: float = MAX_EXTRAPOLATION):
+        """
+        Aircraft state at a monotonic time, see position_at() / attitude_at().
+
+        Returns:
+            dict: The FIELDS of both kinds plus position_age, attitude_age and extrapolated,
+            None without a ring or samples
+        """
+        position = self.samples(POSITION)
+        attitude = self.samples(ATTITUDE)
+        if position is None or not len(position[0]):
+            return None
+        state = {}
+        values, age, extrapolated = position_at(*position, [monotonic], max_extrapolation)
+        state.update(zip(FIELDS[POSITION], values[0].tolist()))
+        state["position_age"] = float(age[0])
+        state["extrapolated"] = bool(extrapolated[0])
+        if len(attitude[0]):
+            values, age, extrapolated = attitude_at(*attitude, [monotonic], max_extrapolation)
+            state.update(zip(FIELDS[ATTITUDE], values[0].tolist()))
+            state["attitude_age"] = float(age[0])
+            state["extrapolated"] |= bool(extrapolated[0])
+        return state
+
+    def newest(self, kind: int):
+        """Monotonic time of the newest sample of a kind, None if there is none (a few slots read, no copy)."""
+        if not self._open():
+            return None
+        _, _, capacity, count = HEADER.unpack_from(self.map, 0)
+        for seq in range(count, max(count - capacity, 0), -1):
+            slot_seq, slot_kind, _, monotonic = SLOT_HEAD.unpack_from(
+                self.map, HEADER.size + (seq - 1) % capacity * SLOT.size)
+            if slot_seq == seq and slot_kind == kind:
+                return monotonic
+        return None
+
+
+def _bracket(times, query):
+    """
+    The two samples around each query time.
+
+    Returns:
+        tuple: (left and right sample index, fraction between them, index of the nearest sample,
+        signed seconds from it, True where the query is outside the samples)
+    """
+    import numpy as np
+    times = np.asarray(times, dtype=np.float64)
+    query = np.asarray(query, dtype=np.float64)
+    right = np.clip(np.searchsorted(times, query), 1, len(times) - 1) if len(times) > 1 else np.zeros(len(query), int)
+    left = np.maximum(right - 1, 0)
+    span = times[right] - times[left]
+    fraction = np.divide(query - times[left], span, out=np.zeros_like(query), where=span > 0)
+    outside = (query < times[0]) | (query > times[-1])
+    nearest = np.where(np.abs(query - times[left]) <= np.abs(times[right] - query), left, right)
+    fraction = np.clip(fraction, 0.0, 1.0)
+    return left, right, fraction, nearest, query - times[nearest], outside
+
+
+def _blend(values, left, right, fraction, angles=()):
+    """Linear interpolation between the left and right rows, angle columns in degrees."""
+    low, high = values[left], values[right]
+    delta = high - low
+    for column in angles:
+        # the short way around for headings
+        delta[:, column] = (delta[:, column] + 180.0) % 360.0 - 180.0
+    return low + delta * fraction[:, None]
+
+
+def position_at(times, values, query, max_extrapolation: float = MAX_EXTRAPOLATION):
+    """
+    Position rows (FIELDS[POSITION]) at the query times.
+
+    Between two samples the position is interpolated linearly. Outside the
+    samples the nearest one is dead reckoned along its NED velocity for up
+    to max_extrapolation seconds (flat earth, as tak/dead_reckoning.py).
+
+    Args:
+        times: Sample times, ascending, any clock shared with query
+        values: Sample rows, one column per FIELDS[POSITION]
+        query: Times to look up
+
+    Returns:
+        tuple: (rows, seconds from the nearest sample, True where extrapolated)
+    """
+    import numpy as np
+    values = np.asarray(values, dtype=np.float64)
+    left, right, fraction, nearest, offset, outside = _bracket(times, query)
+    rows = _blend(values, left, right, fraction)
+    dt = np.clip(offset, -max_extrapolation, max_extrapolation)[outside]
+    if len(dt):
+        base = values[nearest[outside]]
+        vn, ve, vd = base[:, 4], base[:, 5], base[:, 6]
+        lat = base[:, 0] + np.degrees(vn * dt / EARTH_RADIUS_M)
+        lon = base[:, 1] + np.degrees(ve * dt / (EARTH_RADIUS_M * np.cos(np.radians(base[:, 0]))))
+        moved = base.copy()
+        moved[:, 0], moved[:, 1] = lat, lon
+        moved[:, 2] -= vd * dt       # alt, relative_alt and agl, NED velocity is positive down
+        moved[:, 3] -= vd * dt
+        moved[:, 7] -= vd * dt
+        rows[outside] = moved
+    return rows, np.abs(offset), outside
+
+
+def attitude_at(times, values, query, max_extrapolation: float = MAX_EXTRAPOLATION):
+    """
+    Attitude rows (FIELDS[ATTITUDE]) at the query times.
+
+    Interpolated between samples (yaw the short way around). Outside the
+    samples yaw follows the yaw rate for up to max_extrapolation seconds,
+    roll and pitch keep the nearest sample.
+
+    Returns:
+        tuple: (rows, seconds from the nearest sample, True where extrapolated)
+    """
+    import numpy as np
+    values = np.asarray(values, dtype=np.float64)
+    left, right, fraction, nearest, offset, outside = _bracket(times, query)
+    rows = _blend(values, left, right, fraction, angles=(2,))
+    dt = np.clip(offset, -max_extrapolation, max_extrapolation)[outside]
+    if len(dt):
+        base = values[nearest[outside]].copy()
+        base[:, 2] = base[:, 2] + base[:, 5] * dt
+        rows[outside] = base
+    rows[:, 2] = rows[:, 2] % 360.0
+    return rows, np.abs(offset), outside
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Toolkit-wide logging setup: off-thread I/O, per-module levels, rate limiting.
+
+    import toolkit_logging
+    toolkit_logging.setup_logging()
+    logger = logging.getLogger("cot_fanout")
+    logger.debug("Position %.6f %.6f", lat, lon)   # %-style, formatted only if emitted
+
+Records are put on an in-memory queue by a QueueHandler and written by a
+QueueListener thread, so the caller never waits on stdout/journald. Unlike
+the stock QueueHandler the message is not formatted in the caller: records
+whose arguments are all numbers, strings, bytes or None are handed over as
+is and formatted on the listener thread, any other argument (a tuple may
+hold a list) is formatted in the caller.
+
+Per-module levels come from, in increasing priority:
+
+    /home/droneman/oi-cm4-toolkit/logging.ini   [levels] section, e.g. atak_chat = DEBUG
+    OI_LOG_LEVELS environment variable          e.g. atak_chat=DEBUG,cot_fanout=WARNING
+    the `levels` argument of setup_logging()
+
+OI_LOG_FORMAT=json (or json_format=True) writes one JSON object per line, with
+any `extra={...}` fields of the record as keys.
+
+Repeated messages from the same call site are rate limited: at most
+RATE_LIMIT_BURST per RATE_LIMIT_INTERVAL seconds, the next one that passes
+reports how many were suppressed.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+from configparser import ConfigParser
+
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+LOG_CONFIG = "/home/droneman/oi-cm4-toolkit/logging.ini"
+RATE_LIMIT_INTERVAL = 10.0   # seconds
+RATE_LIMIT_BURST = 5         # records per call site and interval
+
+# argument types that can be formatted later on the listener thread
+_IMMUTABLE_TYPES = (str, int, float, bool, bytes, type(None))
+# LogRecord attributes, everything else on a record came from extra={...}
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener = None
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Pass at most `burst` records per call site (file and line) per `interval` seconds.
+
+    The counters are not locked, concurrent threads may let a record more or
+    less through, which is fine for log volume control.
+    """
+
+    def __init__(self, interval: float = RATE_LIMIT_INTERVAL, burst: int = RATE_LIMIT_BURST):
+        super().__init__()
+        self.interval = interval
+        self.burst = burst
+        self._windows = {}  # (pathname, lineno) -> [window start, records, suppressed]
+        self.suppressed = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = (record.pathname, record.lineno)
+        window = self._windows.get(key)
+        if window is None or record.created - window[0] >= self.interval:
+            self._windows[key] = [record.created, 1, 0]
+            if window is not None and window[2]:
+                _append_suppressed(record, window[2])
+            return True
+        window[1] += 1
+        if window[1] <= self.burst:
+            return True
+        window[2] += 1
+        self.suppressed += 1
+        return False
+
+
+def _append_suppressed(record: logging.LogRecord, count: int):
+    if isinstance(record.args, dict):
+        return
+    msg = str(record.msg)
+    if not record.args:
+        msg = msg.replace("%", "%%")
+    record.msg = msg + " [%d similar messages suppressed]"
+    record.args = tuple(record.args or ()) + (count,)
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves the formatting to the listener thread when it is safe."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        args = record.args
+        if args and not (isinstance(args, tuple) and all(isinstance(a, _IMMUTABLE_TYPES) for a in args)):
+            # mutable arguments may change before the listener gets to them
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message plus the extra fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def parse_levels(text: str) -> dict:
+    """Parse "name=LEVEL,name=LEVEL" into a dict of logger name -> level name."""
+    levels = {}
+    for item in text.split(","):
+        name, sep, level = item.partition("=")
+        if sep and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def load_levels(config_path: str = LOG_CONFIG) -> dict:
+    """Per-module levels from the config file and OI_LOG_LEVELS, the environment wins."""
+    levels = {}
+    if config_path and os.path.exists(config_path):
+        config = ConfigParser()
+        config.optionxform = str  # logger names are case sensitive
+        config.read(config_path)
+        if config.has_section("levels"):
+            levels.update({name: value.upper() for name, value in config.items("levels")})
+    levels.update(parse_levels(os.environ.get("OI_LOG_LEVELS", "")))
+    return levels
+
+
+def setup_logging(level=logging.INFO, levels: dict = None, config_path: str = LOG_CONFIG,
+                  json_format: bool = None, rate_limit: bool = True, stream=None):
+    """
+    Route all logging through a queue to a listener thread writing to stderr.
+
+    Calling it again only applies the levels, the listener keeps running.
+
+    Args:
+        level: Root level, a per-module level for "root" overrides it
+        levels: Logger name -> level, applied after the config file and OI_LOG_LEVELS
+        config_path: INI file with a [levels] section
+        json_format: JSON lines instead of LOG_FORMAT, default from OI_LOG_FORMAT=json
+        rate_limit: Rate limit repeated messages per call site
+        stream: Output stream, default sys.stderr
+
+    Returns:
+        logging.handlers.QueueListener: The running listener (stopped at exit, see stop_logging)
+    """
+    global _listener
+    root = logging.getLogger()
+    root.setLevel(level)
+    all_levels = load_levels(config_path)
+    all_levels.update(levels or {})
+    for name, name_level in all_levels.items():
+        logger = root if name == "root" else logging.getLogger(name)
+        logger.setLevel(name_level.upper() if isinstance(name_level, str) else name_level)
+    if _listener is not None:
+        return _listener
+
+    if json_format is None:
+        json_format = os.environ.get("OI_LOG_FORMAT", "").lower() == "json"
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter() if json_format else logging.Formatter(LOG_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    handler = DeferredQueueHandler(log_queue)
+    if rate_limit:
+        handler.addFilter(RateLimitFilter())
+    for old in root.handlers[:]:
+        root.removeHandler(old)
+        old.close()
+    root.addHandler(handler)
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+    return _listener
+
+
+def stop_logging():
+    """Write out the queued records and stop the listener thread, safe to call more than once."""
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+UART capture files, as written by sensor-testing/test-uart.py --capture.
+
+A capture file is a sequence of records, one per read from the port:
+RECORD_HEADER (unix time of the read as float64, length as uint32, little
+endian) followed by the raw bytes. The file rotates to FILE.1 ... FILE.<keep>.
+
+    for timestamp, data in read_capture("ins.cap"):
+        ...
+
+nmea_parser.parse_capture() parses a whole file in vectorized chunks.
+"""
+import os
+import struct
+
+RECORD_HEADER = struct.Struct("<dI")  # unix time of the read (float64), length (uint32)
+ROTATE_MB = 64                        # capture file size before rotating
+KEEP_FILES = 5                        # rotated capture files kept
+WRITE_BUFFER = 1 << 20                # bytes buffered before the capture file is written
+
+
+class CaptureWriter:
+    """Appends timestamped records to a capture file, rotating it like RotatingFileHandler."""
+
+    def __init__(self, path: str, max_bytes: int = ROTATE_MB << 20, keep: int = KEEP_FILES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.keep = keep
+        self.file = open(path, "ab", buffering=WRITE_BUFFER)
+        self.size = self.file.tell()
+
+    def write(self, timestamp: float, data):
+        if self.size >= self.max_bytes:
+            self.rotate()
+        self.file.write(RECORD_HEADER.pack(timestamp, len(data)))
+        self.file.write(data)
+        self.size += RECORD_HEADER.size + len(data)
+
+    def rotate(self):
+        self.file.close()
+        for i in range(self.keep - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{i}"):
+                os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+        if self.keep:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self.file = open(self.path, "wb", buffering=WRITE_BUFFER)
+        self.size = 0
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def read_capture(path: str):
+    """
+    Iterate over the records of a capture file.
+
+    Args:
+        path: File written by CaptureWriter
+
+    Yields:
+        tuple: (unix time of the read, bytes)
+    """
+    with open(path, "rb") as f:
+        while True:
+            header = f.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                return
+            timestamp, length = RECORD_HEADER.unpack(header)
+            data = f.read(length)
+            if len(data) < length:
+                return  # cut off while writing
+            yield timestamp, data
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Compare startup time, resident memory and decode speed of the trimmed
+oi_mavlink dialect with the full pymavlink dialect mavutil used to load.
+
+Every measurement runs in a fresh interpreter:
+
+    startup     wall time of `python3 -c "import <module>"` minus an empty interpreter
+                (.pyc files compiled beforehand, as they are after the first run on the CM4)
+    import      time of the import statement alone
+    rss         VmRSS after the import minus VmRSS before it
+    decode      frames per second through MAVLink.parse_buffer, a mix of the
+                subscribed messages as mavlink-router would forward them
+
+Usage:
+    python3 bench_dialect.py --runs 10
+"""
+import argparse
+import compileall
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+CHILD = r"""
+import os, sys, time
+def rss_kb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+before = rss_kb()
+start = time.perf_counter()
+{import_line}
+elapsed = time.perf_counter() - start
+after = rss_kb()
+
+# decode benchmark, frames encoded with the same module
+m = mavlink.MAVLink(None, srcSystem=28, srcComponent=1)
+frames = [
+    m.attitude_encode(1, 0.1, 0.2, 0.3, 0, 0, 0).pack(m),
+    m.global_position_int_encode(1, 279500000, -816200000, 0, 0, 120, -340, 0, 9000).pack(m),
+    m.vfr_hud_encode(20.0, 21.0, 90, 50, 100.0, 0.5).pack(m),
+    m.heartbeat_encode(1, 3, 128, 10, 4).pack(m),
+    m.system_time_encode(1700000000000000, 1000).pack(m),
+]
+packets = [frames[i % len(frames)] for i in range({frames})]
+parser = mavlink.MAVLink(None)
+start = time.perf_counter()
+decoded = 0
+for packet in packets:
+    decoded += len(parser.parse_buffer(packet) or ())
+rate = decoded / (time.perf_counter() - start)
+print(elapsed, after - before, rate)
+"""
+
+MODULES = {
+    "oi_mavlink": "import sys; sys.path.insert(0, {here!r}); import oi_mavlink as mavlink",
+    "ardupilotmega": "from pymavlink.dialects.v20 import ardupilotmega as mavlink",
+    "mavutil": "from pymavlink import mavutil; mavlink = mavutil.mavlink",
+}
+
+
+def run_child(import_line: str, frames: int):
+    """Import time, RSS growth and decode rate in a fresh interpreter."""
+    code = CHILD.replace("{import_line}", import_line.format(here=HERE)).replace("{frames}", str(frames))
+    out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True,
+                         env=dict(os.environ, MAVLINK20="1")).stdout
+    return tuple(float(x) for x in out.split())
+
+
+def startup(code: str) -> float:
+    """Wall time of a fresh interpreter running `code`."""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], check=True, env=dict(os.environ, MAVLINK20="1"))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trimmed vs full MAVLink dialect: startup, memory and decode speed.")
+    parser.add_argument("--runs", type=int, default=10, help="Fresh interpreters per module")
+    parser.add_argument("--frames", type=int, default=20000, help="Frames decoded per run")
+    args = parser.parse_args()
+
+    compileall.compile_file(os.path.join(HERE, "oi_mavlink.py"), quiet=1)
+    for import_line in MODULES.values():
+        run_child(import_line, 100)  # warm the page cache
+    base = statistics.median(startup("pass") for _ in range(args.runs))
+
+    print(f"{'module':>14} {'startup ms':>11} {'import ms':>10} {'rss MB':>8} {'frames/s':>10}")
+    for name, import_line in MODULES.items():
+        wall = statistics.median(startup(import_line.format(here=HERE)) for _ in range(args.runs))
+        results = [run_child(import_line, args.frames) for _ in range(args.runs)]
+        import_time, rss_kb, rate = (statistics.median(r[i] for r in results) for i in range(3))
+        print(f"{name:>14} {(wall - base) * 1e3:11.0f} {import_time * 1e3:10.0f} {rss_kb / 1024:8.1f} {rate:10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Generate the trimmed MAVLink dialect used by mavlink-reader.py.
+
+The message definitions of the messages in MESSAGES (and the enums their
+fields refer to) are copied from the ardupilotmega dialect XML shipped with
+pymavlink, includes resolved, into dialect/oi_telemetry.xml. mavgen then
+turns it into oi_mavlink.py, a self-contained parser for MAVLink 1 and 2
+frames that only knows these messages. Message ids and CRC extras are the
+same as in the full dialect, so the frames decode identically.
+
+Both files are committed, the CM4 never runs mavgen. Rerun this after
+changing the message list:
+
+    python3 generate_dialect.py
+"""
+import argparse
+import os
+import xml.etree.ElementTree as ET
+
+# Keep in sync with message_types in mavlink-reader.py
+MESSAGES = [
+    "HEARTBEAT",
+    "TERRAIN_REPORT",
+    "RANGEFINDER",
+    "BATTERY_STATUS",
+    "VFR_HUD",
+    "WIND",
+    "SYSTEM_TIME",
+    "GLOBAL_POSITION_INT",
+    "ATTITUDE",
+]
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DIALECT_XML = os.path.join(HERE, "dialect", "oi_telemetry.xml")
+DIALECT_MODULE = os.path.join(HERE, "oi_mavlink.py")
+
+
+def default_source() -> str:
+    from pymavlink import dialects
+    return os.path.join(os.path.dirname(dialects.__file__), "v20", "ardupilotmega.xml")
+
+
+def load_definitions(path: str, messages: dict, enums: dict, seen: set):
+    """Collect <message> and <enum> elements from a dialect XML and its includes."""
+    path = os.path.realpath(path)
+    if path in seen:
+        return
+    seen.add(path)
+    root = ET.parse(path).getroot()
+    for include in root.findall("include"):
+        load_definitions(os.path.join(os.path.dirname(path), include.text.strip()), messages, enums, seen)
+    for message in root.iter("message"):
+        messages.setdefault(message.get("name"), message)
+    for enum in root.iter("enum"):
+        name = enum.get("name")
+        if name not in enums:
+            enums[name] = enum
+        else:
+            # enums can be extended by other files, merge the entries
+            known = {entry.get("name") for entry in enums[name].findall("entry")}
+            for entry in enum.findall("entry"):
+                if entry.get("name") not in known:
+                    enums[name].append(entry)
+
+
+def build_dialect(source: str, names: list) -> ET.Element:
+    """Trimmed dialect XML with the named messages and the enums they use."""
+    messages, enums = {}, {}
+    load_definitions(source, messages, enums, set())
+    missing = [name for name in names if name not in messages]
+    if missing:
+        raise SystemExit(f"Messages not in {source}: {', '.join(missing)}")
+
+    root = ET.Element("mavlink")
+    ET.SubElement(root, "version").text = "3"
+    ET.SubElement(root, "dialect").text = "0"
+    enums_element = ET.SubElement(root, "enums")
+    messages_element = ET.SubElement(root, "messages")
+    used = []
+    for name in names:
+        for field in messages[name].iter("field"):
+            enum = field.get("enum")
+            if enum and enum in enums and enum not in used:
+                used.append(enum)
+    for enum in sorted(used):
+        enums_element.append(enums[enum])
+    for message in sorted((messages[name] for name in names), key=lambda m: int(m.get("id"))):
+        messages_element.append(message)
+    ET.indent(root)
+    return root
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the trimmed MAVLink dialect for mavlink-reader.py.")
+    parser.add_argument("--source", default=None, help="Dialect XML to copy from (default: pymavlink ardupilotmega.xml)")
+    args = parser.parse_args()
+
+    from pymavlink.generator import mavgen, mavparse
+
+    source = args.source or default_source()
+    root = build_dialect(source, MESSAGES)
+    os.makedirs(os.path.dirname(DIALECT_XML), exist_ok=True)
+    ET.ElementTree(root).write(DIALECT_XML, encoding="utf-8", xml_declaration=True)
+    print(f"Wrote {DIALECT_XML} ({len(MESSAGES)} messages, {len(root.find('enums'))} enums)")
+
+    opts = mavgen.Opts(os.path.splitext(DIALECT_MODULE)[0], wire_protocol=mavparse.PROTOCOL_2_0,
+                       language="Python3", validate=False)
+    mavgen.mavgen(opts, [DIALECT_XML])
+    print(f"Wrote {DIALECT_MODULE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,36 @@
 import sys
-from pymavlink import mavutil
 import time
 import csv
 import fcntl
 from datetime import datetime, timezone
 import os
+import math
+import socket
+import struct
+from collections import deque
+
+# Trimmed dialect pre-generated by generate_dialect.py with only the messages we subscribe to.
+# pymavlink.mavutil is not imported, it loads the full dialect (ardupilotmega / all) on import.
+import oi_mavlink as mavlink
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "common"))
+
+# custom modules
+import metrics
+import latency_trace
+import sd_notify
+import telemetry_ring
 
 # Constants
 UDP_IP = "127.0.0.1"
 UDP_PORT = 10006
 
+METRICS_PORT = 9101 # localhost Prometheus endpoint
+
+RECV_TIMEOUT = 1.0 # seconds recv_match waits before the loop runs again (watchdog)
+
+TLOG_NAME = "mavlink.tlog" # raw MAVLink tee written next to the mission log CSV
+
 DRONE_SYS_ID = 28 # The system ID of the drone we want to read data from, change this to match the drone's system ID
 
 class MavLinkData:
@@ -19,6 +40,8 @@ class MavLinkData:
         self.agl = 0.0
         self.battery = 0.0
         self.heading = 0.0
+        self.roll = 0.0 # degrees
+        self.pitch = 0.0 # degrees
         self.flight_mode = "default"
         self.wind_dir = 0.0
         self.wind_speed = 0.0
@@ -28,9 +51,13 @@ class MavLinkData:
         self.unix_time = 0.0
         self.lat = 0.0
         self.lon = 0.0
+        self.vn = 0.0 # ground velocity north in m/s
+        self.ve = 0.0 # ground velocity east in m/s
+        self.position_time = 0.0 # local unix time the lat/lon sample was received
+        self.rx_monotonic = 0.0 # CLOCK_MONOTONIC when the lat/lon sample came off the socket, for latency tracing
         self.mavlink_log_filepath = ""
     
-    def update_data(self, msg, armed=None, rangefinder_dst=None, agl=None, battery=None, heading=None, flight_mode=None, wind_dir=None, wind_speed = None, wind_speed_z = None, ground_speed = None, air_speed = None, unix_time = None, lat=None, lon=None):
+    def update_data(self, msg, armed=None, rangefinder_dst=None, agl=None, battery=None, heading=None, flight_mode=None, wind_dir=None, wind_speed = None, wind_speed_z = None, ground_speed = None, air_speed = None, unix_time = None, lat=None, lon=None, vn=None, ve=None, position_time=None, roll=None, pitch=None, rx_monotonic=None):
         """
         Fills data which is present at time mavlink message read.
         
@@ -44,13 +71,17 @@ class MavLinkData:
             wind: Current wind direction in degrees
             wind_speed: Current wind speed horizontal
             wind_speed_z: Current wind speed vertical
+            vn, ve: Current ground velocity north/east in m/s
+            position_time: Local unix time the lat/lon sample was received, used for dead reckoning
+            rx_monotonic: time.monotonic() when msg was received, kept for the lat/lon sample
+            roll, pitch: Current vehicle attitude in degrees
 
         Returns:
             None
         """
         if msg and msg.get_type() == 'HEARTBEAT':
             if msg.type == 1 and msg.autopilot == 3:  # Fixed-wing, ArduPilot
-                armed = (msg.base_mode & mavutil.mavlink.MAV_MODE_FLAG_SAFETY_ARMED) != 0
+                armed = (msg.base_mode & mavlink.MAV_MODE_FLAG_SAFETY_ARMED) != 0
                 if msg.custom_mode == 0:
                     flight_mode = "manual"
                 elif msg.custom_mode == 5:
@@ -88,16 +119,27 @@ class MavLinkData:
             #wind_speed_z = msg.speed_z
         elif msg and msg.get_type() == 'SYSTEM_TIME':
             unix_time = msg.time_unix_usec # unix time in microseconds
+        elif msg and msg.get_type() == 'ATTITUDE':
+            roll = math.degrees(msg.roll) # attitude is sent in radians
+            pitch = math.degrees(msg.pitch)
         elif msg and msg.get_type() == 'GLOBAL_POSITION_INT':
             # lat and lon are sent as integers in 1e7 degrees; convert to float degrees
             lat = msg.lat / 1e7
             lon = msg.lon / 1e7
+            vn = msg.vx / 100.0 # velocities are sent in cm/s
+            ve = msg.vy / 100.0
+            position_time = time.time()
+            rx_monotonic = rx_monotonic if rx_monotonic is not None else time.monotonic()
+        else:
+            rx_monotonic = None # only position samples are traced
              
         self.armed = armed if armed is not None else self.armed
         self.rangefinder_dst = rangefinder_dst if rangefinder_dst is not None else self.rangefinder_dst
         self.agl = agl if agl is not None else self.agl
         self.battery = battery if battery is not None else self.battery
         self.heading = heading if heading is not None else self.heading
+        self.roll = roll if roll is not None else self.roll
+        self.pitch = pitch if pitch is not None else self.pitch
         self.flight_mode = flight_mode if flight_mode is not None else self.flight_mode
         self.wind_dir = wind_dir if wind_dir is not None else self.wind_dir
         self.wind_speed = wind_speed if wind_speed is not None else self.wind_speed
@@ -107,6 +149,10 @@ class MavLinkData:
         self.unix_time = unix_time if unix_time is not None else self.unix_time
         self.lat = lat if lat is not None else self.lat
         self.lon = lon if lon is not None else self.lon
+        self.vn = vn if vn is not None else self.vn
+        self.ve = ve if ve is not None else self.ve
+        self.position_time = position_time if position_time is not None else self.position_time
+        self.rx_monotonic = rx_monotonic if rx_monotonic is not None else self.rx_monotonic
     
     def write_to_csv(self):
         default_file_path = "/home/droneman/oi-cm4-toolkit/mavlink-reader/mavlink-data.csv"
@@ -117,6 +163,8 @@ class MavLinkData:
             'rangefinder_dst': self.rangefinder_dst,
             'agl': self.agl,
             'heading': self.heading,
+            'roll': f"{self.roll:.2f}",
+            'pitch': f"{self.pitch:.2f}",
             'ground_speed' : self.ground_speed,
             'air_speed' : self.air_speed,
             'wind_dir': self.wind_dir,
@@ -124,6 +172,11 @@ class MavLinkData:
             'UTC_Date_Time': datetime.fromtimestamp(self.unix_time / 1e6, timezone.utc).strftime('%Y-%m-%d %H:%M:%S'),  # Convert Unix time (in microseconds) to human-readable format (UTC)
             'lat': self.lat,
             'lon': self.lon,
+            'vn': self.vn,
+            've': self.ve,
+            'position_time': f"{self.position_time:.3f}",
+            'rx_monotonic': f"{self.rx_monotonic:.6f}",
+            'write_monotonic': f"{time.monotonic():.6f}",
         }
 
         
@@ -153,13 +206,91 @@ class MavLinkData:
 class MavLinkReader:
     """
     A class to encapsulate MAVLink interactions and commands.
+
+    Listens on the mavlink-router UDP endpoint and decodes the frames with the
+    trimmed oi_mavlink dialect. Frames of messages that are not in the dialect
+    decode as UNKNOWN_<id> with their raw bytes: they are skipped by
+    recv_match but still written unchanged to the tlog tee.
     """
 
-    def __init__(self, ip=UDP_IP, port=UDP_PORT):
+    def __init__(self, ip=UDP_IP, port=UDP_PORT, tlog_path=None):
         """
         Initialize MAVLink connection.
+
+        Args:
+            ip: Address to listen on
+            port: UDP port mavlink-router sends to
+            tlog_path: Optional .tlog file every received frame is appended to
+        """
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind((ip, port))
+        self.mav = mavlink.MAVLink(None)
+        self.mav.robust_parsing = True # corrupt frames come back as BAD_DATA instead of raising
+        self.pending = deque() # decoded messages not returned yet
+        self.tlog = open(tlog_path, "ab") if tlog_path else None
+        self.unknown = 0 # frames of messages not in the dialect
+        self.bad = 0 # frames that failed to decode (CRC, length)
+
+    def recv_match(self, type=None, blocking=True, timeout=None):
+        """
+        Return the next message of one of the given types, like mavutil's recv_match.
+
+        Args:
+            type: List of message names, None for any known message
+            blocking: Wait for a message, else return None when the socket has nothing queued
+            timeout: Seconds to wait when blocking, None waits forever
+
+        Returns:
+            The decoded message, or None
         """
-        self.mav = mavutil.mavlink_connection(f'udp:{ip}:{port}') 
+        while True:
+            while self.pending:
+                msg = self.pending.popleft()
+                if type is None or msg.get_type() in type:
+                    return msg
+            try:
+                if not blocking:
+                    packet = self.sock.recv(65535, socket.MSG_DONTWAIT)
+                else:
+                    self.sock.settimeout(timeout)
+                    packet = self.sock.recv(65535)
+            except (BlockingIOError, socket.timeout):
+                return None
+            timestamp = int(time.time() * 1e6)
+            for msg in self.mav.parse_buffer(packet) or ():
+                msg_type = msg.get_type()
+                if msg_type == 'BAD_DATA':
+                    self.bad += 1
+                    continue
+                if self.tlog:
+                    # tlog format: big-endian unix time in microseconds, then the raw frame
+                    self.tlog.write(struct.pack(">Q", timestamp) + msg.get_msgbuf())
+                if msg_type.startswith('UNKNOWN_'):
+                    self.unknown += 1
+                    continue
+                self.pending.append(msg)
+
+def publish_sample(ring, msg, rx_time, agl):
+    """
+    Append a position or attitude sample to the shared telemetry ring (cam-trigger.py looks the
+    aircraft state up there at trigger time).
+
+    Args:
+        ring: telemetry_ring.TelemetryRingWriter
+        msg: GLOBAL_POSITION_INT or ATTITUDE, other messages are ignored
+        rx_time: time.monotonic() when msg was received
+        agl: Latest TERRAIN_REPORT height in meters, nan before the first one
+    """
+    msg_type = msg.get_type()
+    if msg_type == 'GLOBAL_POSITION_INT':
+        ring.append(telemetry_ring.POSITION, rx_time,
+                    (msg.lat / 1e7, msg.lon / 1e7, msg.alt / 1000.0, msg.relative_alt / 1000.0,
+                     msg.vx / 100.0, msg.vy / 100.0, msg.vz / 100.0, agl))
+    elif msg_type == 'ATTITUDE':
+        ring.append(telemetry_ring.ATTITUDE, rx_time,
+                    (math.degrees(msg.roll), math.degrees(msg.pitch), math.degrees(msg.yaw),
+                     math.degrees(msg.rollspeed), math.degrees(msg.pitchspeed), math.degrees(msg.yawspeed)))
 
 def main():
     """
@@ -186,33 +317,89 @@ def main():
         command = sys.argv[1].lower() #command
         port = UDP_PORT #default port
 
-    reader = MavLinkReader(port=int(port)) # Create an instance of MavLinkReader with the specified port
+    tlog_path = None
+    if data.mavlink_log_filepath and data.mavlink_log_filepath.strip():
+        tlog_path = os.path.join(data.mavlink_log_filepath, TLOG_NAME) # tee the raw stream next to the mission CSV
+    reader = MavLinkReader(port=int(port), tlog_path=tlog_path) # Create an instance of MavLinkReader with the specified port
     
 
     if command == "stream":
         last_sent_time = time.time() #initialize time variable
+        last_traced_rx = 0.0 # rx time of the last position sample written
+
+        message_types = ['HEARTBEAT', 'TERRAIN_REPORT', 'RANGEFINDER', 'BATTERY_STATUS', 'VFR_HUD', 'WIND', 'SYSTEM_TIME', 'GLOBAL_POSITION_INT', 'ATTITUDE'] # keep in sync with MESSAGES in generate_dialect.py
+
+        known = {cls.msgname for cls in mavlink.mavlink_map.values()}
+        missing = [t for t in message_types if t not in known]
+        if missing:
+            sys.exit(f"Messages {missing} are not in the oi_mavlink dialect, add them to generate_dialect.py and regenerate it")
 
-        message_types = ['HEARTBEAT', 'TERRAIN_REPORT', 'RANGEFINDER', 'BATTERY_STATUS', 'VFR_HUD', 'WIND', 'SYSTEM_TIME', 'GLOBAL_POSITION_INT'] 
+        metrics.start_metrics_server("mavlink_reader", METRICS_PORT)
+        metrics.counter("mavlink_reader_unknown_total", "Frames of messages not in the dialect (kept in the tlog)").set_function(lambda: reader.unknown)
+        metrics.counter("mavlink_reader_bad_frames_total", "Frames that failed to decode").set_function(lambda: reader.bad)
+        message_counters = {t: metrics.counter("mavlink_reader_messages_total", "MAVLink messages processed", {"type": t}) for t in message_types}
+        ignored = metrics.counter("mavlink_reader_ignored_total", "Messages from other system IDs")
+        csv_writes = metrics.counter("mavlink_reader_csv_writes_total", "Telemetry CSV writes")
+        csv_write_time = metrics.histogram("mavlink_reader_csv_write_seconds", "Time to write the telemetry CSV")
+        metrics.gauge("mavlink_reader_position_age_seconds", "Seconds since the last GLOBAL_POSITION_INT").set_function(
+            lambda: time.time() - data.position_time if data.position_time else 0.0)
+        first_telemetry = metrics.gauge("mavlink_reader_first_telemetry_seconds", "CLOCK_MONOTONIC of the first telemetry row written, 0 before it") # read by boot-timeline.py
+
+        try:
+            ring = telemetry_ring.TelemetryRingWriter() # position/attitude history for other processes
+        except OSError as e:
+            print(f"Telemetry ring {telemetry_ring.TELEMETRY_RING} not available: {e}")
+            ring = None
+        agl = math.nan # until the first TERRAIN_REPORT
+
+        # systemd: READY=1 once the UDP socket is bound, WATCHDOG=1 from this loop.
+        # Telemetry only arrives once the flight controller is powered, the first row goes to STATUS= and the metric.
+        watchdog = sd_notify.Watchdog()
+        streaming = False
+        sd_notify.ready(f"Waiting for MAVLink from system {DRONE_SYS_ID} on udp port {port}")
 
         while True:
-            # read MAVLink messages
-            msg = reader.mav.recv_match(type=message_types, blocking=True)
+            # read MAVLink messages, the timeout keeps the watchdog fed while the link is quiet
+            msg = reader.recv_match(type=message_types, blocking=True, timeout=RECV_TIMEOUT)
+            rx_time = time.monotonic()
+            watchdog.ping()
+            if msg is None:
+                continue
             #msg = reader.mav.recv_msg()
 
             # filter messages based on source system ID, we only want messages from this drone (DRONE_SYS_ID)
             if not msg or msg.get_srcSystem() != DRONE_SYS_ID:
+                ignored.inc()
                 continue
+            message_counters[msg.get_type()].inc()
 
             #print(msg)
             current_time = time.time()
-            data.update_data(msg) # Parse mavlink message and extract the data we want
+            data.update_data(msg, rx_monotonic=rx_time) # Parse mavlink message and extract the data we want
+            if ring:
+                if msg.get_type() == 'TERRAIN_REPORT':
+                    agl = data.agl
+                publish_sample(ring, msg, rx_time, agl)
+            latency_trace.observe_stage("mavlink_reader", "rx_update", time.monotonic() - rx_time)
             
             # Check if at least 1 seconds has passed since we last wrote to file
             if (current_time - last_sent_time >= 1):
-                data.write_to_csv()
+                if data.rx_monotonic and data.rx_monotonic != last_traced_rx:
+                    # how long the newest position waited for this write
+                    last_traced_rx = data.rx_monotonic
+                    latency_trace.observe_stage("mavlink_reader", "update_write", time.monotonic() - data.rx_monotonic)
+                with csv_write_time.time():
+                    data.write_to_csv()
+                csv_writes.inc()
+                if reader.tlog:
+                    reader.tlog.flush()
                 last_sent_time = current_time  # Update the last write time
-            else:
-                time.sleep(0.05)
+                if not streaming:
+                    first_telemetry.set(time.monotonic())
+                    sd_notify.status(f"Streaming telemetry from system {DRONE_SYS_ID}")
+                    streaming = True
+            # no sleep here: recv_match blocks, and sleeping per message would let
+            # high-rate messages (ATTITUDE) back up in the socket
     
 
 if __name__ == "__main__":
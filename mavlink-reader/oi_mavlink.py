@@ -0,0 +1,1773 @@
+"""
+MAVLink protocol implementation (auto-generated by mavgen.py)
+
+Generated from: ('oi_telemetry.xml',)
+
+Note: this file has been auto-generated. DO NOT EDIT
+"""
+import hashlib
+import json
+import logging
+import os
+import struct
+import sys
+import time
+from builtins import object, range
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Type, Union
+
+WIRE_PROTOCOL_VERSION = "2.0"
+DIALECT = "oi_mavlink"
+
+PROTOCOL_MARKER_V1 = 0xFE
+PROTOCOL_MARKER_V2 = 0xFD
+HEADER_LEN_V1 = 6
+HEADER_LEN_V2 = 10
+
+MAVLINK_SIGNATURE_BLOCK_LEN = 13
+
+MAVLINK_IFLAG_SIGNED = 0x01
+
+logger = logging.getLogger(__name__)
+
+# allow MAV_IGNORE_CRC=1 to ignore CRC, allowing some
+# corrupted msgs to be seen
+MAVLINK_IGNORE_CRC = os.environ.get("MAV_IGNORE_CRC", 0)
+
+# some base types from mavlink_types.h
+MAVLINK_TYPE_CHAR = 0
+MAVLINK_TYPE_UINT8_T = 1
+MAVLINK_TYPE_INT8_T = 2
+MAVLINK_TYPE_UINT16_T = 3
+MAVLINK_TYPE_INT16_T = 4
+MAVLINK_TYPE_UINT32_T = 5
+MAVLINK_TYPE_INT32_T = 6
+MAVLINK_TYPE_UINT64_T = 7
+MAVLINK_TYPE_INT64_T = 8
+MAVLINK_TYPE_FLOAT = 9
+MAVLINK_TYPE_DOUBLE = 10
+
+# CRC calculation using fastcrc, falling back to a pure Python implementation
+# if fastcrc is not available
+try:
+    import fastcrc
+    mcrf4xx = fastcrc.crc16.mcrf4xx
+except Exception:
+    mcrf4xx = None  # type: ignore
+
+
+BytesLike = Union[List[int], Tuple[int], bytes, bytearray, str]
+
+
+class _x25crc_slow(object):
+    """CRC-16/MCRF4XX - based on checksum.h from mavlink library"""
+
+    crc: int
+
+    def __init__(self, buf: Optional[BytesLike] = None):
+        self.crc = 0xFFFF
+        if buf is not None:
+            self.accumulate(buf)
+
+    def accumulate(self, buf: BytesLike) -> None:
+        """add in some more bytes (it also accepts strings)"""
+        if isinstance(buf, str):
+            buf = buf.encode()
+
+        accum = self.crc
+        for b in buf:
+            tmp = b ^ (accum & 0xFF)
+            tmp = (tmp ^ (tmp << 4)) & 0xFF
+            accum = (accum >> 8) ^ (tmp << 8) ^ (tmp << 3) ^ (tmp >> 4)
+        self.crc = accum
+
+
+class _x25crc_fast(object):
+    """CRC-16/MCRF4XX - based on checksum.h from mavlink library"""
+
+    def __init__(self, buf: Optional[BytesLike] = None):
+        self.crc = 0xFFFF
+        if buf is not None:
+            self.accumulate(buf)
+
+    def accumulate(self, buf: BytesLike) -> None:
+        """add in some more bytes (it also accepts strings)"""
+        if isinstance(buf, str):
+            buf_as_bytes = bytes(buf.encode())
+        elif isinstance(buf, (list, tuple, bytearray)):
+            buf_as_bytes = bytes(buf)
+        else:
+            buf_as_bytes = buf
+        self.crc = mcrf4xx(buf_as_bytes, self.crc)
+
+
+x25crc = _x25crc_fast if mcrf4xx is not None else _x25crc_slow
+
+
+class MAVLink_header(object):
+    """MAVLink message header"""
+
+    def __init__(self, msgId: int, incompat_flags: int = 0, compat_flags: int = 0, mlen: int = 0, seq: int = 0, srcSystem: int = 0, srcComponent: int = 0) -> None:
+        self.mlen = mlen
+        self.seq = seq
+        self.srcSystem = srcSystem
+        self.srcComponent = srcComponent
+        self.msgId = msgId
+        self.incompat_flags = incompat_flags
+        self.compat_flags = compat_flags
+
+    def pack(self, force_mavlink1: bool = False) -> bytes:
+        if float(WIRE_PROTOCOL_VERSION) == 2.0 and not force_mavlink1:
+            return struct.pack(
+                "<BBBBBBBHB",
+                253,
+                self.mlen,
+                self.incompat_flags,
+                self.compat_flags,
+                self.seq,
+                self.srcSystem,
+                self.srcComponent,
+                self.msgId & 0xFFFF,
+                self.msgId >> 16,
+            )
+        return struct.pack(
+            "<BBBBBB",
+            PROTOCOL_MARKER_V1,
+            self.mlen,
+            self.seq,
+            self.srcSystem,
+            self.srcComponent,
+            self.msgId,
+        )
+
+
+class MAVLink_message(object):
+    """base MAVLink message class"""
+
+    id = 0
+    msgname = ""
+    fieldnames: List[str] = []
+    ordered_fieldnames: List[str] = []
+    fieldtypes: List[str] = []
+    fielddisplays_by_name: Dict[str, str] = {}
+    fieldenums_by_name: Dict[str, str] = {}
+    fieldunits_by_name: Dict[str, str] = {}
+    native_format = bytearray(b"")
+    orders: List[int] = []
+    lengths: List[int] = []
+    array_lengths: List[int] = []
+    crc_extra = 0
+    unpacker = struct.Struct("")
+    instance_field: Optional[str] = None
+    instance_offset = -1
+
+    def __init__(self, msgId: int, name: str) -> None:
+        self._header = MAVLink_header(msgId)
+        self._payload: Optional[Union[bytes, bytearray]] = None
+        self._msgbuf = bytearray(b"")
+        self._crc: Optional[int] = None
+        self._fieldnames: List[str] = []
+        self._type = name
+        self._signed = False
+        self._link_id: Optional[int] = None
+        self._instances: Optional[Dict[str, str]] = None
+        self._instance_field: Optional[str] = None
+
+    def format_attr(self, field: str) -> Union[str, float, int]:
+        """override field getter"""
+        raw_attr: Union[bytes, float, int] = getattr(self, field)
+        if isinstance(raw_attr, bytes):
+            return raw_attr.decode(errors="backslashreplace").rstrip("\x00")
+        return raw_attr
+
+    def get_msgbuf(self) -> bytearray:
+        return self._msgbuf
+
+    def get_header(self) -> MAVLink_header:
+        return self._header
+
+    def get_payload(self) -> Optional[Union[bytes, bytearray]]:
+        return self._payload
+
+    def get_crc(self) -> Optional[int]:
+        return self._crc
+
+    def get_fieldnames(self) -> List[str]:
+        return self._fieldnames
+
+    def get_type(self) -> str:
+        return self._type
+
+    def get_msgId(self) -> int:
+        return self._header.msgId
+
+    def get_srcSystem(self) -> int:
+        return self._header.srcSystem
+
+    def get_srcComponent(self) -> int:
+        return self._header.srcComponent
+
+    def get_seq(self) -> int:
+        return self._header.seq
+
+    def get_signed(self) -> bool:
+        return self._signed
+
+    def get_link_id(self) -> Optional[int]:
+        return self._link_id
+
+    def __str__(self) -> str:
+        ret = "%s {" % self._type
+        for a in self._fieldnames:
+            v = self.format_attr(a)
+            ret += "%s : %s, " % (a, v)
+        ret = ret[0:-2] + "}"
+        return ret
+
+    def __ne__(self, other: object) -> bool:
+        return not self.__eq__(other)
+
+    def __eq__(self, other: object) -> bool:
+        if other is None:
+            return False
+
+        if not isinstance(other, MAVLink_message):
+            return False
+
+        if self.get_type() != other.get_type():
+            return False
+
+        if self.get_crc() != other.get_crc():
+            return False
+
+        if self.get_seq() != other.get_seq():
+            return False
+
+        if self.get_srcSystem() != other.get_srcSystem():
+            return False
+
+        if self.get_srcComponent() != other.get_srcComponent():
+            return False
+
+        for a in self._fieldnames:
+            if self.format_attr(a) != other.format_attr(a):
+                return False
+
+        return True
+
+    def to_dict(self) -> Dict[str, Union[str, float, int]]:
+        d: Dict[str, Union[str, float, int]] = {}
+        d["mavpackettype"] = self._type
+        for a in self._fieldnames:
+            d[a] = self.format_attr(a)
+        return d
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict())
+
+    def sign_packet(self, mav: "MAVLink") -> None:
+        assert mav.signing.secret_key is not None
+
+        h = hashlib.new("sha256")
+        self._msgbuf += struct.pack("<BQ", mav.signing.link_id, mav.signing.timestamp)[:7]
+        h.update(mav.signing.secret_key)
+        h.update(self._msgbuf)
+        sig = h.digest()[:6]
+        self._msgbuf += sig
+        mav.signing.timestamp += 1
+
+    def _pack(self, mav: "MAVLink", crc_extra: int, payload: bytes, force_mavlink1: bool = False) -> bytes:
+        plen = len(payload)
+        if float(WIRE_PROTOCOL_VERSION) == 2.0 and not force_mavlink1:
+            # in MAVLink2 we can strip trailing zeros off payloads. This allows for simple
+            # variable length arrays and smaller packets
+            nullbyte = 0
+            while plen > 1 and payload[plen - 1] == nullbyte:
+                plen -= 1
+        self._payload = payload[:plen]
+        incompat_flags = 0
+        if mav.signing.sign_outgoing:
+            incompat_flags |= MAVLINK_IFLAG_SIGNED
+        self._header = MAVLink_header(
+            self._header.msgId,
+            incompat_flags=incompat_flags,
+            compat_flags=0,
+            mlen=len(self._payload),
+            seq=mav.seq,
+            srcSystem=mav.srcSystem,
+            srcComponent=mav.srcComponent,
+        )
+        self._msgbuf = bytearray(self._header.pack(force_mavlink1=force_mavlink1))
+        self._msgbuf += self._payload
+        crc = x25crc(self._msgbuf[1:])
+        # we are using CRC extra
+        crc.accumulate(struct.pack("B", crc_extra))
+        self._crc = crc.crc
+        self._msgbuf += struct.pack("<H", self._crc)
+        if mav.signing.sign_outgoing and not force_mavlink1:
+            self.sign_packet(mav)
+        return bytes(self._msgbuf)
+
+    def pack(self, mav: "MAVLink", force_mavlink1: bool = False) -> bytes:
+        raise NotImplementedError("MAVLink_message cannot be serialized directly")
+
+    def __getitem__(self, key: str) -> str:
+        """support indexing, allowing for multi-instance sensors in one message"""
+        if self._instances is None:
+            raise IndexError()
+        if key not in self._instances:
+            raise IndexError()
+        return self._instances[key]
+
+
+class mavlink_msg_deprecated_name_property(object):
+    """
+    This handles the class variable name change from name to msgname for
+    subclasses of MAVLink_message during a transition period.
+
+    This is used by setting the class variable to
+    `mavlink_msg_deprecated_name_property()`.
+    """
+
+    def __get__(self, instance: Optional[MAVLink_message], owner: Type[MAVLink_message]) -> str:
+        if instance is not None:
+            logger.error("Using .name on a MAVLink_message is not supported, use .get_type() instead.")
+            raise AttributeError("Class {} has no attribute 'name'".format(owner.__name__))
+        logger.warning(
+            """Using .name on a MAVLink_message class is deprecated, consider using .msgname instead.
+Note that if compatibility with pymavlink 2.4.30 and earlier is desired, use something like this:
+
+msg_name =  msg.msgname if hasattr(msg, "msgname") else msg.name"""
+        )
+        return owner.msgname
+
+
+# enums
+
+
+class EnumEntry(object):
+    def __init__(self, name: str, description: str) -> None:
+        self.name = name
+        self.description = description
+        self.param: Dict[int, str] = {}
+        self.label: Dict[int, str] = {}
+        self.has_location = False
+
+class Enum(Dict[int, EnumEntry]):
+    def __init__(self) -> None:
+        self.bitmask = False
+
+enums: Dict[str, Enum] = {}
+
+# MAV_AUTOPILOT
+enums["MAV_AUTOPILOT"] = Enum()
+enums["MAV_AUTOPILOT"].bitmask = False
+MAV_AUTOPILOT_GENERIC = 0
+enums["MAV_AUTOPILOT"][0] = EnumEntry("MAV_AUTOPILOT_GENERIC", """Generic autopilot, full support for everything""")
+MAV_AUTOPILOT_RESERVED = 1
+enums["MAV_AUTOPILOT"][1] = EnumEntry("MAV_AUTOPILOT_RESERVED", """Reserved for future use.""")
+MAV_AUTOPILOT_SLUGS = 2
+enums["MAV_AUTOPILOT"][2] = EnumEntry("MAV_AUTOPILOT_SLUGS", """SLUGS autopilot, http://slugsuav.soe.ucsc.edu""")
+MAV_AUTOPILOT_ARDUPILOTMEGA = 3
+enums["MAV_AUTOPILOT"][3] = EnumEntry("MAV_AUTOPILOT_ARDUPILOTMEGA", """ArduPilot - Plane/Copter/Rover/Sub/Tracker, https://ardupilot.org""")
+MAV_AUTOPILOT_OPENPILOT = 4
+enums["MAV_AUTOPILOT"][4] = EnumEntry("MAV_AUTOPILOT_OPENPILOT", """OpenPilot, http://openpilot.org""")
+MAV_AUTOPILOT_GENERIC_WAYPOINTS_ONLY = 5
+enums["MAV_AUTOPILOT"][5] = EnumEntry("MAV_AUTOPILOT_GENERIC_WAYPOINTS_ONLY", """Generic autopilot only supporting simple waypoints""")
+MAV_AUTOPILOT_GENERIC_WAYPOINTS_AND_SIMPLE_NAVIGATION_ONLY = 6
+enums["MAV_AUTOPILOT"][6] = EnumEntry("MAV_AUTOPILOT_GENERIC_WAYPOINTS_AND_SIMPLE_NAVIGATION_ONLY", """Generic autopilot supporting waypoints and other simple navigation commands""")
+MAV_AUTOPILOT_GENERIC_MISSION_FULL = 7
+enums["MAV_AUTOPILOT"][7] = EnumEntry("MAV_AUTOPILOT_GENERIC_MISSION_FULL", """Generic autopilot supporting the full mission command set""")
+MAV_AUTOPILOT_INVALID = 8
+enums["MAV_AUTOPILOT"][8] = EnumEntry("MAV_AUTOPILOT_INVALID", """No valid autopilot, e.g. a GCS or other MAVLink component""")
+MAV_AUTOPILOT_PPZ = 9
+enums["MAV_AUTOPILOT"][9] = EnumEntry("MAV_AUTOPILOT_PPZ", """PPZ UAV - http://nongnu.org/paparazzi""")
+MAV_AUTOPILOT_UDB = 10
+enums["MAV_AUTOPILOT"][10] = EnumEntry("MAV_AUTOPILOT_UDB", """UAV Dev Board""")
+MAV_AUTOPILOT_FP = 11
+enums["MAV_AUTOPILOT"][11] = EnumEntry("MAV_AUTOPILOT_FP", """FlexiPilot""")
+MAV_AUTOPILOT_PX4 = 12
+enums["MAV_AUTOPILOT"][12] = EnumEntry("MAV_AUTOPILOT_PX4", """PX4 Autopilot - http://px4.io/""")
+MAV_AUTOPILOT_SMACCMPILOT = 13
+enums["MAV_AUTOPILOT"][13] = EnumEntry("MAV_AUTOPILOT_SMACCMPILOT", """SMACCMPilot - http://smaccmpilot.org""")
+MAV_AUTOPILOT_AUTOQUAD = 14
+enums["MAV_AUTOPILOT"][14] = EnumEntry("MAV_AUTOPILOT_AUTOQUAD", """AutoQuad -- http://autoquad.org""")
+MAV_AUTOPILOT_ARMAZILA = 15
+enums["MAV_AUTOPILOT"][15] = EnumEntry("MAV_AUTOPILOT_ARMAZILA", """Armazila -- http://armazila.com""")
+MAV_AUTOPILOT_AEROB = 16
+enums["MAV_AUTOPILOT"][16] = EnumEntry("MAV_AUTOPILOT_AEROB", """Aerob -- http://aerob.ru""")
+MAV_AUTOPILOT_ASLUAV = 17
+enums["MAV_AUTOPILOT"][17] = EnumEntry("MAV_AUTOPILOT_ASLUAV", """ASLUAV autopilot -- http://www.asl.ethz.ch""")
+MAV_AUTOPILOT_SMARTAP = 18
+enums["MAV_AUTOPILOT"][18] = EnumEntry("MAV_AUTOPILOT_SMARTAP", """SmartAP Autopilot - http://sky-drones.com""")
+MAV_AUTOPILOT_AIRRAILS = 19
+enums["MAV_AUTOPILOT"][19] = EnumEntry("MAV_AUTOPILOT_AIRRAILS", """AirRails - http://uaventure.com""")
+MAV_AUTOPILOT_REFLEX = 20
+enums["MAV_AUTOPILOT"][20] = EnumEntry("MAV_AUTOPILOT_REFLEX", """Fusion Reflex - https://fusion.engineering""")
+MAV_AUTOPILOT_ENUM_END = 21
+enums["MAV_AUTOPILOT"][21] = EnumEntry("MAV_AUTOPILOT_ENUM_END", """""")
+
+# MAV_BATTERY_CHARGE_STATE
+enums["MAV_BATTERY_CHARGE_STATE"] = Enum()
+enums["MAV_BATTERY_CHARGE_STATE"].bitmask = False
+MAV_BATTERY_CHARGE_STATE_UNDEFINED = 0
+enums["MAV_BATTERY_CHARGE_STATE"][0] = EnumEntry("MAV_BATTERY_CHARGE_STATE_UNDEFINED", """Low battery state is not provided""")
+MAV_BATTERY_CHARGE_STATE_OK = 1
+enums["MAV_BATTERY_CHARGE_STATE"][1] = EnumEntry("MAV_BATTERY_CHARGE_STATE_OK", """Battery is not in low state. Normal operation.""")
+MAV_BATTERY_CHARGE_STATE_LOW = 2
+enums["MAV_BATTERY_CHARGE_STATE"][2] = EnumEntry("MAV_BATTERY_CHARGE_STATE_LOW", """Battery state is low, warn and monitor close.""")
+MAV_BATTERY_CHARGE_STATE_CRITICAL = 3
+enums["MAV_BATTERY_CHARGE_STATE"][3] = EnumEntry("MAV_BATTERY_CHARGE_STATE_CRITICAL", """Battery state is critical, return or abort immediately.""")
+MAV_BATTERY_CHARGE_STATE_EMERGENCY = 4
+enums["MAV_BATTERY_CHARGE_STATE"][4] = EnumEntry("MAV_BATTERY_CHARGE_STATE_EMERGENCY", """Battery state is too low for ordinary abort sequence. Perform fastest possible emergency stop to prevent damage.""")
+MAV_BATTERY_CHARGE_STATE_FAILED = 5
+enums["MAV_BATTERY_CHARGE_STATE"][5] = EnumEntry("MAV_BATTERY_CHARGE_STATE_FAILED", """Battery failed, damage unavoidable. Possible causes (faults) are listed in MAV_BATTERY_FAULT.""")
+MAV_BATTERY_CHARGE_STATE_UNHEALTHY = 6
+enums["MAV_BATTERY_CHARGE_STATE"][6] = EnumEntry("MAV_BATTERY_CHARGE_STATE_UNHEALTHY", """Battery is diagnosed to be defective or an error occurred, usage is discouraged / prohibited. Possible causes (faults) are listed in MAV_BATTERY_FAULT.""")
+MAV_BATTERY_CHARGE_STATE_CHARGING = 7
+enums["MAV_BATTERY_CHARGE_STATE"][7] = EnumEntry("MAV_BATTERY_CHARGE_STATE_CHARGING", """Battery is charging.""")
+MAV_BATTERY_CHARGE_STATE_ENUM_END = 8
+enums["MAV_BATTERY_CHARGE_STATE"][8] = EnumEntry("MAV_BATTERY_CHARGE_STATE_ENUM_END", """""")
+
+# MAV_BATTERY_FAULT
+enums["MAV_BATTERY_FAULT"] = Enum()
+enums["MAV_BATTERY_FAULT"].bitmask = True
+MAV_BATTERY_FAULT_DEEP_DISCHARGE = 1
+enums["MAV_BATTERY_FAULT"][1] = EnumEntry("MAV_BATTERY_FAULT_DEEP_DISCHARGE", """Battery has deep discharged.""")
+MAV_BATTERY_FAULT_SPIKES = 2
+enums["MAV_BATTERY_FAULT"][2] = EnumEntry("MAV_BATTERY_FAULT_SPIKES", """Voltage spikes.""")
+MAV_BATTERY_FAULT_CELL_FAIL = 4
+enums["MAV_BATTERY_FAULT"][4] = EnumEntry("MAV_BATTERY_FAULT_CELL_FAIL", """One or more cells have failed. Battery should also report MAV_BATTERY_CHARGE_STATE_FAILE (and should not be used).""")
+MAV_BATTERY_FAULT_OVER_CURRENT = 8
+enums["MAV_BATTERY_FAULT"][8] = EnumEntry("MAV_BATTERY_FAULT_OVER_CURRENT", """Over-current fault.""")
+MAV_BATTERY_FAULT_OVER_TEMPERATURE = 16
+enums["MAV_BATTERY_FAULT"][16] = EnumEntry("MAV_BATTERY_FAULT_OVER_TEMPERATURE", """Over-temperature fault.""")
+MAV_BATTERY_FAULT_UNDER_TEMPERATURE = 32
+enums["MAV_BATTERY_FAULT"][32] = EnumEntry("MAV_BATTERY_FAULT_UNDER_TEMPERATURE", """Under-temperature fault.""")
+MAV_BATTERY_FAULT_INCOMPATIBLE_VOLTAGE = 64
+enums["MAV_BATTERY_FAULT"][64] = EnumEntry("MAV_BATTERY_FAULT_INCOMPATIBLE_VOLTAGE", """Vehicle voltage is not compatible with this battery (batteries on same power rail should have similar voltage).""")
+MAV_BATTERY_FAULT_INCOMPATIBLE_FIRMWARE = 128
+enums["MAV_BATTERY_FAULT"][128] = EnumEntry("MAV_BATTERY_FAULT_INCOMPATIBLE_FIRMWARE", """Battery firmware is not compatible with current autopilot firmware.""")
+BATTERY_FAULT_INCOMPATIBLE_CELLS_CONFIGURATION = 256
+enums["MAV_BATTERY_FAULT"][256] = EnumEntry("BATTERY_FAULT_INCOMPATIBLE_CELLS_CONFIGURATION", """Battery is not compatible due to cell configuration (e.g. 5s1p when vehicle requires 6s).""")
+MAV_BATTERY_FAULT_ENUM_END = 257
+enums["MAV_BATTERY_FAULT"][257] = EnumEntry("MAV_BATTERY_FAULT_ENUM_END", """""")
+
+# MAV_BATTERY_FUNCTION
+enums["MAV_BATTERY_FUNCTION"] = Enum()
+enums["MAV_BATTERY_FUNCTION"].bitmask = False
+MAV_BATTERY_FUNCTION_UNKNOWN = 0
+enums["MAV_BATTERY_FUNCTION"][0] = EnumEntry("MAV_BATTERY_FUNCTION_UNKNOWN", """Battery function is unknown""")
+MAV_BATTERY_FUNCTION_ALL = 1
+enums["MAV_BATTERY_FUNCTION"][1] = EnumEntry("MAV_BATTERY_FUNCTION_ALL", """Battery supports all flight systems""")
+MAV_BATTERY_FUNCTION_PROPULSION = 2
+enums["MAV_BATTERY_FUNCTION"][2] = EnumEntry("MAV_BATTERY_FUNCTION_PROPULSION", """Battery for the propulsion system""")
+MAV_BATTERY_FUNCTION_AVIONICS = 3
+enums["MAV_BATTERY_FUNCTION"][3] = EnumEntry("MAV_BATTERY_FUNCTION_AVIONICS", """Avionics battery""")
+MAV_BATTERY_FUNCTION_PAYLOAD = 4
+enums["MAV_BATTERY_FUNCTION"][4] = EnumEntry("MAV_BATTERY_FUNCTION_PAYLOAD", """Payload battery""")
+MAV_BATTERY_FUNCTION_ENUM_END = 5
+enums["MAV_BATTERY_FUNCTION"][5] = EnumEntry("MAV_BATTERY_FUNCTION_ENUM_END", """""")
+
+# MAV_BATTERY_MODE
+enums["MAV_BATTERY_MODE"] = Enum()
+enums["MAV_BATTERY_MODE"].bitmask = False
+MAV_BATTERY_MODE_UNKNOWN = 0
+enums["MAV_BATTERY_MODE"][0] = EnumEntry("MAV_BATTERY_MODE_UNKNOWN", """Battery mode not supported/unknown battery mode/normal operation.""")
+MAV_BATTERY_MODE_AUTO_DISCHARGING = 1
+enums["MAV_BATTERY_MODE"][1] = EnumEntry("MAV_BATTERY_MODE_AUTO_DISCHARGING", """Battery is auto discharging (towards storage level).""")
+MAV_BATTERY_MODE_HOT_SWAP = 2
+enums["MAV_BATTERY_MODE"][2] = EnumEntry("MAV_BATTERY_MODE_HOT_SWAP", """Battery in hot-swap mode (current limited to prevent spikes that might damage sensitive electrical circuits).""")
+MAV_BATTERY_MODE_ENUM_END = 3
+enums["MAV_BATTERY_MODE"][3] = EnumEntry("MAV_BATTERY_MODE_ENUM_END", """""")
+
+# MAV_BATTERY_TYPE
+enums["MAV_BATTERY_TYPE"] = Enum()
+enums["MAV_BATTERY_TYPE"].bitmask = False
+MAV_BATTERY_TYPE_UNKNOWN = 0
+enums["MAV_BATTERY_TYPE"][0] = EnumEntry("MAV_BATTERY_TYPE_UNKNOWN", """Not specified.""")
+MAV_BATTERY_TYPE_LIPO = 1
+enums["MAV_BATTERY_TYPE"][1] = EnumEntry("MAV_BATTERY_TYPE_LIPO", """Lithium polymer battery""")
+MAV_BATTERY_TYPE_LIFE = 2
+enums["MAV_BATTERY_TYPE"][2] = EnumEntry("MAV_BATTERY_TYPE_LIFE", """Lithium-iron-phosphate battery""")
+MAV_BATTERY_TYPE_LION = 3
+enums["MAV_BATTERY_TYPE"][3] = EnumEntry("MAV_BATTERY_TYPE_LION", """Lithium-ION battery""")
+MAV_BATTERY_TYPE_NIMH = 4
+enums["MAV_BATTERY_TYPE"][4] = EnumEntry("MAV_BATTERY_TYPE_NIMH", """Nickel metal hydride battery""")
+MAV_BATTERY_TYPE_ENUM_END = 5
+enums["MAV_BATTERY_TYPE"][5] = EnumEntry("MAV_BATTERY_TYPE_ENUM_END", """""")
+
+# MAV_MODE_FLAG
+enums["MAV_MODE_FLAG"] = Enum()
+enums["MAV_MODE_FLAG"].bitmask = True
+MAV_MODE_FLAG_CUSTOM_MODE_ENABLED = 1
+enums["MAV_MODE_FLAG"][1] = EnumEntry("MAV_MODE_FLAG_CUSTOM_MODE_ENABLED", """0b00000001 Reserved for future use.""")
+MAV_MODE_FLAG_TEST_ENABLED = 2
+enums["MAV_MODE_FLAG"][2] = EnumEntry("MAV_MODE_FLAG_TEST_ENABLED", """0b00000010 system has a test mode enabled. This flag is intended for temporary system tests and should not be used for stable implementations.""")
+MAV_MODE_FLAG_AUTO_ENABLED = 4
+enums["MAV_MODE_FLAG"][4] = EnumEntry("MAV_MODE_FLAG_AUTO_ENABLED", """0b00000100 autonomous mode enabled, system finds its own goal positions. Guided flag can be set or not, depends on the actual implementation.""")
+MAV_MODE_FLAG_GUIDED_ENABLED = 8
+enums["MAV_MODE_FLAG"][8] = EnumEntry("MAV_MODE_FLAG_GUIDED_ENABLED", """0b00001000 guided mode enabled, system flies waypoints / mission items.""")
+MAV_MODE_FLAG_STABILIZE_ENABLED = 16
+enums["MAV_MODE_FLAG"][16] = EnumEntry("MAV_MODE_FLAG_STABILIZE_ENABLED", """0b00010000 system stabilizes electronically its attitude (and optionally position). It needs however further control inputs to move around.""")
+MAV_MODE_FLAG_HIL_ENABLED = 32
+enums["MAV_MODE_FLAG"][32] = EnumEntry("MAV_MODE_FLAG_HIL_ENABLED", """0b00100000 hardware in the loop simulation. All motors / actuators are blocked, but internal software is full operational.""")
+MAV_MODE_FLAG_MANUAL_INPUT_ENABLED = 64
+enums["MAV_MODE_FLAG"][64] = EnumEntry("MAV_MODE_FLAG_MANUAL_INPUT_ENABLED", """0b01000000 remote control input is enabled.""")
+MAV_MODE_FLAG_SAFETY_ARMED = 128
+enums["MAV_MODE_FLAG"][128] = EnumEntry("MAV_MODE_FLAG_SAFETY_ARMED", """0b10000000 MAV safety set to armed. Motors are enabled / running / can start. Ready to fly. Additional note: this flag is to be ignore when sent in the command MAV_CMD_DO_SET_MODE and MAV_CMD_COMPONENT_ARM_DISARM shall be used instead. The flag can still be used to report the armed state.""")
+MAV_MODE_FLAG_ENUM_END = 129
+enums["MAV_MODE_FLAG"][129] = EnumEntry("MAV_MODE_FLAG_ENUM_END", """""")
+
+# MAV_STATE
+enums["MAV_STATE"] = Enum()
+enums["MAV_STATE"].bitmask = False
+MAV_STATE_UNINIT = 0
+enums["MAV_STATE"][0] = EnumEntry("MAV_STATE_UNINIT", """Uninitialized system, state is unknown.""")
+MAV_STATE_BOOT = 1
+enums["MAV_STATE"][1] = EnumEntry("MAV_STATE_BOOT", """System is booting up.""")
+MAV_STATE_CALIBRATING = 2
+enums["MAV_STATE"][2] = EnumEntry("MAV_STATE_CALIBRATING", """System is calibrating and not flight-ready.""")
+MAV_STATE_STANDBY = 3
+enums["MAV_STATE"][3] = EnumEntry("MAV_STATE_STANDBY", """System is grounded and on standby. It can be launched any time.""")
+MAV_STATE_ACTIVE = 4
+enums["MAV_STATE"][4] = EnumEntry("MAV_STATE_ACTIVE", """System is active and might be already airborne. Motors are engaged.""")
+MAV_STATE_CRITICAL = 5
+enums["MAV_STATE"][5] = EnumEntry("MAV_STATE_CRITICAL", """System is in a non-normal flight mode (failsafe). It can however still navigate.""")
+MAV_STATE_EMERGENCY = 6
+enums["MAV_STATE"][6] = EnumEntry("MAV_STATE_EMERGENCY", """System is in a non-normal flight mode (failsafe). It lost control over parts or over the whole airframe. It is in mayday and going down.""")
+MAV_STATE_POWEROFF = 7
+enums["MAV_STATE"][7] = EnumEntry("MAV_STATE_POWEROFF", """System just initialized its power-down sequence, will shut down now.""")
+MAV_STATE_FLIGHT_TERMINATION = 8
+enums["MAV_STATE"][8] = EnumEntry("MAV_STATE_FLIGHT_TERMINATION", """System is terminating itself (failsafe or commanded).""")
+MAV_STATE_ENUM_END = 9
+enums["MAV_STATE"][9] = EnumEntry("MAV_STATE_ENUM_END", """""")
+
+# MAV_TYPE
+enums["MAV_TYPE"] = Enum()
+enums["MAV_TYPE"].bitmask = False
+MAV_TYPE_GENERIC = 0
+enums["MAV_TYPE"][0] = EnumEntry("MAV_TYPE_GENERIC", """Generic micro air vehicle""")
+MAV_TYPE_FIXED_WING = 1
+enums["MAV_TYPE"][1] = EnumEntry("MAV_TYPE_FIXED_WING", """Fixed wing aircraft.""")
+MAV_TYPE_QUADROTOR = 2
+enums["MAV_TYPE"][2] = EnumEntry("MAV_TYPE_QUADROTOR", """Quadrotor""")
+MAV_TYPE_COAXIAL = 3
+enums["MAV_TYPE"][3] = EnumEntry("MAV_TYPE_COAXIAL", """Coaxial helicopter""")
+MAV_TYPE_HELICOPTER = 4
+enums["MAV_TYPE"][4] = EnumEntry("MAV_TYPE_HELICOPTER", """Normal helicopter with tail rotor.""")
+MAV_TYPE_ANTENNA_TRACKER = 5
+enums["MAV_TYPE"][5] = EnumEntry("MAV_TYPE_ANTENNA_TRACKER", """Ground installation""")
+MAV_TYPE_GCS = 6
+enums["MAV_TYPE"][6] = EnumEntry("MAV_TYPE_GCS", """Operator control unit / ground control station""")
+MAV_TYPE_AIRSHIP = 7
+enums["MAV_TYPE"][7] = EnumEntry("MAV_TYPE_AIRSHIP", """Airship, controlled""")
+MAV_TYPE_FREE_BALLOON = 8
+enums["MAV_TYPE"][8] = EnumEntry("MAV_TYPE_FREE_BALLOON", """Free balloon, uncontrolled""")
+MAV_TYPE_ROCKET = 9
+enums["MAV_TYPE"][9] = EnumEntry("MAV_TYPE_ROCKET", """Rocket""")
+MAV_TYPE_GROUND_ROVER = 10
+enums["MAV_TYPE"][10] = EnumEntry("MAV_TYPE_GROUND_ROVER", """Ground rover""")
+MAV_TYPE_SURFACE_BOAT = 11
+enums["MAV_TYPE"][11] = EnumEntry("MAV_TYPE_SURFACE_BOAT", """Surface vessel, boat, ship""")
+MAV_TYPE_SUBMARINE = 12
+enums["MAV_TYPE"][12] = EnumEntry("MAV_TYPE_SUBMARINE", """Submarine""")
+MAV_TYPE_HEXAROTOR = 13
+enums["MAV_TYPE"][13] = EnumEntry("MAV_TYPE_HEXAROTOR", """Hexarotor""")
+MAV_TYPE_OCTOROTOR = 14
+enums["MAV_TYPE"][14] = EnumEntry("MAV_TYPE_OCTOROTOR", """Octorotor""")
+MAV_TYPE_TRICOPTER = 15
+enums["MAV_TYPE"][15] = EnumEntry("MAV_TYPE_TRICOPTER", """Tricopter""")
+MAV_TYPE_FLAPPING_WING = 16
+enums["MAV_TYPE"][16] = EnumEntry("MAV_TYPE_FLAPPING_WING", """Flapping wing""")
+MAV_TYPE_KITE = 17
+enums["MAV_TYPE"][17] = EnumEntry("MAV_TYPE_KITE", """Kite""")
+MAV_TYPE_ONBOARD_CONTROLLER = 18
+enums["MAV_TYPE"][18] = EnumEntry("MAV_TYPE_ONBOARD_CONTROLLER", """Onboard companion controller""")
+MAV_TYPE_VTOL_DUOROTOR = 19
+enums["MAV_TYPE"][19] = EnumEntry("MAV_TYPE_VTOL_DUOROTOR", """Two-rotor VTOL using control surfaces in vertical operation in addition. Tailsitter.""")
+MAV_TYPE_VTOL_QUADROTOR = 20
+enums["MAV_TYPE"][20] = EnumEntry("MAV_TYPE_VTOL_QUADROTOR", """Quad-rotor VTOL using a V-shaped quad config in vertical operation. Tailsitter.""")
+MAV_TYPE_VTOL_TILTROTOR = 21
+enums["MAV_TYPE"][21] = EnumEntry("MAV_TYPE_VTOL_TILTROTOR", """Tiltrotor VTOL""")
+MAV_TYPE_VTOL_RESERVED2 = 22
+enums["MAV_TYPE"][22] = EnumEntry("MAV_TYPE_VTOL_RESERVED2", """VTOL reserved 2""")
+MAV_TYPE_VTOL_RESERVED3 = 23
+enums["MAV_TYPE"][23] = EnumEntry("MAV_TYPE_VTOL_RESERVED3", """VTOL reserved 3""")
+MAV_TYPE_VTOL_RESERVED4 = 24
+enums["MAV_TYPE"][24] = EnumEntry("MAV_TYPE_VTOL_RESERVED4", """VTOL reserved 4""")
+MAV_TYPE_VTOL_RESERVED5 = 25
+enums["MAV_TYPE"][25] = EnumEntry("MAV_TYPE_VTOL_RESERVED5", """VTOL reserved 5""")
+MAV_TYPE_GIMBAL = 26
+enums["MAV_TYPE"][26] = EnumEntry("MAV_TYPE_GIMBAL", """Gimbal""")
+MAV_TYPE_ADSB = 27
+enums["MAV_TYPE"][27] = EnumEntry("MAV_TYPE_ADSB", """ADSB system""")
+MAV_TYPE_PARAFOIL = 28
+enums["MAV_TYPE"][28] = EnumEntry("MAV_TYPE_PARAFOIL", """Steerable, nonrigid airfoil""")
+MAV_TYPE_DODECAROTOR = 29
+enums["MAV_TYPE"][29] = EnumEntry("MAV_TYPE_DODECAROTOR", """Dodecarotor""")
+MAV_TYPE_CAMERA = 30
+enums["MAV_TYPE"][30] = EnumEntry("MAV_TYPE_CAMERA", """Camera""")
+MAV_TYPE_CHARGING_STATION = 31
+enums["MAV_TYPE"][31] = EnumEntry("MAV_TYPE_CHARGING_STATION", """Charging station""")
+MAV_TYPE_FLARM = 32
+enums["MAV_TYPE"][32] = EnumEntry("MAV_TYPE_FLARM", """FLARM collision avoidance system""")
+MAV_TYPE_SERVO = 33
+enums["MAV_TYPE"][33] = EnumEntry("MAV_TYPE_SERVO", """Servo""")
+MAV_TYPE_ODID = 34
+enums["MAV_TYPE"][34] = EnumEntry("MAV_TYPE_ODID", """Open Drone ID. See https://mavlink.io/en/services/opendroneid.html.""")
+MAV_TYPE_DECAROTOR = 35
+enums["MAV_TYPE"][35] = EnumEntry("MAV_TYPE_DECAROTOR", """Decarotor""")
+MAV_TYPE_BATTERY = 36
+enums["MAV_TYPE"][36] = EnumEntry("MAV_TYPE_BATTERY", """Battery""")
+MAV_TYPE_PARACHUTE = 37
+enums["MAV_TYPE"][37] = EnumEntry("MAV_TYPE_PARACHUTE", """Parachute""")
+MAV_TYPE_LOG = 38
+enums["MAV_TYPE"][38] = EnumEntry("MAV_TYPE_LOG", """Log""")
+MAV_TYPE_OSD = 39
+enums["MAV_TYPE"][39] = EnumEntry("MAV_TYPE_OSD", """OSD""")
+MAV_TYPE_IMU = 40
+enums["MAV_TYPE"][40] = EnumEntry("MAV_TYPE_IMU", """IMU""")
+MAV_TYPE_GPS = 41
+enums["MAV_TYPE"][41] = EnumEntry("MAV_TYPE_GPS", """GPS""")
+MAV_TYPE_WINCH = 42
+enums["MAV_TYPE"][42] = EnumEntry("MAV_TYPE_WINCH", """Winch""")
+MAV_TYPE_GENERIC_MULTIROTOR = 43
+enums["MAV_TYPE"][43] = EnumEntry("MAV_TYPE_GENERIC_MULTIROTOR", """Generic multirotor that does not fit into a specific type or whose type is unknown""")
+MAV_TYPE_ILLUMINATOR = 44
+enums["MAV_TYPE"][44] = EnumEntry("MAV_TYPE_ILLUMINATOR", """Illuminator. An illuminator is a light source that is used for lighting up dark areas external to the system: e.g. a torch or searchlight (as opposed to a light source for illuminating the system itself, e.g. an indicator light).""")
+MAV_TYPE_SPACECRAFT_ORBITER = 45
+enums["MAV_TYPE"][45] = EnumEntry("MAV_TYPE_SPACECRAFT_ORBITER", """Orbiter spacecraft. Includes satellites orbiting terrestrial and extra-terrestrial bodies. Follows NASA Spacecraft Classification.""")
+MAV_TYPE_GROUND_QUADRUPED = 46
+enums["MAV_TYPE"][46] = EnumEntry("MAV_TYPE_GROUND_QUADRUPED", """A generic four-legged ground vehicle (e.g., a robot dog).""")
+MAV_TYPE_VTOL_GYRODYNE = 47
+enums["MAV_TYPE"][47] = EnumEntry("MAV_TYPE_VTOL_GYRODYNE", """VTOL hybrid of helicopter and autogyro. It has a main rotor for lift and separate propellers for forward flight. The rotor must be powered for hover but can autorotate in cruise flight. See: https://en.wikipedia.org/wiki/Gyrodyne""")
+MAV_TYPE_GRIPPER = 48
+enums["MAV_TYPE"][48] = EnumEntry("MAV_TYPE_GRIPPER", """Gripper""")
+MAV_TYPE_ENUM_END = 49
+enums["MAV_TYPE"][49] = EnumEntry("MAV_TYPE_ENUM_END", """""")
+
+# message IDs
+MAVLINK_MSG_ID_BAD_DATA = -1
+MAVLINK_MSG_ID_UNKNOWN = -2
+MAVLINK_MSG_ID_HEARTBEAT = 0
+MAVLINK_MSG_ID_SYSTEM_TIME = 2
+MAVLINK_MSG_ID_ATTITUDE = 30
+MAVLINK_MSG_ID_GLOBAL_POSITION_INT = 33
+MAVLINK_MSG_ID_VFR_HUD = 74
+MAVLINK_MSG_ID_TERRAIN_REPORT = 136
+MAVLINK_MSG_ID_BATTERY_STATUS = 147
+MAVLINK_MSG_ID_WIND = 168
+MAVLINK_MSG_ID_RANGEFINDER = 173
+
+
+class MAVLink_heartbeat_message(MAVLink_message):
+    """
+    The heartbeat message shows that a system or component is present
+    and responding. The type and autopilot fields (along with the
+    message component id), allow the receiving system to treat further
+    messages from this system appropriately (e.g. by laying out the
+    user interface based on the autopilot). This microservice is
+    documented at https://mavlink.io/en/services/heartbeat.html
+    """
+
+    id = MAVLINK_MSG_ID_HEARTBEAT
+    msgname = "HEARTBEAT"
+    fieldnames = ["type", "autopilot", "base_mode", "custom_mode", "system_status", "mavlink_version"]
+    ordered_fieldnames = ["custom_mode", "type", "autopilot", "base_mode", "system_status", "mavlink_version"]
+    fieldtypes = ["uint8_t", "uint8_t", "uint8_t", "uint32_t", "uint8_t", "uint8_t"]
+    fielddisplays_by_name: Dict[str, str] = {"base_mode": "bitmask"}
+    fieldenums_by_name: Dict[str, str] = {"type": "MAV_TYPE", "autopilot": "MAV_AUTOPILOT", "base_mode": "MAV_MODE_FLAG", "system_status": "MAV_STATE"}
+    fieldunits_by_name: Dict[str, str] = {}
+    native_format = bytearray(b"<IBBBBB")
+    orders = [1, 2, 3, 0, 4, 5]
+    lengths = [1, 1, 1, 1, 1, 1]
+    array_lengths = [0, 0, 0, 0, 0, 0]
+    crc_extra = 50
+    unpacker = struct.Struct("<IBBBBB")
+    instance_field = None
+    instance_offset = -1
+
+    def __init__(self, type: int, autopilot: int, base_mode: int, custom_mode: int, system_status: int, mavlink_version: int):
+        MAVLink_message.__init__(self, MAVLink_heartbeat_message.id, MAVLink_heartbeat_message.msgname)
+        self._fieldnames = MAVLink_heartbeat_message.fieldnames
+        self._instance_field = MAVLink_heartbeat_message.instance_field
+        self._instance_offset = MAVLink_heartbeat_message.instance_offset
+        self.type = type
+        self.autopilot = autopilot
+        self.base_mode = base_mode
+        self.custom_mode = custom_mode
+        self.system_status = system_status
+        self.mavlink_version = mavlink_version
+
+    def pack(self, mav: "MAVLink", force_mavlink1: bool = False) -> bytes:
+        return self._pack(mav, self.crc_extra, self.unpacker.pack(self.custom_mode, self.type, self.autopilot, self.base_mode, self.system_status, self.mavlink_version), force_mavlink1=force_mavlink1)
+
+
+# Define name on the class for backwards compatibility (it is now msgname).
+# Done with setattr to hide the class variable from mypy.
+setattr(MAVLink_heartbeat_message, "name", mavlink_msg_deprecated_name_property())
+
+
+class MAVLink_system_time_message(MAVLink_message):
+    """
+    The system time is the time of the sender's master clock.
+    This can be emitted by flight controllers, onboard computers, or
+    other components in the MAVLink network.         Components that
+    are using a less reliable time source, such as a battery-backed
+    real time clock, can choose to match their system clock to that of
+    a system that indicates a more recent time.         This allows
+    more broadly accurate date stamping of logs, and so on.         If
+    precise time synchronization is needed then use TIMESYNC instead.
+    """
+
+    id = MAVLINK_MSG_ID_SYSTEM_TIME
+    msgname = "SYSTEM_TIME"
+    fieldnames = ["time_unix_usec", "time_boot_ms"]
+    ordered_fieldnames = ["time_unix_usec", "time_boot_ms"]
+    fieldtypes = ["uint64_t", "uint32_t"]
+    fielddisplays_by_name: Dict[str, str] = {}
+    fieldenums_by_name: Dict[str, str] = {}
+    fieldunits_by_name: Dict[str, str] = {"time_unix_usec": "us", "time_boot_ms": "ms"}
+    native_format = bytearray(b"<QI")
+    orders = [0, 1]
+    lengths = [1, 1]
+    array_lengths = [0, 0]
+    crc_extra = 137
+    unpacker = struct.Struct("<QI")
+    instance_field = None
+    instance_offset = -1
+
+    def __init__(self, time_unix_usec: int, time_boot_ms: int):
+        MAVLink_message.__init__(self, MAVLink_system_time_message.id, MAVLink_system_time_message.msgname)
+        self._fieldnames = MAVLink_system_time_message.fieldnames
+        self._instance_field = MAVLink_system_time_message.instance_field
+        self._instance_offset = MAVLink_system_time_message.instance_offset
+        self.time_unix_usec = time_unix_usec
+        self.time_boot_ms = time_boot_ms
+
+    def pack(self, mav: "MAVLink", force_mavlink1: bool = False) -> bytes:
+        return self._pack(mav, self.crc_extra, self.unpacker.pack(self.time_unix_usec, self.time_boot_ms), force_mavlink1=force_mavlink1)
+
+
+# Define name on the class for backwards compatibility (it is now msgname).
+# Done with setattr to hide the class variable from mypy.
+setattr(MAVLink_system_time_message, "name", mavlink_msg_deprecated_name_property())
+
+
+class MAVLink_attitude_message(MAVLink_message):
+    """
+    The attitude in the aeronautical frame (right-handed, Z-down,
+    Y-right, X-front, ZYX, intrinsic).
+    """
+
+    id = MAVLINK_MSG_ID_ATTITUDE
+    msgname = "ATTITUDE"
+    fieldnames = ["time_boot_ms", "roll", "pitch", "yaw", "rollspeed", "pitchspeed", "yawspeed"]
+    ordered_fieldnames = ["time_boot_ms", "roll", "pitch", "yaw", "rollspeed", "pitchspeed", "yawspeed"]
+    fieldtypes = ["uint32_t", "float", "float", "float", "float", "float", "float"]
+    fielddisplays_by_name: Dict[str, str] = {}
+    fieldenums_by_name: Dict[str, str] = {}
+    fieldunits_by_name: Dict[str, str] = {"time_boot_ms": "ms", "roll": "rad", "pitch": "rad", "yaw": "rad", "rollspeed": "rad/s", "pitchspeed": "rad/s", "yawspeed": "rad/s"}
+    native_format = bytearray(b"<Iffffff")
+    orders = [0, 1, 2, 3, 4, 5, 6]
+    lengths = [1, 1, 1, 1, 1, 1, 1]
+    array_lengths = [0, 0, 0, 0, 0, 0, 0]
+    crc_extra = 39
+    unpacker = struct.Struct("<Iffffff")
+    instance_field = None
+    instance_offset = -1
+
+    def __init__(self, time_boot_ms: int, roll: float, pitch: float, yaw: float, rollspeed: float, pitchspeed: float, yawspeed: float):
+        MAVLink_message.__init__(self, MAVLink_attitude_message.id, MAVLink_attitude_message.msgname)
+        self._fieldnames = MAVLink_attitude_message.fieldnames
+        self._instance_field = MAVLink_attitude_message.instance_field
+        self._instance_offset = MAVLink_attitude_message.instance_offset
+        self.time_boot_ms = time_boot_ms
+        self.roll = roll
+        self.pitch = pitch
+        self.yaw = yaw
+        self.rollspeed = rollspeed
+        self.pitchspeed = pitchspeed
+        self.yawspeed = yawspeed
+
+    def pack(self, mav: "MAVLink", force_mavlink1: bool = False) -> bytes:
+        return self._pack(mav, self.crc_extra, self.unpacker.pack(self.time_boot_ms, self.roll, self.pitch, self.yaw, self.rollspeed, self.pitchspeed, self.yawspeed), force_mavlink1=force_mavlink1)
+
+
+# Define name on the class for backwards compatibility (it is now msgname).
+# Done with setattr to hide the class variable from mypy.
+setattr(MAVLink_attitude_message, "name", mavlink_msg_deprecated_name_property())
+
+
+class MAVLink_global_position_int_message(MAVLink_message):
+    """
+    The filtered global position (e.g. fused GPS and accelerometers).
+    The position is in GPS-frame (right-handed, Z-up). It is designed
+    as scaled integer message since the resolution of float is not
+    sufficient.
+    """
+
+    id = MAVLINK_MSG_ID_GLOBAL_POSITION_INT
+    msgname = "GLOBAL_POSITION_INT"
+    fieldnames = ["time_boot_ms", "lat", "lon", "alt", "relative_alt", "vx", "vy", "vz", "hdg"]
+    ordered_fieldnames = ["time_boot_ms", "lat", "lon", "alt", "relative_alt", "vx", "vy", "vz", "hdg"]
+    fieldtypes = ["uint32_t", "int32_t", "int32_t", "int32_t", "int32_t", "int16_t", "int16_t", "int16_t", "uint16_t"]
+    fielddisplays_by_name: Dict[str, str] = {}
+    fieldenums_by_name: Dict[str, str] = {}
+    fieldunits_by_name: Dict[str, str] = {"time_boot_ms": "ms", "lat": "degE7", "lon": "degE7", "alt": "mm", "relative_alt": "mm", "vx": "cm/s", "vy": "cm/s", "vz": "cm/s", "hdg": "cdeg"}
+    native_format = bytearray(b"<IiiiihhhH")
+    orders = [0, 1, 2, 3, 4, 5, 6, 7, 8]
+    lengths = [1, 1, 1, 1, 1, 1, 1, 1, 1]
+    array_lengths = [0, 0, 0, 0, 0, 0, 0, 0, 0]
+    crc_extra = 104
+    unpacker = struct.Struct("<IiiiihhhH")
+    instance_field = None
+    instance_offset = -1
+
+    def __init__(self, time_boot_ms: int, lat: int, lon: int, alt: int, relative_alt: int, vx: int, vy: int, vz: int, hdg: int):
+        MAVLink_message.__init__(self, MAVLink_global_position_int_message.id, MAVLink_global_position_int_message.msgname)
+        self._fieldnames = MAVLink_global_position_int_message.fieldnames
+        self._instance_field = MAVLink_global_position_int_message.instance_field
+        self._instance_offset = MAVLink_global_position_int_message.instance_offset
+        self.time_boot_ms = time_boot_ms
+        self.lat = lat
+        self.lon = lon
+        self.alt = alt
+        self.relative_alt = relative_alt
+        self.vx = vx
+        self.vy = vy
+        self.vz = vz
+        self.hdg = hdg
+
+    def pack(self, mav: "MAVLink", force_mavlink1: bool = False) -> bytes:
+        return self._pack(mav, self.crc_extra, self.unpacker.pack(self.time_boot_ms, self.lat, self.lon, self.alt, self.relative_alt, self.vx, self.vy, self.vz, self.hdg), force_mavlink1=force_mavlink1)
+
+
+# Define name on the class for backwards compatibility (it is now msgname).
+# Done with setattr to hide the class variable from mypy.
+setattr(MAVLink_global_position_int_message, "name", mavlink_msg_deprecated_name_property())
+
+
+class MAVLink_vfr_hud_message(MAVLink_message):
+    """
+    Metrics typically displayed on a HUD for fixed wing aircraft.
+    """
+
+    id = MAVLINK_MSG_ID_VFR_HUD
+    msgname = "VFR_HUD"
+    fieldnames = ["airspeed", "groundspeed", "heading", "throttle", "alt", "climb"]
+    ordered_fieldnames = ["airspeed", "groundspeed", "alt", "climb", "heading", "throttle"]
+    fieldtypes = ["float", "float", "int16_t", "uint16_t", "float", "float"]
+    fielddisplays_by_name: Dict[str, str] = {}
+    fieldenums_by_name: Dict[str, str] = {}
+    fieldunits_by_name: Dict[str, str] = {"airspeed": "m/s", "groundspeed": "m/s", "heading": "deg", "throttle": "%", "alt": "m", "climb": "m/s"}
+    native_format = bytearray(b"<ffffhH")
+    orders = [0, 1, 4, 5, 2, 3]
+    lengths = [1, 1, 1, 1, 1, 1]
+    array_lengths = [0, 0, 0, 0, 0, 0]
+    crc_extra = 20
+    unpacker = struct.Struct("<ffffhH")
+    instance_field = None
+    instance_offset = -1
+
+    def __init__(self, airspeed: float, groundspeed: float, heading: int, throttle: int, alt: float, climb: float):
+        MAVLink_message.__init__(self, MAVLink_vfr_hud_message.id, MAVLink_vfr_hud_message.msgname)
+        self._fieldnames = MAVLink_vfr_hud_message.fieldnames
+        self._instance_field = MAVLink_vfr_hud_message.instance_field
+        self._instance_offset = MAVLink_vfr_hud_message.instance_offset
+        self.airspeed = airspeed
+        self.groundspeed = groundspeed
+        self.heading = heading
+        self.throttle = throttle
+        self.alt = alt
+        self.climb = climb
+
+    def pack(self, mav: "MAVLink", force_mavlink1: bool = False) -> bytes:
+        return self._pack(mav, self.crc_extra, self.unpacker.pack(self.airspeed, self.groundspeed, self.alt, self.climb, self.heading, self.throttle), force_mavlink1=force_mavlink1)
+
+
+# Define name on the class for backwards compatibility (it is now msgname).
+# Done with setattr to hide the class variable from mypy.
+setattr(MAVLink_vfr_hud_message, "name", mavlink_msg_deprecated_name_property())
+
+
+class MAVLink_terrain_report_message(MAVLink_message):
+    """
+    Streamed from drone to report progress of terrain map download
+    (initiated by TERRAIN_REQUEST), or sent as a response to a
+    TERRAIN_CHECK request. See terrain protocol docs:
+    https://mavlink.io/en/services/terrain.html
+    """
+
+    id = MAVLINK_MSG_ID_TERRAIN_REPORT
+    msgname = "TERRAIN_REPORT"
+    fieldnames = ["lat", "lon", "spacing", "terrain_height", "current_height", "pending", "loaded"]
+    ordered_fieldnames = ["lat", "lon", "terrain_height", "current_height", "spacing", "pending", "loaded"]
+    fieldtypes = ["int32_t", "int32_t", "uint16_t", "float", "float", "uint16_t", "uint16_t"]
+    fielddisplays_by_name: Dict[str, str] = {}
+    fieldenums_by_name: Dict[str, str] = {}
+    fieldunits_by_name: Dict[str, str] = {"lat": "degE7", "lon": "degE7", "terrain_height": "m", "current_height": "m"}
+    native_format = bytearray(b"<iiffHHH")
+    orders = [0, 1, 4, 2, 3, 5, 6]
+    lengths = [1, 1, 1, 1, 1, 1, 1]
+    array_lengths = [0, 0, 0, 0, 0, 0, 0]
+    crc_extra = 1
+    unpacker = struct.Struct("<iiffHHH")
+    instance_field = None
+    instance_offset = -1
+
+    def __init__(self, lat: int, lon: int, spacing: int, terrain_height: float, current_height: float, pending: int, loaded: int):
+        MAVLink_message.__init__(self, MAVLink_terrain_report_message.id, MAVLink_terrain_report_message.msgname)
+        self._fieldnames = MAVLink_terrain_report_message.fieldnames
+        self._instance_field = MAVLink_terrain_report_message.instance_field
+        self._instance_offset = MAVLink_terrain_report_message.instance_offset
+        self.lat = lat
+        self.lon = lon
+        self.spacing = spacing
+        self.terrain_height = terrain_height
+        self.current_height = current_height
+        self.pending = pending
+        self.loaded = loaded
+
+    def pack(self, mav: "MAVLink", force_mavlink1: bool = False) -> bytes:
+        return self._pack(mav, self.crc_extra, self.unpacker.pack(self.lat, self.lon, self.terrain_height, self.current_height, self.spacing, self.pending, self.loaded), force_mavlink1=force_mavlink1)
+
+
+# Define name on the class for backwards compatibility (it is now msgname).
+# Done with setattr to hide the class variable from mypy.
+setattr(MAVLink_terrain_report_message, "name", mavlink_msg_deprecated_name_property())
+
+
+class MAVLink_battery_status_message(MAVLink_message):
+    """
+    Battery information
+    """
+
+    id = MAVLINK_MSG_ID_BATTERY_STATUS
+    msgname = "BATTERY_STATUS"
+    fieldnames = ["id", "battery_function", "type", "temperature", "voltages", "current_battery", "current_consumed", "energy_consumed", "battery_remaining", "time_remaining", "charge_state", "voltages_ext", "mode", "fault_bitmask"]
+    ordered_fieldnames = ["current_consumed", "energy_consumed", "temperature", "voltages", "current_battery", "id", "battery_function", "type", "battery_remaining", "time_remaining", "charge_state", "voltages_ext", "mode", "fault_bitmask"]
+    fieldtypes = ["uint8_t", "uint8_t", "uint8_t", "int16_t", "uint16_t", "int16_t", "int32_t", "int32_t", "int8_t", "int32_t", "uint8_t", "uint16_t", "uint8_t", "uint32_t"]
+    fielddisplays_by_name: Dict[str, str] = {"fault_bitmask": "bitmask"}
+    fieldenums_by_name: Dict[str, str] = {"battery_function": "MAV_BATTERY_FUNCTION", "type": "MAV_BATTERY_TYPE", "charge_state": "MAV_BATTERY_CHARGE_STATE", "mode": "MAV_BATTERY_MODE", "fault_bitmask": "MAV_BATTERY_FAULT"}
+    fieldunits_by_name: Dict[str, str] = {"temperature": "cdegC", "voltages": "mV", "current_battery": "cA", "current_consumed": "mAh", "energy_consumed": "hJ", "battery_remaining": "%", "time_remaining": "s", "voltages_ext": "mV"}
+    native_format = bytearray(b"<iihHhBBBbiBHBI")
+    orders = [5, 6, 7, 2, 3, 4, 0, 1, 8, 9, 10, 11, 12, 13]
+    lengths = [1, 1, 1, 10, 1, 1, 1, 1, 1, 1, 1, 4, 1, 1]
+    array_lengths = [0, 0, 0, 10, 0, 0, 0, 0, 0, 0, 0, 4, 0, 0]
+    crc_extra = 154
+    unpacker = struct.Struct("<iih10HhBBBbiB4HBI")
+    instance_field = "id"
+    instance_offset = 32
+
+    def __init__(self, id: int, battery_function: int, type: int, temperature: int, voltages: Sequence[int], current_battery: int, current_consumed: int, energy_consumed: int, battery_remaining: int, time_remaining: int = 0, charge_state: int = 0, voltages_ext: Sequence[int] = (0, 0, 0, 0), mode: int = 0, fault_bitmask: int = 0):
+        MAVLink_message.__init__(self, MAVLink_battery_status_message.id, MAVLink_battery_status_message.msgname)
+        self._fieldnames = MAVLink_battery_status_message.fieldnames
+        self._instance_field = MAVLink_battery_status_message.instance_field
+        self._instance_offset = MAVLink_battery_status_message.instance_offset
+        self.id = id
+        self.battery_function = battery_function
+        self.type = type
+        self.temperature = temperature
+        self.voltages = voltages
+        self.current_battery = current_battery
+        self.current_consumed = current_consumed
+        self.energy_consumed = energy_consumed
+        self.battery_remaining = battery_remaining
+        self.time_remaining = time_remaining
+        self.charge_state = charge_state
+        self.voltages_ext = voltages_ext
+        self.mode = mode
+        self.fault_bitmask = fault_bitmask
+
+    def pack(self, mav: "MAVLink", force_mavlink1: bool = False) -> bytes:
+        return self._pack(mav, self.crc_extra, self.unpacker.pack(self.current_consumed, self.energy_consumed, self.temperature, self.voltages[0], self.voltages[1], self.voltages[2], self.voltages[3], self.voltages[4], self.voltages[5], self.voltages[6], self.voltages[7], self.voltages[8], self.voltages[9], self.current_battery, self.id, self.battery_function, self.type, self.battery_remaining, self.time_remaining, self.charge_state, self.voltages_ext[0], self.voltages_ext[1], self.voltages_ext[2], self.voltages_ext[3], self.mode, self.fault_bitmask), force_mavlink1=force_mavlink1)
+
+
+# Define name on the class for backwards compatibility (it is now msgname).
+# Done with setattr to hide the class variable from mypy.
+setattr(MAVLink_battery_status_message, "name", mavlink_msg_deprecated_name_property())
+
+
+class MAVLink_wind_message(MAVLink_message):
+    """
+    Wind estimation.
+    """
+
+    id = MAVLINK_MSG_ID_WIND
+    msgname = "WIND"
+    fieldnames = ["direction", "speed", "speed_z"]
+    ordered_fieldnames = ["direction", "speed", "speed_z"]
+    fieldtypes = ["float", "float", "float"]
+    fielddisplays_by_name: Dict[str, str] = {}
+    fieldenums_by_name: Dict[str, str] = {}
+    fieldunits_by_name: Dict[str, str] = {"direction": "deg", "speed": "m/s", "speed_z": "m/s"}
+    native_format = bytearray(b"<fff")
+    orders = [0, 1, 2]
+    lengths = [1, 1, 1]
+    array_lengths = [0, 0, 0]
+    crc_extra = 1
+    unpacker = struct.Struct("<fff")
+    instance_field = None
+    instance_offset = -1
+
+    def __init__(self, direction: float, speed: float, speed_z: float):
+        MAVLink_message.__init__(self, MAVLink_wind_message.id, MAVLink_wind_message.msgname)
+        self._fieldnames = MAVLink_wind_message.fieldnames
+        self._instance_field = MAVLink_wind_message.instance_field
+        self._instance_offset = MAVLink_wind_message.instance_offset
+        self.direction = direction
+        self.speed = speed
+        self.speed_z = speed_z
+
+    def pack(self, mav: "MAVLink", force_mavlink1: bool = False) -> bytes:
+        return self._pack(mav, self.crc_extra, self.unpacker.pack(self.direction, self.speed, self.speed_z), force_mavlink1=force_mavlink1)
+
+
+# Define name on the class for backwards compatibility (it is now msgname).
+# Done with setattr to hide the class variable from mypy.
+setattr(MAVLink_wind_message, "name", mavlink_msg_deprecated_name_property())
+
+
+class MAVLink_rangefinder_message(MAVLink_message):
+    """
+    Rangefinder reporting.
+    """
+
+    id = MAVLINK_MSG_ID_RANGEFINDER
+    msgname = "RANGEFINDER"
+    fieldnames = ["distance", "voltage"]
+    ordered_fieldnames = ["distance", "voltage"]
+    fieldtypes = ["float", "float"]
+    fielddisplays_by_name: Dict[str, str] = {}
+    fieldenums_by_name: Dict[str, str] = {}
+    fieldunits_by_name: Dict[str, str] = {"distance": "m", "voltage": "V"}
+    native_format = bytearray(b"<ff")
+    orders = [0, 1]
+    lengths = [1, 1]
+    array_lengths = [0, 0]
+    crc_extra = 83
+    unpacker = struct.Struct("<ff")
+    instance_field = None
+    instance_offset = -1
+
+    def __init__(self, distance: float, voltage: float):
+        MAVLink_message.__init__(self, MAVLink_rangefinder_message.id, MAVLink_rangefinder_message.msgname)
+        self._fieldnames = MAVLink_rangefinder_message.fieldnames
+        self._instance_field = MAVLink_rangefinder_message.instance_field
+        self._instance_offset = MAVLink_rangefinder_message.instance_offset
+        self.distance = distance
+        self.voltage = voltage
+
+    def pack(self, mav: "MAVLink", force_mavlink1: bool = False) -> bytes:
+        return self._pack(mav, self.crc_extra, self.unpacker.pack(self.distance, self.voltage), force_mavlink1=force_mavlink1)
+
+
+# Define name on the class for backwards compatibility (it is now msgname).
+# Done with setattr to hide the class variable from mypy.
+setattr(MAVLink_rangefinder_message, "name", mavlink_msg_deprecated_name_property())
+
+
+mavlink_map: Dict[int, Type[MAVLink_message]] = {
+    MAVLINK_MSG_ID_HEARTBEAT: MAVLink_heartbeat_message,
+    MAVLINK_MSG_ID_SYSTEM_TIME: MAVLink_system_time_message,
+    MAVLINK_MSG_ID_ATTITUDE: MAVLink_attitude_message,
+    MAVLINK_MSG_ID_GLOBAL_POSITION_INT: MAVLink_global_position_int_message,
+    MAVLINK_MSG_ID_VFR_HUD: MAVLink_vfr_hud_message,
+    MAVLINK_MSG_ID_TERRAIN_REPORT: MAVLink_terrain_report_message,
+    MAVLINK_MSG_ID_BATTERY_STATUS: MAVLink_battery_status_message,
+    MAVLINK_MSG_ID_WIND: MAVLink_wind_message,
+    MAVLINK_MSG_ID_RANGEFINDER: MAVLink_rangefinder_message,
+}
+
+
+class MAVError(Exception):
+    """MAVLink error class"""
+
+    def __init__(self, msg: str) -> None:
+        Exception.__init__(self, msg)
+        self.message = msg
+
+
+class MAVLink_bad_data(MAVLink_message):
+    """
+    a piece of bad data in a mavlink stream
+    """
+
+    def __init__(self, data: Union[bytes, bytearray], reason: str) -> None:
+        MAVLink_message.__init__(self, MAVLINK_MSG_ID_BAD_DATA, "BAD_DATA")
+        self._fieldnames = ["data", "reason"]
+        self.data = data
+        self.reason = reason
+        self._msgbuf = bytearray(data)
+        self._instance_field = None
+
+    def __str__(self) -> str:
+        """Override the __str__ function from MAVLink_messages because non-printable characters are common in to be the reason for this message to exist."""
+        hexstr = ["{:x}".format(i) for i in self.data]
+        return "%s {%s, data:%s}" % (self._type, self.reason, hexstr)
+
+
+class MAVLink_unknown(MAVLink_message):
+    """
+    a message that we don't have in the XML used when built
+    """
+
+    def __init__(self, msgid: int, data: Union[bytes, bytearray]) -> None:
+        MAVLink_message.__init__(self, MAVLINK_MSG_ID_UNKNOWN, "UNKNOWN_%u" % msgid)
+        self._fieldnames = ["data"]
+        self.data = data
+        self._msgbuf = bytearray(data)
+        self._instance_field = None
+
+    def __str__(self) -> str:
+        """Override the __str__ function from MAVLink_messages because non-printable characters are common."""
+        hexstr = ["{:x}".format(i) for i in self.data]
+        return "%s {data:%s}" % (self._type, hexstr)
+
+
+class MAVLinkSigning(object):
+    """MAVLink signing state class"""
+
+    def __init__(self) -> None:
+        self.secret_key: Optional[bytes] = None
+        self.timestamp = 0
+        self.link_id = 0
+        self.sign_outgoing = False
+        self.allow_unsigned_callback: Optional[Callable[["MAVLink", int], bool]] = None
+        self.stream_timestamps: Dict[Tuple[int, int, int], int] = {}
+        self.sig_count = 0
+        self.badsig_count = 0
+        self.goodsig_count = 0
+        self.unsigned_count = 0
+        self.reject_count = 0
+
+
+MAVLinkV1Header = Tuple[bytes, int, int, int, int, int]
+MAVLinkV2Header = Tuple[bytes, int, int, int, int, int, int, int, int]
+
+class MAVLink(object):
+    """MAVLink protocol handling class"""
+
+    def __init__(self, file: Any, srcSystem: int = 0, srcComponent: int = 0, use_native: bool = False) -> None:
+        self.seq = 0
+        self.file = file
+        self.srcSystem = srcSystem
+        self.srcComponent = srcComponent
+        self.callback: Optional[Callable[..., None]] = None
+        self.callback_args: Optional[Iterable[Any]] = None
+        self.callback_kwargs: Optional[Mapping[str, Any]] = None
+        self.send_callback: Optional[Callable[..., None]] = None
+        self.send_callback_args: Optional[Iterable[Any]] = None
+        self.send_callback_kwargs: Optional[Mapping[str, Any]] = None
+        self.buf = bytearray()
+        self.buf_index = 0
+        self.expected_length = HEADER_LEN_V1 + 2
+        self.have_prefix_error = False
+        self.robust_parsing = False
+        self.protocol_marker = 253
+        self.little_endian = True
+        self.crc_extra = True
+        self.sort_fields = True
+        self.total_packets_sent = 0
+        self.total_bytes_sent = 0
+        self.total_packets_received = 0
+        self.total_bytes_received = 0
+        self.total_receive_errors = 0
+        self.startup_time = time.time()
+        self.signing = MAVLinkSigning()
+        self.mav20_unpacker = struct.Struct("<cBBBBBBHB")
+        self.mav10_unpacker = struct.Struct("<cBBBBB")
+        self.mav20_h3_unpacker = struct.Struct("BBB")
+        self.mav_csum_unpacker = struct.Struct("<H")
+        self.mav_sign_unpacker = struct.Struct("<IH")
+
+    def set_callback(self, callback: Callable[..., None], *args: Any, **kwargs: Any) -> None:
+        self.callback = callback
+        self.callback_args = args
+        self.callback_kwargs = kwargs
+
+    def set_send_callback(self, callback: Callable[..., None], *args: Any, **kwargs: Any) -> None:
+        self.send_callback = callback
+        self.send_callback_args = args
+        self.send_callback_kwargs = kwargs
+
+    def send(self, mavmsg: MAVLink_message, force_mavlink1: bool = False) -> None:
+        """send a MAVLink message"""
+        buf = mavmsg.pack(self, force_mavlink1=force_mavlink1)
+        self.file.write(buf)
+        self.seq = (self.seq + 1) % 256
+        self.total_packets_sent += 1
+        self.total_bytes_sent += len(buf)
+        if self.send_callback is not None and self.send_callback_args is not None and self.send_callback_kwargs is not None:
+            self.send_callback(mavmsg, *self.send_callback_args, **self.send_callback_kwargs)
+
+    def buf_len(self) -> int:
+        return len(self.buf) - self.buf_index
+
+    def bytes_needed(self) -> int:
+        """return number of bytes needed for next parsing stage"""
+        ret = self.expected_length - self.buf_len()
+
+        if ret <= 0:
+            return 1
+        return ret
+
+    def __callbacks(self, msg: MAVLink_message) -> None:
+        """this method exists only to make profiling results easier to read"""
+        if self.callback is not None and self.callback_args is not None and self.callback_kwargs is not None:
+            self.callback(msg, *self.callback_args, **self.callback_kwargs)
+
+    def parse_char(self, c: Sequence[int]) -> Optional[MAVLink_message]:
+        """input some data bytes, possibly returning a new message"""
+        self.buf.extend(c)
+
+        self.total_bytes_received += len(c)
+
+        m = self.__parse_char_legacy()
+
+        if m is not None:
+            self.total_packets_received += 1
+            self.__callbacks(m)
+
+        # See if there's nothing left in the buffer, reset it to 0
+        # which frees the memory
+        if self.buf_index != 0 and self.buf_len() == 0:
+            self.buf = bytearray()
+            self.buf_index = 0
+
+        return m
+
+    def __parse_char_legacy(self) -> Optional[MAVLink_message]:
+        """input some data bytes, possibly returning a new message"""
+        header_len = HEADER_LEN_V1
+        if self.buf_len() >= 1 and self.buf[self.buf_index] == PROTOCOL_MARKER_V2:
+            header_len = HEADER_LEN_V2
+
+        m: Optional[MAVLink_message] = None
+        if self.buf_len() >= 1 and self.buf[self.buf_index] != PROTOCOL_MARKER_V1 and self.buf[self.buf_index] != PROTOCOL_MARKER_V2:
+            magic = self.buf[self.buf_index]
+            self.buf_index += 1
+            if self.robust_parsing:
+                invalid_prefix_start = self.buf_index - 1
+                while self.buf_len() >= 1 and self.buf[self.buf_index] != PROTOCOL_MARKER_V1 and self.buf[self.buf_index] != PROTOCOL_MARKER_V2:
+                    self.buf_index += 1
+                m = MAVLink_bad_data(self.buf[invalid_prefix_start : self.buf_index], "Bad prefix")
+                self.expected_length = header_len + 2
+                self.total_receive_errors += 1
+                return m
+            if self.have_prefix_error:
+                return None
+            self.have_prefix_error = True
+            self.total_receive_errors += 1
+            raise MAVError("invalid MAVLink prefix '%s'" % magic)
+        self.have_prefix_error = False
+        if self.buf_len() >= 3:
+            sbuf = self.buf[self.buf_index : 3 + self.buf_index]
+            unpacked_h3: Tuple[int, int, int] = self.mav20_h3_unpacker.unpack(sbuf)
+            magic, self.expected_length, incompat_flags = unpacked_h3
+            if magic == PROTOCOL_MARKER_V2 and (incompat_flags & MAVLINK_IFLAG_SIGNED):
+                self.expected_length += MAVLINK_SIGNATURE_BLOCK_LEN
+            self.expected_length += header_len + 2
+        if self.expected_length >= (header_len + 2) and self.buf_len() >= self.expected_length:
+            mbuf = self.buf[self.buf_index : self.buf_index + self.expected_length]
+            self.buf_index += self.expected_length
+            self.expected_length = header_len + 2
+            if self.robust_parsing:
+                try:
+                    if magic == PROTOCOL_MARKER_V2 and (incompat_flags & ~MAVLINK_IFLAG_SIGNED) != 0:
+                        raise MAVError("invalid incompat_flags 0x%x 0x%x %u" % (incompat_flags, magic, self.expected_length))
+                    m = self.decode(mbuf)
+                except MAVError as reason:
+                    m = MAVLink_bad_data(mbuf, reason.message)
+                    self.total_receive_errors += 1
+            else:
+                if magic == PROTOCOL_MARKER_V2 and (incompat_flags & ~MAVLINK_IFLAG_SIGNED) != 0:
+                    raise MAVError("invalid incompat_flags 0x%x 0x%x %u" % (incompat_flags, magic, self.expected_length))
+                m = self.decode(mbuf)
+            return m
+        return None
+
+    def parse_buffer(self, s: Sequence[int]) -> Optional[List[MAVLink_message]]:
+        """input some data bytes, possibly returning a list of new messages"""
+        m = self.parse_char(s)
+        if m is None:
+            return None
+        ret = [m]
+        while True:
+            m = self.parse_char(b"")
+            if m is None:
+                return ret
+            ret.append(m)
+
+    def check_signature(self, msgbuf: bytearray, srcSystem: int, srcComponent: int) -> bool:
+        """check signature on incoming message"""
+        assert self.signing.secret_key is not None
+
+        timestamp_buf = msgbuf[-12:-6]
+        link_id = msgbuf[-13]
+        tbytes: Tuple[int, int] = self.mav_sign_unpacker.unpack(timestamp_buf)
+        tlow, thigh = tbytes
+        timestamp = tlow + (thigh << 32)
+
+        # see if the timestamp is acceptable
+        stream_key = (link_id, srcSystem, srcComponent)
+        if stream_key in self.signing.stream_timestamps:
+            if timestamp <= self.signing.stream_timestamps[stream_key]:
+                # reject old timestamp
+                logger.info("old timestamp")
+                return False
+        else:
+            # a new stream has appeared. Accept the timestamp if it is at most
+            # one minute behind our current timestamp
+            if timestamp + 6000 * 1000 < self.signing.timestamp:
+                logger.info("bad new stream %s %s", timestamp / (100.0 * 1000 * 60 * 60 * 24 * 365), self.signing.timestamp / (100.0 * 1000 * 60 * 60 * 24 * 365))
+                return False
+            logger.info("new stream")
+
+        # set the streams timestamp so we reject timestamps that go backwards
+        self.signing.stream_timestamps[stream_key] = timestamp
+
+        h = hashlib.new("sha256")
+        h.update(self.signing.secret_key)
+        h.update(msgbuf[:-6])
+        sig1 = h.digest()[:6]
+        sig2 = msgbuf[-6:]
+        if sig1 != sig2:
+            logger.info("sig mismatch")
+            return False
+
+        # the timestamp we next send with is the max of the received timestamp and
+        # our current timestamp
+        self.signing.timestamp = max(self.signing.timestamp, timestamp)
+        return True
+
+    def decode(self, msgbuf: bytearray) -> MAVLink_message:
+        """decode a buffer as a MAVLink message"""
+        # decode the header
+        if msgbuf[0] != PROTOCOL_MARKER_V1:
+            headerlen = 10
+            try:
+                header_v2: MAVLinkV2Header = self.mav20_unpacker.unpack(msgbuf[:headerlen])
+            except struct.error as emsg:
+                raise MAVError("Unable to unpack MAVLink header: %s" % emsg)
+            magic, mlen, incompat_flags, compat_flags, seq, srcSystem, srcComponent, msgIdlow, msgIdhigh = header_v2
+            msgId = msgIdlow | (msgIdhigh << 16)
+        else:
+            headerlen = 6
+            try:
+                header_v1: MAVLinkV1Header = self.mav10_unpacker.unpack(msgbuf[:headerlen])
+            except struct.error as emsg:
+                raise MAVError("Unable to unpack MAVLink header: %s" % emsg)
+            magic, mlen, seq, srcSystem, srcComponent, msgId = header_v1
+            incompat_flags = 0
+            compat_flags = 0
+        mapkey = msgId
+        if (incompat_flags & MAVLINK_IFLAG_SIGNED) != 0:
+            signature_len = MAVLINK_SIGNATURE_BLOCK_LEN
+        else:
+            signature_len = 0
+
+        if ord(magic) != PROTOCOL_MARKER_V1 and ord(magic) != PROTOCOL_MARKER_V2:
+            raise MAVError("invalid MAVLink prefix '{}'".format(hex(ord(magic))))
+        if mlen != len(msgbuf) - (headerlen + 2 + signature_len):
+            raise MAVError("invalid MAVLink message length. Got %u expected %u, msgId=%u headerlen=%u" % (len(msgbuf) - (headerlen + 2 + signature_len), mlen, msgId, headerlen))
+
+        if mapkey not in mavlink_map:
+            return MAVLink_unknown(msgId, msgbuf)
+
+        # decode the payload
+        msgtype = mavlink_map[mapkey]
+        order_map = msgtype.orders
+        len_map = msgtype.lengths
+        crc_extra = msgtype.crc_extra
+
+        # decode the checksum
+        try:
+            crc: int = self.mav_csum_unpacker.unpack(msgbuf[-(2 + signature_len) :][:2])[0]
+        except struct.error as emsg:
+            raise MAVError("Unable to unpack MAVLink CRC: %s" % emsg)
+        crcbuf = msgbuf[1 : -(2 + signature_len)]
+        # using CRC extra
+        crcbuf.append(crc_extra)
+        crc2 = x25crc(crcbuf)
+        if crc != crc2.crc and not MAVLINK_IGNORE_CRC:
+            raise MAVError("invalid MAVLink CRC in msgID %u 0x%04x should be 0x%04x" % (msgId, crc, crc2.crc))
+
+        sig_ok = False
+        if signature_len == MAVLINK_SIGNATURE_BLOCK_LEN:
+            self.signing.sig_count += 1
+        if self.signing.secret_key is not None:
+            accept_signature = False
+            if signature_len == MAVLINK_SIGNATURE_BLOCK_LEN:
+                sig_ok = self.check_signature(msgbuf, srcSystem, srcComponent)
+                accept_signature = sig_ok
+                if sig_ok:
+                    self.signing.goodsig_count += 1
+                else:
+                    self.signing.badsig_count += 1
+                if not accept_signature and self.signing.allow_unsigned_callback is not None:
+                    accept_signature = self.signing.allow_unsigned_callback(self, msgId)
+                    if accept_signature:
+                        self.signing.unsigned_count += 1
+                    else:
+                        self.signing.reject_count += 1
+            elif self.signing.allow_unsigned_callback is not None:
+                accept_signature = self.signing.allow_unsigned_callback(self, msgId)
+                if accept_signature:
+                    self.signing.unsigned_count += 1
+                else:
+                    self.signing.reject_count += 1
+            if not accept_signature:
+                raise MAVError("Invalid signature")
+
+        csize = msgtype.unpacker.size
+        mbuf = msgbuf[headerlen : -(2 + signature_len)]
+        if len(mbuf) < csize:
+            # zero pad to give right size
+            mbuf.extend([0] * (csize - len(mbuf)))
+        if len(mbuf) < csize:
+            raise MAVError("Bad message of type %s length %u needs %s" % (msgtype, len(mbuf), csize))
+        mbuf = mbuf[:csize]
+        try:
+            t: Tuple[Union[bytes, int, float], ...] = msgtype.unpacker.unpack(mbuf)
+        except struct.error as emsg:
+            raise MAVError("Unable to unpack MAVLink payload type=%s payloadLength=%u: %s" % (msgtype, len(mbuf), emsg))
+
+        tlist: List[Union[bytes, float, int, Sequence[Union[bytes, float, int]]]] = list(t)
+        # handle sorted fields
+        if sum(len_map) == len(len_map):
+            # message has no arrays in it
+            for i in range(0, len(tlist)):
+                tlist[i] = t[order_map[i]]
+        else:
+            # message has some arrays
+            tlist = []
+            for i in range(0, len(order_map)):
+                order = order_map[i]
+                L = len_map[order]
+                tip = sum(len_map[:order])
+                field = t[tip]
+                if L == 1 or isinstance(field, bytes):
+                    tlist.append(field)
+                else:
+                    tlist.append(list(t[tip : (tip + L)]))
+
+        # terminate any strings
+        for i, elem in enumerate(tlist):
+            if isinstance(elem, bytes):
+                tlist[i] = elem.rstrip(b"\x00")
+
+        # construct the message object
+        try:
+            # Note that initializers don't follow the Liskov Substitution Principle
+            # therefore it can't be typechecked
+            m = msgtype(*tlist)  # type: ignore
+        except Exception as emsg:
+            raise MAVError("Unable to instantiate MAVLink message of type %s : %s" % (msgtype, emsg))
+        m._signed = sig_ok
+        if m._signed:
+            m._link_id = msgbuf[-13]
+        m._msgbuf = msgbuf
+        m._payload = msgbuf[6 : -(2 + signature_len)]
+        m._crc = crc
+        m._header = MAVLink_header(msgId, incompat_flags, compat_flags, mlen, seq, srcSystem, srcComponent)
+        return m
+
+    def heartbeat_encode(self, type: int, autopilot: int, base_mode: int, custom_mode: int, system_status: int, mavlink_version: int = 3) -> MAVLink_heartbeat_message:
+        """
+        The heartbeat message shows that a system or component is present and
+        responding. The type and autopilot fields (along with the
+        message component id), allow the receiving system to treat
+        further messages from this system appropriately (e.g. by
+        laying out the user interface based on the autopilot). This
+        microservice is documented at
+        https://mavlink.io/en/services/heartbeat.html
+
+        type                      : Vehicle or component type. For a flight controller component the vehicle type (quadrotor, helicopter, etc.). For other components the component type (e.g. camera, gimbal, etc.). This should be used in preference to component id for identifying the component type. (type:uint8_t, values:MAV_TYPE)
+        autopilot                 : Autopilot type / class. Use MAV_AUTOPILOT_INVALID for components that are not flight controllers. (type:uint8_t, values:MAV_AUTOPILOT)
+        base_mode                 : System mode bitmap. (type:uint8_t, values:MAV_MODE_FLAG)
+        custom_mode               : A bitfield for use for autopilot-specific flags (type:uint32_t)
+        system_status             : System status flag. (type:uint8_t, values:MAV_STATE)
+        mavlink_version           : MAVLink version, not writable by user, gets added by protocol because of magic data type: uint8_t_mavlink_version (type:uint8_t)
+
+        """
+        return MAVLink_heartbeat_message(type, autopilot, base_mode, custom_mode, system_status, mavlink_version)
+
+    def heartbeat_send(self, type: int, autopilot: int, base_mode: int, custom_mode: int, system_status: int, mavlink_version: int = 3, force_mavlink1: bool = False) -> None:
+        """
+        The heartbeat message shows that a system or component is present and
+        responding. The type and autopilot fields (along with the
+        message component id), allow the receiving system to treat
+        further messages from this system appropriately (e.g. by
+        laying out the user interface based on the autopilot). This
+        microservice is documented at
+        https://mavlink.io/en/services/heartbeat.html
+
+        type                      : Vehicle or component type. For a flight controller component the vehicle type (quadrotor, helicopter, etc.). For other components the component type (e.g. camera, gimbal, etc.). This should be used in preference to component id for identifying the component type. (type:uint8_t, values:MAV_TYPE)
+        autopilot                 : Autopilot type / class. Use MAV_AUTOPILOT_INVALID for components that are not flight controllers. (type:uint8_t, values:MAV_AUTOPILOT)
+        base_mode                 : System mode bitmap. (type:uint8_t, values:MAV_MODE_FLAG)
+        custom_mode               : A bitfield for use for autopilot-specific flags (type:uint32_t)
+        system_status             : System status flag. (type:uint8_t, values:MAV_STATE)
+        mavlink_version           : MAVLink version, not writable by user, gets added by protocol because of magic data type: uint8_t_mavlink_version (type:uint8_t)
+
+        """
+        self.send(self.heartbeat_encode(type, autopilot, base_mode, custom_mode, system_status, mavlink_version), force_mavlink1=force_mavlink1)
+
+    def system_time_encode(self, time_unix_usec: int, time_boot_ms: int) -> MAVLink_system_time_message:
+        """
+        The system time is the time of the sender's master clock.         This
+        can be emitted by flight controllers, onboard computers, or
+        other components in the MAVLink network.         Components
+        that are using a less reliable time source, such as a battery-
+        backed real time clock, can choose to match their system clock
+        to that of a system that indicates a more recent time.
+        This allows more broadly accurate date stamping of logs, and
+        so on.         If precise time synchronization is needed then
+        use TIMESYNC instead.
+
+        time_unix_usec            : Timestamp (UNIX epoch time). [us] (type:uint64_t)
+        time_boot_ms              : Timestamp (time since system boot). [ms] (type:uint32_t)
+
+        """
+        return MAVLink_system_time_message(time_unix_usec, time_boot_ms)
+
+    def system_time_send(self, time_unix_usec: int, time_boot_ms: int, force_mavlink1: bool = False) -> None:
+        """
+        The system time is the time of the sender's master clock.         This
+        can be emitted by flight controllers, onboard computers, or
+        other components in the MAVLink network.         Components
+        that are using a less reliable time source, such as a battery-
+        backed real time clock, can choose to match their system clock
+        to that of a system that indicates a more recent time.
+        This allows more broadly accurate date stamping of logs, and
+        so on.         If precise time synchronization is needed then
+        use TIMESYNC instead.
+
+        time_unix_usec            : Timestamp (UNIX epoch time). [us] (type:uint64_t)
+        time_boot_ms              : Timestamp (time since system boot). [ms] (type:uint32_t)
+
+        """
+        self.send(self.system_time_encode(time_unix_usec, time_boot_ms), force_mavlink1=force_mavlink1)
+
+    def attitude_encode(self, time_boot_ms: int, roll: float, pitch: float, yaw: float, rollspeed: float, pitchspeed: float, yawspeed: float) -> MAVLink_attitude_message:
+        """
+        The attitude in the aeronautical frame (right-handed, Z-down, Y-right,
+        X-front, ZYX, intrinsic).
+
+        time_boot_ms              : Timestamp (time since system boot). [ms] (type:uint32_t)
+        roll                      : Roll angle (-pi..+pi) [rad] (type:float)
+        pitch                     : Pitch angle (-pi..+pi) [rad] (type:float)
+        yaw                       : Yaw angle (-pi..+pi) [rad] (type:float)
+        rollspeed                 : Roll angular speed [rad/s] (type:float)
+        pitchspeed                : Pitch angular speed [rad/s] (type:float)
+        yawspeed                  : Yaw angular speed [rad/s] (type:float)
+
+        """
+        return MAVLink_attitude_message(time_boot_ms, roll, pitch, yaw, rollspeed, pitchspeed, yawspeed)
+
+    def attitude_send(self, time_boot_ms: int, roll: float, pitch: float, yaw: float, rollspeed: float, pitchspeed: float, yawspeed: float, force_mavlink1: bool = False) -> None:
+        """
+        The attitude in the aeronautical frame (right-handed, Z-down, Y-right,
+        X-front, ZYX, intrinsic).
+
+        time_boot_ms              : Timestamp (time since system boot). [ms] (type:uint32_t)
+        roll                      : Roll angle (-pi..+pi) [rad] (type:float)
+        pitch                     : Pitch angle (-pi..+pi) [rad] (type:float)
+        yaw                       : Yaw angle (-pi..+pi) [rad] (type:float)
+        rollspeed                 : Roll angular speed [rad/s] (type:float)
+        pitchspeed                : Pitch angular speed [rad/s] (type:float)
+        yawspeed                  : Yaw angular speed [rad/s] (type:float)
+
+        """
+        self.send(self.attitude_encode(time_boot_ms, roll, pitch, yaw, rollspeed, pitchspeed, yawspeed), force_mavlink1=force_mavlink1)
+
+    def global_position_int_encode(self, time_boot_ms: int, lat: int, lon: int, alt: int, relative_alt: int, vx: int, vy: int, vz: int, hdg: int) -> MAVLink_global_position_int_message:
+        """
+        The filtered global position (e.g. fused GPS and accelerometers). The
+        position is in GPS-frame (right-handed, Z-up). It is designed
+        as scaled integer message since the resolution of float is not
+        sufficient.
+
+        time_boot_ms              : Timestamp (time since system boot). [ms] (type:uint32_t)
+        lat                       : Latitude, expressed [degE7] (type:int32_t)
+        lon                       : Longitude, expressed [degE7] (type:int32_t)
+        alt                       : Altitude (MSL). Note that virtually all GPS modules provide both WGS84 and MSL. [mm] (type:int32_t)
+        relative_alt              : Altitude above home [mm] (type:int32_t)
+        vx                        : Ground X Speed (Latitude, positive north) [cm/s] (type:int16_t)
+        vy                        : Ground Y Speed (Longitude, positive east) [cm/s] (type:int16_t)
+        vz                        : Ground Z Speed (Altitude, positive down) [cm/s] (type:int16_t)
+        hdg                       : Vehicle heading (yaw angle), 0.0..359.99 degrees. If unknown, set to: UINT16_MAX [cdeg] (type:uint16_t)
+
+        """
+        return MAVLink_global_position_int_message(time_boot_ms, lat, lon, alt, relative_alt, vx, vy, vz, hdg)
+
+    def global_position_int_send(self, time_boot_ms: int, lat: int, lon: int, alt: int, relative_alt: int, vx: int, vy: int, vz: int, hdg: int, force_mavlink1: bool = False) -> None:
+        """
+        The filtered global position (e.g. fused GPS and accelerometers). The
+        position is in GPS-frame (right-handed, Z-up). It is designed
+        as scaled integer message since the resolution of float is not
+        sufficient.
+
+        time_boot_ms              : Timestamp (time since system boot). [ms] (type:uint32_t)
+        lat                       : Latitude, expressed [degE7] (type:int32_t)
+        lon                       : Longitude, expressed [degE7] (type:int32_t)
+        alt                       : Altitude (MSL). Note that virtually all GPS modules provide both WGS84 and MSL. [mm] (type:int32_t)
+        relative_alt              : Altitude above home [mm] (type:int32_t)
+        vx                        : Ground X Speed (Latitude, positive north) [cm/s] (type:int16_t)
+        vy                        : Ground Y Speed (Longitude, positive east) [cm/s] (type:int16_t)
+        vz                        : Ground Z Speed (Altitude, positive down) [cm/s] (type:int16_t)
+        hdg                       : Vehicle heading (yaw angle), 0.0..359.99 degrees. If unknown, set to: UINT16_MAX [cdeg] (type:uint16_t)
+
+        """
+        self.send(self.global_position_int_encode(time_boot_ms, lat, lon, alt, relative_alt, vx, vy, vz, hdg), force_mavlink1=force_mavlink1)
+
+    def vfr_hud_encode(self, airspeed: float, groundspeed: float, heading: int, throttle: int, alt: float, climb: float) -> MAVLink_vfr_hud_message:
+        """
+        Metrics typically displayed on a HUD for fixed wing aircraft.
+
+        airspeed                  : Vehicle speed in form appropriate for vehicle type. For standard aircraft this is typically calibrated airspeed (CAS) or indicated airspeed (IAS) - either of which can be used by a pilot to estimate stall speed. [m/s] (type:float)
+        groundspeed               : Current ground speed. [m/s] (type:float)
+        heading                   : Current heading in compass units (0-360, 0=north). [deg] (type:int16_t)
+        throttle                  : Current throttle setting (0 to 100). [%] (type:uint16_t)
+        alt                       : Current altitude (MSL). [m] (type:float)
+        climb                     : Current climb rate. [m/s] (type:float)
+
+        """
+        return MAVLink_vfr_hud_message(airspeed, groundspeed, heading, throttle, alt, climb)
+
+    def vfr_hud_send(self, airspeed: float, groundspeed: float, heading: int, throttle: int, alt: float, climb: float, force_mavlink1: bool = False) -> None:
+        """
+        Metrics typically displayed on a HUD for fixed wing aircraft.
+
+        airspeed                  : Vehicle speed in form appropriate for vehicle type. For standard aircraft this is typically calibrated airspeed (CAS) or indicated airspeed (IAS) - either of which can be used by a pilot to estimate stall speed. [m/s] (type:float)
+        groundspeed               : Current ground speed. [m/s] (type:float)
+        heading                   : Current heading in compass units (0-360, 0=north). [deg] (type:int16_t)
+        throttle                  : Current throttle setting (0 to 100). [%] (type:uint16_t)
+        alt                       : Current altitude (MSL). [m] (type:float)
+        climb                     : Current climb rate. [m/s] (type:float)
+
+        """
+        self.send(self.vfr_hud_encode(airspeed, groundspeed, heading, throttle, alt, climb), force_mavlink1=force_mavlink1)
+
+    def terrain_report_encode(self, lat: int, lon: int, spacing: int, terrain_height: float, current_height: float, pending: int, loaded: int) -> MAVLink_terrain_report_message:
+        """
+        Streamed from drone to report progress of terrain map download
+        (initiated by TERRAIN_REQUEST), or sent as a response to a
+        TERRAIN_CHECK request. See terrain protocol docs:
+        https://mavlink.io/en/services/terrain.html
+
+        lat                       : Latitude [degE7] (type:int32_t)
+        lon                       : Longitude [degE7] (type:int32_t)
+        spacing                   : grid spacing (zero if terrain at this location unavailable) (type:uint16_t)
+        terrain_height            : Terrain height MSL [m] (type:float)
+        current_height            : Current vehicle height above lat/lon terrain height [m] (type:float)
+        pending                   : Number of 4x4 terrain blocks waiting to be received or read from disk (type:uint16_t)
+        loaded                    : Number of 4x4 terrain blocks in memory (type:uint16_t)
+
+        """
+        return MAVLink_terrain_report_message(lat, lon, spacing, terrain_height, current_height, pending, loaded)
+
+    def terrain_report_send(self, lat: int, lon: int, spacing: int, terrain_height: float, current_height: float, pending: int, loaded: int, force_mavlink1: bool = False) -> None:
+        """
+        Streamed from drone to report progress of terrain map download
+        (initiated by TERRAIN_REQUEST), or sent as a response to a
+        TERRAIN_CHECK request. See terrain protocol docs:
+        https://mavlink.io/en/services/terrain.html
+
+        lat                       : Latitude [degE7] (type:int32_t)
+        lon                       : Longitude [degE7] (type:int32_t)
+        spacing                   : grid spacing (zero if terrain at this location unavailable) (type:uint16_t)
+        terrain_height            : Terrain height MSL [m] (type:float)
+        current_height            : Current vehicle height above lat/lon terrain height [m] (type:float)
+        pending                   : Number of 4x4 terrain blocks waiting to be received or read from disk (type:uint16_t)
+        loaded                    : Number of 4x4 terrain blocks in memory (type:uint16_t)
+
+        """
+        self.send(self.terrain_report_encode(lat, lon, spacing, terrain_height, current_height, pending, loaded), force_mavlink1=force_mavlink1)
+
+    def battery_status_encode(self, id: int, battery_function: int, type: int, temperature: int, voltages: Sequence[int], current_battery: int, current_consumed: int, energy_consumed: int, battery_remaining: int, time_remaining: int = 0, charge_state: int = 0, voltages_ext: Sequence[int] = (0, 0, 0, 0), mode: int = 0, fault_bitmask: int = 0) -> MAVLink_battery_status_message:
+        """
+        Battery information
+
+        id                        : Battery ID (type:uint8_t)
+        battery_function          : Function of the battery (type:uint8_t, values:MAV_BATTERY_FUNCTION)
+        type                      : Type (chemistry) of the battery (type:uint8_t, values:MAV_BATTERY_TYPE)
+        temperature               : Temperature of the battery. INT16_MAX for unknown temperature. [cdegC] (type:int16_t)
+        voltages                  : Battery voltage of cells 1 to 10 (see voltages_ext for cells 11-14). Cells in this field above the valid cell count for this battery should have the UINT16_MAX value. If individual cell voltages are unknown or not measured for this battery, then the overall battery voltage should be filled in cell 0, with all others set to UINT16_MAX. If the voltage of the battery is greater than (UINT16_MAX - 1), then cell 0 should be set to (UINT16_MAX - 1), and cell 1 to the remaining voltage. This can be extended to multiple cells if the total voltage is greater than 2 * (UINT16_MAX - 1). [mV] (type:uint16_t)
+        current_battery           : Battery current, -1: autopilot does not measure the current. Value may overflow/rollover for very high currents (> 327.67A) [cA] (type:int16_t)
+        current_consumed          : Consumed charge, -1: autopilot does not provide consumption estimate [mAh] (type:int32_t)
+        energy_consumed           : Consumed energy, -1: autopilot does not provide energy consumption estimate [hJ] (type:int32_t)
+        battery_remaining         : Remaining battery energy. Values: [0-100], -1: autopilot does not estimate the remaining battery. [%] (type:int8_t)
+        time_remaining            : Remaining battery time, 0: autopilot does not provide remaining battery time estimate [s] (type:int32_t)
+        charge_state              : State for extent of discharge, provided by autopilot for warning or external reactions (type:uint8_t, values:MAV_BATTERY_CHARGE_STATE)
+        voltages_ext              : Battery voltages for cells 11 to 14. Cells above the valid cell count for this battery should have a value of 0, where zero indicates not supported (note, this is different than for the voltages field and allows empty byte truncation). If the measured value is 0 then 1 should be sent instead. [mV] (type:uint16_t)
+        mode                      : Battery mode. Default (0) is that battery mode reporting is not supported or battery is in normal-use mode. (type:uint8_t, values:MAV_BATTERY_MODE)
+        fault_bitmask             : Fault/health indications. These should be set when charge_state is MAV_BATTERY_CHARGE_STATE_FAILED or MAV_BATTERY_CHARGE_STATE_UNHEALTHY (if not, fault reporting is not supported). (type:uint32_t, values:MAV_BATTERY_FAULT)
+
+        """
+        return MAVLink_battery_status_message(id, battery_function, type, temperature, voltages, current_battery, current_consumed, energy_consumed, battery_remaining, time_remaining, charge_state, voltages_ext, mode, fault_bitmask)
+
+    def battery_status_send(self, id: int, battery_function: int, type: int, temperature: int, voltages: Sequence[int], current_battery: int, current_consumed: int, energy_consumed: int, battery_remaining: int, time_remaining: int = 0, charge_state: int = 0, voltages_ext: Sequence[int] = (0, 0, 0, 0), mode: int = 0, fault_bitmask: int = 0, force_mavlink1: bool = False) -> None:
+        """
+        Battery information
+
+        id                        : Battery ID (type:uint8_t)
+        battery_function          : Function of the battery (type:uint8_t, values:MAV_BATTERY_FUNCTION)
+        type                      : Type (chemistry) of the battery (type:uint8_t, values:MAV_BATTERY_TYPE)
+        temperature               : Temperature of the battery. INT16_MAX for unknown temperature. [cdegC] (type:int16_t)
+        voltages                  : Battery voltage of cells 1 to 10 (see voltages_ext for cells 11-14). Cells in this field above the valid cell count for this battery should have the UINT16_MAX value. If individual cell voltages are unknown or not measured for this battery, then the overall battery voltage should be filled in cell 0, with all others set to UINT16_MAX. If the voltage of the battery is greater than (UINT16_MAX - 1), then cell 0 should be set to (UINT16_MAX - 1), and cell 1 to the remaining voltage. This can be extended to multiple cells if the total voltage is greater than 2 * (UINT16_MAX - 1). [mV] (type:uint16_t)
+        current_battery           : Battery current, -1: autopilot does not measure the current. Value may overflow/rollover for very high currents (> 327.67A) [cA] (type:int16_t)
+        current_consumed          : Consumed charge, -1: autopilot does not provide consumption estimate [mAh] (type:int32_t)
+        energy_consumed           : Consumed energy, -1: autopilot does not provide energy consumption estimate [hJ] (type:int32_t)
+        battery_remaining         : Remaining battery energy. Values: [0-100], -1: autopilot does not estimate the remaining battery. [%] (type:int8_t)
+        time_remaining            : Remaining battery time, 0: autopilot does not provide remaining battery time estimate [s] (type:int32_t)
+        charge_state              : State for extent of discharge, provided by autopilot for warning or external reactions (type:uint8_t, values:MAV_BATTERY_CHARGE_STATE)
+        voltages_ext              : Battery voltages for cells 11 to 14. Cells above the valid cell count for this battery should have a value of 0, where zero indicates not supported (note, this is different than for the voltages field and allows empty byte truncation). If the measured value is 0 then 1 should be sent instead. [mV] (type:uint16_t)
+        mode                      : Battery mode. Default (0) is that battery mode reporting is not supported or battery is in normal-use mode. (type:uint8_t, values:MAV_BATTERY_MODE)
+        fault_bitmask             : Fault/health indications. These should be set when charge_state is MAV_BATTERY_CHARGE_STATE_FAILED or MAV_BATTERY_CHARGE_STATE_UNHEALTHY (if not, fault reporting is not supported). (type:uint32_t, values:MAV_BATTERY_FAULT)
+
+        """
+        self.send(self.battery_status_encode(id, battery_function, type, temperature, voltages, current_battery, current_consumed, energy_consumed, battery_remaining, time_remaining, charge_state, voltages_ext, mode, fault_bitmask), force_mavlink1=force_mavlink1)
+
+    def wind_encode(self, direction: float, speed: float, speed_z: float) -> MAVLink_wind_message:
+        """
+        Wind estimation.
+
+        direction                 : Wind direction (that wind is coming from). [deg] (type:float)
+        speed                     : Wind speed in ground plane. [m/s] (type:float)
+        speed_z                   : Vertical wind speed. [m/s] (type:float)
+
+        """
+        return MAVLink_wind_message(direction, speed, speed_z)
+
+    def wind_send(self, direction: float, speed: float, speed_z: float, force_mavlink1: bool = False) -> None:
+        """
+        Wind estimation.
+
+        direction                 : Wind direction (that wind is coming from). [deg] (type:float)
+        speed                     : Wind speed in ground plane. [m/s] (type:float)
+        speed_z                   : Vertical wind speed. [m/s] (type:float)
+
+        """
+        self.send(self.wind_encode(direction, speed, speed_z), force_mavlink1=force_mavlink1)
+
+    def rangefinder_encode(self, distance: float, voltage: float) -> MAVLink_rangefinder_message:
+        """
+        Rangefinder reporting.
+
+        distance                  : Distance. [m] (type:float)
+        voltage                   : Raw voltage if available, zero otherwise. [V] (type:float)
+
+        """
+        return MAVLink_rangefinder_message(distance, voltage)
+
+    def rangefinder_send(self, distance: float, voltage: float, force_mavlink1: bool = False) -> None:
+        """
+        Rangefinder reporting.
+
+        distance                  : Distance. [m] (type:float)
+        voltage                   : Raw voltage if available, zero otherwise. [V] (type:float)
+
+        """
+        self.send(self.rangefinder_encode(distance, voltage), force_mavlink1=force_mavlink1)
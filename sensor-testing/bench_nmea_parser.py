@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Sentences per second of the ways to parse Inertial Sense $PINS1 output.
+
+    legacy       the per-line parser set-time.py and gps-timed.py used: decode,
+                 strip, XOR loop over a str, split into str fields
+    incremental  nmea_parser.SentenceParser.feed on reads of --read-size bytes,
+                 typed PINS1 records, as in a UART read loop
+    batch        nmea_parser.parse_batch on --chunk-mb chunks, one array per field,
+                 as test-uart.py --parse runs over capture files
+
+The input is synthetic 200 Hz INS output with a $GPGGA every 40 sentences,
+some line noise and 1 % corrupted checksums, so all parsers also reject.
+
+Usage:
+    python3 bench_nmea_parser.py --sentences 200000
+"""
+import argparse
+import random
+import sys
+import time
+import os
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "common"))
+
+# custom modules
+import nmea_parser
+
+
+def legacy_parse(line: bytes):
+    """The parse_pins1 of set-time.py before nmea_parser, extended to all fields."""
+    try:
+        text = line.decode("ascii").strip()
+    except UnicodeDecodeError:
+        return None
+    if not text.startswith("$PINS1,"):
+        return None
+    body, star, checksum = text[1:].partition("*")
+    if not star:
+        return None
+    calculated = 0
+    for char in body.encode("ascii"):
+        calculated ^= char
+    try:
+        if calculated != int(checksum[:2], 16):
+            return None
+        tokens = body.split(",")
+        return [float(token) if "." in token else token for token in tokens[1:]]
+    except (ValueError, IndexError):
+        return None
+
+
+def make_stream(count: int) -> bytes:
+    random.seed(1)
+    parts = []
+    for sequence in range(count):
+        sentence = nmea_parser.build_sentence(
+            f"PINS1,{100000 + sequence * 0.005:.3f},2441,0x00040037,0x00000020,"
+            f"{random.uniform(-0.1, 0.1):.4f},{random.uniform(-0.1, 0.1):.4f},{random.uniform(-3, 3):.4f},"
+            f"12.1,0.2,-0.3,27.9512345,-81.6234567,{10 + sequence % 100 * 0.01:.3f},1.5,-2.5,-10.1")
+        if random.random() < 0.01:
+            sentence = sentence.replace(b",2441,", b",2442,")  # checksum no longer matches
+        parts.append(sentence)
+        if sequence % 40 == 0:
+            parts.append(nmea_parser.build_sentence("GPGGA,123519.00,2757.07407,N,08137.40740,W,1,12,0.9,10.1,M,,M,,"))
+        if sequence % 500 == 0:
+            parts.append(bytes(random.getrandbits(8) for _ in range(24)) + b"\n")
+    return b"".join(parts)
+
+
+def bench_legacy(data: bytes):
+    start = time.perf_counter()
+    parsed = sum(legacy_parse(line) is not None for line in data.split(b"\n"))
+    return parsed, time.perf_counter() - start
+
+
+def bench_incremental(data: bytes, read_size: int):
+    parser = nmea_parser.SentenceParser(("PINS1",))
+    start = time.perf_counter()
+    parsed = 0
+    for offset in range(0, len(data), read_size):
+        parsed += len(parser.feed(data[offset:offset + read_size]))
+    return parsed, time.perf_counter() - start
+
+
+def bench_batch(data: bytes, chunk_size: int):
+    nmea_parser.parse_batch(data[:4096])  # import numpy outside the measurement
+    start = time.perf_counter()
+    parsed = 0
+    carry = b""
+    for offset in range(0, len(data), chunk_size):
+        chunk = carry + data[offset:offset + chunk_size]
+        cut = chunk.rfind(b"\n") + 1
+        parsed += len(nmea_parser.parse_batch(chunk[:cut]).get("PINS1", {}).get("tow", ()))
+        carry = chunk[cut:]
+    return parsed, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the $PINS1 parsers.")
+    parser.add_argument("--sentences", type=int, default=200000, help="$PINS1 sentences in the test stream")
+    parser.add_argument("--read-size", type=int, default=4096, help="Bytes per feed() of the incremental parser")
+    parser.add_argument("--chunk-mb", type=float, default=4, help="Chunk size of the batch parser")
+    args = parser.parse_args()
+
+    data = make_stream(args.sentences)
+    print(f"{args.sentences} $PINS1, {len(data) / 1e6:.1f} MB")
+    results = {
+        "legacy": bench_legacy(data),
+        "incremental": bench_incremental(data, args.read_size),
+        "batch": bench_batch(data, int(args.chunk_mb * (1 << 20))),
+    }
+    expected = results["legacy"][0]
+    for name, (parsed, elapsed) in results.items():
+        check = "" if parsed == expected else f"  MISMATCH ({expected} expected)"
+        print(f"{name:<12} {parsed:8d} parsed {elapsed:7.3f} s {parsed / elapsed:10.0f} sentences/s"
+              f" {len(data) / elapsed / 1e6:7.1f} MB/s{check}")
+
+
+if __name__ == "__main__":
+    main()
@@ -46,21 +46,14 @@ trigger_shutter() {
     done
 }
 
-# Function for development test mode
+# Function for development test mode: fire the camera on every CUBE trigger.
+# system-services/cam-trigger.py waits for edge events instead of polling the pin
+# and queues back-to-back triggers instead of missing them during a shot.
+# Run by hand it logs to ~/camera-triggers.csv, only cam-trigger.service can
+# create /var/lib/oi-cm4-toolkit.
 devtest() {
     echo "Waiting for CUBE photo trigger command..."
-    while true; do
-        if [[ $(gpio read $TRIGGER_PIN) -eq 0 ]]; then
-            echo "GPIO $TRIGGER_PIN triggered, shuttering cam..."
-            trigger_shutter 1
-            # Wait for the GPIO to go HIGH before continuing to avoid multiple triggers
-            while [[ $(gpio read $TRIGGER_PIN) -eq 0 ]]; do
-                sleep 0.1
-            done
-            echo "resetting..."
-        fi
-        sleep 0.1  # Polling interval
-    done
+    exec python3 "$(dirname "$(readlink -f "$0")")/../system-services/cam-trigger.py"
 }
 
 # Main logic to handle command-line arguments
@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+Geotag photos from the camera trigger log.
+
+cam-trigger.py logs every shutter press with its UTC time and the aircraft
+state interpolated at that instant. This matches the photos of a flight to
+those rows by time, instead of searching the EXIF times in the whole
+telemetry CSV one photo at a time:
+
+  - the capture time of every photo is read from its EXIF header
+    (DateTimeOriginal + SubSecTimeOriginal, only the first EXIF_READ_SIZE
+    bytes of each file are read)
+  - the camera clock offset (camera clock minus UTC, time zone and drift
+    included) is given with --offset or estimated: the offset between one of
+    the first photos and one of the first shutter presses that lines up the
+    most photos wins, then it is refined by the median residual
+  - the shutter times are sorted once and every photo is placed with one
+    np.searchsorted call, each photo takes the nearest press within
+    --max-gap, and each press goes to its closest photo: O(n log n) overall
+  - rows logged without telemetry (mavlink-reader was not running) can be
+    filled from a mission telemetry CSV with --telemetry
+
+The output CSV has one row per photo. --exiftool writes the GPS tags in the
+layout `exiftool -csv=FILE DIR` applies to the images.
+
+Usage:
+    python3 geotag-photos.py /media/usb/DCIM /var/lib/oi-cm4-toolkit/camera-triggers.csv -o geotags.csv
+    python3 geotag-photos.py DCIM camera-triggers.csv --offset -14400 --exiftool exif.csv
+    python3 geotag-photos.py --simulate 5000       # synthetic flight, no photos needed
+"""
+import argparse
+import csv
+import os
+import random
+import struct
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "common"))
+
+# custom modules
+import telemetry_ring
+
+PHOTO_DIR = "/media/usb/DCIM"
+PHOTO_EXTENSIONS = (".jpg", ".jpeg")
+EXIF_READ_SIZE = 131072         # bytes read per photo, the EXIF segment is at the start of the file
+MAX_GAP = 1.0                   # seconds between a photo and its shutter press, after the offset
+OFFSET_CANDIDATES = 8           # first photos x first presses tried by the offset estimate
+
+EXIF_IFD_POINTER = 0x8769
+TAG_DATETIME = 0x0132
+TAG_DATETIME_ORIGINAL = 0x9003
+TAG_SUBSEC_ORIGINAL = 0x9291
+
+TELEMETRY_COLUMNS = ("lat", "lon", "alt", "relative_alt", "agl", "roll", "pitch", "yaw")
+
+
+def _tiff_time(tiff: bytes):
+    """Capture time from the TIFF structure of an EXIF segment, as unix time of the camera clock."""
+    endian = "<" if tiff[:2] == b"II" else ">"
+    entry = struct.Struct(endian + "HHI4s")
+
+    def ifd(offset: int) -> dict:
+        count = struct.unpack_from(endian + "H", tiff, offset)[0]
+        return {tag: (kind, length, raw) for tag, kind, length, raw in
+                (entry.unpack_from(tiff, offset + 2 + i * entry.size) for i in range(count))}
+
+    def text(item) -> str:
+        kind, length, raw = item
+        if kind != 2:
+            return ""
+        value = raw[:length] if length <= 4 else tiff[struct.unpack(endian + "I", raw)[0]:][:length]
+        return value.split(b"\0")[0].decode("ascii", "replace").strip()
+
+    ifd0 = ifd(struct.unpack_from(endian + "I", tiff, 4)[0])
+    exif = ifd(struct.unpack(endian + "I", ifd0[EXIF_IFD_POINTER][2])[0]) if EXIF_IFD_POINTER in ifd0 else {}
+    stamp = text(exif[TAG_DATETIME_ORIGINAL]) if TAG_DATETIME_ORIGINAL in exif else \
+        text(ifd0[TAG_DATETIME]) if TAG_DATETIME in ifd0 else ""
+    if not stamp:
+        return None
+    seconds = datetime.strptime(stamp, "%Y:%m:%d %H:%M:%S").replace(tzinfo=timezone.utc).timestamp()
+    subsec = text(exif[TAG_SUBSEC_ORIGINAL]) if TAG_SUBSEC_ORIGINAL in exif else ""
+    return seconds + (float("0." + subsec) if subsec.isdigit() else 0.0)
+
+
+def read_exif_time(path: str):
+    """
+    Capture time of a JPEG.
+
+    Returns:
+        float: Unix time of the camera clock (the camera's local time read as UTC), None without EXIF
+    """
+    with open(path, "rb") as f:
+        data = f.read(EXIF_READ_SIZE)
+    if data[:2] != b"\xff\xd8":
+        return None
+    pos = 2
+    while pos + 4 <= len(data) and data[pos] == 0xFF:
+        marker = data[pos + 1]
+        length = int.from_bytes(data[pos + 2:pos + 4], "big")
+        if marker == 0xE1 and data[pos + 4:pos + 10] == b"Exif\0\0":
+            try:
+                return _tiff_time(data[pos + 10:pos + 2 + length])
+            except (struct.error, KeyError, ValueError):
+                return None
+        if marker == 0xDA:  # start of the image data, no EXIF before it
+            return None
+        pos += 2 + length
+    return None
+
+
+def load_photos(directory: str):
+    """
+    Returns:
+        tuple: (paths, camera clock times) of the photos with an EXIF time, sorted by time
+    """
+    photos = []
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if name.lower().endswith(PHOTO_EXTENSIONS):
+                path = os.path.join(root, name)
+                taken = read_exif_time(path)
+                if taken is None:
+                    print(f"{path}: no EXIF capture time, skipped", file=sys.stderr)
+                else:
+                    photos.append((taken, path))
+    photos.sort()
+    return [path for _, path in photos], np.array([taken for taken, _ in photos], dtype=np.float64)
+
+
+def load_trigger_log(path: str, kind: str = "shutter") -> dict:
+    """
+    The rows of one kind of a cam-trigger.py log as columns.
+
+    Returns:
+        dict: number, unix_time, the TELEMETRY_COLUMNS (nan where empty) and telemetry, as numpy arrays
+    """
+    with open(path, newline="") as f:
+        rows = [row for row in csv.DictReader(f) if row["kind"] == kind]
+    columns = {
+        "number": np.array([int(row["number"]) for row in rows], dtype=np.int64),
+        "unix_time": np.array([float(row["unix_time"]) for row in rows], dtype=np.float64),
+        "telemetry": np.array([row["telemetry"] for row in rows], dtype=object),
+    }
+    for name in TELEMETRY_COLUMNS:
+        columns[name] = np.array([float(row[name]) if row[name] else np.nan for row in rows], dtype=np.float64)
+    return columns
+
+
+def fill_from_telemetry(events: dict, path: str) -> int:
+    """
+    Interpolate the rows logged without telemetry from a mission telemetry CSV (mavlink-reader.py).
+
+    The CSV has no altitude or vertical speed, alt and relative_alt stay empty.
+
+    Returns:
+        int: Rows filled
+    """
+    missing = np.flatnonzero(events["telemetry"] == "none")
+    if not len(missing):
+        return 0
+    with open(path, newline="") as f:
+        rows = [row for row in csv.DictReader(f) if float(row.get("position_time") or 0)]
+    if not rows:
+        return 0
+    column = lambda name: np.array([float(row.get(name) or "nan") for row in rows], dtype=np.float64)
+    times = column("position_time")
+    order = np.argsort(times, kind="stable")
+    nan = np.full(len(rows), np.nan)
+    zero = np.zeros(len(rows))
+    position = np.column_stack((column("lat"), column("lon"), nan, nan, column("vn"), column("ve"), zero,
+                                column("agl")))[order]
+    attitude = np.column_stack((column("roll"), column("pitch"), column("heading"), zero, zero, zero))[order]
+    query = events["unix_time"][missing]
+    rows_position, _, extrapolated = telemetry_ring.position_at(times[order], position, query)
+    rows_attitude, _, _ = telemetry_ring.attitude_at(times[order], attitude, query)
+    for i, name in enumerate(telemetry_ring.FIELDS[telemetry_ring.POSITION]):
+        if name in events:
+            events[name][missing] = rows_position[:, i]
+    for i, name in enumerate(("roll", "pitch", "yaw")):
+        events[name][missing] = rows_attitude[:, i]
+    events["telemetry"][missing] = np.where(extrapolated, "csv-extrapolated", "csv-interpolated")
+    return len(missing)
+
+
+def match(photo_times, event_times, max_gap: float = MAX_GAP):
+    """
+    Nearest event for every photo, one photo per event.
+
+    Args:
+        photo_times: Photo times on the event clock
+        event_times: Event times, any order
+
+    Returns:
+        tuple: (index into event_times or -1 per photo, photo time minus event time)
+    """
+    photo_times = np.asarray(photo_times, dtype=np.float64)
+    event_times = np.asarray(event_times, dtype=np.float64)
+    matched = np.full(len(photo_times), -1, dtype=np.int64)
+    dt = np.full(len(photo_times), np.nan)
+    if not len(event_times) or not len(photo_times):
+        return matched, dt
+    order = np.argsort(event_times, kind="stable")
+    times = event_times[order]
+    right = np.clip(np.searchsorted(times, photo_times), 0, len(times) - 1)
+    left = np.maximum(right - 1, 0)
+    nearest = np.where(np.abs(photo_times - times[left]) <= np.abs(times[right] - photo_times), left, right)
+    gap = photo_times - times[nearest]
+    candidates = np.flatnonzero(np.abs(gap) <= max_gap)
+    # several photos on one event: the closest keeps it
+    ranked = candidates[np.lexsort((np.abs(gap[candidates]), nearest[candidates]))]
+    _, first = np.unique(nearest[ranked], return_index=True)
+    winners = ranked[first]
+    matched[winners] = order[nearest[winners]]
+    dt[winners] = gap[winners]
+    return matched, dt
+
+
+def estimate_offset(camera_times, event_times, max_gap: float = MAX_GAP) -> float:
+    """
+    Camera clock minus event clock that lines up the most photos with events.
+
+    Every pairing of one of the first OFFSET_CANDIDATES photos with one of the
+    first OFFSET_CANDIDATES events is a candidate offset, each is scored by
+    match(), the best is refined by the median residual of its matches.
+    """
+    camera_times = np.sort(np.asarray(camera_times, dtype=np.float64))
+    event_times = np.sort(np.asarray(event_times, dtype=np.float64))
+    best, best_score = 0.0, (-1, 0.0)
+    for photo in camera_times[:OFFSET_CANDIDATES]:
+        for event in event_times[:OFFSET_CANDIDATES]:
+            offset = photo - event
+            matched, dt = match(camera_times - offset, event_times, max_gap)
+            score = (int((matched >= 0).sum()), -float(np.nansum(np.abs(dt))))
+            if score > best_score:
+                best, best_score = offset, score
+    matched, dt = match(camera_times - best, event_times, max_gap)
+    return best + float(np.median(dt[matched >= 0])) if (matched >= 0).any() else best
+
+
+def write_geotags(path: str, photos: list, photo_times, offset: float, events: dict, matched, dt):
+    fields = ("photo", "camera_time", "utc", "trigger", "time_difference", *TELEMETRY_COLUMNS, "telemetry")
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(fields)
+        for photo, taken, index, gap in zip(photos, photo_times, matched, dt):
+            utc = taken - offset
+            row = [photo, f"{taken:.3f}", datetime.fromtimestamp(utc, timezone.utc).isoformat()]
+            if index < 0:
+                writer.writerow(row + [""] * (len(fields) - len(row) - 1) + ["unmatched"])
+                continue
+            row += [int(events["number"][index]), f"{gap:+.3f}"]
+            for name in TELEMETRY_COLUMNS:
+                value = events[name][index]
+                row.append("" if np.isnan(value) else f"{value:.7f}" if name in ("lat", "lon") else f"{value:.3f}")
+            writer.writerow(row + [events["telemetry"][index]])
+
+
+def write_exiftool(path: str, photos: list, events: dict, matched):
+    """GPS tags per photo as `exiftool -csv=path DIR` reads them."""
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(("SourceFile", "GPSLatitude", "GPSLatitudeRef", "GPSLongitude", "GPSLongitudeRef",
+                         "GPSAltitude", "GPSAltitudeRef", "GPSImgDirection", "GPSImgDirectionRef"))
+        for photo, index in zip(photos, matched):
+            if index < 0 or np.isnan(events["lat"][index]):
+                continue
+            lat, lon, alt, yaw = (events[name][index] for name in ("lat", "lon", "alt", "yaw"))
+            writer.writerow((photo, f"{abs(lat):.7f}", "N" if lat >= 0 else "S", f"{abs(lon):.7f}",
+                             "E" if lon >= 0 else "W", "" if np.isnan(alt) else f"{abs(alt):.2f}",
+                             "" if np.isnan(alt) else int(alt < 0), "" if np.isnan(yaw) else f"{yaw:.1f}",
+                             "" if np.isnan(yaw) else "T"))
+
+
+def simulate(count: int, max_gap: float):
+    """
+    Geotag a synthetic flight: `count` shutter presses 0.8-3 s apart on a
+    track north at 20 m/s, photos taken 80 +-20 ms after the press on a
+    camera clock 4 h behind UTC, 3% of the presses without a photo and 1%
+    photos without a press. The result goes through write_geotags() and
+    write_exiftool() and the geotag CSV is checked against the track.
+    """
+    random.seed(1)
+    press = 1.7e9 + np.cumsum([random.uniform(0.8, 3.0) for _ in range(count)])
+    lat = 27.95 + np.degrees(20.0 * (press - press[0]) / telemetry_ring.EARTH_RADIUS_M)
+    events = {"number": np.arange(1, count + 1), "unix_time": press,
+              "telemetry": np.full(count, "interpolated", dtype=object)}
+    events.update({name: np.zeros(count) for name in TELEMETRY_COLUMNS})
+    events.update(lat=lat, lon=np.full(count, -81.62), alt=np.full(count, 120.0), agl=np.full(count, 100.0))
+    true_event, camera = [], []
+    for i, t in enumerate(press):
+        if random.random() >= 0.03:
+            camera.append(t + random.gauss(0.08, 0.02) - 14400.0)
+            true_event.append(i)
+    for _ in range(count // 100):
+        camera.append(random.uniform(press[0], press[-1]) - 14400.0)
+        true_event.append(-1)
+    order = np.argsort(camera)
+    camera = np.array(camera)[order]
+    true_event = np.array(true_event)[order]
+
+    start = time.perf_counter()
+    offset = estimate_offset(camera, press, max_gap)
+    estimated = time.perf_counter() - start
+    start = time.perf_counter()
+    matched, dt = match(camera - offset, press, max_gap)
+    matching = time.perf_counter() - start
+
+    photos = [f"IMG_{i:05d}.JPG" for i in range(len(camera))]
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        write_geotags(os.path.join(tmp, "geotags.csv"), photos, camera, offset, events, matched, dt)
+        write_exiftool(os.path.join(tmp, "exif.csv"), photos, events, matched)
+        writing = time.perf_counter() - start
+        with open(os.path.join(tmp, "geotags.csv"), newline="") as f:
+            written = list(csv.DictReader(f))
+
+    real = true_event >= 0
+    correct = int((matched[real] == true_event[real]).sum())
+    # geotag rows of the correctly matched photos carry the latitude of their press
+    tagged = [(float(row["lat"]), lat[index]) for row, index, truth in zip(written, matched, true_event)
+              if index >= 0 and index == truth]
+    lat_error = max((abs(a - b) for a, b in tagged), default=0.0)
+    wrong = int(((matched >= 0) & (matched != true_event)).sum())
+    unmatched_real = int((matched[real] < 0).sum())
+    print(f"{count} presses, {int(real.sum())} photos + {int((~real).sum())} spurious")
+    print(f"offset estimated {offset:+.3f} s (true -14399.920 s mean) in {estimated * 1000:.0f} ms")
+    print(f"matched in {matching * 1000:.1f} ms ({len(camera) / matching:,.0f} photos/s): {correct} correct, "
+          f"{wrong} wrong, {unmatched_real} real photos unmatched, residual {np.nanstd(dt) * 1000:.1f} ms rms")
+    print(f"{len(written)} geotag rows written in {writing * 1000:.0f} ms, latitude error {lat_error:.1e} deg")
+    if correct < real.sum() * 0.99:
+        print("FAIL: fewer than 99% of the photos matched to their press")
+        sys.exit(1)
+    if len(written) != len(camera) or lat_error > 1e-7:
+        print("FAIL: geotag CSV does not match the track")
+        sys.exit(1)
+    print("OK")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Geotag photos from the camera trigger log.")
+    parser.add_argument("photos", nargs="?", default=PHOTO_DIR, help="Directory with the photos (searched recursively)")
+    parser.add_argument("trigger_log", nargs="?", help="camera-triggers.csv written by cam-trigger.py")
+    parser.add_argument("-o", "--output", default="geotags.csv", help="Geotag CSV, one row per photo")
+    parser.add_argument("--exiftool", metavar="FILE", help="Also write the GPS tags for exiftool -csv=FILE")
+    parser.add_argument("--offset", default="auto",
+                        help="Camera clock minus UTC in seconds (e.g. -14400 for a camera on EDT), or auto")
+    parser.add_argument("--max-gap", type=float, default=MAX_GAP, help="Seconds between a photo and its press")
+    parser.add_argument("--triggers", action="store_true",
+                        help="Match to trigger rows instead of shutter rows (cam-trigger.py --log-only)")
+    parser.add_argument("--telemetry", metavar="CSV", help="Mission telemetry CSV for rows logged without telemetry")
+    parser.add_argument("--simulate", type=int, metavar="N", help="Geotag a synthetic flight of N presses")
+    args = parser.parse_args()
+
+    if args.simulate:
+        simulate(args.simulate, args.max_gap)
+        return
+    if not args.trigger_log:
+        parser.error("trigger_log is required unless --simulate is given")
+
+    events = load_trigger_log(args.trigger_log, "trigger" if args.triggers else "shutter")
+    photos, camera_times = load_photos(args.photos)
+    print(f"{len(photos)} photos, {len(events['unix_time'])} {'trigger' if args.triggers else 'shutter'} rows")
+    if not len(photos) or not len(events["unix_time"]):
+        sys.exit(1)
+    if args.telemetry:
+        print(f"{fill_from_telemetry(events, args.telemetry)} rows filled from {args.telemetry}")
+
+    offset = estimate_offset(camera_times, events["unix_time"], args.max_gap) if args.offset == "auto" \
+        else float(args.offset)
+    matched, dt = match(camera_times - offset, events["unix_time"], args.max_gap)
+    count = int((matched >= 0).sum())
+    print(f"camera clock offset {offset:+.3f} s{' (estimated)' if args.offset == 'auto' else ''}, "
+          f"{count} of {len(photos)} photos matched"
+          + (f", residual {np.nanstd(dt) * 1000:.0f} ms rms" if count else ""))
+    write_geotags(args.output, photos, camera_times, offset, events, matched, dt)
+    print(f"Geotags written to {args.output}")
+    if args.exiftool:
+        write_exiftool(args.exiftool, photos, events, matched)
+        print(f"exiftool tags written to {args.exiftool}: exiftool -csv={args.exiftool} {args.photos}")
+
+
+if __name__ == "__main__":
+    main()
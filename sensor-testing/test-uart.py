@@ -1,55 +1,348 @@
 #!/usr/bin/env python3
+"""
+Read from a UART: print lines (default), or capture at full rate.
+
+Line mode prints what arrives, as before. It is meant for a quick look at a
+slow port: one print per line cannot keep up with 921600 baud and mangles
+binary protocols.
+
+Capture mode (--capture FILE, --stats or --decode) reads large blocks into one
+preallocated buffer and never prints per line:
+
+  - every read is appended to FILE as a record: unix time of the read,
+    length and the raw bytes (common/uart_capture.py), FILE rotates at
+    --rotate-mb into FILE.1 ... FILE.<--keep>
+  - byte and line rates are printed once per STATS_INTERVAL
+  - --decode nmea|pins|hex shows the newest decoded sentences once per
+    interval, so a fast port never waits on the terminal
+
+--parse FILE checks and decodes a capture with the vectorized parser of
+common/nmea_parser.py and prints the sentence counts and time span.
+
+--self-test writes synthetic $PINS1/NMEA through a pty at the given baud rate,
+captures it and checks that every byte and every sentence arrived.
+
+Usage:
+    python3 test-uart.py ttyAMA0 921600
+    python3 test-uart.py ttyAMA0 921600 --capture ins.cap --decode pins
+    python3 test-uart.py --parse ins.cap
+    python3 test-uart.py --self-test 921600 --duration 10
+"""
 import argparse
-import serial
+import hashlib
+import io
+import os
+import pty
+import select
 import sys
+import tempfile
+import threading
+import time
+
+import serial
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "common"))
+
+# custom modules
+import nmea_parser
+import uart_capture
+
+CHUNK_SIZE = 65536              # bytes, size of the preallocated read buffer
+STATS_INTERVAL = 1.0            # seconds between statistics/decode lines
+
+
+def open_serial(device: str, baudrate: int, timeout=0.5) -> serial.Serial:
+    ser = serial.Serial(
+        port=device,
+        baudrate=baudrate,
+        bytesize=serial.EIGHTBITS,
+        parity=serial.PARITY_NONE,
+        stopbits=serial.STOPBITS_ONE,
+        timeout=timeout,
+        xonxoff=False,  # Disable software flow control
+        rtscts=False,   # Disable hardware (RTS/CTS) flow control
+        dsrdtr=False    # Disable hardware (DSR/DTR) flow control
+    )
+    ser.reset_input_buffer()
+    return ser
+
+
+class Decoder:
+    """Parses the byte stream into sentences and keeps the newest of each type for display."""
+
+    def __init__(self, mode: str):
+        self.mode = mode
+        self.parser = nmea_parser.SentenceParser(("PINS1", "PINS2") if mode == "pins" else None)
+        self.latest = {}     # sentence type -> newest record
+        self.counts = {}     # sentence type -> count
+        self.head = b""      # hex mode: start of the newest read
+
+    def feed(self, data: memoryview):
+        if self.mode == "hex":
+            self.head = bytes(data[:32])
+            return
+        for record in self.parser.feed(data):
+            self.counts[record.kind] = self.counts.get(record.kind, 0) + 1
+            self.latest[record.kind] = record
+
+    def render(self) -> list:
+        if self.mode == "hex":
+            return [f"  {self.head.hex(' ')}"] if self.head else []
+        out = []
+        for kind in sorted(self.latest):
+            record = self.latest[kind]
+            if kind in ("PINS1", "PINS2"):
+                out.append(f"  {kind} x{self.counts[kind]}: tow={record.tow} week={record.week} "
+                           f"status=0x{record.ins_status or 0:08X} lat={record.lat} lon={record.lon} alt={record.alt}")
+            elif isinstance(record, nmea_parser.Sentence):
+                out.append(f"  {kind} x{self.counts[kind]}: {','.join(record.fields[:7])}")
+            else:
+                values = [f"{name}={value}" for name, value in zip(record._fields[:7], record) if value is not None]
+                out.append(f"  {kind} x{self.counts[kind]}: {' '.join(values)}")
+        if self.parser.bad_checksum:
+            out.append(f"  bad checksums: {self.parser.bad_checksum}")
+        self.latest.clear()
+        return out
+
+
+class CaptureStats:
+    def __init__(self):
+        self.bytes = self.lines = self.reads = 0
+        self.period_bytes = self.period_lines = self.period_reads = self.max_read = 0
+        self.started = self.period_start = time.monotonic()
+
+    def add(self, buffer: bytearray, n: int):
+        lines = buffer.count(b"\n", 0, n)
+        self.bytes += n
+        self.lines += lines
+        self.reads += 1
+        self.period_bytes += n
+        self.period_lines += lines
+        self.period_reads += 1
+        self.max_read = max(self.max_read, n)
+
+    def report(self) -> str:
+        now = time.monotonic()
+        elapsed = max(now - self.period_start, 1e-9)
+        line = (f"{self.period_bytes / elapsed / 1000:8.1f} kB/s {self.period_lines / elapsed:7.0f} lines/s "
+                f"{self.period_reads / elapsed:6.0f} reads/s  max read {self.max_read:5d} B  "
+                f"total {self.bytes / 1e6:.2f} MB")
+        self.period_bytes = self.period_lines = self.period_reads = self.max_read = 0
+        self.period_start = now
+        return line
+
+
+def capture(ser: serial.Serial, writer: uart_capture.CaptureWriter = None, decoder: Decoder = None,
+            show_stats: bool = True, duration: float = None, stop: threading.Event = None) -> CaptureStats:
+    """
+    Read the port in blocks until interrupted, the duration ends or stop is set.
+
+    The bytes go straight from the kernel into a preallocated buffer
+    (FileIO.readinto on the port's non-blocking fd), nothing is decoded or
+    allocated per line on this path.
+    """
+    buffer = bytearray(CHUNK_SIZE)
+    view = memoryview(buffer)
+    port = io.FileIO(ser.fileno(), "rb", closefd=False)
+    poller = select.poll()
+    poller.register(ser.fileno(), select.POLLIN)
+    stats = CaptureStats()
+    next_report = time.monotonic() + STATS_INTERVAL
+    end = time.monotonic() + duration if duration else None
+    while not (stop and stop.is_set()):
+        if poller.poll(100):
+            n = port.readinto(view)
+            if n:
+                timestamp = time.time()
+                stats.add(buffer, n)
+                if writer:
+                    writer.write(timestamp, view[:n])
+                if decoder:
+                    decoder.feed(view[:n])
+        now = time.monotonic()
+        if now >= next_report:
+            next_report = now + STATS_INTERVAL
+            if show_stats:
+                print(stats.report(), file=sys.stderr, flush=True)
+            if decoder:
+                output = decoder.render()
+                if output:
+                    print("\n".join(output), flush=True)
+        if end and now >= end:
+            break
+    if writer:
+        writer.flush()
+    return stats
+
+
+def print_lines(ser: serial.Serial):
+    """The original line mode: print each line as it arrives."""
+    while True:
+        data = ser.readline()
+        if data:
+            # Attempt to decode data as UTF-8 text; replace invalid characters
+            try:
+                text = data.decode("utf-8", errors="replace")
+                print(text, end="", flush=True)
+            except Exception as decode_err:
+                print(f"\nError decoding data: {decode_err}")
+
+
+def parse_file(path: str):
+    """Check and decode a capture file in vectorized chunks, print what it contains."""
+    start = time.monotonic()
+    result = nmea_parser.parse_capture(path, kinds=("PINS1", "PINS2", "GGA", "RMC", "ZDA"))
+    elapsed = time.monotonic() - start
+    stats = result["_stats"]
+    print(f"{path}: {stats['sentences']} sentences, {stats['bad_checksum']} bad checksums, "
+          f"{stats['other']} other, parsed in {elapsed:.2f} s")
+    for kind, columns in result.items():
+        if kind == "_stats":
+            continue
+        rx_time = columns["rx_time"]
+        span = rx_time[-1] - rx_time[0]
+        rate = f", {(len(rx_time) - 1) / span:.1f} Hz" if span > 0 else ""
+        print(f"  {kind}: {len(rx_time)} over {span:.1f} s{rate}")
+        if "tow" in columns:
+            gaps = (columns["tow"][1:] - columns["tow"][:-1]).max() if len(rx_time) > 1 else 0.0
+            print(f"    week {columns['week'][0]} tow {columns['tow'][0]:.3f} .. {columns['tow'][-1]:.3f}, "
+                  f"largest tow gap {gaps:.3f} s")
+    return result
+
+
+def self_test(baudrate: int, duration: float, decode: str = None):
+    """
+    Capture synthetic INS output written through a pty, paced at the baud rate, and compare it.
+
+    A pty has no baud rate, the writer sleeps to send baudrate / 10 bytes per
+    second (8N1) in 1 ms slices, like the UART would deliver them.
+    """
+    master, slave = pty.openpty()
+    device = os.ttyname(slave)
+    ser = open_serial(device, baudrate, timeout=0)
+    written = hashlib.sha256()
+    sent = [0]
+    pins_sent = [0]
+    stop = threading.Event()
+
+    def writer_thread():
+        sequence = 0
+        pending = b""
+        bytes_per_second = baudrate / 10
+        start = time.monotonic()
+        while True:
+            elapsed = time.monotonic() - start
+            if elapsed >= duration:
+                break
+            due = int(elapsed * bytes_per_second) - sent[0]
+            while len(pending) < due:
+                tow = 100000 + sequence * 0.005
+                pending += nmea_parser.build_sentence(
+                    f"PINS1,{tow:.3f},2441,0x00040037,0x00000020,0.011,-0.023,1.571,12.1,0.2,-0.3,"
+                    f"27.9512345,-81.6234567,{10 + sequence % 100 * 0.01:.3f},1.5,-2.5,-10.1")
+                if sequence % 40 == 0:
+                    pending += nmea_parser.build_sentence(
+                        f"GPGGA,{sequence % 86400:06d}.00,2757.07407,N,08137.40740,W,1,12,0.9,10.1,M,,M,,")
+                sequence += 1
+                pins_sent[0] += 1
+            if due > 0:
+                chunk, pending = pending[:due], pending[due:]
+                os.write(master, chunk)
+                written.update(chunk)
+                sent[0] += len(chunk)
+            time.sleep(0.001)
+        pins_sent[0] -= pending.count(b"$PINS1,")
+        time.sleep(0.5)  # let the reader drain
+        stop.set()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "self-test.cap")
+        cap = uart_capture.CaptureWriter(path)
+        thread = threading.Thread(target=writer_thread, daemon=True)
+        cpu = time.process_time()
+        thread.start()
+        stats = capture(ser, cap, Decoder(decode) if decode else None, stop=stop)
+        cpu = time.process_time() - cpu
+        cap.close()
+        captured = hashlib.sha256()
+        for _, data in uart_capture.read_capture(path):
+            captured.update(data)
+        print("capture parsed with --parse:")
+        parsed = parse_file(path)
+    ser.close()
+    os.close(master)
+
+    rate = sent[0] / duration
+    print(f"wrote {sent[0]} bytes in {duration:.1f} s ({rate / 1000:.1f} kB/s, {baudrate} baud 8N1 = "
+          f"{baudrate / 10 / 1000:.1f} kB/s)")
+    print(f"captured {stats.bytes} bytes in {stats.reads} reads, {stats.lines} lines, "
+          f"CPU {cpu / duration * 100:.1f}% of one core (writer and reader)")
+    if captured.digest() != written.digest():
+        print(f"FAIL: {sent[0] - stats.bytes} bytes missing or different")
+        sys.exit(1)
+    # the last sentence may be cut off by the end of the test
+    pins = len(parsed.get("PINS1", {}).get("tow", ()))
+    if parsed["_stats"]["bad_checksum"] or pins_sent[0] - pins not in (0, 1):
+        print(f"FAIL: {pins} of {pins_sent[0]} $PINS1 parsed, {parsed['_stats']['bad_checksum']} bad checksums")
+        sys.exit(1)
+    print("OK: capture identical to the written stream, every $PINS1 parsed")
+
 
 def main():
     parser = argparse.ArgumentParser(
         description="Read from a UART device at a specified baud rate."
     )
-    parser.add_argument("device", help="UART device (e.g. /dev/ttyAMA0 or ttyAMA5)")
-    parser.add_argument("baudrate", type=int, help="Baud rate (e.g. 115200)")
+    parser.add_argument("device", nargs="?", help="UART device (e.g. /dev/ttyAMA0 or ttyAMA5)")
+    parser.add_argument("baudrate", type=int, nargs="?", help="Baud rate (e.g. 115200)")
+    parser.add_argument("--capture", metavar="FILE", help="Capture the raw stream to FILE (rotating)")
+    parser.add_argument("--stats", action="store_true", help="Block reads with rate statistics, no line printing")
+    parser.add_argument("--decode", choices=("nmea", "pins", "hex"),
+                        help="Show the newest NMEA/$PINS sentences or a hex dump once per second")
+    parser.add_argument("--rotate-mb", type=int, default=uart_capture.ROTATE_MB,
+                        help="Capture file size before rotating")
+    parser.add_argument("--keep", type=int, default=uart_capture.KEEP_FILES, help="Rotated capture files kept")
+    parser.add_argument("--parse", metavar="FILE", help="Check and decode a capture file, then exit")
+    parser.add_argument("--duration", type=float, help="Stop after this many seconds")
+    parser.add_argument("--self-test", action="store_true",
+                        help="Capture synthetic data through a pty at the baud rate and verify it")
     args = parser.parse_args()
 
+    if args.parse:
+        parse_file(args.parse)
+        return
+    if args.baudrate is None and args.device and args.device.isdigit():
+        args.device, args.baudrate = None, int(args.device)  # --self-test 921600
+    if not args.baudrate:
+        parser.error("baudrate is required unless --parse is given")
+    if args.self_test:
+        self_test(args.baudrate, args.duration or 5.0, args.decode)
+        return
+    if not args.device:
+        parser.error("device is required unless --self-test is given")
+
     # Ensure the device string starts with /dev/
     device = args.device if args.device.startswith("/dev/") else f"/dev/{args.device}"
     baudrate = args.baudrate
+    block_mode = args.capture or args.stats or args.decode
 
     try:
-        ser = serial.Serial(
-            port=device,
-            baudrate=baudrate,
-            bytesize=serial.EIGHTBITS,
-            parity=serial.PARITY_NONE,
-            stopbits=serial.STOPBITS_ONE,
-            timeout=0.5,    # Non-blocking read
-            xonxoff=False,  # Disable software flow control
-            rtscts=False,   # Disable hardware (RTS/CTS) flow control
-            dsrdtr=False    # Disable hardware (DSR/DTR) flow control
-        )
-        ser.reset_input_buffer()
-
+        ser = open_serial(device, baudrate, timeout=0 if block_mode else 0.5)
     except Exception as e:
         print(f"Error opening serial port {device}: {e}", file=sys.stderr)
         sys.exit(1)
 
     print(f"Listening on {device} at {baudrate} baud...")
+    writer = uart_capture.CaptureWriter(args.capture, args.rotate_mb << 20, args.keep) if args.capture else None
     try:
-        while True:
-            # Read up to 1024 bytes at a time
-            data = ser.readline()
-            #if data and data.startswith(b'#'):
-            if data:
-                # Attempt to decode data as UTF-8 text; replace invalid characters
-                try:
-                    text = data.decode("utf-8", errors="replace")
-                    print(text, end="", flush=True)
-                    
-                except Exception as decode_err:
-                    print(f"\nError decoding data: {decode_err}")
+        if block_mode:
+            capture(ser, writer, Decoder(args.decode) if args.decode else None, duration=args.duration)
+        else:
+            print_lines(ser)
     except KeyboardInterrupt:
         print("\nExiting...")
     finally:
+        if writer:
+            writer.close()
         ser.close()
 
 if __name__ == "__main__":
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Monitor several UARTs at once from one selector loop.
+
+Every port is opened at its own baud rate, read non-blocking whenever the
+selector reports data, and split into lines that are printed interleaved
+with a timestamp and the port name. Binary data is shown as hex. There is
+one thread for all ports, output is written once per loop iteration.
+
+Once per STATS_INTERVAL a line per port shows the throughput and the
+driver's error counters (TIOCGICOUNT): framing, parity, hardware overrun
+(UART FIFO) and buffer overrun (tty buffer full, the reader was too slow).
+Counters are shown as "-" where the driver has none (pty, USB adapters).
+
+Usage:
+    python3 uart-monitor.py ttyAMA0:921600 ttyAMA2:921600 ttyAMA3:115200
+    python3 uart-monitor.py --all --baud 921600 --max-lines 5
+    python3 uart-monitor.py --self-test 4 --duration 5
+"""
+import argparse
+import fcntl
+import glob
+import os
+import pty
+import selectors
+import struct
+import sys
+import threading
+import time
+from datetime import datetime
+
+import serial
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "common"))
+
+# custom modules
+from nmea_parser import build_sentence
+
+DEFAULT_BAUD = 921600
+READ_SIZE = 65536               # bytes per os.read
+STATS_INTERVAL = 5.0            # seconds between counter lines
+MAX_LINES = 50                  # lines shown per port and second, the rest only counted
+MAX_LINE = 256                  # bytes, longer runs without newline are flushed as they are
+CM4_PORTS = "/dev/ttyAMA[0-9]*"
+
+TIOCGICOUNT = 0x545D            # linux/asm-generic/ioctls.h
+# struct serial_icounter_struct: cts dsr rng dcd rx tx frame overrun parity brk buf_overrun reserved[9]
+ICOUNTER = struct.Struct("20i")
+ICOUNTER_FIELDS = {"rx": 4, "frame": 6, "overrun": 7, "parity": 8, "brk": 9, "buf_overrun": 10}
+
+
+def read_icounter(fd: int):
+    """Driver error counters of a serial port, None if the driver does not keep them."""
+    try:
+        values = ICOUNTER.unpack(fcntl.ioctl(fd, TIOCGICOUNT, bytes(ICOUNTER.size)))
+    except OSError:
+        return None
+    return {name: values[index] for name, index in ICOUNTER_FIELDS.items()}
+
+
+def printable(line: bytes) -> str:
+    """The line as text, or as hex when it is not printable ASCII."""
+    if all(32 <= b < 127 or b == 9 for b in line):
+        return line.decode("ascii")
+    return "hex " + line.hex(" ")
+
+
+class Port:
+    """One monitored UART: its fd, partial line and counters."""
+
+    def __init__(self, device: str, baud: int):
+        self.device = device
+        self.name = os.path.basename(device)
+        self.baud = baud
+        self.serial = serial.Serial(device, baud, timeout=0)  # configures termios, the fd is non-blocking
+        self.serial.reset_input_buffer()
+        self.fd = self.serial.fileno()
+        self.partial = b""
+        self.bytes = self.lines = self.shown = self.skipped = 0
+        self.period_bytes = self.period_lines = 0
+        self.second = 0               # current second for the display limit
+        self.second_lines = 0
+        self.icount_start = read_icounter(self.fd)
+
+    def errors(self) -> dict:
+        """Error counters since the port was opened, None without driver support."""
+        now = read_icounter(self.fd)
+        if now is None or self.icount_start is None:
+            return None
+        return {name: now[name] - self.icount_start[name] for name in now}
+
+    def close(self):
+        self.serial.close()
+
+
+class UartMonitor:
+    def __init__(self, ports: list, max_lines: int = MAX_LINES, quiet: bool = False, out=None):
+        self.ports = ports
+        self.max_lines = max_lines
+        self.quiet = quiet
+        self.out = out or sys.stdout
+        self.selector = selectors.DefaultSelector()
+        for port in ports:
+            self.selector.register(port.fd, selectors.EVENT_READ, port)
+        self.period_start = time.monotonic()
+
+    def handle(self, port: Port, data: bytes, now: float, output: list):
+        port.bytes += len(data)
+        port.period_bytes += len(data)
+        lines = (port.partial + data).split(b"\n")
+        port.partial = lines.pop()
+        if len(port.partial) > MAX_LINE:
+            lines.append(port.partial)
+            port.partial = b""
+        port.lines += len(lines)
+        port.period_lines += len(lines)
+        if self.quiet:
+            return
+        second = int(now)
+        if second != port.second:
+            port.second, port.second_lines = second, 0
+        stamp = None
+        for line in lines:
+            if port.second_lines >= self.max_lines:
+                port.skipped += 1
+                continue
+            port.second_lines += 1
+            port.shown += 1
+            if stamp is None:
+                stamp = datetime.fromtimestamp(now).strftime("%H:%M:%S.%f")[:-3]
+            text = printable(line.rstrip(b"\r"))
+            output.append(f"{stamp} {port.name:<9} | {text}\n")
+
+    def report(self) -> str:
+        now = time.monotonic()
+        elapsed = max(now - self.period_start, 1e-9)
+        self.period_start = now
+        lines = []
+        for port in self.ports:
+            errors = port.errors()
+            if errors is None:
+                counters = "frame - parity - overrun - buf_overrun -"
+            else:
+                counters = (f"frame {errors['frame']} parity {errors['parity']} overrun {errors['overrun']} "
+                            f"buf_overrun {errors['buf_overrun']}")
+            lines.append(f"-- {port.name:<9} {port.baud:>7} baud {port.period_bytes / elapsed / 1000:7.1f} kB/s "
+                         f"{port.period_lines / elapsed:6.0f} lines/s  total {port.bytes} B  "
+                         f"skipped {port.skipped}  {counters}\n")
+            port.period_bytes = port.period_lines = 0
+        return "".join(lines)
+
+    def run(self, duration: float = None, stop: threading.Event = None):
+        next_report = time.monotonic() + STATS_INTERVAL
+        end = time.monotonic() + duration if duration else None
+        while not (stop and stop.is_set()):
+            output = []
+            for key, _ in self.selector.select(timeout=0.2):
+                port = key.data
+                try:
+                    data = os.read(port.fd, READ_SIZE)
+                except BlockingIOError:
+                    continue
+                except OSError as e:
+                    output.append(f"-- {port.name}: read error {e}, closing\n")
+                    self.selector.unregister(port.fd)
+                    continue
+                if data:
+                    self.handle(port, data, time.time(), output)
+            now = time.monotonic()
+            if now >= next_report:
+                next_report = now + STATS_INTERVAL
+                output.append(self.report())
+            if output:
+                self.out.write("".join(output))
+                self.out.flush()
+            if end and now >= end:
+                break
+
+    def close(self):
+        self.selector.close()
+        for port in self.ports:
+            port.close()
+
+
+def parse_port(arg: str, default_baud: int) -> tuple:
+    """DEVICE[:BAUD] -> (/dev/DEVICE, baud)."""
+    device, _, baud = arg.partition(":")
+    device = device if device.startswith("/dev/") else f"/dev/{device}"
+    return device, int(baud) if baud else default_baud
+
+
+def self_test(count: int, baud: int, duration: float, max_lines: int):
+    """
+    Monitor `count` ptys fed at `baud` (8N1 pacing) by one writer thread and compare the byte counts.
+    """
+    masters, ports = [], []
+    for _ in range(count):
+        master, slave = pty.openpty()
+        masters.append(master)
+        ports.append(Port(os.ttyname(slave), baud))
+    sent = [0] * count
+    stop = threading.Event()
+
+    def writer():
+        start = time.monotonic()
+        pending = [b""] * count
+        sequence = 0
+        while time.monotonic() - start < duration:
+            due_total = int((time.monotonic() - start) * baud / 10)
+            for i, master in enumerate(masters):
+                due = due_total - sent[i]
+                while len(pending[i]) < due:
+                    pending[i] += build_sentence(f"PINS1,{100000 + sequence * 0.005:.3f},2441,0x00040037,"
+                                                 f"0x00000020,0.011,-0.023,1.571,12.1,0.2,-0.3,"
+                                                 f"27.9512345,-81.6234567,10.123,1.5,-2.5,-10.1")
+                    sequence += 1
+                if due > 0:
+                    os.write(master, pending[i][:due])
+                    pending[i] = pending[i][due:]
+                    sent[i] += due
+            time.sleep(0.001)
+        time.sleep(0.5)
+        stop.set()
+
+    monitor = UartMonitor(ports, max_lines, quiet=max_lines == 0, out=open(os.devnull, "w"))
+    thread = threading.Thread(target=writer, daemon=True)
+    cpu = time.process_time()
+    thread.start()
+    monitor.run(stop=stop)
+    cpu = time.process_time() - cpu
+    ok = True
+    for port, written in zip(ports, sent):
+        status = "OK" if port.bytes == written else "FAIL"
+        ok &= port.bytes == written
+        print(f"{port.name}: wrote {written} B, read {port.bytes} B, {port.lines} lines, "
+              f"{port.shown} shown, {port.skipped} over the display limit  {status}")
+    print(f"{count} ports at {baud} baud ({count * baud / 10 / 1000:.0f} kB/s total) for {duration:.0f} s: "
+          f"CPU {cpu / duration * 100:.1f}% of one core (writer and monitor)")
+    monitor.close()
+    for master in masters:
+        os.close(master)
+    if not ok:
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monitor several UARTs from one selector loop.")
+    parser.add_argument("ports", nargs="*", help="DEVICE[:BAUD], e.g. ttyAMA0:921600 ttyAMA3:115200")
+    parser.add_argument("--baud", type=int, default=DEFAULT_BAUD, help="Baud rate of ports given without one")
+    parser.add_argument("--all", action="store_true", help=f"Monitor every port matching {CM4_PORTS}")
+    parser.add_argument("--max-lines", type=int, default=MAX_LINES,
+                        help="Lines shown per port and second, 0 for counters only")
+    parser.add_argument("--duration", type=float, help="Stop after this many seconds")
+    parser.add_argument("--self-test", type=int, metavar="N", help="Monitor N ptys fed at --baud and verify")
+    args = parser.parse_args()
+
+    if args.self_test:
+        self_test(args.self_test, args.baud, args.duration or 5.0, args.max_lines)
+        return
+
+    specs = [parse_port(arg, args.baud) for arg in args.ports]
+    if args.all:
+        specs += [(device, args.baud) for device in sorted(glob.glob(CM4_PORTS))
+                  if device not in {d for d, _ in specs}]
+    if not specs:
+        parser.error("give at least one port or --all")
+
+    ports = []
+    for device, baud in specs:
+        try:
+            ports.append(Port(device, baud))
+            print(f"Listening on {device} at {baud} baud...")
+        except (serial.SerialException, OSError) as e:
+            print(f"Error opening serial port {device}: {e}", file=sys.stderr)
+    if not ports:
+        sys.exit(1)
+
+    monitor = UartMonitor(ports, args.max_lines, quiet=args.max_lines == 0)
+    try:
+        monitor.run(args.duration)
+    except KeyboardInterrupt:
+        print("\nExiting...")
+    finally:
+        sys.stdout.write(monitor.report())
+        monitor.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Boot timeline of the toolkit services: when each unit started and became ready.
+
+All units are read with one `systemctl show` call. For a Type=notify unit
+"ready" is the READY=1 of the daemon (set-datetime: time valid, mavlink-reader:
+UDP socket bound, gps-timed: UART open, cot-fanout: sinks started), for the
+others it is only when the process was forked. Times are seconds since boot
+(CLOCK_MONOTONIC).
+
+Time to first telemetry and to the first GPS fix are read from the metrics
+endpoints of mavlink-reader and gps-timed, they depend on the flight
+controller and the sky and do not hold up the boot. With --csv the first
+telemetry is the write_monotonic of the first row of a mission log CSV, which
+also works for earlier boots.
+
+Usage:
+    python3 boot-timeline.py
+    python3 boot-timeline.py --csv /path/to/mission/mavlink-data.csv --json > before.json
+    python3 boot-timeline.py --compare before.json
+"""
+import argparse
+import csv
+import json
+import os
+import subprocess
+import urllib.request
+
+UNITS = [
+    "mavlink-router.service",
+    "set-datetime.service",
+    "gps-timed.service",
+    "mavlink-reader.service",
+    "cot-fanout.service",
+    "pytak-client.service",
+    "photogram.service",
+    "quspin-mag.service",
+    "mavlink-mag-forwarder.service",
+]
+PROPERTIES = ["Id", "Type", "ActiveState", "ExecMainStartTimestampMonotonic", "ActiveEnterTimestampMonotonic"]
+TIME_STATUS_FILE = "/run/oi-cm4-toolkit/set-time.json"  # written by set-time.py
+METRICS_URL = "http://127.0.0.1:{port}/metrics"
+FIRST_TELEMETRY_METRIC = (9101, "mavlink_reader_first_telemetry_seconds")  # mavlink-reader.py
+FIRST_FIX_METRIC = (9106, "gps_timed_first_fix_seconds")                   # gps-timed.py
+METRICS_TIMEOUT = 2.0
+
+
+def read_units(units: list) -> dict:
+    """
+    Start and ready times of the units from a single systemctl call.
+
+    Returns:
+        dict: unit -> {"type", "state", "started", "ready"}, times in seconds since boot or None
+    """
+    output = subprocess.run(["systemctl", "show", "--property=" + ",".join(PROPERTIES)] + units,
+                            capture_output=True, text=True, check=True).stdout
+    timeline = {}
+    for block in output.strip().split("\n\n"):
+        props = dict(line.split("=", 1) for line in block.splitlines() if "=" in line)
+        if props.get("Id") not in units:
+            continue
+
+        def seconds(name):
+            usec = int(props.get(name) or 0)
+            return usec / 1e6 if usec else None
+
+        timeline[props["Id"]] = {
+            "type": props.get("Type", ""),
+            "state": props.get("ActiveState", ""),
+            "started": seconds("ExecMainStartTimestampMonotonic"),
+            "ready": seconds("ActiveEnterTimestampMonotonic"),
+        }
+    return timeline
+
+
+def read_metric(port: int, name: str) -> float:
+    """Value of an unlabelled metric of a running daemon, None if it is not running or the value is 0."""
+    try:
+        with urllib.request.urlopen(METRICS_URL.format(port=port), timeout=METRICS_TIMEOUT) as response:
+            text = response.read().decode()
+    except OSError:
+        return None
+    for line in text.splitlines():
+        metric, _, value = line.partition(" ")
+        if metric == name:
+            return float(value) or None
+    return None
+
+
+def first_csv_row_time(path: str) -> float:
+    """write_monotonic of the first row of a mavlink-reader CSV, None if it has no such column."""
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            value = row.get("write_monotonic")
+            return float(value) if value else None
+    return None
+
+
+def collect(args) -> dict:
+    timeline = read_units(UNITS)
+    result = {"units": timeline, "time_valid": None, "first_telemetry": None,
+              "first_fix": read_metric(*FIRST_FIX_METRIC)}
+    if os.path.exists(TIME_STATUS_FILE):
+        with open(TIME_STATUS_FILE) as f:
+            status = json.load(f)
+        result["time_valid"] = status.get("boot_to_valid_time")
+        result["time_source"] = status.get("source")
+    if args.csv:
+        result["first_telemetry"] = first_csv_row_time(args.csv)
+    else:
+        result["first_telemetry"] = read_metric(*FIRST_TELEMETRY_METRIC)
+    return result
+
+
+def fmt(value) -> str:
+    return f"{value:8.2f}" if value is not None else "       -"
+
+
+def print_timeline(result: dict, before: dict = None):
+    print(f"{'unit':<32} {'type':<8} {'started':>8} {'ready':>8}" + (f" {'was':>8}" if before else ""))
+    units = sorted(result["units"].items(), key=lambda item: item[1]["ready"] or float("inf"))
+    for unit, u in units:
+        line = f"{unit:<32} {u['type']:<8} {fmt(u['started'])} {fmt(u['ready'])}"
+        if before:
+            line += " " + fmt(before["units"].get(unit, {}).get("ready"))
+        print(line)
+    print()
+    for key, label in (("time_valid", "valid time"), ("first_telemetry", "first telemetry"),
+                       ("first_fix", "first GPS fix")):
+        line = f"{label:<32} {'':<8} {'':>8} {fmt(result[key])}"
+        if before:
+            line += " " + fmt(before.get(key))
+            if result[key] is not None and before.get(key) is not None:
+                line += f"   {result[key] - before[key]:+.2f} s"
+        print(line)
+    if result.get("time_source"):
+        print(f"time source: {result['time_source']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seconds from boot to start and readiness of the toolkit services.")
+    parser.add_argument("--csv", help="Mission log CSV whose first row marks the first telemetry")
+    parser.add_argument("--json", action="store_true", help="Print JSON (save it for --compare)")
+    parser.add_argument("--compare", help="JSON of an earlier boot to show next to this one")
+    args = parser.parse_args()
+
+    result = collect(args)
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    before = None
+    if args.compare:
+        with open(args.compare) as f:
+            before = json.load(f)
+    print_timeline(result, before)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,581 @@
+#!/usr/bin/env python3
+"""
+Camera trigger daemon.
+
+Waits for the flight controller's camera trigger on a GPIO line and presses
+focus and shutter of the camera, replacing the `cam-control.sh devtest`
+loop that ran `gpio read` every 100 ms:
+
+  - the trigger line is requested from the GPIO character device (libgpiod
+    v2) with edge detection, kernel debounce and the internal pull-up, the
+    process sleeps in poll() until an edge arrives. Every edge carries the
+    kernel's CLOCK_MONOTONIC timestamp of the interrupt, so the trigger time
+    does not depend on when the daemon gets to run.
+  - focus and shutter are sequenced from a schedule in the same loop
+    (FOCUS_LEAD, SHUTTER_HOLD, RECOVERY as in cam-control.sh). Nothing
+    sleeps: triggers that arrive while the camera is busy are timestamped
+    immediately and their shots queued, up to MAX_PENDING.
+  - all lines are active low, as wired: trigger asserted, focus and shutter
+    pressed = line low. A trigger has to be released before the next one
+    counts, like the devtest loop waited for the pin to go high.
+
+Every trigger and every shutter press is appended to the trigger log
+(TRIGGER_LOG, CSV) with its monotonic and UTC time and the aircraft state at
+that instant: position, velocity, attitude and AGL interpolated between the
+samples mavlink-reader.py publishes in the shared telemetry ring
+(common/telemetry_ring.py). The rows are written by a thread apart from the
+event loop, each one once the first samples after its event are in. If none
+arrive within SETTLE_TIMEOUT, the state is dead reckoned from the newest one
+and the row says so. sensor-testing/geotag-photos.py matches the photos to
+the shutter rows afterwards. Counters and the detection latency are on the
+metrics endpoint.
+
+Testing without the camera:
+
+    python3 cam-trigger.py --self-test 20     # in-process mock chip, no GPIO needed
+
+or against the kernel's gpio-sim, which behaves like the real chip:
+
+    sudo modprobe gpio-sim
+    sudo mkdir -p /sys/kernel/config/gpio-sim/cam/bank0
+    echo 28 | sudo tee /sys/kernel/config/gpio-sim/cam/bank0/num_lines
+    echo 1 | sudo tee /sys/kernel/config/gpio-sim/cam/live
+    sudo python3 cam-trigger.py --chip /dev/$(cat /sys/kernel/config/gpio-sim/cam/bank0/chip_name)
+    # assert / release the trigger (BCM 8):
+    echo pull-down | sudo tee /sys/devices/platform/gpio-sim.0/gpiochip*/sim_gpio8/pull
+    echo pull-up | sudo tee /sys/devices/platform/gpio-sim.0/gpiochip*/sim_gpio8/pull
+
+Usage:
+    sudo python3 cam-trigger.py
+    sudo python3 cam-trigger.py --log-only     # timestamp and log triggers, leave the camera alone
+"""
+import argparse
+import csv
+import logging
+import math
+import os
+import queue
+import select
+import sys
+import tempfile
+import threading
+import time
+from collections import deque, namedtuple
+from datetime import datetime, timedelta, timezone
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "common"))
+
+# custom modules
+import metrics
+import sd_notify
+import telemetry_ring
+import toolkit_logging
+
+GPIO_CHIP = "/dev/gpiochip0"
+TRIGGER_LINE = 8                # BCM 8 = wPi 10, camera trigger from the flight controller
+SHUTTER_LINE = 11               # BCM 11 = wPi 14
+FOCUS_LINE = 10                 # BCM 10 = wPi 12
+DEBOUNCE = 0.001                # seconds, kernel debounce of the trigger line
+
+FOCUS_LEAD = 1.0                # seconds focus is held before the shutter
+SHUTTER_HOLD = 1.5              # seconds the shutter is held
+RECOVERY = 1.5                  # seconds after release before the next shot
+MAX_PENDING = 8                 # queued shots, later triggers are only logged
+POLL_TIMEOUT = 1.0              # seconds, upper bound of one poll() for the watchdog
+TRIGGER_LOG = "/var/lib/oi-cm4-toolkit/camera-triggers.csv"  # flight data, outside the git checkout
+USER_TRIGGER_LOG = "~/camera-triggers.csv"  # manual runs (cam-control.sh devtest), only systemd creates TRIGGER_LOG's directory
+SETTLE_TIMEOUT = 0.5            # seconds a log row waits for telemetry after its event before dead reckoning
+SETTLE_POLL = 0.02              # seconds between checks for that telemetry
+METRICS_PORT = 9108             # localhost Prometheus endpoint
+
+CameraEvent = namedtuple("CameraEvent", ("kind", "number", "monotonic", "utc"))  # kind: "trigger" or "shutter"
+
+# trigger log columns, the telemetry column is interpolated, extrapolated (dead reckoned) or none
+LOG_FIELDS = ("kind", "number", "monotonic", "utc", "unix_time",
+              *telemetry_ring.FIELDS[telemetry_ring.POSITION], "roll", "pitch", "yaw",
+              "position_age", "attitude_age", "telemetry")
+LOG_FORMATS = {"lat": "{:.7f}", "lon": "{:.7f}"}  # other telemetry columns: {:.3f}
+
+logger = logging.getLogger("cam_trigger")
+
+
+def utc_of(monotonic: float) -> float:
+    """Unix time of a CLOCK_MONOTONIC time in the recent past."""
+    return time.time() - (time.monotonic() - monotonic)
+
+
+def format_utc(unix_time: float) -> str:
+    return datetime.fromtimestamp(unix_time, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+class GpiodLines:
+    """Trigger input with edge events and the focus/shutter outputs, on a GPIO character device (libgpiod v2)."""
+
+    def __init__(self, chip: str, trigger: int, outputs: tuple, debounce: float = DEBOUNCE):
+        import gpiod
+        from gpiod.line import Bias, Clock, Direction, Edge, Value
+
+        self._active = {True: Value.ACTIVE, False: Value.INACTIVE}
+        self._rising = gpiod.EdgeEvent.Type.RISING_EDGE
+        config = {
+            trigger: gpiod.LineSettings(direction=Direction.INPUT, edge_detection=Edge.BOTH, bias=Bias.PULL_UP,
+                                        active_low=True, debounce_period=timedelta(seconds=debounce),
+                                        event_clock=Clock.MONOTONIC),
+        }
+        if outputs:
+            config[tuple(outputs)] = gpiod.LineSettings(direction=Direction.OUTPUT, active_low=True,
+                                                        output_value=Value.INACTIVE)
+        self.request = gpiod.request_lines(chip, consumer="cam-trigger", config=config)
+        self.fd = self.request.fd
+
+    def read_events(self) -> list:
+        """Pending edges as (asserted, CLOCK_MONOTONIC ns), active_low makes "rising" mean asserted."""
+        return [(event.event_type == self._rising, event.timestamp_ns)
+                for event in self.request.read_edge_events()]
+
+    def set(self, line: int, active: bool):
+        self.request.set_value(line, self._active[active])
+
+    def close(self):
+        self.request.release()
+
+
+class MockLines:
+    """
+    In-process stand-in for the GPIO chip.
+
+    drive_trigger() queues an edge with the current monotonic time and wakes
+    poll() through a pipe, the outputs are recorded in history as
+    (monotonic ns, line, active).
+    """
+
+    def __init__(self):
+        self.fd, self._wake = os.pipe()
+        os.set_blocking(self.fd, False)
+        self._events = deque()
+        self.history = []
+
+    def drive_trigger(self, asserted: bool):
+        self._events.append((asserted, time.monotonic_ns()))
+        os.write(self._wake, b"e")
+
+    def read_events(self) -> list:
+        try:
+            os.read(self.fd, 4096)
+        except BlockingIOError:
+            pass
+        events = []
+        while self._events:
+            events.append(self._events.popleft())
+        return events
+
+    def set(self, line: int, active: bool):
+        self.history.append((time.monotonic_ns(), line, active))
+
+    def close(self):
+        os.close(self.fd)
+        os.close(self._wake)
+
+
+class ShotSequencer:
+    """
+    Focus/shutter sequence of the queued shots, run from the caller's loop.
+
+    run_due() performs every step whose time has come and starts the next
+    queued shot once the camera has recovered, next_due() tells the loop how
+    long it may sleep.
+    """
+
+    def __init__(self, lines, focus_lead: float = FOCUS_LEAD, shutter_hold: float = SHUTTER_HOLD,
+                 recovery: float = RECOVERY, max_pending: int = MAX_PENDING, on_shutter=None):
+        self.lines = lines
+        self.focus_lead = focus_lead
+        self.shutter_hold = shutter_hold
+        self.recovery = recovery
+        self.max_pending = max_pending
+        self.on_shutter = on_shutter  # called with the CameraEvent of each shutter press
+        self.steps = deque()          # (due monotonic, line, active, trigger number) of the running shot
+        self.pending = deque()        # trigger numbers waiting for the camera
+        self.ready_at = 0.0
+        self.shots = 0
+        self.dropped = 0
+
+    def request(self, number: int, now: float) -> bool:
+        """Queue a shot for trigger `number`, False if the queue is full."""
+        if len(self.pending) >= self.max_pending:
+            self.dropped += 1
+            return False
+        self.pending.append(number)
+        self.run_due(now)
+        return True
+
+    def next_due(self):
+        """Monotonic time of the next step, None if there is nothing to do."""
+        if self.steps:
+            return self.steps[0][0]
+        if self.pending:
+            return self.ready_at
+        return None
+
+    def run_due(self, now: float):
+        while True:
+            if self.steps and self.steps[0][0] <= now:
+                _, line, active, number = self.steps.popleft()
+                self.lines.set(line, active)
+                if line == SHUTTER_LINE and active:
+                    pressed = time.monotonic()
+                    self.shots += 1
+                    event = CameraEvent("shutter", number, pressed, utc_of(pressed))
+                    logger.info("Shutter for trigger %d at %s (monotonic %.6f)", number, format_utc(event.utc),
+                                pressed)
+                    if self.on_shutter:
+                        self.on_shutter(event)
+            elif not self.steps and self.pending and now >= self.ready_at:
+                number = self.pending.popleft()
+                release = now + self.focus_lead + self.shutter_hold
+                self.steps.extend(((now, FOCUS_LINE, True, number),
+                                   (now + self.focus_lead, SHUTTER_LINE, True, number),
+                                   (release, SHUTTER_LINE, False, number),
+                                   (release, FOCUS_LINE, False, number)))
+                self.ready_at = release + self.recovery
+            else:
+                return
+
+
+class TriggerLog:
+    """
+    Append-only CSV of camera events with the aircraft state at each event.
+
+    add() only queues the event: a writer thread waits for the telemetry to
+    settle (see the module docstring) and writes the rows in order, so
+    neither the ring lookups nor the fsync of every row can delay an edge or
+    a shutter step in the event loop.
+    """
+
+    def __init__(self, path: str, ring: telemetry_ring.TelemetryRing = None):
+        self.path = path
+        self.file = None
+        self.writer = None
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._open()
+        self.ring = ring              # None: events are logged without telemetry
+        self.queue = queue.Queue()
+        self.rows = 0
+        self.extrapolated = 0
+        self.missing = 0              # rows without telemetry (mavlink-reader not running)
+        self.errors = 0               # rows whose write or fsync failed
+        self.thread = threading.Thread(target=self._run, name="trigger-log", daemon=True)
+        self.thread.start()
+
+    def _open(self):
+        new = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        self.file = open(self.path, "a", newline="")
+        self.writer = csv.writer(self.file)
+        if new:
+            self.writer.writerow(LOG_FIELDS)
+
+    def _close_file(self):
+        try:
+            self.file.close()
+        except OSError:
+            pass  # the buffered row is lost with the file
+        self.file = None
+
+    def add(self, event: CameraEvent):
+        self.queue.put(event)
+
+    def _run(self):
+        while True:
+            event = self.queue.get()
+            if event is None:
+                return
+            try:
+                self.write(event, self.settled_state(event))
+            except Exception as e:
+                # full or removed SD card: count the row, reopen the file for the next one
+                self.errors += 1
+                logger.error("Trigger log: %s %d not written to %s: %s", event.kind, event.number, self.path, e)
+                if self.file is not None:
+                    self._close_file()
+
+    def settled_state(self, event: CameraEvent):
+        """The state at the event once samples after it are in the ring, or after SETTLE_TIMEOUT."""
+        if not self.ring:
+            return None
+        while time.monotonic() < event.monotonic + SETTLE_TIMEOUT:
+            newest = [self.ring.newest(kind) for kind in (telemetry_ring.POSITION, telemetry_ring.ATTITUDE)]
+            if None not in newest and min(newest) >= event.monotonic:
+                break
+            time.sleep(SETTLE_POLL)
+        return self.ring.state_at(event.monotonic)
+
+    def write(self, event: CameraEvent, state: dict):
+        if state is None:
+            telemetry = "none"
+            self.missing += 1
+        elif state["extrapolated"]:
+            telemetry = "extrapolated"
+            self.extrapolated += 1
+        else:
+            telemetry = "interpolated"
+        row = [event.kind, event.number, f"{event.monotonic:.6f}", format_utc(event.utc), f"{event.utc:.6f}"]
+        for name in LOG_FIELDS[5:-1]:
+            value = state.get(name) if state else None
+            row.append("" if value is None or math.isnan(value) else LOG_FORMATS.get(name, "{:.3f}").format(value))
+        row.append(telemetry)
+        if self.file is None:
+            self._open()
+        self.writer.writerow(row)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.rows += 1
+
+    def close(self):
+        """Write the queued events and close the file."""
+        self.queue.put(None)
+        self.thread.join()
+        if self.file is not None:
+            self._close_file()
+
+
+class CamTrigger:
+    """Edge handling and the event loop, shared by the daemon and the self-test."""
+
+    def __init__(self, lines, sequencer: ShotSequencer = None, trigger_log: TriggerLog = None, on_trigger=None):
+        self.lines = lines
+        self.sequencer = sequencer    # None: only timestamp triggers
+        self.trigger_log = trigger_log
+        self.on_trigger = on_trigger  # called with the CameraEvent of each trigger
+        self.armed = True
+        self.triggers = 0
+        self.ignored = 0              # asserted again without a release in between
+        self.latency = metrics.histogram("cam_trigger_latency_seconds",
+                                         "Trigger edge in the kernel to handled by the daemon")
+
+    def handle(self, asserted: bool, timestamp_ns: int):
+        if not asserted:
+            self.armed = True
+            return
+        if not self.armed:
+            self.ignored += 1
+            return
+        self.armed = False
+        self.triggers += 1
+        edge = timestamp_ns / 1e9
+        now = time.monotonic()
+        self.latency.observe(now - edge)
+        event = CameraEvent("trigger", self.triggers, edge, utc_of(edge))
+        logger.info("Trigger %d at %s (monotonic %.6f), handled after %.3f ms", event.number,
+                    format_utc(event.utc), edge, (now - edge) * 1000)
+        if self.trigger_log:
+            self.trigger_log.add(event)
+        if self.on_trigger:
+            self.on_trigger(event)
+        if self.sequencer and not self.sequencer.request(event.number, now):
+            logger.warning("Trigger %d: %d shots already queued, not fired", event.number,
+                           self.sequencer.max_pending)
+
+    def run(self, stop: threading.Event = None):
+        poller = select.poll()
+        poller.register(self.lines.fd, select.POLLIN)
+        watchdog = sd_notify.Watchdog()
+        sd_notify.ready("Waiting for camera triggers")
+        while not (stop and stop.is_set()):
+            timeout = POLL_TIMEOUT
+            due = self.sequencer.next_due() if self.sequencer else None
+            if due is not None:
+                timeout = min(max(due - time.monotonic(), 0.0), POLL_TIMEOUT)
+            if poller.poll(math.ceil(timeout * 1000)):
+                for asserted, timestamp_ns in self.lines.read_events():
+                    self.handle(asserted, timestamp_ns)
+            if self.sequencer:
+                self.sequencer.run_due(time.monotonic())
+            watchdog.ping()
+
+
+def register_metrics(trigger: CamTrigger):
+    metrics.counter("cam_trigger_triggers_total", "Accepted trigger edges").set_function(lambda: trigger.triggers)
+    metrics.counter("cam_trigger_ignored_total", "Trigger edges without a release before").set_function(
+        lambda: trigger.ignored)
+    if trigger.sequencer:
+        sequencer = trigger.sequencer
+        metrics.counter("cam_trigger_shots_total", "Shutter presses").set_function(lambda: sequencer.shots)
+        metrics.counter("cam_trigger_dropped_total", "Triggers not fired, queue full").set_function(
+            lambda: sequencer.dropped)
+        metrics.gauge("cam_trigger_pending", "Shots waiting for the camera").set_function(
+            lambda: len(sequencer.pending))
+    if trigger.trigger_log:
+        trigger_log = trigger.trigger_log
+        metrics.counter("cam_trigger_log_rows_total", "Trigger log rows written").set_function(
+            lambda: trigger_log.rows)
+        metrics.counter("cam_trigger_log_extrapolated_total", "Trigger log rows with dead reckoned telemetry"
+                        ).set_function(lambda: trigger_log.extrapolated)
+        metrics.counter("cam_trigger_log_missing_total", "Trigger log rows without telemetry").set_function(
+            lambda: trigger_log.missing)
+        metrics.counter("cam_trigger_log_errors_total", "Trigger log rows whose write or fsync failed").set_function(
+            lambda: trigger_log.errors)
+
+
+def self_test(count: int, interval: float, pulse: float):
+    """
+    Fire `count` trigger pulses into the mock chip, back to back, while a
+    synthetic track (north at 20 m/s, climbing, turning) is published into a
+    temporary telemetry ring. Check that every trigger is shot in order with
+    the right timing and logged with the interpolated state of the track.
+    """
+    focus_lead, shutter_hold, recovery = 0.02, 0.03, 0.02
+    lat0, lon0, speed, climb, turn = 27.95, -81.62, 20.0, 1.0, 5.0
+
+    def track(t):
+        """Aircraft state at monotonic time t: lat, lon, alt, yaw."""
+        return (lat0 + math.degrees(speed * t / telemetry_ring.EARTH_RADIUS_M), lon0, 100.0 + climb * t,
+                (turn * t) % 360.0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ring_path = os.path.join(tmp, "telemetry.ring")
+        writer = telemetry_ring.TelemetryRingWriter(ring_path)
+        trigger_log = TriggerLog(os.path.join(tmp, "triggers.csv"), telemetry_ring.TelemetryRing(ring_path))
+        lines = MockLines()
+        latencies = []
+        sequencer = ShotSequencer(lines, focus_lead, shutter_hold, recovery, max_pending=count,
+                                  on_shutter=trigger_log.add)
+        trigger = CamTrigger(lines, sequencer, trigger_log,
+                             on_trigger=lambda event: latencies.append(time.monotonic() - event.monotonic))
+        stop = threading.Event()
+
+        def telemetry():
+            # GLOBAL_POSITION_INT at 10 Hz, ATTITUDE at 25 Hz, as mavlink-reader publishes them
+            tick = 0
+            while not stop.is_set():
+                now = time.monotonic()
+                lat, lon, alt, yaw = track(now)
+                if tick % 5 == 0:
+                    writer.append(telemetry_ring.POSITION, now, (lat, lon, alt, alt - 100.0, speed, 0.0, -climb,
+                                                                 alt - 20.0))
+                writer.append(telemetry_ring.ATTITUDE, now, (1.0, 2.0, yaw if yaw <= 180 else yaw - 360, 0.0, 0.0,
+                                                             turn))
+                tick += 1
+                time.sleep(0.02)
+
+        def driver():
+            time.sleep(0.2)
+            for _ in range(count):
+                lines.drive_trigger(True)
+                time.sleep(pulse)
+                lines.drive_trigger(False)
+                time.sleep(interval - pulse)
+            # wait for the queue to drain and the last rows to settle
+            time.sleep(count * (focus_lead + shutter_hold + recovery) + SETTLE_TIMEOUT)
+            stop.set()
+
+        threads = [threading.Thread(target=target, daemon=True) for target in (telemetry, driver)]
+        cpu = time.process_time()
+        for thread in threads:
+            thread.start()
+        trigger.run(stop)
+        cpu = time.process_time() - cpu
+        lines.close()
+        trigger_log.close()
+        writer.close()
+        with open(os.path.join(tmp, "triggers.csv"), newline="") as f:
+            rows = list(csv.DictReader(f))
+
+    errors = []
+    if trigger.triggers != count:
+        errors.append(f"{trigger.triggers} of {count} triggers seen")
+    if sequencer.shots != count:
+        errors.append(f"{sequencer.shots} of {count} shots fired")
+    presses = [(ns, line, active) for ns, line, active in lines.history]
+    shots = [presses[i:i + 4] for i in range(0, len(presses), 4)]
+    lead_errors, hold_errors = [], []
+    for shot in shots:
+        if [(line, active) for _, line, active in shot] != [(FOCUS_LINE, True), (SHUTTER_LINE, True),
+                                                          (SHUTTER_LINE, False), (FOCUS_LINE, False)]:
+            errors.append(f"wrong step order {shot}")
+            break
+        lead_errors.append(abs((shot[1][0] - shot[0][0]) / 1e9 - focus_lead))
+        hold_errors.append(abs((shot[2][0] - shot[1][0]) / 1e9 - shutter_hold))
+
+    kinds = [row["kind"] for row in rows]
+    if kinds.count("trigger") != count or kinds.count("shutter") != count:
+        errors.append(f"trigger log has {kinds.count('trigger')} trigger and {kinds.count('shutter')} shutter rows")
+    position_error = yaw_error = 0.0
+    for row in rows:
+        if row["telemetry"] != "interpolated":
+            errors.append(f"{row['kind']} {row['number']}: telemetry {row['telemetry']}")
+            break
+        lat, _, alt, yaw = track(float(row["monotonic"]))
+        position_error = max(position_error, abs(float(row["lat"]) - lat) * math.radians(1) *
+                             telemetry_ring.EARTH_RADIUS_M, abs(float(row["alt"]) - alt))
+        yaw_error = max(yaw_error, abs((float(row["yaw"]) - yaw + 180.0) % 360.0 - 180.0))
+
+    print(f"{count} triggers every {interval * 1000:.0f} ms, shot sequence {(focus_lead + shutter_hold) * 1000:.0f} ms "
+          f"+ {recovery * 1000:.0f} ms recovery: {trigger.triggers} triggers, {sequencer.shots} shots, "
+          f"{sequencer.dropped} dropped")
+    if lead_errors:
+        print(f"step timing error: focus lead max {max(lead_errors) * 1000:.2f} ms, "
+              f"shutter hold max {max(hold_errors) * 1000:.2f} ms")
+    if latencies:
+        print(f"edge to handled: mean {sum(latencies) / len(latencies) * 1000:.3f} ms, "
+              f"max {max(latencies) * 1000:.3f} ms, CPU {cpu * 1000:.0f} ms total")
+    print(f"trigger log: {len(rows)} rows, {trigger_log.extrapolated} extrapolated, max error against the track "
+          f"{position_error:.3f} m, yaw {yaw_error:.3f} deg")
+    if errors:
+        print("FAIL: " + "; ".join(errors))
+        sys.exit(1)
+    print("OK: every trigger timestamped, shot in order and logged with interpolated telemetry")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fire the camera on GPIO trigger edges.")
+    parser.add_argument("--chip", default=GPIO_CHIP, help="GPIO character device")
+    parser.add_argument("--trigger-line", type=int, default=TRIGGER_LINE, help="Trigger input line (BCM)")
+    parser.add_argument("--focus-lead", type=float, default=FOCUS_LEAD, help="Seconds of focus before the shutter")
+    parser.add_argument("--shutter-hold", type=float, default=SHUTTER_HOLD, help="Seconds the shutter is held")
+    parser.add_argument("--recovery", type=float, default=RECOVERY, help="Seconds between shots")
+    parser.add_argument("--max-pending", type=int, default=MAX_PENDING, help="Shots queued while the camera is busy")
+    parser.add_argument("--debounce", type=float, default=DEBOUNCE, help="Kernel debounce of the trigger in seconds")
+    parser.add_argument("--log-only", action="store_true", help="Timestamp triggers without pressing the shutter")
+    parser.add_argument("--trigger-log", default=TRIGGER_LOG, help="Append-only CSV of triggers and shutter presses")
+    parser.add_argument("--telemetry-ring", default=telemetry_ring.TELEMETRY_RING,
+                        help="Telemetry ring published by mavlink-reader.py")
+    parser.add_argument("--no-telemetry", action="store_true", help="Log events without the aircraft state")
+    parser.add_argument("--self-test", type=int, metavar="N", help="Fire N triggers into a mock chip and verify")
+    parser.add_argument("--interval", type=float, default=0.01, help="Self-test: seconds between trigger pulses")
+    args = parser.parse_args()
+
+    toolkit_logging.setup_logging()
+    if args.self_test:
+        logging.getLogger("cam_trigger").setLevel(logging.WARNING)
+        self_test(args.self_test, args.interval, min(0.002, args.interval / 2))
+        return
+
+    metrics.start_metrics_server("cam_trigger", METRICS_PORT)
+    outputs = () if args.log_only else (FOCUS_LINE, SHUTTER_LINE)
+    lines = GpiodLines(args.chip, args.trigger_line, outputs, args.debounce)
+    ring = None if args.no_telemetry else telemetry_ring.TelemetryRing(args.telemetry_ring)
+    try:
+        trigger_log = TriggerLog(args.trigger_log, ring)
+    except PermissionError as e:
+        if args.trigger_log != TRIGGER_LOG:
+            raise
+        args.trigger_log = os.path.expanduser(USER_TRIGGER_LOG)
+        logger.warning("Trigger log %s not writable (%s), logging to %s", TRIGGER_LOG, e, args.trigger_log)
+        trigger_log = TriggerLog(args.trigger_log, ring)
+    sequencer = None if args.log_only else ShotSequencer(lines, args.focus_lead, args.shutter_hold, args.recovery,
+                                                        args.max_pending, on_shutter=trigger_log.add)
+    trigger = CamTrigger(lines, sequencer, trigger_log)
+    register_metrics(trigger)
+    logger.info("Waiting for triggers on %s line %d%s, logging to %s", args.chip, args.trigger_line,
+                " (log only)" if args.log_only else "", args.trigger_log)
+    try:
+        trigger.run()
+    except KeyboardInterrupt:
+        print("\nProgram terminated by user")
+    finally:
+        trigger_log.close()
+        lines.close()
+
+
+if __name__ == "__main__":
+    main()
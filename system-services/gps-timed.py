@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+GPS time discipline daemon.
+
+Streams $PINS1 from the Inertial Sense INS on the UART and keeps the system
+clock on GPS time, instead of the one-shot `date -s` of set-time.py:
+
+  - GPS week / time of week are converted to UTC with the GPS-UTC leap
+    second offset of common/nmea_parser.py (--leap-seconds, the same option
+    as set-time.py).
+  - The serial latency is estimated per line: the transmit time of the line
+    at the baud rate is subtracted, and the variable read latency is removed
+    with a minimum filter (the least delayed line of each window is the best
+    estimate of the offset). FIXED_DELAY is the INS output delay, if known.
+  - mode "step-slew": the clock is stepped once with clock_settime when the
+    offset is above STEP_THRESHOLD, then slewed with adjtime.
+    mode "chrony": the filtered samples are written to a chrony SHM
+    refclock (refclock SHM 0 refid GPS in chrony.conf) and chrony disciplines.
+    mode "monitor": only measure.
+
+Offset, jitter and latency are logged every STATS_INTERVAL and exported on
+the metrics endpoint.
+
+Usage:
+    sudo python3 gps-timed.py                  # step once, then slew
+    sudo python3 gps-timed.py --mode chrony --shm-unit 0
+    python3 gps-timed.py --mode monitor        # no clock changes
+"""
+import argparse
+import ctypes
+import ctypes.util
+import logging
+import math
+import os
+import statistics
+import sys
+import time
+from collections import deque
+
+import serial
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "common"))
+
+# custom modules
+import metrics
+import nmea_parser
+import sd_notify
+import toolkit_logging
+
+UART_DEVICE = "/dev/ttyAMA0"
+BAUD_RATE = 921600
+
+FIXED_DELAY = 0.0               # seconds from the INS time of validity to the first byte on the wire
+FILTER_WINDOW = 16              # lines per minimum filter window
+STEP_THRESHOLD = 0.5            # seconds, offsets above this are stepped instead of slewed
+SLEW_INTERVAL = 16.0            # seconds between adjtime corrections
+MIN_SLEW = 0.0005               # seconds, offsets below this are left alone
+STATS_INTERVAL = 60.0           # seconds between statistics reports
+REOPEN_DELAY = 2.0              # seconds before reopening the UART after an error
+METRICS_PORT = 9106             # localhost Prometheus endpoint
+
+CHRONY_SHM_KEY = 0x4E545030     # "NTP0", unit N uses key + N
+SHM_PRECISION = -10             # log2 seconds (~1 ms) reported to chrony
+
+logger = logging.getLogger("gps_timed")
+
+
+class Timeval(ctypes.Structure):
+    _fields_ = [("tv_sec", ctypes.c_long), ("tv_usec", ctypes.c_long)]
+
+
+_libc = None
+
+
+def libc():
+    global _libc
+    if _libc is None:
+        _libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+    return _libc
+
+
+def step_clock(offset: float):
+    """Step CLOCK_REALTIME back by `offset` seconds (system time minus GPS time)."""
+    time.clock_settime(time.CLOCK_REALTIME, time.clock_gettime(time.CLOCK_REALTIME) - offset)
+
+
+def slew_clock(offset: float):
+    """Start slewing the clock by -offset with adjtime (replaces a slew still in progress)."""
+    delta = -offset
+    seconds = int(delta)  # truncates toward zero, usec keeps the same sign
+    tv = Timeval(seconds, int(round((delta - seconds) * 1e6)))
+    if libc().adjtime(ctypes.byref(tv), None) != 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, f"adjtime failed: {os.strerror(errno)}")
+
+
+class ShmTime(ctypes.Structure):
+    """struct shmTime of the NTP SHM refclock driver, as read by chrony and ntpd."""
+    _fields_ = [
+        ("mode", ctypes.c_int),
+        ("count", ctypes.c_int),
+        ("clockTimeStampSec", ctypes.c_long),     # time_t
+        ("clockTimeStampUSec", ctypes.c_int),
+        ("receiveTimeStampSec", ctypes.c_long),   # time_t
+        ("receiveTimeStampUSec", ctypes.c_int),
+        ("leap", ctypes.c_int),
+        ("precision", ctypes.c_int),
+        ("nsamples", ctypes.c_int),
+        ("valid", ctypes.c_int),
+        ("clockTimeStampNSec", ctypes.c_uint),
+        ("receiveTimeStampNSec", ctypes.c_uint),
+        ("dummy", ctypes.c_int * 8),
+    ]
+
+
+class ChronyShm:
+    """Writer side of a chrony/ntpd SHM refclock segment."""
+
+    IPC_CREAT = 0o1000
+
+    def __init__(self, unit: int = 0):
+        lib = libc()
+        lib.shmget.restype = ctypes.c_int
+        lib.shmget.argtypes = (ctypes.c_int, ctypes.c_size_t, ctypes.c_int)
+        lib.shmat.restype = ctypes.c_void_p
+        lib.shmat.argtypes = (ctypes.c_int, ctypes.c_void_p, ctypes.c_int)
+        # units 0 and 1 are root only (0600), like chrony creates them
+        shm_id = lib.shmget(CHRONY_SHM_KEY + unit, ctypes.sizeof(ShmTime), self.IPC_CREAT | 0o600)
+        if shm_id < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"shmget for SHM unit {unit} failed: {os.strerror(errno)}")
+        address = lib.shmat(shm_id, None, 0)
+        if address in (None, ctypes.c_void_p(-1).value):
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"shmat for SHM unit {unit} failed: {os.strerror(errno)}")
+        self.shm = ShmTime.from_address(address)
+        self.unit = unit
+
+    def write(self, reference_time: float, receive_time: float):
+        """Publish one sample: the true time `reference_time` was valid at system time `receive_time`."""
+        shm = self.shm
+        shm.valid = 0
+        shm.mode = 1
+        shm.count += 1  # odd while writing, the reader retries if count changed
+        ref_sec, ref_frac = divmod(reference_time, 1.0)
+        rx_sec, rx_frac = divmod(receive_time, 1.0)
+        shm.clockTimeStampSec = int(ref_sec)
+        shm.clockTimeStampUSec = int(ref_frac * 1e6)
+        shm.clockTimeStampNSec = int(ref_frac * 1e9)
+        shm.receiveTimeStampSec = int(rx_sec)
+        shm.receiveTimeStampUSec = int(rx_frac * 1e6)
+        shm.receiveTimeStampNSec = int(rx_frac * 1e9)
+        shm.leap = 0
+        shm.precision = SHM_PRECISION
+        shm.count += 1
+        shm.valid = 1
+
+
+class TimeDiscipline:
+    """Minimum-filters the raw offsets and steps/slews the clock or feeds chrony."""
+
+    def __init__(self, mode: str = "step-slew", window: int = FILTER_WINDOW, shm: ChronyShm = None):
+        self.mode = mode
+        self.window = deque(maxlen=window)  # (offset, receive time) of the current window
+        self.shm = shm
+        self.last_slew = 0.0
+
+        self.samples = 0
+        self.offset = 0.0               # last filtered offset, system time - GPS time
+        self.jitter = 0.0               # stdev of the raw offsets in the last window
+        self.latency = 0.0              # median - minimum raw offset, the typical extra read delay
+        self.steps = 0
+        self.slews = 0
+        self.slewed = 0.0               # total slew requested in seconds
+        self.period_offsets = []        # filtered offsets since the last report
+
+    def add_sample(self, offset: float, receive_time: float):
+        """Add the raw offset of one line, every full window produces one filtered sample."""
+        self.samples += 1
+        self.window.append((offset, receive_time))
+        if len(self.window) < self.window.maxlen:
+            return
+        offsets = [o for o, _ in self.window]
+        best_offset, best_time = min(self.window)
+        self.jitter = statistics.pstdev(offsets)
+        self.latency = statistics.median(offsets) - best_offset
+        self.window.clear()
+        self.offset = best_offset
+        self.period_offsets.append(best_offset)
+        self.apply(best_offset, best_time)
+
+    def apply(self, offset: float, receive_time: float):
+        if self.mode == "monitor":
+            return
+        if self.mode == "chrony":
+            self.shm.write(receive_time - offset, receive_time)
+            return
+        if abs(offset) > STEP_THRESHOLD:
+            step_clock(offset)
+            self.steps += 1
+            logger.warning("Stepped the clock by %.6f s", -offset)
+            return
+        now = time.monotonic()
+        if now - self.last_slew >= SLEW_INTERVAL and abs(offset) > MIN_SLEW:
+            slew_clock(offset)
+            self.last_slew = now
+            self.slews += 1
+            self.slewed += -offset
+            logger.debug("Slewing by %.6f s", -offset)
+
+    def report(self) -> dict:
+        """Statistics since the last report."""
+        offsets, self.period_offsets = self.period_offsets, []
+        return {
+            "samples": self.samples,
+            "filtered": len(offsets),
+            "offset": self.offset,
+            "offset_rms": math.sqrt(sum(o * o for o in offsets) / len(offsets)) if offsets else 0.0,
+            "jitter": self.jitter,
+            "latency": self.latency,
+            "steps": self.steps,
+            "slews": self.slews,
+            "slewed": self.slewed,
+        }
+
+
+def register_metrics(discipline: TimeDiscipline, counters: dict):
+    metrics.gauge("gps_timed_offset_seconds", "System time minus GPS time, minimum filtered").set_function(
+        lambda: discipline.offset)
+    metrics.gauge("gps_timed_jitter_seconds", "Standard deviation of the raw offsets in the last window").set_function(
+        lambda: discipline.jitter)
+    metrics.gauge("gps_timed_latency_seconds", "Median extra serial read delay over the minimum").set_function(
+        lambda: discipline.latency)
+    metrics.counter("gps_timed_samples_total", "Valid $PINS1 lines").set_function(lambda: discipline.samples)
+    metrics.counter("gps_timed_steps_total", "Clock steps").set_function(lambda: discipline.steps)
+    metrics.counter("gps_timed_slews_total", "adjtime corrections").set_function(lambda: discipline.slews)
+    metrics.counter("gps_timed_invalid_total", "Lines that were not a valid $PINS1 with a fix").set_function(
+        lambda: counters["invalid"])
+    metrics.gauge("gps_timed_first_fix_seconds", "CLOCK_MONOTONIC of the first valid $PINS1, 0 before it").set_function(
+        lambda: counters["first_fix"])
+
+
+def run(args, discipline: TimeDiscipline):
+    counters = {"invalid": 0, "first_fix": 0.0}
+    register_metrics(discipline, counters)
+    last_report = time.monotonic()
+    watchdog = sd_notify.Watchdog()
+    while True:
+        try:
+            with serial.Serial(args.device, args.baud, timeout=1) as ser:
+                logger.info("Reading $PINS1 from %s at %d baud (mode %s)", args.device, args.baud, args.mode)
+                # READY=1 once the UART is open: a GPS fix can take minutes or never come on the bench,
+                # the first valid $PINS1 goes to STATUS= and gps_timed_first_fix_seconds
+                if discipline.samples:
+                    sd_notify.status(f"Receiving $PINS1 from {args.device} (mode {args.mode})")
+                else:
+                    sd_notify.ready(f"Waiting for a GPS fix on {args.device} (mode {args.mode})")
+                while True:
+                    line = ser.readline()
+                    receive_time = time.time()  # right after the last byte arrived
+                    watchdog.ping()
+                    if line:
+                        # the checksum is checked when present
+                        parsed = nmea_parser.pins1_time(line, require_checksum=False)
+                        if parsed is None or not nmea_parser.valid_gps_time(*parsed):
+                            counters["invalid"] += 1
+                        else:
+                            gps_time = nmea_parser.gps_to_unix(*parsed, leap_seconds=args.leap_seconds)
+                            transmit = nmea_parser.transmit_time(line, args.baud)
+                            discipline.add_sample(receive_time - (gps_time + transmit + args.fixed_delay),
+                                                  receive_time)
+                            if discipline.samples == 1:
+                                counters["first_fix"] = time.monotonic()
+                                sd_notify.status(f"Receiving $PINS1 from {args.device} (mode {args.mode})")
+
+                    now = time.monotonic()
+                    if now - last_report >= STATS_INTERVAL:
+                        last_report = now
+                        s = discipline.report()
+                        logger.info("samples=%d invalid=%d offset=%+.6f rms=%.6f jitter=%.6f latency=%.6f "
+                                    "steps=%d slews=%d slewed=%+.6f", s["samples"], counters["invalid"],
+                                    s["offset"], s["offset_rms"], s["jitter"], s["latency"],
+                                    s["steps"], s["slews"], s["slewed"])
+        except (serial.SerialException, OSError) as e:
+            logger.error("UART error on %s: %s (reopening in %.0fs)", args.device, e, REOPEN_DELAY)
+            time.sleep(REOPEN_DELAY)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Discipline the system clock to the INS GPS time ($PINS1).")
+    parser.add_argument("--device", default=UART_DEVICE, help="UART the INS is connected to")
+    parser.add_argument("--baud", type=int, default=BAUD_RATE, help="UART baud rate")
+    parser.add_argument("--mode", choices=("step-slew", "chrony", "monitor"), default="step-slew",
+                        help="step once then slew with adjtime, feed a chrony SHM refclock, or only measure")
+    parser.add_argument("--shm-unit", type=int, default=0, help="chrony SHM refclock unit")
+    parser.add_argument("--leap-seconds", type=int, default=nmea_parser.GPS_UTC_LEAP_SECONDS,
+                        help="GPS - UTC in seconds, keep it the same as set-time.py --leap-seconds")
+    parser.add_argument("--fixed-delay", type=float, default=FIXED_DELAY,
+                        help="Seconds from the INS time of validity to the start of the line")
+    parser.add_argument("--window", type=int, default=FILTER_WINDOW, help="Lines per minimum filter window")
+    args = parser.parse_args()
+
+    toolkit_logging.setup_logging()
+    metrics.start_metrics_server("gps_timed", METRICS_PORT)
+    shm = ChronyShm(args.shm_unit) if args.mode == "chrony" else None
+    try:
+        run(args, TimeDiscipline(args.mode, args.window, shm))
+    except KeyboardInterrupt:
+        print("\nProgram terminated by user")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+Resident status daemon for the toolkit services.
+
+`system-services.sh status` used to fork systemctl is-active, is-enabled and
+journalctl for every service one after the other, several seconds on a CM4.
+This daemon keeps the status in memory and answers queries on a Unix socket
+(see common/service_status.py) at once:
+
+  - Every POLL_INTERVAL the cgroup of each unit is read (processes, CPU,
+    memory), a handful of small file reads and no forks.
+  - Unit state comes from one `systemctl show` call for all units, at start,
+    every REFRESH_INTERVAL and as soon as a cgroup gains or loses processes.
+    A failing call is retried with exponential backoff up to MAX_RETRY_DELAY.
+  - One long-running `journalctl -f -o json -p warning` keeps the last
+    ERROR_TAIL warnings and errors per unit.
+
+The health is exported on the metrics endpoint, and cot_fanout.py can add the
+summary to its events as a CoT detail (--status-detail).
+
+Usage:
+    sudo python3 service-statusd.py
+    python3 ../common/service_status.py          # query it
+"""
+import argparse
+import json
+import logging
+import os
+import shlex
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "common"))
+
+# custom modules
+import metrics
+import sd_notify
+import toolkit_logging
+from service_status import STATUS_SOCKET
+
+# the units are the SERVICES of system-services.sh, see load_units()
+SERVICES_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "system-services.sh")
+POLL_INTERVAL = 1.0             # seconds between cgroup reads
+REFRESH_INTERVAL = 30.0         # seconds between systemctl show calls without a cgroup change
+MAX_RETRY_DELAY = 300.0         # seconds, upper bound of the backoff after failed systemctl show calls
+ERROR_TAIL = 10                 # journal entries kept per unit
+ERROR_PRIORITY = "warning"      # lowest journal priority kept
+JOURNAL_BACKLOG = 50            # entries read from before the daemon started, shown but not in errors_total
+RECENT_ERRORS_WINDOW = 300.0    # seconds counted by the summary's recent_errors
+REOPEN_DELAY = 5.0              # seconds before restarting journalctl
+CGROUP_ROOT = "/sys/fs/cgroup"
+METRICS_PORT = 9107             # localhost Prometheus endpoint
+
+SHOW_PROPERTIES = ["Id", "LoadState", "ActiveState", "SubState", "UnitFileState", "MainPID", "NRestarts", "Result"]
+PRIORITY_NAMES = ["emerg", "alert", "crit", "err", "warning", "notice", "info", "debug"]
+RUNNING_STATES = ("active", "activating", "reloading")
+
+logger = logging.getLogger("service_statusd")
+
+
+class UnitState:
+    """What is known about one unit, updated by the poll loop and the journal thread."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.load_state = "unknown"
+        self.active_state = "unknown"
+        self.sub_state = ""
+        self.enabled = ""
+        self.main_pid = 0
+        self.restarts = 0
+        self.result = ""
+        self.pids = 0
+        self.cpu_seconds = 0.0
+        self.memory_bytes = 0
+        self.errors = deque(maxlen=ERROR_TAIL)  # newest journal warnings/errors
+        self.errors_total = 0                   # journal warnings/errors logged since the daemon started
+
+    def as_dict(self) -> dict:
+        return {
+            "load_state": self.load_state,
+            "active_state": self.active_state,
+            "sub_state": self.sub_state,
+            "enabled": self.enabled,
+            "result": self.result,
+            "main_pid": self.main_pid,
+            "restarts": self.restarts,
+            "pids": self.pids,
+            "cpu_seconds": round(self.cpu_seconds, 3),
+            "memory_bytes": self.memory_bytes,
+            "errors_total": self.errors_total,
+            "errors": list(self.errors),
+        }
+
+
+class CgroupReader:
+    """Processes, CPU time and memory of a unit from its cgroup (v2, or the v1 controller trees)."""
+
+    def __init__(self, root: str = CGROUP_ROOT):
+        self.unified = os.path.exists(os.path.join(root, "cgroup.controllers"))
+        if self.unified:
+            base = os.path.join(root, "system.slice")
+            self.procs = os.path.join(base, "{}", "cgroup.procs")
+            self.cpu = os.path.join(base, "{}", "cpu.stat")
+            self.memory = os.path.join(base, "{}", "memory.current")
+        else:
+            self.procs = os.path.join(root, "systemd", "system.slice", "{}", "cgroup.procs")
+            self.cpu = os.path.join(root, "cpuacct", "system.slice", "{}", "cpuacct.usage")
+            self.memory = os.path.join(root, "memory", "system.slice", "{}", "memory.usage_in_bytes")
+
+    @staticmethod
+    def _read(path: str) -> str:
+        try:
+            with open(path) as f:
+                return f.read()
+        except OSError:
+            return ""
+
+    def read(self, unit: str) -> tuple:
+        """(process count, cpu seconds, memory bytes), zeros for a unit without a cgroup."""
+        pids = len(self._read(self.procs.format(unit)).split())
+        cpu = 0.0
+        text = self._read(self.cpu.format(unit))
+        if self.unified:
+            for line in text.splitlines():
+                if line.startswith("usage_usec "):
+                    cpu = int(line.split()[1]) / 1e6
+                    break
+        elif text.strip():
+            cpu = int(text) / 1e9
+        memory = self._read(self.memory.format(unit)).strip()
+        return pids, cpu, int(memory) if memory.isdigit() else 0
+
+
+class StatusDaemon:
+    """In-memory status of the units, kept current by poll() and follow_journal()."""
+
+    def __init__(self, units: list, cgroups: CgroupReader):
+        self.units = {name: UnitState(name) for name in units}
+        self.cgroups = cgroups
+        self.lock = threading.Lock()
+        self.last_refresh = 0.0
+        self.error_times = deque()  # journal entry times for the summary's recent_errors
+        self.started = time.time()  # journal entries before it are the backlog, not counted in errors_total
+        self.journal_cursor = None  # last journal entry read, journalctl restarts after it
+        self.refreshes = 0
+        self.refresh_failures = 0   # consecutive failed systemctl show calls
+        self.refresh_errors = 0     # failed systemctl show calls since start
+        self.retry_at = 0.0         # monotonic time before which no refresh is tried after a failure
+
+    def refresh(self) -> bool:
+        """Unit state of all units from a single systemctl call, False if it failed."""
+        try:
+            result = subprocess.run(["systemctl", "show", "--property=" + ",".join(SHOW_PROPERTIES)]
+                                    + list(self.units), capture_output=True, text=True, timeout=10)
+        except (OSError, subprocess.SubprocessError) as e:
+            return self._refresh_failed(str(e))
+        output = result.stdout
+        if result.returncode != 0 and not output.strip():
+            error = "; ".join(line for line in result.stderr.splitlines() if line.strip())
+            return self._refresh_failed(error or f"exit status {result.returncode}")
+        if self.refresh_failures:
+            logger.info("systemctl show works again after %d failures", self.refresh_failures)
+            self.refresh_failures = 0
+        with self.lock:
+            for block in output.strip().split("\n\n"):
+                props = dict(line.split("=", 1) for line in block.splitlines() if "=" in line)
+                unit = self.units.get(props.get("Id"))
+                if unit is None:
+                    continue
+                unit.load_state = props.get("LoadState", "")
+                unit.active_state = props.get("ActiveState", "")
+                unit.sub_state = props.get("SubState", "")
+                unit.enabled = props.get("UnitFileState", "")
+                unit.result = props.get("Result", "")
+                unit.main_pid = int(props.get("MainPID") or 0)
+                unit.restarts = int(props.get("NRestarts") or 0)
+            self.last_refresh = time.monotonic()
+            self.refreshes += 1
+        return True
+
+    def _refresh_failed(self, error: str) -> bool:
+        """Back off exponentially from POLL_INTERVAL to MAX_RETRY_DELAY, warn on the first failure only."""
+        self.refresh_failures += 1
+        self.refresh_errors += 1
+        delay = min(POLL_INTERVAL * 2 ** self.refresh_failures, MAX_RETRY_DELAY)
+        self.retry_at = time.monotonic() + delay
+        log = logger.warning if self.refresh_failures == 1 else logger.debug
+        log("systemctl show failed (%s), retrying in %.0fs", error, delay)
+        return False
+
+    def poll(self):
+        """Read the cgroups, refresh the unit state when a unit started or stopped."""
+        changed = False
+        for unit in self.units.values():
+            pids, cpu, memory = self.cgroups.read(unit.name)
+            with self.lock:
+                if bool(pids) != bool(unit.pids):
+                    changed = True
+                unit.pids, unit.cpu_seconds, unit.memory_bytes = pids, cpu, memory
+        now = time.monotonic()
+        if (changed or not self.refreshes or now - self.last_refresh >= REFRESH_INTERVAL) and now >= self.retry_at:
+            self.refresh()
+
+    def add_journal_entry(self, entry: dict):
+        """Keep a journal entry of one of the units (its own output or systemd's messages about it)."""
+        unit = self.units.get(entry.get("_SYSTEMD_UNIT")) or self.units.get(entry.get("UNIT"))
+        if unit is None:
+            return
+        message = entry.get("MESSAGE", "")
+        if isinstance(message, list):  # not valid UTF-8, journalctl sends the bytes
+            message = bytes(message).decode("utf-8", "replace")
+        priority = int(entry.get("PRIORITY", 6))
+        timestamp = int(entry.get("__REALTIME_TIMESTAMP", 0)) / 1e6
+        with self.lock:
+            unit.errors.append({"time": timestamp, "priority": PRIORITY_NAMES[priority], "message": message})
+            if timestamp >= self.started:
+                unit.errors_total += 1
+            self.error_times.append(timestamp)
+
+    def follow_journal(self):
+        """Tail the journal of all units, restarting journalctl after the last entry read if it exits."""
+        units = []
+        for name in self.units:
+            units += ["-u", name]
+        while True:
+            # the backlog only the first time, a restart must not read the same entries again
+            start = ["--after-cursor", self.journal_cursor] if self.journal_cursor else ["-n", str(JOURNAL_BACKLOG)]
+            command = ["journalctl", "-f", "-o", "json", "-p", ERROR_PRIORITY, "--no-pager"] + start + units
+            try:
+                with subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL) as process:
+                    for line in process.stdout:
+                        try:
+                            entry = json.loads(line)
+                            self.journal_cursor = entry.get("__CURSOR") or self.journal_cursor
+                            self.add_journal_entry(entry)
+                        except (ValueError, TypeError, IndexError) as e:
+                            logger.debug("Skipping journal entry: %s", e)
+                logger.warning("journalctl exited with %s, restarting in %.0fs", process.returncode, REOPEN_DELAY)
+            except OSError as e:
+                logger.error("Could not run journalctl: %s", e)
+            time.sleep(REOPEN_DELAY)
+
+    def status(self) -> dict:
+        with self.lock:
+            return {"time": time.time(), "units": {name: unit.as_dict() for name, unit in self.units.items()}}
+
+    def summary(self) -> dict:
+        """Counts over the installed units and the names of the ones that should run but don't."""
+        cutoff = time.time() - RECENT_ERRORS_WINDOW
+        with self.lock:
+            while self.error_times and self.error_times[0] < cutoff:
+                self.error_times.popleft()
+            installed = [u for u in self.units.values() if u.load_state == "loaded"]
+            down = [u.name.removesuffix(".service") for u in installed
+                    if u.active_state == "failed" or (u.enabled == "enabled" and u.active_state not in RUNNING_STATES
+                                                      and u.result != "success")]
+            return {
+                "time": time.time(),
+                "ok": not down,
+                "units": len(installed),
+                "active": sum(u.active_state == "active" for u in installed),
+                "down": down,
+                "restarts": sum(u.restarts for u in installed),
+                "recent_errors": len(self.error_times),
+            }
+
+
+class StatusHandler(socketserver.StreamRequestHandler):
+    """One command line in, one JSON document out."""
+
+    def handle(self):
+        command = self.rfile.readline(256).decode(errors="replace").strip() or "status"
+        daemon = self.server.status_daemon
+        if command == "summary":
+            answer = daemon.summary()
+        elif command == "status":
+            answer = daemon.status()
+        else:
+            answer = {"error": f"unknown command {command!r}, use status or summary"}
+        self.wfile.write(json.dumps(answer).encode())
+
+
+def start_server(daemon: StatusDaemon, path: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if os.path.exists(path):
+        os.unlink(path)  # left over from a previous run
+    server = socketserver.ThreadingUnixStreamServer(path, StatusHandler)
+    server.daemon_threads = True
+    server.status_daemon = daemon
+    os.chmod(path, 0o666)  # droneman queries a daemon running as root
+    threading.Thread(target=server.serve_forever, name="status-server", daemon=True).start()
+    return server
+
+
+def register_metrics(daemon: StatusDaemon):
+    for name, unit in daemon.units.items():
+        labels = {"unit": name}
+        metrics.gauge("oi_service_active", "1 while the unit is active", labels).set_function(
+            lambda unit=unit: int(unit.active_state == "active"))
+        metrics.counter("oi_service_restarts_total", "Automatic restarts by systemd", labels).set_function(
+            lambda unit=unit: unit.restarts)
+        metrics.counter("oi_service_cpu_seconds_total", "CPU time of the unit's cgroup", labels).set_function(
+            lambda unit=unit: unit.cpu_seconds)
+        metrics.gauge("oi_service_memory_bytes", "Memory of the unit's cgroup", labels).set_function(
+            lambda unit=unit: unit.memory_bytes)
+        metrics.counter("oi_service_journal_errors_total",
+                        "Journal warnings and errors of the unit since service-statusd started",
+                        labels).set_function(lambda unit=unit: unit.errors_total)
+    metrics.gauge("oi_services_down", "Installed units that should run but don't").set_function(
+        lambda: len(daemon.summary()["down"]))
+    metrics.counter("oi_service_refresh_errors_total", "Failed systemctl show calls").set_function(
+        lambda: daemon.refresh_errors)
+
+
+def load_units(path: str = SERVICES_SCRIPT) -> list:
+    """
+    The units of SERVICES=(...) in system-services.sh, so `status` shows the same units with and without the daemon.
+
+    Returns:
+        list: Unit names with the .service suffix
+    """
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("SERVICES=(") and line.endswith(")"):
+                return [f"{name}.service" for name in shlex.split(line[len("SERVICES=("):-1])]
+    raise ValueError(f"No SERVICES=(...) line in {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep the toolkit service status in memory and answer queries.")
+    parser.add_argument("--socket", default=STATUS_SOCKET, help="Unix socket to answer on")
+    parser.add_argument("--cgroup-root", default=CGROUP_ROOT, help="cgroup filesystem mount point")
+    parser.add_argument("--no-journal", action="store_true", help="Don't tail the journal")
+    parser.add_argument("--services-script", default=SERVICES_SCRIPT, help="Script whose SERVICES list is watched")
+    args = parser.parse_args()
+
+    toolkit_logging.setup_logging()
+    metrics.start_metrics_server("service_statusd", METRICS_PORT)
+    daemon = StatusDaemon(load_units(args.services_script), CgroupReader(args.cgroup_root))
+    daemon.poll()
+    register_metrics(daemon)
+    if not args.no_journal:
+        threading.Thread(target=daemon.follow_journal, name="journal", daemon=True).start()
+    start_server(daemon, args.socket)
+    logger.info("Answering on %s for %d units", args.socket, len(daemon.units))
+    sd_notify.ready(f"Watching {len(daemon.units)} units")
+
+    watchdog = sd_notify.Watchdog()
+    try:
+        while True:
+            time.sleep(POLL_INTERVAL)
+            daemon.poll()
+            watchdog.ping()
+    except KeyboardInterrupt:
+        print("\nProgram terminated by user")
+
+
+if __name__ == "__main__":
+    main()
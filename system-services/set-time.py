@@ -1,101 +1,285 @@
-import serial
+#!/usr/bin/env python3
+"""
+Set the system time at boot from the first trustworthy source.
+
+All sources are listened to at once, each on its own thread:
+
+    uart     $PINS1 from the Inertial Sense INS (checksummed, GPS week with a
+             fix, CONFIRM_SAMPLES lines agreeing with the monotonic clock)
+    mavlink  SYSTEM_TIME from the flight controller through mavlink-router
+             (UDP endpoint Internal7, time_unix_usec is 0 until it has GPS)
+    network  the Date header of an HTTP response (1 s resolution)
+
+The first valid time is corrected for the delay since it was received and set
+with clock_settime, then systemd is told READY=1 (Type=notify), so the units
+ordered after set-datetime.service and time-set.target start the moment the
+time is valid. gps-timed.py disciplines the clock from there.
+
+The boot-to-valid-time latency (CLOCK_BOOTTIME when the clock was set) is
+logged and written to TIME_STATUS_FILE with the source that won.
+
+Usage:
+    sudo python3 set-time.py
+    python3 set-time.py --dry-run             # report the sources, don't set the clock
+"""
+import argparse
+import http.client
+import json
+import logging
+import os
+import queue
+import socket
+import struct
+import sys
+import threading
 import time
-from datetime import datetime, timedelta
-import subprocess
+from email.utils import parsedate_to_datetime
+
+import serial
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "common"))
+
+# custom modules
+import nmea_parser
+import sd_notify
+import toolkit_logging
 
-# Constants
-SECONDS_IN_DAY = 86400
-SECONDS_IN_WEEK = 604800
 UART_DEVICE = "/dev/ttyAMA0"
 BAUD_RATE = 921600
+CONFIRM_SAMPLES = 2             # consecutive $PINS1 lines that have to agree
+CONFIRM_TOLERANCE = 0.05        # seconds the GPS and monotonic intervals may differ
 
-# Function to validate GPS time
-def validate_gps_time(gps_week, time_of_week):
-    try:
-        gps_week = int(gps_week)
-        time_of_week = float(time_of_week)
-    except ValueError:
-        print("Invalid GPS data: non-numeric values detected.")
-        return False
-
-    if gps_week < 0 or gps_week > 5000:
-        print(f"Invalid GPSweek value: {gps_week}. Skipping.")
-        return False
-
-    if 0 <= time_of_week < SECONDS_IN_WEEK:
-        return True
-    else:
-        print(f"Invalid timeOfWeek value: {time_of_week}. Skipping.")
-        return False
-
-# Function to get datetime from GPS week and time of week
-def get_datetime_from_gps(gps_week: int, time_of_week: float) -> datetime:
-    """Converts GPS week and time of week to a datetime object.
+MAVLINK_PORT = 10007            # mavlink-router UdpEndpoint Internal7
+MAVLINK_ID_SYSTEM_TIME = 2
+MAVLINK_CRC_EXTRA_SYSTEM_TIME = 137
+
+HTTP_HOST = "google.com"
+HTTP_TIMEOUT = 3.0              # seconds per request
+HTTP_RETRY = 2.0                # seconds between attempts while the network is down
+
+MIN_VALID_TIME = 1704067200     # 2024-01-01, anything earlier is not a real time
+
+MAX_WAIT = 120.0                # seconds before giving up without a source
+REOPEN_DELAY = 1.0              # seconds before retrying a source that failed
+TIME_STATUS_FILE = "/run/oi-cm4-toolkit/set-time.json"
+
+logger = logging.getLogger("set_time")
+
+
+class TimeSample:
+    """A candidate time: `unix_time` was the UTC time at CLOCK_MONOTONIC `monotonic`."""
+
+    __slots__ = ("source", "unix_time", "monotonic", "detail")
+
+    def __init__(self, source: str, unix_time: float, monotonic: float, detail: str = ""):
+        self.source = source
+        self.unix_time = unix_time
+        self.monotonic = monotonic
+        self.detail = detail
+
+    def now(self) -> float:
+        """The UTC time now, extrapolated with the monotonic clock."""
+        return self.unix_time + (time.monotonic() - self.monotonic)
+
+
+def x25_crc(data: bytes, crc: int = 0xFFFF) -> int:
+    """CRC-16/MCRF4XX as used by MAVLink."""
+    for byte in data:
+        tmp = byte ^ (crc & 0xFF)
+        tmp = (tmp ^ (tmp << 4)) & 0xFF
+        crc = ((crc >> 8) ^ (tmp << 8) ^ (tmp << 3) ^ (tmp >> 4)) & 0xFFFF
+    return crc
+
+
+def parse_system_time(datagram: bytes):
+    """
+    Find a SYSTEM_TIME message in a MAVLink 1/2 datagram.
+
+    Only the frame header and the CRC are decoded, other messages are skipped.
 
     Args:
-        gps_week (int): The GPS week number.
-        time_of_week (float): The time of the week in seconds.
+        datagram: One UDP payload from mavlink-router, may hold several frames
 
     Returns:
-        datetime: A datetime object representing the corresponding date and time.
+        int: time_unix_usec of the first SYSTEM_TIME with a valid CRC, or None
     """
-    return datetime(1980, 1, 6, 0, 0, 0) + timedelta(weeks=gps_week, seconds=time_of_week)
-
-# Function to format GPS time and update the system date
-def format_gps_time(gps_week, time_of_week):
-    formatted_datetime = get_datetime_from_gps(gps_week, time_of_week)
-
-    print(f"Formatted Date: {formatted_datetime.strftime('%Y-%m-%d')}")
-    print(f"Time: {formatted_datetime.strftime('%H:%M:%S')}")
-
-    if formatted_datetime.year >= 2024:
-        print(f"Valid GPS time detected. Setting system time to: {formatted_datetime.strftime('%Y-%m-%d %H:%M:%S')}")
-        subprocess.run(["sudo", "date", "-s", formatted_datetime.strftime('%Y-%m-%d %H:%M:%S')])
-        exit(0)
-    else:
-        print("Invalid GPS time detected. Possible no-fix.")
-
-# Read data from the UART device
-def read_from_uart():
-
-    start_time = time.time()
-    received_valid_data = False
-    
-    while(True):
-        
-        # If no valid serial data has been received in 15 seconds, use the network command to set date/time
-        if time.time() - start_time >= 15 and not received_valid_data:
-            print("No serial data received within 15 seconds, setting system time from network")
-            cmd = 'sudo date -s "$(wget -qSO- --max-redirect=0 google.com 2>&1 | grep Date: | cut -d\' \' -f5-8)Z"'
-            subprocess.run(cmd, shell=True)
-            exit(0)
-
-        with serial.Serial(UART_DEVICE, BAUD_RATE, timeout=1) as ser:
-            try:
-                line = ser.readline().decode('utf-8').strip()
-            except:
-                print("Error decoding line from uart")
-
-            if line.startswith("$PINS1"):
-                received_valid_data = True
-                print(f"Raw Line: {line}")
-                tokens = line.split(',')
-
-                if len(tokens) >= 3:
-                    time_of_week = tokens[1]
-                    gps_week = tokens[2]
-
-                    if validate_gps_time(gps_week, time_of_week):
-                        format_gps_time(int(gps_week), float(time_of_week))
+    i = 0
+    while i < len(datagram):
+        stx = datagram[i]
+        if stx == 0xFD and i + 10 <= len(datagram):
+            length, incompat = datagram[i + 1], datagram[i + 2]
+            header_end = i + 10
+            msg_id = int.from_bytes(datagram[i + 7:i + 10], "little")
+            frame_end = header_end + length + 2 + (13 if incompat & 0x01 else 0)
+        elif stx == 0xFE and i + 6 <= len(datagram):
+            length = datagram[i + 1]
+            header_end = i + 6
+            msg_id = datagram[i + 5]
+            frame_end = header_end + length + 2
+        else:
+            i += 1
+            continue
+        if frame_end > len(datagram):
+            return None
+        payload = datagram[header_end:header_end + length]
+        if msg_id == MAVLINK_ID_SYSTEM_TIME:
+            crc = x25_crc(datagram[i + 1:header_end + length])
+            crc = x25_crc(bytes([MAVLINK_CRC_EXTRA_SYSTEM_TIME]), crc)
+            if crc == int.from_bytes(datagram[header_end + length:header_end + length + 2], "little"):
+                # MAVLink 2 truncates trailing zero bytes of the payload
+                time_unix_usec, _time_boot_ms = struct.unpack_from("<QI", payload.ljust(12, b"\0"))
+                return time_unix_usec
+            i += 1  # bad CRC, resynchronise
+            continue
+        i = frame_end
+    return None
+
+
+def uart_source(samples: queue.Queue, stop: threading.Event, device: str, baud: int, leap_seconds: int):
+    """Put a sample once CONFIRM_SAMPLES consecutive checksummed $PINS1 lines agree."""
+    while not stop.is_set():
+        try:
+            with serial.Serial(device, baud, timeout=0.5) as ser:
+                logger.info("Listening for $PINS1 on %s", device)
+                previous = None
+                agreeing = 0
+                while not stop.is_set():
+                    line = ser.readline()
+                    received = time.monotonic()
+                    parsed = nmea_parser.pins1_time(line) if line else None
+                    if parsed is None:
+                        continue
+                    week, tow = parsed
+                    if not nmea_parser.valid_gps_time(week, tow):
+                        agreeing = 0
+                        continue
+                    # the line was valid when its first byte was sent
+                    unix_time = nmea_parser.gps_to_unix(week, tow, leap_seconds) + nmea_parser.transmit_time(line, baud)
+                    if previous is not None and abs((unix_time - previous[0]) - (received - previous[1])) \
+                            <= CONFIRM_TOLERANCE:
+                        agreeing += 1
                     else:
-                        print("Skipping invalid GPS time.")
-                else:
-                    print("Incomplete line received, skipping.")
-            
-            time.sleep(5)  # Wait before the next read
+                        agreeing = 1
+                    previous = (unix_time, received)
+                    if agreeing >= CONFIRM_SAMPLES:
+                        samples.put(TimeSample("uart", unix_time, received, f"GPS week {week} tow {tow:.3f}"))
+                        return
+        except (serial.SerialException, OSError) as e:
+            logger.debug("UART %s not available: %s", device, e)
+            stop.wait(REOPEN_DELAY)
+
+
+def mavlink_source(samples: queue.Queue, stop: threading.Event, port: int):
+    """Put a sample from the first SYSTEM_TIME with a GPS time."""
+    while not stop.is_set():
+        try:
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                sock.bind(("0.0.0.0", port))
+                sock.settimeout(0.5)
+                logger.info("Listening for SYSTEM_TIME on udp port %d", port)
+                while not stop.is_set():
+                    try:
+                        datagram = sock.recv(65535)
+                    except socket.timeout:
+                        continue
+                    received = time.monotonic()
+                    time_unix_usec = parse_system_time(datagram)
+                    if time_unix_usec and time_unix_usec / 1e6 >= MIN_VALID_TIME:
+                        samples.put(TimeSample("mavlink", time_unix_usec / 1e6, received, "SYSTEM_TIME"))
+                        return
+        except OSError as e:
+            logger.debug("MAVLink port %d not available: %s", port, e)
+            stop.wait(REOPEN_DELAY)
+
+
+def network_source(samples: queue.Queue, stop: threading.Event, host: str):
+    """Put a sample from the Date header of an HTTP HEAD request."""
+    while not stop.is_set():
+        connection = http.client.HTTPConnection(host, timeout=HTTP_TIMEOUT)
+        try:
+            sent = time.monotonic()
+            connection.request("HEAD", "/")
+            response = connection.getresponse()
+            received = time.monotonic()
+            date = response.getheader("Date")
+            if date:
+                # the server truncated to the second somewhere between sent and received
+                unix_time = parsedate_to_datetime(date).timestamp() + 0.5
+                if unix_time >= MIN_VALID_TIME:
+                    samples.put(TimeSample("network", unix_time, (sent + received) / 2, f"Date: {date} from {host}"))
+                    return
+        except (OSError, http.client.HTTPException, ValueError, TypeError) as e:
+            logger.debug("No time from %s: %s", host, e)
+        finally:
+            connection.close()
+        stop.wait(HTTP_RETRY)
+
+
+def write_status(path: str, status: dict):
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(status, f, indent=2)
+    except OSError as e:
+        logger.warning("Could not write %s: %s", path, e)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Set the system time from the first valid time source.")
+    parser.add_argument("--device", default=UART_DEVICE, help="UART the INS is connected to")
+    parser.add_argument("--baud", type=int, default=BAUD_RATE, help="UART baud rate")
+    parser.add_argument("--leap-seconds", type=int, default=nmea_parser.GPS_UTC_LEAP_SECONDS,
+                        help="GPS - UTC in seconds, keep it the same as gps-timed.py --leap-seconds")
+    parser.add_argument("--mavlink-port", type=int, default=MAVLINK_PORT, help="UDP port with SYSTEM_TIME")
+    parser.add_argument("--http-host", default=HTTP_HOST, help="Host whose HTTP Date header is used")
+    parser.add_argument("--sources", default="uart,mavlink,network", help="Comma separated sources to listen on")
+    parser.add_argument("--max-wait", type=float, default=MAX_WAIT, help="Seconds before giving up")
+    parser.add_argument("--dry-run", action="store_true", help="Report the first valid time, don't set the clock")
+    args = parser.parse_args()
+
+    toolkit_logging.setup_logging()
+    started = time.monotonic()
+    sources = {
+        "uart": (uart_source, (args.device, args.baud, args.leap_seconds)),
+        "mavlink": (mavlink_source, (args.mavlink_port,)),
+        "network": (network_source, (args.http_host,)),
+    }
+    samples = queue.Queue()
+    stop = threading.Event()
+    for name in args.sources.split(","):
+        target, source_args = sources[name.strip()]
+        threading.Thread(target=target, args=(samples, stop) + source_args, name=name, daemon=True).start()
+    sd_notify.status(f"Waiting for a time source ({args.sources})")
 
-if __name__ == "__main__":
     try:
-        read_from_uart()
-    except:
-        print("Error reading from uart")
+        sample = samples.get(timeout=args.max_wait)
+    except queue.Empty:
+        logger.error("No valid time from %s within %.0f s", args.sources, args.max_wait)
+        sys.exit(1)
+    finally:
+        stop.set()
+
+    unix_time = sample.now()
+    offset = time.time() - unix_time
+    if not args.dry_run:
+        time.clock_settime(time.CLOCK_REALTIME, unix_time)
+    boot_time = time.clock_gettime(time.CLOCK_BOOTTIME)
+    elapsed = time.monotonic() - started
+    logger.info("Time %s from %s (%s), clock was off by %+.3f s", "valid" if args.dry_run else "set",
+                sample.source, sample.detail, offset)
+    logger.info("Valid time %.3f s after boot, %.3f s after start", boot_time, elapsed)
+    if not args.dry_run:
+        write_status(TIME_STATUS_FILE, {
+            "source": sample.source,
+            "detail": sample.detail,
+            "offset": round(offset, 6),
+            "boot_to_valid_time": round(boot_time, 3),
+            "start_to_valid_time": round(elapsed, 3),
+            "unix_time": round(unix_time, 3),
+        })
+    sd_notify.ready(f"Time set from {sample.source} {boot_time:.1f} s after boot")
+
+
+if __name__ == "__main__":
+    main()
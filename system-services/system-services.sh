@@ -1,10 +1,17 @@
 #!/bin/bash
 
-# Define the services to check
-SERVICES=("mavlink-router" "set-datetime" "photogram" "quspin-mag" "mavlink-mag-forwarder" "pytak-client")
+# Define the services to check (service-statusd.py watches the same list, keep it on one line)
+SERVICES=("mavlink-router" "set-datetime" "gps-timed" "photogram" "quspin-mag" "mavlink-mag-forwarder" "mavlink-reader" "pytak-client" "service-statusd")
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 
 # Function to check the status of services
 check_status() {
+    # ask the resident status daemon first, it answers without forking per service
+    if python3 "$SCRIPT_DIR/../common/service_status.py" 2>/dev/null; then
+        return
+    fi
+    echo "service-statusd not running, querying systemd per service"
+
     for SERVICE in "${SERVICES[@]}"; do
         echo "========================================"
         echo "Service: $SERVICE"
@@ -3,15 +3,20 @@ import asyncio
 import xml.etree.ElementTree as ET
 from configparser import ConfigParser
 import pytak
-from collections import defaultdict
-import math
 import sys
 import uuid
 import random
+import os
+import time
 sys.path.append('testing') 
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "common"))
 
 # custom module to read CSV values
-from cot_broadcast import read_csv_values
+from cot_broadcast import read_csv_row
+from breadcrumb_trail import BreadcrumbTrail
+from sensor_footprint import append_footprint, sensor_footprint
+import metrics
+import sd_notify
 
 # Configuration settings
 #SERVER_URL = "tls://45.32.196.115:8089" # vector server
@@ -27,13 +32,24 @@ MCAST_ADDR = "224.10.10.1"
 MCAST_PORT = 17012
 TEAM_COLOR = "Cyan"
 ROLE       = "Team Member"
+METRICS_PORT = 9102   # localhost Prometheus endpoint
+GIMBAL_STABILIZED = True  # the gimbal keeps the camera level, vehicle roll/pitch do not move the footprint
 
-all_positions = defaultdict(list)
+# presence values used until mavlink-reader has written them (test position)
+DEFAULT_TELEMETRY = {
+    "lat": 27.95, "lon": -81.62,
+    "agl": 10.0,             # meters above ground
+    "heading": 200.0,        # Drone heading (degrees, 0 = North)
+    "ground_speed": 150.0,   # m/s
+    "roll": 0.0, "pitch": 0.0,  # Vehicle attitude (degrees)
+}
 
-def build_tls_conf():
+trail = BreadcrumbTrail()  # our own position history, sent as a polyline in the presence
+
+def build_tls_conf(url=SERVER_URL):
     cfg = ConfigParser()
     cfg.add_section("tak")
-    cfg.set("tak", "COT_URL", SERVER_URL)
+    cfg.set("tak", "COT_URL", url)
     
     # paths to your cert/key/CA
     cfg.set("tak", "PYTAK_TLS_CLIENT_CERT", "/home/droneman/oi-cm4-toolkit/tak/certs/Magellan_cert.pem")
@@ -47,11 +63,13 @@ def build_tls_conf():
 
 def make_presence() -> bytes:
     now = pytak.cot_time()
-    # ——— Use your real data later ———
-    # lat, lon, alt, battery, heading, speed, gimbal_az, gimbal_el = read_csv_values()
-    lat, lon, alt = 27.95, -81.62, 10
-    heading = 200.0        # Drone heading (degrees, 0 = North)
-    speed = 150.0          # m/s
+    # latest mavlink-reader row, DEFAULT_TELEMETRY for columns it has not written
+    row = read_csv_row()
+    values = {key: row[key] if isinstance(row.get(key), float) else default
+              for key, default in DEFAULT_TELEMETRY.items()}
+    lat, lon, alt = values["lat"], values["lon"], values["agl"]
+    heading, speed = values["heading"], values["ground_speed"]
+    roll, pitch = values["roll"], values["pitch"]
     gimbal_az = 30.0      # Camera azimuth offset from heading
     gimbal_el = -25.0     # Camera elevation (negative = down)
     fov = 60.0            # Horizontal FOV (degrees)
@@ -91,8 +109,8 @@ def make_presence() -> bytes:
     # ——— SPATIAL: REQUIRED FOR WINTAK POINTER & CONE ———
     spatial = ET.SubElement(det, "spatial")
     ET.SubElement(spatial, "attitude", {
-        "roll": "0.0",
-        "pitch": "0.0",
+        "roll": f"{roll:.2f}",
+        "pitch": f"{pitch:.2f}",
         "yaw": f"{heading:.2f}"
     })
     ET.SubElement(spatial, "spin", {
@@ -101,7 +119,7 @@ def make_presence() -> bytes:
 
     
     sensor = ET.SubElement(det, "sensor", {
-        "azimuth": f"{heading:.2f}",
+        "azimuth": f"{(heading + gimbal_az) % 360:.2f}",
         "elevation": f"{gimbal_el:.2f}",
         "fov": f"{fov:.1f}",
         "vfov": f"{vfov:.1f}",
@@ -111,23 +129,23 @@ def make_presence() -> bytes:
         "north": "0.0",          # Optional, usually 0
         "roll": "0.0"
     })
-    # ——— STRAIGHT WHITE LINE (100m ahead) ———
-    line_length_deg = 0.0162  # ~100m at equator (adjust for latitude if needed)
-    line_angle_offset = 0.0
-    line_heading = (heading + line_angle_offset) % 360
-
-    delta_lat = line_length_deg * math.cos(math.radians(line_heading))
-    delta_lon = line_length_deg * math.sin(math.radians(line_heading)) / math.cos(math.radians(lat))
-    end_lat = lat + delta_lat
-    end_lon = lon + delta_lon
+    # ——— SENSOR FOOTPRINT (camera frustum projected on the ground) ———
+    footprint = sensor_footprint(lat, lon, alt, heading, pitch, roll, gimbal_az, gimbal_el, fov, vfov, sensor_range,
+                                 stabilized=GIMBAL_STABILIZED)
 
     shape = ET.SubElement(det, "shape")
+    # line from the drone to where the camera is looking
     poly = ET.SubElement(shape, "polyline", {
         "closed": "false",
         "ownerUID": UID
     })
     ET.SubElement(poly, "vertex", {"lat": f"{lat:.6f}", "lon": f"{lon:.6f}"})
-    ET.SubElement(poly, "vertex", {"lat": f"{end_lat:.6f}", "lon": f"{end_lon:.6f}"})
+    ET.SubElement(poly, "vertex", {"lat": f"{footprint.center[0]:.6f}", "lon": f"{footprint.center[1]:.6f}"})
+    append_footprint(shape, footprint, UID)
+
+    # ——— BREADCRUMB TRAIL (simplified, bounded in bytes) ———
+    trail.add(lat, lon)
+    trail.append_polyline(shape, UID)
 
 
 
@@ -138,6 +156,11 @@ def make_presence() -> bytes:
 # main async function
 async def async_main():
     
+    metrics.start_metrics_server("pytak_client", METRICS_PORT)
+    events_sent = metrics.counter("pytak_client_events_total", "Presence events sent to the TAK server")
+    bytes_sent = metrics.counter("pytak_client_bytes_total", "Bytes sent to the TAK server")
+    drain_latency = metrics.histogram("pytak_client_drain_seconds", "Time to write and drain one presence event")
+
     # — TLS setup —
     conf = build_tls_conf()
     tls_reader, tls_writer = await pytak.protocol_factory(conf)
@@ -145,13 +168,21 @@ async def async_main():
 
     # send initial presence
     tls_writer.write(make_presence());  await tls_writer.drain()
+    sd_notify.ready(f"Connected to {SERVER_URL}")
 
 
     # — keep presence alive —
     async def presence_loop():
+        watchdog = sd_notify.Watchdog()
         while True:
-            tls_writer.write(make_presence())
+            watchdog.ping()
+            data = make_presence()
+            start = time.perf_counter()
+            tls_writer.write(data)
             await tls_writer.drain()
+            drain_latency.observe(time.perf_counter() - start)
+            events_sent.inc()
+            bytes_sent.inc(len(data))
             await asyncio.sleep(5)
 
     # — user input loop —
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Bounded breadcrumb trail of our own position for the outbound presence CoT.
+
+Positions go into a short raw tail. Every TAIL_SIZE points the tail is
+simplified with Douglas-Peucker (vectorized in NumPy) and the kept points are
+sealed into a fixed-size ring, so memory stays bounded over long flights and
+the simplification cost per new point stays constant.
+
+When the trail is written into a CoT <shape> it is simplified again with a
+growing tolerance until the polyline fits the byte budget; if even that is
+not enough the oldest points are dropped.
+"""
+import time
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+TRAIL_CAPACITY = 1024     # sealed points kept in the ring
+TAIL_SIZE = 32            # raw points simplified together
+MIN_SPACING_M = 5.0       # new points closer than this to the last one are skipped
+TOLERANCE_M = 3.0         # Douglas-Peucker tolerance when sealing the tail
+TRAIL_BYTE_BUDGET = 1200  # bytes of <polyline> per presence event
+MAX_TOLERANCE_M = 500.0
+
+EARTH_RADIUS_M = 6371000.0
+
+
+def to_local_xy(lat: np.ndarray, lon: np.ndarray, ref_lat: float) -> np.ndarray:
+    """Equirectangular projection to meters, good enough for simplification distances."""
+    x = np.radians(lon) * EARTH_RADIUS_M * np.cos(np.radians(ref_lat))
+    y = np.radians(lat) * EARTH_RADIUS_M
+    return np.column_stack((x, y))
+
+
+def douglas_peucker(xy: np.ndarray, tolerance: float) -> np.ndarray:
+    """
+    Douglas-Peucker simplification with an explicit stack and vectorized distances.
+
+    Args:
+        xy: (N, 2) array of points in meters
+        tolerance: Maximum distance in meters of a dropped point from the simplified line
+
+    Returns:
+        np.ndarray: Boolean mask of the points to keep (first and last are always kept)
+    """
+    n = len(xy)
+    keep = np.zeros(n, dtype=bool)
+    if n == 0:
+        return keep
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        segment = xy[end] - xy[start]
+        points = xy[start + 1:end] - xy[start]
+        length = np.hypot(segment[0], segment[1])
+        if length == 0.0:
+            distances = np.hypot(points[:, 0], points[:, 1])
+        else:
+            distances = np.abs(segment[0] * points[:, 1] - segment[1] * points[:, 0]) / length
+        index = int(np.argmax(distances))
+        if distances[index] > tolerance:
+            split = start + 1 + index
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+    return keep
+
+
+class BreadcrumbTrail:
+    """Fixed-size ring of simplified positions plus a raw tail."""
+
+    def __init__(self, capacity: int = TRAIL_CAPACITY, tail_size: int = TAIL_SIZE,
+                 min_spacing_m: float = MIN_SPACING_M, tolerance_m: float = TOLERANCE_M):
+        self.capacity = capacity
+        self.tail_size = tail_size
+        self.min_spacing_m = min_spacing_m
+        self.tolerance_m = tolerance_m
+
+        self.ring = np.zeros((capacity, 3))  # lat, lon, unix time
+        self.head = 0                        # next write index
+        self.count = 0
+        self.tail = np.zeros((tail_size, 3))
+        self.tail_count = 0
+
+        self.added = 0
+        self.skipped = 0
+        self._cache = None                   # (budget, polyline points) until the next add
+        self._budget_tolerance = tolerance_m # tolerance that met the budget last time
+
+    def add(self, lat: float, lon: float, timestamp: float = None) -> bool:
+        """
+        Add a position, returns False if it was too close to the last one.
+        """
+        last = self._last_point()
+        if last is not None:
+            xy = to_local_xy(np.array([last[0], lat]), np.array([last[1], lon]), lat)
+            if np.hypot(*(xy[1] - xy[0])) < self.min_spacing_m:
+                self.skipped += 1
+                return False
+
+        self.tail[self.tail_count] = (lat, lon, time.time() if timestamp is None else timestamp)
+        self.tail_count += 1
+        self.added += 1
+        self._cache = None
+        if self.tail_count == self.tail_size:
+            self._seal_tail()
+        return True
+
+    def _last_point(self):
+        if self.tail_count:
+            return self.tail[self.tail_count - 1]
+        if self.count:
+            return self.ring[(self.head - 1) % self.capacity]
+        return None
+
+    def _seal_tail(self):
+        """Simplify the tail and move the kept points into the ring, keeping the last as the new tail start."""
+        tail = self.tail[:self.tail_count]
+        if self.count:
+            # anchor on the last sealed point so the joint is simplified too
+            anchor = self.ring[(self.head - 1) % self.capacity]
+            points = np.vstack((anchor, tail))
+        else:
+            points = tail
+        keep = douglas_peucker(to_local_xy(points[:, 0], points[:, 1], points[-1, 0]), self.tolerance_m)
+        if self.count:
+            keep = keep[1:]
+        sealed = tail[keep][:-1]
+
+        for point in sealed:
+            self.ring[self.head] = point
+            self.head = (self.head + 1) % self.capacity
+            self.count = min(self.count + 1, self.capacity)
+        self.tail[0] = tail[-1]
+        self.tail_count = 1
+
+    def points(self) -> np.ndarray:
+        """All trail points, oldest first, as an (N, 3) array of lat, lon, time."""
+        start = (self.head - self.count) % self.capacity
+        if start + self.count <= self.capacity:
+            sealed = self.ring[start:start + self.count]
+        else:
+            sealed = np.vstack((self.ring[start:], self.ring[:self.head]))
+        return np.vstack((sealed, self.tail[:self.tail_count]))
+
+    def polyline_points(self, byte_budget: int = TRAIL_BYTE_BUDGET) -> np.ndarray:
+        """
+        Trail points simplified until their <vertex> elements fit the byte budget.
+
+        Returns:
+            np.ndarray: (N, 2) lat, lon, oldest first
+        """
+        if self._cache is not None and self._cache[0] == byte_budget:
+            return self._cache[1]
+
+        points = self.points()[:, :2]
+        if len(points) > 2:
+            xy = to_local_xy(points[:, 0], points[:, 1], points[-1, 0])
+            # start just below the tolerance that fit last time, the trail changes little between events
+            tolerance = max(self.tolerance_m, self._budget_tolerance / 2.0)
+            if vertices_size(points) > byte_budget and tolerance > self.tolerance_m:
+                points = points[douglas_peucker(xy, tolerance)]
+                xy = to_local_xy(points[:, 0], points[:, 1], points[-1, 0])
+            while vertices_size(points) > byte_budget and tolerance < MAX_TOLERANCE_M:
+                tolerance *= 2.0
+                points = points[douglas_peucker(xy, tolerance)]
+                xy = to_local_xy(points[:, 0], points[:, 1], points[-1, 0])
+            self._budget_tolerance = tolerance
+        # last resort: drop the oldest points
+        while len(points) > 2 and vertices_size(points) > byte_budget:
+            points = points[max(1, len(points) // 10):]
+
+        self._cache = (byte_budget, points)
+        return points
+
+    def append_polyline(self, shape: ET.Element, owner_uid: str,
+                        byte_budget: int = TRAIL_BYTE_BUDGET) -> ET.Element:
+        """
+        Add the trail as an open <polyline> to a CoT <shape> element.
+
+        Returns:
+            ET.Element: The polyline, or None if the trail has fewer than two points
+        """
+        points = self.polyline_points(byte_budget)
+        if len(points) < 2:
+            return None
+        poly = ET.SubElement(shape, "polyline", {"closed": "false", "ownerUID": owner_uid})
+        for lat, lon in points:
+            ET.SubElement(poly, "vertex", {"lat": f"{lat:.6f}", "lon": f"{lon:.6f}"})
+        return poly
+
+    def stats(self) -> dict:
+        return {
+            "added": self.added,
+            "skipped": self.skipped,
+            "stored": self.count + self.tail_count,
+        }
+
+
+def vertices_size(points: np.ndarray) -> int:
+    """Serialized size in bytes of the <vertex lat=".." lon=".."/> elements for these points."""
+    # <vertex lat="" lon="" /> is 24 bytes, plus the two numbers with 6 decimals
+    digits = np.floor(np.log10(np.maximum(np.abs(points), 1.0))) + 1 + 7 + (points < 0)
+    return int(len(points) * 24 + digits.sum())
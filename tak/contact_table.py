@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+In-memory table of contacts (other units) received from the TAK server.
+
+Keeps the latest position, type and stale time per UID, with:
+    - a uniform lat/lon grid index for "contacts within R meters" queries
+    - a timer wheel that evicts entries once their CoT stale time has passed
+    - a hard cap on the number of contacts (least recently updated goes first)
+
+so memory stays bounded even when the server floods us with tracks. Eviction
+is amortized into update() and within(), no background task is needed.
+"""
+import math
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional
+
+EARTH_RADIUS_M = 6371000.0
+METERS_PER_DEG_LAT = 111320.0
+
+MAX_CONTACTS = 5000          # hard cap on the number of tracked contacts
+CELL_SIZE_M = 1000.0         # grid cell size (north-south) in meters
+WHEEL_SLOTS = 512            # timer wheel length, one slot per WHEEL_RESOLUTION
+WHEEL_RESOLUTION = 1.0       # seconds per timer wheel slot
+DEFAULT_STALE = 120.0        # seconds, used when an event has no parseable stale time
+
+
+def parse_cot_time(value: str) -> Optional[float]:
+    """Convert a CoT timestamp (e.g. 2025-06-09T12:00:00.000Z) to epoch seconds."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+def distance_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in meters (haversine)."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+class Contact:
+    """Latest known state of one contact."""
+
+    __slots__ = ("uid", "cot_type", "callsign", "lat", "lon", "hae", "stale", "updated", "cell", "slot")
+
+    def __init__(self, uid: str):
+        self.uid = uid
+        self.cot_type = ""
+        self.callsign = None
+        self.lat = 0.0
+        self.lon = 0.0
+        self.hae = 0.0
+        self.stale = 0.0       # epoch seconds
+        self.updated = 0.0     # epoch seconds of the last update
+        self.cell = None       # grid cell key
+        self.slot = None       # timer wheel slot index
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__ if name not in ("cell", "slot")}
+
+
+class ContactTable:
+    """UID-keyed contact table with a spatial grid index and stale eviction."""
+
+    def __init__(self, max_contacts: int = MAX_CONTACTS, cell_size_m: float = CELL_SIZE_M,
+                 wheel_slots: int = WHEEL_SLOTS, wheel_resolution: float = WHEEL_RESOLUTION):
+        self.max_contacts = max_contacts
+        self.cell_deg = cell_size_m / METERS_PER_DEG_LAT
+        self.wheel_resolution = wheel_resolution
+        self.wheel = [set() for _ in range(wheel_slots)]
+        self._wheel_tick = None             # last processed wheel tick
+        self.contacts = OrderedDict()       # uid -> Contact, least recently updated first
+        self.grid = {}                      # cell -> set of Contact
+        self.evicted_stale = 0
+        self.evicted_capacity = 0
+
+    def __len__(self):
+        return len(self.contacts)
+
+    def __contains__(self, uid):
+        return uid in self.contacts
+
+    def get(self, uid: str) -> Optional[Contact]:
+        return self.contacts.get(uid)
+
+    def _cell(self, lat: float, lon: float):
+        return (math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg))
+
+    def _tick(self, t: float) -> int:
+        return int(t / self.wheel_resolution)
+
+    def _wheel_add(self, contact: Contact, now: float):
+        # entries beyond the wheel horizon go in the last slot within reach and
+        # are re-filed when that slot comes up; already stale ones go in the
+        # current slot so the next pass drops them
+        current = self._tick(now)
+        tick = max(current, min(self._tick(contact.stale), current + len(self.wheel) - 1))
+        contact.slot = tick % len(self.wheel)
+        self.wheel[contact.slot].add(contact)
+
+    def _unlink(self, contact: Contact):
+        if contact.slot is not None:
+            self.wheel[contact.slot].discard(contact)
+            contact.slot = None
+        if contact.cell is not None:
+            members = self.grid.get(contact.cell)
+            if members is not None:
+                members.discard(contact)
+                if not members:
+                    del self.grid[contact.cell]
+            contact.cell = None
+
+    def remove(self, uid: str) -> bool:
+        contact = self.contacts.pop(uid, None)
+        if contact is None:
+            return False
+        self._unlink(contact)
+        return True
+
+    def update(self, uid: str, cot_type: str, lat: float, lon: float, hae: float = 0.0,
+               stale: Optional[float] = None, callsign: Optional[str] = None,
+               now: Optional[float] = None) -> Contact:
+        """
+        Insert or update a contact.
+
+        Args:
+            uid: Contact UID
+            cot_type: CoT type (e.g. a-f-G-U-C)
+            lat: Latitude in degrees
+            lon: Longitude in degrees
+            hae: Height above ellipsoid in meters
+            stale: Stale time in epoch seconds (default now + DEFAULT_STALE)
+            callsign: Optional callsign
+            now: Current epoch time, mostly for replay/testing
+
+        Returns:
+            Contact: The updated entry
+        """
+        now = time.time() if now is None else now
+        self.evict_stale(now)
+
+        contact = self.contacts.get(uid)
+        if contact is None:
+            while len(self.contacts) >= self.max_contacts:
+                _, oldest = self.contacts.popitem(last=False)
+                self._unlink(oldest)
+                self.evicted_capacity += 1
+            contact = Contact(uid)
+            self.contacts[uid] = contact
+        else:
+            self.contacts.move_to_end(uid)
+            if contact.slot is not None:
+                self.wheel[contact.slot].discard(contact)
+
+        contact.cot_type = cot_type
+        if callsign:
+            contact.callsign = callsign
+        contact.lat = lat
+        contact.lon = lon
+        contact.hae = hae
+        contact.stale = stale if stale is not None else now + DEFAULT_STALE
+        contact.updated = now
+
+        cell = self._cell(lat, lon)
+        if cell != contact.cell:
+            if contact.cell is not None:
+                members = self.grid[contact.cell]
+                members.discard(contact)
+                if not members:
+                    del self.grid[contact.cell]
+            self.grid.setdefault(cell, set()).add(contact)
+            contact.cell = cell
+
+        self._wheel_add(contact, now)
+        return contact
+
+    def update_from_event(self, root, now: Optional[float] = None) -> Optional[Contact]:
+        """
+        Update the table from a parsed CoT <event> element.
+
+        Returns:
+            Contact: The updated entry, or None if the event has no usable position
+        """
+        uid = root.get("uid")
+        point = root.find("point")
+        if not uid or point is None:
+            return None
+        try:
+            lat = float(point.get("lat"))
+            lon = float(point.get("lon"))
+            hae = float(point.get("hae", 0.0))
+        except (TypeError, ValueError):
+            return None
+
+        callsign = None
+        contact = root.find("detail/contact")
+        if contact is not None:
+            callsign = contact.get("callsign")
+
+        return self.update(uid, root.get("type", ""), lat, lon, hae,
+                           stale=parse_cot_time(root.get("stale")), callsign=callsign, now=now)
+
+    def evict_stale(self, now: Optional[float] = None) -> int:
+        """
+        Advance the timer wheel and drop every contact whose stale time has passed.
+
+        Returns:
+            int: Number of contacts evicted
+        """
+        now = time.time() if now is None else now
+        current = self._tick(now)
+        if self._wheel_tick is None:
+            self._wheel_tick = current
+            return 0
+
+        evicted = 0
+        # at most one full turn of the wheel per call
+        start = max(self._wheel_tick, current - len(self.wheel) + 1)
+        for tick in range(start, current + 1):
+            slot = self.wheel[tick % len(self.wheel)]
+            if not slot:
+                continue
+            for contact in list(slot):
+                if contact.stale <= now:
+                    self.contacts.pop(contact.uid, None)
+                    self._unlink(contact)
+                    evicted += 1
+                elif self._tick(contact.stale) != tick:
+                    # parked beyond the horizon, or not due in this turn of the wheel
+                    slot.discard(contact)
+                    self._wheel_add(contact, now)
+        self._wheel_tick = current
+        self.evicted_stale += evicted
+        return evicted
+
+    def within(self, lat: float, lon: float, radius_m: float, cot_prefix: str = "",
+               now: Optional[float] = None) -> list:
+        """
+        Contacts within radius_m of a position, nearest first.
+
+        Args:
+            lat: Latitude in degrees
+            lon: Longitude in degrees
+            radius_m: Search radius in meters
+            cot_prefix: Optional CoT type prefix filter (e.g. "a-h" for hostile)
+
+        Returns:
+            list: (distance in meters, Contact) tuples sorted by distance
+        """
+        self.evict_stale(now)
+
+        cell_lat, cell_lon = self._cell(lat, lon)
+        span_lat = math.ceil(radius_m / (self.cell_deg * METERS_PER_DEG_LAT))
+        cos_lat = max(math.cos(math.radians(lat)), 1e-6)
+        span_lon = math.ceil(radius_m / (self.cell_deg * METERS_PER_DEG_LAT * cos_lat))
+
+        results = []
+        if (2 * span_lat + 1) * (2 * span_lon + 1) > len(self.grid):
+            # large radius: scanning the occupied cells is cheaper than the window
+            cells = [c for c in self.grid
+                     if abs(c[0] - cell_lat) <= span_lat and abs(c[1] - cell_lon) <= span_lon]
+        else:
+            cells = [(i, j) for i in range(cell_lat - span_lat, cell_lat + span_lat + 1)
+                     for j in range(cell_lon - span_lon, cell_lon + span_lon + 1)]
+
+        for cell in cells:
+            for contact in self.grid.get(cell, ()):
+                if cot_prefix and not contact.cot_type.startswith(cot_prefix):
+                    continue
+                d = distance_m(lat, lon, contact.lat, contact.lon)
+                if d <= radius_m:
+                    results.append((d, contact))
+        results.sort(key=lambda item: item[0])
+        return results
+
+    def stats(self) -> dict:
+        return {
+            "contacts": len(self.contacts),
+            "cells": len(self.grid),
+            "evicted_stale": self.evicted_stale,
+            "evicted_capacity": self.evicted_capacity,
+        }
@@ -2,19 +2,33 @@
 import socket
 import time
 import csv
+import logging
 from datetime import datetime, timedelta, timezone
 import subprocess
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "common"))
+
+# custom modules
+from dead_reckoning import extrapolate_row
+import metrics
+import toolkit_logging
+from latency_trace import TelemetryTrace
+from service_status import cot_detail
 
 # Configuration parameters:
 BROADCAST_IP = "255.255.255.255"  # Update this to your network's broadcast address
 PORT = 6969                   # Port that ATAK is listening on for CoT messages
 
-# Launch the mavlink-reader.py script
 CSV_FILE = "/home/droneman/oi-cm4-toolkit/mavlink-reader/mavlink-data.csv"
 mavlink_reader_script = "/home/droneman/oi-cm4-toolkit/mavlink-reader/mavlink-reader.py"
-subprocess.Popen(["python3", mavlink_reader_script, "stream"])
+METRICS_PORT = 9103           # localhost Prometheus endpoint
+TRACE_DETAIL = False          # add a <__latency> detail with the age of the telemetry sample
 
-def create_cot_message(lat, lon, altitude, uid="drone-1", callsign="Default Goose", type="a-f-A-C-F"):
+logger = logging.getLogger("cot_broadcast")
+
+def create_cot_message(lat, lon, altitude, uid="drone-1", callsign="Default Goose", type="a-f-A-C-F", trace=None, status=None):
     """
     Generate a simple CoT XML message with current time and provided location.
     
@@ -25,6 +39,10 @@ def create_cot_message(lat, lon, altitude, uid="drone-1", callsign="Default Goos
         uid (str): Unique identifier for the source.
         callsign (str): Human-friendly name for the source.
         type (str): Cursor type that designates what the icon looks like in ATAK.
+        trace (TelemetryTrace): Optional trace of the telemetry sample, adds a <__latency> detail
+            with the sample age in seconds and its receive time.
+        status (dict): Optional service health summary (service_status.query("summary")),
+            adds an <__oi_status> detail.
     
     Returns:
         str: A CoT message in XML format.
@@ -33,6 +51,13 @@ def create_cot_message(lat, lon, altitude, uid="drone-1", callsign="Default Goos
     time_str = now.isoformat() + "Z"
     start_str = time_str
     stale_str = (now + timedelta(minutes=2)).isoformat() + "Z"
+    latency = ""
+    if trace is not None:
+        latency = f"""
+        <__latency sourceAge="{trace.source_age():.3f}" sampleTime="{trace.sample_time()}"/>"""
+    if status:
+        latency += f"""
+        {cot_detail(status)}"""
     
     cot_message = f"""<?xml version="1.0" encoding="UTF-8"?>
 <event version="2.0" 
@@ -42,7 +67,7 @@ def create_cot_message(lat, lon, altitude, uid="drone-1", callsign="Default Goos
     time="{time_str}" start="{start_str}" stale="{stale_str}">
     <point lat="{lat}" lon="{lon}" hae="{altitude}" ce="10.0" le="10.0"/>
     <detail>
-        <contact callsign="{callsign}"/>
+        <contact callsign="{callsign}"/>{latency}
     </detail>
 </event>"""
     return cot_message
@@ -69,10 +94,48 @@ def read_csv_values():
                 heading = float(row.get("heading", 0.0))
                 #print(f"Read from CSV: lat={lat}, lon={lon}, alt={alt}")
     except Exception as e:
-        print(f"Error reading CSV: {e}")
+        logger.error("Error reading CSV: %s", e)
     return lat, lon, alt, battery, heading, grnd_speed
 
+def read_csv_row():
+    """
+    Reads the latest telemetry row from the CSV file as a dict.
+
+    Numeric columns are converted to float, everything else is kept as a string.
+    Newer mavlink-reader versions also write vn, ve (ground velocity in m/s) and
+    position_time (unix time of the lat/lon sample) used for dead reckoning, and
+    rx_monotonic / write_monotonic (CLOCK_MONOTONIC at MAVLink receive and CSV
+    write) used for latency tracing.
+
+    Returns:
+        dict: The last row, or an empty dict if the file could not be read
+    """
+    row = {}
+    try:
+        with open(CSV_FILE, newline='') as csvfile:
+            for row in csv.DictReader(csvfile):
+                pass
+    except FileNotFoundError:
+        logger.debug("%s does not exist yet", CSV_FILE)
+        return {}
+    except Exception as e:
+        logger.error("Error reading CSV: %s", e)
+        return {}
+    values = {}
+    for key, value in row.items():
+        try:
+            values[key] = float(value)
+        except (TypeError, ValueError):
+            values[key] = value
+    return values
+
 def main():
+    toolkit_logging.setup_logging()
+
+    # Launch the mavlink-reader.py script (only when run standalone, importing this
+    # module for read_csv_values must not start another reader)
+    subprocess.Popen(["python3", mavlink_reader_script, "stream"])
+
     # Create a UDP socket configured for broadcasting
     sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
     sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
@@ -85,10 +148,24 @@ def main():
     hostname = socket.gethostname()
     uid = f"{hostname}-1"
 
-    print("Broadcasting CoT messages. Press Ctrl+C to stop.")
+    metrics.start_metrics_server("cot_broadcast", METRICS_PORT)
+    events_sent = metrics.counter("cot_broadcast_events_total", "CoT events broadcast")
+    bytes_sent = metrics.counter("cot_broadcast_bytes_total", "Bytes broadcast")
+    send_errors = metrics.counter("cot_broadcast_errors_total", "Broadcast send failures")
+    position_age = metrics.gauge("cot_broadcast_position_age_seconds", "Age of the telemetry sample at send time")
+
+    logger.info("Broadcasting CoT messages. Press Ctrl+C to stop.")
     try:
         while True:
-            lat, lon, alt, battery, heading, grnd_speed = read_csv_values() # Update location values from the CSV file
+            row = read_csv_row() # Update location values from the CSV file
+            if "lat" not in row:
+                time.sleep(5)
+                continue
+            # The CSV sample can be seconds old, extrapolate it to now
+            lat, lon, age = extrapolate_row(row)
+            alt = row.get("agl", 0.0)
+            position_age.set(age)
+            trace = TelemetryTrace.from_row(row, "cot_broadcast")
 
             # CoT type string: Hyphen-delimited identifier based on MIL-STD-2525 concepts.
             # Common 'atoms' structure: 'a'-affiliation-dimension-function_code
@@ -98,22 +175,29 @@ def main():
             # 'a-f-A-C-F' -> Friendly Air Civilian Fixed-wing 
             # 'a-f-G'-> Friendly Ground (e.g., vehicle, person, etc.)
             # 'a-f-A-W' -> Friendly Air Missle
-            message = create_cot_message(lat, lon, alt, uid=uid, callsign=hostname, type="a-f-A-C")
+            message = create_cot_message(lat, lon, alt, uid=uid, callsign=hostname, type="a-f-A-C",
+                                         trace=trace if TRACE_DETAIL else None)
+            if trace is not None:
+                trace.mark_built()
             
             
             try:
-                sock.sendto(message.encode('utf-8'), (BROADCAST_IP, PORT)) # Send the message via UDP broadcast
+                data = message.encode('utf-8')
+                sock.sendto(data, (BROADCAST_IP, PORT)) # Send the message via UDP broadcast
+                events_sent.inc()
+                bytes_sent.inc(len(data))
+                if trace is not None:
+                    trace.mark_sent("broadcast")
             except Exception as e:
-                print(f"Error sending message: {e}")
+                send_errors.inc()
+                logger.error("Error sending message: %s", e)
                 continue
 
-            print("Broadcasted CoT message:")
-            print(message)
-            print("-" * 50)
+            logger.debug("Broadcasted CoT message:\n%s", message)
             # Wait a few seconds before sending the next message
             time.sleep(5)
     except KeyboardInterrupt:
-        print("Broadcasting stopped.")
+        logger.info("Broadcasting stopped.")
     finally:
         sock.close()
 
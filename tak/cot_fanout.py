@@ -0,0 +1,468 @@
+#!/usr/bin/env python3
+"""
+Single-process CoT fan-out service.
+
+Reads the drone telemetry once, serializes each CoT event once and writes the
+same bytes to every configured sink. A sink is described by a URL:
+
+    tls://host:port          TAK server over TLS (uses the pytak cert config)
+    tcp://host:port          TAK server over plain TCP
+    udp://host:port          UDP unicast
+    broadcast://addr:port    UDP broadcast (e.g. 255.255.255.255:6969 for ATAK)
+    multicast://group:port   UDP multicast (e.g. 239.2.3.1:6969, ATAK SA)
+
+Each sink has its own rate policy (minimum interval between events and a small
+"latest wins" queue) and its own health counters, so a slow TAK server never
+holds up the local broadcast and vice versa.
+
+Every position event carries the latency trace of its telemetry sample
+(common/latency_trace.py), so telemetry_age_seconds shows how old the
+position was when it left each sink. --trace-detail also writes the sample
+age into the event as a <__latency> detail. --status-detail adds the service
+health summary of service-statusd as an <__oi_status> detail, refreshed every
+10 s.
+"""
+import abc
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import sys
+import time
+from collections import deque
+from urllib.parse import urlparse
+
+import pytak
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "common"))
+
+# custom modules
+from cot_broadcast import create_cot_message, read_csv_row
+from dead_reckoning import extrapolate_row
+from geofence import build_geofence_alert, load_geojson
+import metrics
+import sd_notify
+from service_status import cached_summary
+import toolkit_logging
+from latency_trace import TelemetryTrace
+from PytakClient import build_tls_conf
+
+# Default sinks: the OI TAK server and the local ATAK broadcast that used to be
+# served by two separate processes (PytakClient.py and cot_broadcast.py)
+SINKS = [
+    {"url": "tls://35.231.4.140:8089", "min_interval": 1.0},
+    {"url": "broadcast://255.255.255.255:6969", "min_interval": 5.0},
+]
+
+PUBLISH_INTERVAL = 1.0   # seconds between telemetry reads / event builds
+STATS_INTERVAL = 30.0    # seconds between sink health reports
+METRICS_PORT = 9105      # localhost Prometheus endpoint
+RECONNECT_DELAY = 3.0    # initial reconnect delay for stream sinks (seconds)
+MAX_RECONNECT_DELAY = 30.0
+MULTICAST_TTL = 1
+ALERT_QUEUE_SIZE = 50    # alerts kept per sink while it is disconnected
+
+logger = logging.getLogger("cot_fanout")
+
+
+class SinkStats:
+    """Health counters for a single sink."""
+
+    __slots__ = ("sent", "bytes_sent", "rate_limited", "dropped", "send_dropped", "errors",
+                 "reconnects", "connected", "last_error", "last_sent_time")
+
+    def __init__(self):
+        self.sent = 0            # events written to the sink
+        self.bytes_sent = 0      # bytes written to the sink
+        self.rate_limited = 0    # events skipped by the sink's rate policy
+        self.dropped = 0         # events replaced in the queue before being sent
+        self.send_dropped = 0    # events the transport could not take (datagram socket buffer full)
+        self.errors = 0          # send / connect failures
+        self.reconnects = 0      # successful reconnects after the first connect
+        self.connected = False
+        self.last_error = ""
+        self.last_sent_time = 0.0
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class CotSink(abc.ABC):
+    """
+    Base class for a fan-out destination.
+
+    Events are handed to the sink with submit(), which never blocks: the rate
+    policy is applied there and, if the sink is still busy with an older event,
+    the oldest queued event is dropped in favour of the newest one.
+    Alerts (submit_alert) skip the rate policy and are never replaced by a
+    newer event, they are sent before anything else in the queue.
+    """
+
+    def __init__(self, url: str, min_interval: float = 0.0, queue_size: int = 1):
+        parsed = urlparse(url)
+        self.url = url
+        self.scheme = parsed.scheme.lower()
+        self.host = parsed.hostname
+        self.port = parsed.port
+        self.min_interval = min_interval
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.alerts = deque(maxlen=ALERT_QUEUE_SIZE)
+        self.stats = SinkStats()
+        self.drain_histogram = None  # set by CotFanout, observes the send time of each event
+        self._last_accept = 0.0
+
+    def submit(self, data: bytes, now: float = None, trace: TelemetryTrace = None) -> bool:
+        """
+        Offer an event to this sink.
+
+        Args:
+            data: Serialized CoT event (shared between all sinks, never copied)
+            now: Optional monotonic timestamp, to avoid a clock read per sink
+            trace: Optional latency trace of the telemetry sample, completed when the event is sent
+
+        Returns:
+            bool: True if the event was queued, False if the rate policy skipped it
+        """
+        now = time.monotonic() if now is None else now
+        if now - self._last_accept < self.min_interval:
+            self.stats.rate_limited += 1
+            return False
+        self._last_accept = now
+
+        if self.queue.full() and self.queue.get_nowait() is not None:
+            # a None only wakes run() for an alert, the new event does that as well
+            self.stats.dropped += 1
+        self.queue.put_nowait((data, trace))
+        return True
+
+    def submit_alert(self, data: bytes):
+        """Queue an alert ahead of regular events, bypassing the rate policy."""
+        self.alerts.append(data)
+        if self.queue.empty():
+            self.queue.put_nowait(None)  # wake up run()
+
+    @abc.abstractmethod
+    async def open(self):
+        """Open the underlying transport."""
+
+    @abc.abstractmethod
+    async def send(self, data: bytes) -> bool:
+        """
+        Write one event to the transport.
+
+        Returns:
+            bool: True if the event was written, False if the transport dropped it
+        """
+
+    def close(self):
+        """Close the underlying transport."""
+
+    async def run(self):
+        """Drain the sink queue, (re)opening the transport as needed."""
+        delay = RECONNECT_DELAY
+        first_connect = True
+        while True:
+            try:
+                await self.open()
+                self.stats.connected = True
+                if not first_connect:
+                    self.stats.reconnects += 1
+                first_connect = False
+                delay = RECONNECT_DELAY
+                logger.info("Sink %s connected", self.url)
+
+                while True:
+                    item = await self.queue.get()
+                    while self.alerts:
+                        await self._send_counted(self.alerts[0])
+                        self.alerts.popleft()
+                    if item is not None:
+                        data, trace = item
+                        if await self._send_counted(data) and trace is not None:
+                            trace.mark_sent(self.url)
+            except asyncio.CancelledError:
+                self.close()
+                raise
+            except Exception as e:
+                self.stats.errors += 1
+                self.stats.last_error = str(e)
+                self.stats.connected = False
+                self.close()
+                logger.warning("Sink %s failed: %s (retrying in %.0fs)", self.url, e, delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, MAX_RECONNECT_DELAY)
+
+    async def _send_counted(self, data: bytes) -> bool:
+        start = time.perf_counter()
+        if not await self.send(data):
+            self.stats.send_dropped += 1
+            return False
+        if self.drain_histogram is not None:
+            self.drain_histogram.observe(time.perf_counter() - start)
+        self.stats.sent += 1
+        self.stats.bytes_sent += len(data)
+        self.stats.last_sent_time = time.time()
+        return True
+
+
+class StreamSink(CotSink):
+    """
+    TLS or TCP connection to a TAK server.
+
+    The pytak config is built from the URL unless an explicit one is given
+    (e.g. the client-cert config used by atak_chat).
+    """
+
+    def __init__(self, url: str, min_interval: float = 0.0, queue_size: int = 1, conf=None):
+        super().__init__(url, min_interval, queue_size)
+        self.conf = conf
+        self.reader = None
+        self.writer = None
+
+    async def open(self):
+        if self.conf is not None:
+            conf = self.conf
+        elif self.scheme == "tls":
+            conf = build_tls_conf(self.url)
+        else:
+            conf = {"COT_URL": self.url}
+        self.reader, self.writer = await pytak.protocol_factory(conf)
+
+    async def send(self, data: bytes) -> bool:
+        self.writer.write(data)
+        await self.writer.drain()
+        return True
+
+    def close(self):
+        if self.writer is not None:
+            try:
+                self.writer.close()
+            except Exception:
+                pass
+            self.reader = None
+            self.writer = None
+
+
+class DatagramSink(CotSink):
+    """UDP unicast, broadcast or multicast destination."""
+
+    def __init__(self, url: str, min_interval: float = 0.0, queue_size: int = 1):
+        super().__init__(url, min_interval, queue_size)
+        self.sock = None
+
+    async def open(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        if self.scheme == "broadcast":
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        elif self.scheme == "multicast":
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, MULTICAST_TTL)
+        sock.setblocking(False)
+        self.sock = sock
+
+    async def send(self, data: bytes) -> bool:
+        try:
+            self.sock.sendto(data, (self.host, self.port))
+        except BlockingIOError:
+            # socket buffer full; a datagram sink never waits, the event is lost
+            return False
+        return True
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+
+SINK_TYPES = {
+    "tls": StreamSink,
+    "ssl": StreamSink,
+    "tcp": StreamSink,
+    "udp": DatagramSink,
+    "broadcast": DatagramSink,
+    "multicast": DatagramSink,
+}
+
+
+def make_sink(url: str, min_interval: float = 0.0, queue_size: int = 1) -> CotSink:
+    """Create the sink matching the URL scheme."""
+    scheme = urlparse(url).scheme.lower()
+    if scheme not in SINK_TYPES:
+        raise ValueError(f"Unsupported sink scheme '{scheme}' in {url}")
+    return SINK_TYPES[scheme](url, min_interval, queue_size)
+
+
+class CotFanout:
+    """Serializes each event once and hands the same bytes to every sink."""
+
+    def __init__(self, sinks):
+        self.sinks = list(sinks)
+        self.published = 0
+        metrics.counter("cot_fanout_published_total", "Events offered to the sinks").set_function(lambda: self.published)
+        for sink in self.sinks:
+            self._register_metrics(sink)
+
+    @staticmethod
+    def _register_metrics(sink: CotSink):
+        labels = {"sink": sink.url}
+        stats = sink.stats
+        for name, help_text in (("sent", "Events written to the sink"),
+                                ("bytes_sent", "Bytes written to the sink"),
+                                ("rate_limited", "Events skipped by the sink rate policy"),
+                                ("dropped", "Events replaced in the queue before being sent"),
+                                ("send_dropped", "Events lost because the socket buffer was full"),
+                                ("errors", "Send and connect failures"),
+                                ("reconnects", "Reconnects after the first connect")):
+            metrics.counter(f"cot_fanout_{name}_total", help_text, labels).set_function(
+                lambda name=name: getattr(stats, name))
+        metrics.gauge("cot_fanout_connected", "1 while the sink is connected", labels).set_function(
+            lambda: int(stats.connected))
+        metrics.gauge("cot_fanout_queue_depth", "Events and alerts waiting to be sent", labels).set_function(
+            lambda: sink.queue.qsize() + len(sink.alerts))
+        sink.drain_histogram = metrics.histogram("cot_fanout_send_seconds", "Time to write and drain one event",
+                                                 labels)
+
+    def publish(self, data: bytes, trace: TelemetryTrace = None) -> int:
+        """
+        Offer one serialized event to all sinks.
+
+        Args:
+            data: Serialized CoT event
+            trace: Optional latency trace of the telemetry sample the event was built from
+
+        Returns:
+            int: Number of sinks that accepted the event
+        """
+        self.published += 1
+        now = time.monotonic()
+        return sum(sink.submit(data, now, trace) for sink in self.sinks)
+
+    def publish_alert(self, data: bytes):
+        """Send an alert to all sinks ahead of regular events, regardless of their rate policy."""
+        self.published += 1
+        for sink in self.sinks:
+            sink.submit_alert(data)
+
+    def stats(self) -> dict:
+        return {sink.url: sink.stats.as_dict() for sink in self.sinks}
+
+    async def stats_loop(self, interval: float = STATS_INTERVAL):
+        while True:
+            await asyncio.sleep(interval)
+            for sink in self.sinks:
+                s = sink.stats
+                logger.info("%s: connected=%s sent=%d bytes=%d rate_limited=%d dropped=%d send_dropped=%d "
+                            "errors=%d reconnects=%d", sink.url, s.connected, s.sent, s.bytes_sent,
+                            s.rate_limited, s.dropped, s.send_dropped, s.errors, s.reconnects)
+
+    async def run(self, producer):
+        """Run all sinks, the stats reporter and the given producer coroutine."""
+        tasks = [asyncio.create_task(sink.run()) for sink in self.sinks]
+        tasks.append(asyncio.create_task(self.stats_loop()))
+        try:
+            await producer
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def telemetry_producer(fanout: CotFanout, uid: str, callsign: str, cot_type: str,
+                             interval: float = PUBLISH_INTERVAL, geofence=None, trace_detail: bool = False,
+                             status_detail: bool = False):
+    """
+    Read the telemetry CSV once per interval and publish one CoT event at the extrapolated position.
+
+    If a GeofenceEngine is given, zone enter/exit events go out as CoT alerts ahead of the position.
+    With trace_detail the event carries the age of the telemetry sample in a <__latency> detail,
+    with status_detail the service health summary of service-statusd in an <__oi_status> detail.
+    systemd is told READY=1 when the loop starts and WATCHDOG=1 on every loop.
+    Until mavlink-reader has written a position the loop only waits, logged once;
+    the first published event is reported with STATUS=.
+    """
+    watchdog = sd_notify.Watchdog()
+    sd_notify.ready("Waiting for telemetry")
+    publishing = False
+    waiting = False
+    while True:
+        watchdog.ping()
+        try:
+            row = read_csv_row()
+            if not isinstance(row.get("lat"), float) or not isinstance(row.get("lon"), float):
+                # no telemetry yet (CSV missing or empty): the normal state at boot
+                (logger.debug if waiting else logger.info)("Waiting for telemetry")
+                waiting = True
+                await asyncio.sleep(interval)
+                continue
+            if waiting:
+                logger.info("Telemetry available")
+                waiting = False
+            trace = TelemetryTrace.from_row(row, "cot_fanout")
+            lat, lon, age = extrapolate_row(row)
+            alt = row.get("agl", 0.0)
+            if geofence is not None:
+                for event in geofence.update(lat, lon):
+                    log = logger.warning if event.breach else logger.info
+                    log("Geofence %s %s (%s)", event.transition, event.name, event.fence)
+                    fanout.publish_alert(build_geofence_alert(event, uid, callsign))
+            message = create_cot_message(lat, lon, alt, uid=uid, callsign=callsign, type=cot_type,
+                                         trace=trace if trace_detail else None,
+                                         status=cached_summary() if status_detail else None)
+            data = message.encode("utf-8")
+            if trace is not None:
+                trace.mark_built()
+            fanout.publish(data, trace)
+            if not publishing:
+                sd_notify.status(f"Publishing to {len(fanout.sinks)} sinks")
+                publishing = True
+        except Exception as e:
+            logger.error("Error building CoT event: %s", e)
+        await asyncio.sleep(interval)
+
+
+def parse_sink_arg(arg: str) -> dict:
+    """Parse a --sink argument of the form URL[@min_interval]."""
+    url, _, interval = arg.partition("@")
+    return {"url": url, "min_interval": float(interval) if interval else 0.0}
+
+
+def main():
+    hostname = socket.gethostname()
+
+    parser = argparse.ArgumentParser(description="Send CoT position to several TAK destinations from one process.")
+    parser.add_argument("--sink", action="append", type=parse_sink_arg,
+                        help="Sink URL with optional minimum interval, e.g. tls://host:8089@1 or broadcast://255.255.255.255:6969@5 (repeatable)")
+    parser.add_argument("--uid", default=f"{hostname}-1", help="CoT UID of the drone")
+    parser.add_argument("--callsign", default=hostname, help="Callsign shown in ATAK")
+    parser.add_argument("--type", default="a-f-A-C", help="CoT type of the drone icon")
+    parser.add_argument("--interval", type=float, default=PUBLISH_INTERVAL, help="Seconds between events")
+    parser.add_argument("--geofence", help="GeoJSON file of no-fly / mission boundary zones to alert on")
+    parser.add_argument("--trace-detail", action="store_true",
+                        help="Add the telemetry sample age to each event as a <__latency> detail")
+    parser.add_argument("--status-detail", action="store_true",
+                        help="Add the service health summary of service-statusd as an <__oi_status> detail")
+    args = parser.parse_args()
+
+    toolkit_logging.setup_logging()
+    metrics.start_metrics_server("cot_fanout", METRICS_PORT)
+
+    sink_configs = args.sink or SINKS
+    fanout = CotFanout(make_sink(cfg["url"], cfg.get("min_interval", 0.0)) for cfg in sink_configs)
+    for sink in fanout.sinks:
+        logger.info("Fan-out sink %s (min interval %.1fs)", sink.url, sink.min_interval)
+
+    geofence = None
+    if args.geofence:
+        geofence = load_geojson(args.geofence)
+        logger.info("Loaded %d geofence zones from %s", len(geofence.zones), args.geofence)
+
+    producer = telemetry_producer(fanout, args.uid, args.callsign, args.type, args.interval, geofence,
+                                  args.trace_detail, args.status_detail)
+    try:
+        asyncio.run(fanout.run(producer))
+    except KeyboardInterrupt:
+        print("\nProgram terminated by user")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Process-pool offload of inbound CoT parsing.
+
+On a busy TAK server the feed of other units' CoT can reach hundreds of
+events per second. CotParsePool collects raw event bytes into batches and
+parses them in worker processes on the other CM4 cores, so the asyncio loop
+that sends our own position only applies the compact records that come back:
+
+    ("pos", fields)                    position of another unit (see peek_position)
+    ("chat", event_uid, message_info)  chat message, same dict as ChatMessageHandler
+
+Batches are applied in the order they were submitted. The number of batches
+in flight is bounded, submit() waits when the workers fall behind.
+"""
+import asyncio
+import logging
+import multiprocessing
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+# custom modules
+from cot_prefilter import peek_event, peek_position
+
+PARSE_WORKERS = 2        # worker processes (the CM4 has 4 cores)
+BATCH_SIZE = 64          # events per batch
+BATCH_MAX_DELAY = 0.05   # seconds a partial batch may wait before it is sent
+
+logger = logging.getLogger("cot_parse_pool")
+
+
+def extract_chat(root: ET.Element, data_str: str, keep_raw_xml: bool = True) -> Optional[dict]:
+    """
+    Extract chat information from a parsed b-t-f event.
+
+    Returns:
+        dict: text, sender, chatroom, sender_uid, message_id and raw_xml,
+        or None if the event has no detail
+    """
+    detail = root.find("detail")
+    if detail is None:
+        return None
+
+    message_info = {
+        "text": None,
+        "sender": "Unknown",
+        "chatroom": "Unknown",
+        "sender_uid": None,
+        "message_id": None,
+        "raw_xml": data_str if keep_raw_xml else None
+    }
+
+    # Get message text
+    remarks = detail.find("remarks")
+    if remarks is not None:
+        message_info["text"] = remarks.text
+
+    # Get chat metadata
+    chat = detail.find("__chat") or detail.find("chat")
+    if chat is not None:
+        message_info["chatroom"] = chat.get("chatroom", "Unknown")
+        message_info["sender"] = chat.get("senderCallsign", "Unknown")
+        message_info["message_id"] = chat.get("messageId")
+
+    # Get sender UID
+    link = detail.find("link")
+    if link is not None:
+        message_info["sender_uid"] = link.get("uid")
+
+    return message_info
+
+
+def parse_event(raw: bytes, prefixes=("b-t-f",), keep_raw_xml: bool = True) -> Optional[tuple]:
+    """Parse one raw event into a compact record, or None if it is of no interest."""
+    peeked = peek_event(raw)
+    cot_type = peeked[0] if peeked else ""
+    if peeked and not cot_type.startswith(tuple(prefixes)):
+        if cot_type.startswith("a-"):
+            fields = peek_position(raw)
+            return ("pos", fields) if fields and fields["uid"] else None
+        return None
+
+    try:
+        data_str = raw.decode()
+        root = ET.fromstring(data_str)
+    except (UnicodeDecodeError, ET.ParseError):
+        return None
+    if root.get("type") == "b-t-f":
+        message_info = extract_chat(root, data_str, keep_raw_xml)
+        return ("chat", root.get("uid"), message_info) if message_info else None
+    if root.get("type", "").startswith("a-"):
+        fields = peek_position(raw)
+        return ("pos", fields) if fields and fields["uid"] else None
+    return None
+
+
+def parse_batch(batch: list, prefixes=("b-t-f",), keep_raw_xml: bool = True) -> tuple:
+    """
+    Worker entry point: parse a batch of raw events.
+
+    Returns:
+        tuple: (records, worker parse time in seconds)
+    """
+    t0 = time.perf_counter()
+    records = [record for record in (parse_event(raw, prefixes, keep_raw_xml) for raw in batch) if record]
+    return records, time.perf_counter() - t0
+
+
+class CotParsePool:
+    """Batches raw CoT and parses it in a process pool."""
+
+    def __init__(self, on_records, workers: int = PARSE_WORKERS, batch_size: int = BATCH_SIZE,
+                 max_delay: float = BATCH_MAX_DELAY, prefixes=("b-t-f",), keep_raw_xml: bool = True):
+        """
+        Args:
+            on_records: Coroutine function called with each batch's list of records, in order
+            workers: Number of worker processes
+            batch_size: Events per batch
+            max_delay: Seconds a partial batch may wait before it is sent anyway
+            prefixes: CoT type prefixes that get a full XML parse
+            keep_raw_xml: Keep the raw XML in chat records
+        """
+        self.on_records = on_records
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.prefixes = tuple(prefixes)
+        self.keep_raw_xml = keep_raw_xml
+
+        self.executor = None
+        self.batch = []
+        self.results = None          # in-flight batch futures, in submit order
+        self._flush_handle = None
+        self._flush_task = None
+        self._consumer = None
+
+        self.events = 0
+        self.batches = 0
+        self.applied = 0
+        self.records = 0
+        self.worker_time = 0.0
+
+    def start(self):
+        # forkserver: the client runs event loops in threads, forking those is unsafe
+        self.executor = ProcessPoolExecutor(max_workers=self.workers,
+                                            mp_context=multiprocessing.get_context("forkserver"))
+        self.results = asyncio.Queue(maxsize=self.workers * 2)
+        self._consumer = asyncio.get_running_loop().create_task(self._consume())
+        logger.info("CoT parse pool started (%d workers, batch %d)", self.workers, self.batch_size)
+
+    async def submit(self, raw: bytes):
+        """Add one raw event to the current batch, waits if the workers are behind."""
+        if self.executor is None:
+            self.start()
+        self.events += 1
+        self.batch.append(raw)
+        if len(self.batch) >= self.batch_size:
+            await self.flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.max_delay, self._flush_later)
+
+    def _flush_later(self):
+        self._flush_handle = None
+        # keep a reference until done, the loop only holds weak references to tasks
+        self._flush_task = asyncio.get_running_loop().create_task(self.flush())
+
+    async def flush(self):
+        """Send the current partial batch to the workers."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self.batch:
+            return
+        batch, self.batch = self.batch, []
+        future = asyncio.get_running_loop().run_in_executor(
+            self.executor, parse_batch, batch, self.prefixes, self.keep_raw_xml)
+        self.batches += 1
+        await self.results.put(future)
+
+    async def _consume(self):
+        while True:
+            future = await self.results.get()
+            try:
+                records, worker_time = await future
+            except Exception as e:
+                logger.error("Error parsing CoT batch: %s", e)
+                self.applied += 1
+                continue
+            self.records += len(records)
+            self.worker_time += worker_time
+            try:
+                await self.on_records(records)
+            except Exception as e:
+                logger.error("Error applying parsed CoT records: %s", e)
+            self.applied += 1
+
+    async def close(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._consumer is not None:
+            self._consumer.cancel()
+            self._consumer = None
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    def stats(self) -> dict:
+        return {
+            "events": self.events,
+            "batches": self.batches,
+            "applied": self.applied,
+            "records": self.records,
+            "in_flight": self.results.qsize() if self.results else 0,
+            "worker_ms_per_event": self.worker_time / self.events * 1000.0 if self.events else 0.0,
+        }
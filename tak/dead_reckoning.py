@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Dead-reckoning extrapolation of the aircraft position between telemetry samples.
+
+mavlink-reader.py writes the telemetry CSV once per second and the CoT senders
+poll it every 1-5 s, so the position in a CoT event can be several seconds old.
+predict() moves the last sampled position forward along the ground track by
+the sample age, using the GLOBAL_POSITION_INT ground velocity (vn/ve columns)
+when present and VFR_HUD ground_speed/heading otherwise.
+
+Extrapolation is capped at MAX_EXTRAPOLATION seconds: beyond that the last
+sample is more honest than a guess.
+"""
+import math
+import time
+from typing import Tuple
+
+EARTH_RADIUS_M = 6371000.0
+MAX_EXTRAPOLATION = 10.0   # seconds, older samples are not extrapolated further
+MIN_SPEED = 0.5            # m/s, below this the aircraft is treated as stationary
+
+
+def offset_position(lat: float, lon: float, north_m: float, east_m: float) -> Tuple[float, float]:
+    """
+    Move a position by a local north/east offset (flat earth, fine for a few km).
+
+    Returns:
+        tuple: (lat, lon) in decimal degrees
+    """
+    dlat = math.degrees(north_m / EARTH_RADIUS_M)
+    dlon = math.degrees(east_m / (EARTH_RADIUS_M * math.cos(math.radians(lat))))
+    return lat + dlat, lon + dlon
+
+
+def predict(lat: float, lon: float, speed: float, heading: float, age: float,
+            max_age: float = MAX_EXTRAPOLATION) -> Tuple[float, float]:
+    """
+    Extrapolate a position along a ground speed and heading.
+
+    Args:
+        lat, lon: Last sampled position in decimal degrees
+        speed: Ground speed in m/s
+        heading: Track in degrees, 0 = North
+        age: Seconds since the sample
+        max_age: Extrapolation cap in seconds
+
+    Returns:
+        tuple: (lat, lon) predicted for now
+    """
+    age = min(max(age, 0.0), max_age)
+    if speed < MIN_SPEED or age == 0.0:
+        return lat, lon
+    distance = speed * age
+    heading_rad = math.radians(heading)
+    return offset_position(lat, lon, distance * math.cos(heading_rad), distance * math.sin(heading_rad))
+
+
+def predict_velocity(lat: float, lon: float, vn: float, ve: float, age: float,
+                     max_age: float = MAX_EXTRAPOLATION) -> Tuple[float, float]:
+    """Extrapolate a position along a north/east ground velocity in m/s."""
+    age = min(max(age, 0.0), max_age)
+    if math.hypot(vn, ve) < MIN_SPEED or age == 0.0:
+        return lat, lon
+    return offset_position(lat, lon, vn * age, ve * age)
+
+
+def extrapolate_row(row: dict, now: float = None, max_age: float = MAX_EXTRAPOLATION) -> Tuple[float, float, float]:
+    """
+    Predict the current position from a telemetry CSV row (see cot_broadcast.read_csv_row).
+
+    Rows without a position_time (older mavlink-reader) are returned unchanged.
+
+    Returns:
+        tuple: (lat, lon, age) where age is the sample age in seconds
+    """
+    lat, lon = row["lat"], row["lon"]
+    sample_time = row.get("position_time") or 0.0
+    if not sample_time:
+        return lat, lon, 0.0
+    age = (time.time() if now is None else now) - sample_time
+    if "vn" in row and "ve" in row:
+        lat, lon = predict_velocity(lat, lon, row["vn"], row["ve"], age, max_age)
+    else:
+        lat, lon = predict(lat, lon, row.get("ground_speed", 0.0), row.get("heading", 0.0), age, max_age)
+    return lat, lon, age
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Geofence evaluation of the aircraft position with CoT alerts.
+
+Zones are loaded once (GeoJSON Polygon/MultiPolygon features) and prepared:
+each ring becomes NumPy edge arrays with precomputed slopes, and the zone's
+bounding box goes into a grid index, so a position update only ray-casts the
+few zones whose cells it falls in. Zones too large for the grid are checked
+with one vectorized bounding-box test.
+
+GeofenceEngine.update() keeps the set of zones the aircraft is inside and
+returns enter/exit events. A zone is a "keep_out" (no-fly, entering is a
+breach) or a "keep_in" (mission boundary, leaving is a breach). Events can be
+sent through any TAK client with build_geofence_alert().
+
+GeoJSON feature properties:
+    name   zone name shown in the alert (default: the feature id)
+    fence  "keep_out" (default) or "keep_in"
+"""
+import json
+import math
+import time
+import uuid
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta, timezone
+from typing import List, NamedTuple
+
+import numpy as np
+
+KEEP_OUT = "keep_out"
+KEEP_IN = "keep_in"
+
+CELL_SIZE_DEG = 0.01         # grid index cell (~1.1 km of latitude)
+MAX_INDEX_CELLS = 4096       # zones spanning more cells are checked by bounding box instead
+ALERT_TYPE = "b-a-g"         # CoT alarm: geofence breached
+ALERT_STALE = 120            # seconds
+
+
+class GeofenceEvent(NamedTuple):
+    zone_id: str
+    name: str
+    fence: str               # KEEP_OUT or KEEP_IN
+    transition: str          # "enter" or "exit"
+    breach: bool             # entered a keep_out or left a keep_in
+    lat: float
+    lon: float
+    timestamp: float
+
+
+class PreparedZone:
+    """One zone with its rings as edge arrays, ready for ray casting."""
+
+    __slots__ = ("zone_id", "name", "fence", "bbox", "x1", "y1", "y2", "slope")
+
+    def __init__(self, zone_id: str, name: str, fence: str, polygons: list):
+        """
+        Args:
+            zone_id: Unique zone identifier
+            name: Human-readable name
+            fence: KEEP_OUT or KEEP_IN
+            polygons: List of polygons, each a list of rings of (lon, lat) pairs (GeoJSON order)
+        """
+        self.zone_id = zone_id
+        self.name = name
+        self.fence = fence
+
+        x1, y1, x2, y2 = [], [], [], []
+        for rings in polygons:
+            for ring in rings:
+                ring = np.asarray(ring, dtype=float)[:, :2]
+                if len(ring) < 3:
+                    continue
+                # edges from every vertex to the next, closing the ring
+                start, end = ring, np.roll(ring, -1, axis=0)
+                x1.append(start[:, 0]); y1.append(start[:, 1])
+                x2.append(end[:, 0]); y2.append(end[:, 1])
+        if not x1:
+            raise ValueError(f"Zone {zone_id} has no ring with at least 3 points")
+        self.x1, self.y1 = np.concatenate(x1), np.concatenate(y1)
+        x2, self.y2 = np.concatenate(x2), np.concatenate(y2)
+
+        # horizontal edges never cross the test ray, a zero slope keeps them harmless
+        dy = self.y2 - self.y1
+        self.slope = np.divide(x2 - self.x1, dy, out=np.zeros_like(dy), where=dy != 0)
+        self.bbox = (float(min(self.x1.min(), x2.min())), float(self.y1.min()),
+                     float(max(self.x1.max(), x2.max())), float(self.y1.max()))
+
+    def contains(self, lat: float, lon: float) -> bool:
+        """Even-odd ray casting over all rings (holes included)."""
+        min_x, min_y, max_x, max_y = self.bbox
+        if not (min_x <= lon <= max_x and min_y <= lat <= max_y):
+            return False
+        straddles = (self.y1 > lat) != (self.y2 > lat)
+        crossings = lon < self.x1 + (lat - self.y1) * self.slope
+        return bool(np.count_nonzero(straddles & crossings) & 1)
+
+
+class GeofenceEngine:
+    """Grid-indexed set of prepared zones with inside/outside state."""
+
+    def __init__(self, zones: List[PreparedZone] = (), cell_size: float = CELL_SIZE_DEG):
+        self.cell_size = cell_size
+        self.zones = []
+        self.by_id = {}              # zone id -> zone
+        self.grid = {}               # (cell x, cell y) -> list of zone indexes
+        self.large = []              # zone indexes checked by bounding box only
+        self.large_bbox = np.zeros((0, 4))
+        self.inside = set()          # zone ids the aircraft is in
+        self.evaluations = 0
+        self.eval_ns = 0
+        for zone in zones:
+            self.add_zone(zone)
+
+    def _cell(self, lon: float, lat: float):
+        return int(math.floor(lon / self.cell_size)), int(math.floor(lat / self.cell_size))
+
+    def add_zone(self, zone: PreparedZone):
+        if zone.zone_id in self.by_id:
+            raise ValueError(f"Duplicate zone id {zone.zone_id}")
+        index = len(self.zones)
+        self.zones.append(zone)
+        self.by_id[zone.zone_id] = zone
+        min_x, min_y, max_x, max_y = zone.bbox
+        cx0, cy0 = self._cell(min_x, min_y)
+        cx1, cy1 = self._cell(max_x, max_y)
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > MAX_INDEX_CELLS:
+            self.large.append(index)
+            self.large_bbox = np.vstack((self.large_bbox, zone.bbox))
+            return
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                self.grid.setdefault((cx, cy), []).append(index)
+
+    def candidates(self, lat: float, lon: float) -> list:
+        """Zone indexes whose bounding box may contain the point."""
+        found = list(self.grid.get(self._cell(lon, lat), ()))
+        if self.large:
+            bbox = self.large_bbox
+            hits = (bbox[:, 0] <= lon) & (lon <= bbox[:, 2]) & (bbox[:, 1] <= lat) & (lat <= bbox[:, 3])
+            found.extend(self.large[i] for i in np.flatnonzero(hits))
+        return found
+
+    def zones_at(self, lat: float, lon: float) -> List[PreparedZone]:
+        """All zones containing the point."""
+        return [self.zones[i] for i in self.candidates(lat, lon) if self.zones[i].contains(lat, lon)]
+
+    def update(self, lat: float, lon: float, timestamp: float = None) -> List[GeofenceEvent]:
+        """
+        Evaluate a new position and return the enter/exit events since the last one.
+        """
+        t0 = time.perf_counter_ns()
+        timestamp = time.time() if timestamp is None else timestamp
+        now_inside = {zone.zone_id: zone for zone in self.zones_at(lat, lon)}
+
+        events = []
+        for zone_id in now_inside.keys() - self.inside:
+            zone = now_inside[zone_id]
+            events.append(GeofenceEvent(zone_id, zone.name, zone.fence, "enter", zone.fence == KEEP_OUT,
+                                        lat, lon, timestamp))
+        for zone_id in self.inside - now_inside.keys():
+            zone = self.by_id[zone_id]
+            events.append(GeofenceEvent(zone_id, zone.name, zone.fence, "exit", zone.fence == KEEP_IN,
+                                        lat, lon, timestamp))
+        self.inside = set(now_inside)
+
+        self.evaluations += 1
+        self.eval_ns += time.perf_counter_ns() - t0
+        return events
+
+    def stats(self) -> dict:
+        return {
+            "zones": len(self.zones),
+            "inside": sorted(self.inside),
+            "evaluations": self.evaluations,
+            "avg_eval_us": self.eval_ns / self.evaluations / 1000.0 if self.evaluations else 0.0,
+        }
+
+
+def load_geojson(path: str, default_fence: str = KEEP_OUT) -> GeofenceEngine:
+    """
+    Load Polygon and MultiPolygon features from a GeoJSON file into an engine.
+
+    Returns:
+        GeofenceEngine: Engine with one prepared zone per feature
+    """
+    with open(path) as f:
+        data = json.load(f)
+    features = data["features"] if data.get("type") == "FeatureCollection" else [data]
+
+    zones = []
+    for number, feature in enumerate(features):
+        geometry = feature.get("geometry") or {}
+        if geometry.get("type") == "Polygon":
+            polygons = [geometry["coordinates"]]
+        elif geometry.get("type") == "MultiPolygon":
+            polygons = geometry["coordinates"]
+        else:
+            continue
+        properties = feature.get("properties") or {}
+        zone_id = str(feature.get("id", properties.get("id", number)))
+        fence = properties.get("fence", default_fence)
+        if fence not in (KEEP_OUT, KEEP_IN):
+            raise ValueError(f"Zone {zone_id}: fence must be {KEEP_OUT} or {KEEP_IN}, not {fence}")
+        zones.append(PreparedZone(zone_id, properties.get("name", zone_id), fence, polygons))
+    return GeofenceEngine(zones)
+
+
+def build_geofence_alert(event: GeofenceEvent, uid: str, callsign: str) -> bytes:
+    """
+    Build a CoT geofence alarm for an enter/exit event.
+
+    Args:
+        event: Event returned by GeofenceEngine.update
+        uid: UID of the aircraft the alert is about
+        callsign: Callsign of the aircraft
+
+    Returns:
+        bytes: CoT event of type ALERT_TYPE at the aircraft position
+    """
+    now = datetime.now(timezone.utc)
+    time_str = now.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+    stale_str = (now + timedelta(seconds=ALERT_STALE)).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+    fence_text = "no-fly zone" if event.fence == KEEP_OUT else "mission boundary"
+    verb = "entered" if event.transition == "enter" else "left"
+
+    ev = ET.Element("event", {
+        "version": "2.0",
+        "uid": f"{uid}.geofence.{event.zone_id}.{uuid.uuid4()}",
+        "type": ALERT_TYPE,
+        "how": "m-g",
+        "time": time_str,
+        "start": time_str,
+        "stale": stale_str,
+    })
+    ET.SubElement(ev, "point", {"lat": f"{event.lat:.6f}", "lon": f"{event.lon:.6f}",
+                                "hae": "0.0", "ce": "10.0", "le": "10.0"})
+    detail = ET.SubElement(ev, "detail")
+    ET.SubElement(detail, "contact", {"callsign": f"{callsign} geofence"})
+    ET.SubElement(detail, "link", {"uid": uid, "type": "a-f-A", "relation": "p-p"})
+    ET.SubElement(detail, "__geofence", {
+        "zone": event.zone_id,
+        "name": event.name,
+        "fence": event.fence,
+        "trigger": event.transition,
+        "breach": str(event.breach).lower(),
+    })
+    remarks = ET.SubElement(detail, "remarks")
+    remarks.text = f"{'BREACH: ' if event.breach else ''}{callsign} {verb} {fence_text} {event.name}"
+    return ET.tostring(ev, encoding="utf-8")
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Token-bucket rate limiting for outbound TAK traffic.
+
+A TokenBucket allows short bursts (up to `burst` events back to back) while
+enforcing a long-term `rate` in events per second. RateLimiter keeps one
+bucket and one FIFO per destination (e.g. a chat room) and hands each event
+to its sink as soon as a token is available. submit() never sleeps, it
+returns a future that resolves once the event has been handed to the sink:
+True when delivered, False when dropped because the destination backlog is
+full.
+"""
+import asyncio
+import inspect
+import logging
+import time
+from collections import deque
+
+CHAT_RATE = 2.0        # long-term messages per second per destination
+CHAT_BURST = 5         # messages that may go out back to back
+MAX_PENDING = 100      # queued messages per destination before new ones are dropped
+
+logger = logging.getLogger("rate_limiter")
+
+
+class TokenBucket:
+    """Classic token bucket, refilled lazily from the monotonic clock."""
+
+    __slots__ = ("rate", "burst", "tokens", "last")
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.last = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+
+    def try_acquire(self, count: float = 1.0, now: float = None) -> bool:
+        """Take `count` tokens if available."""
+        self._refill(time.monotonic() if now is None else now)
+        if self.tokens >= count:
+            self.tokens -= count
+            return True
+        return False
+
+    def delay(self, count: float = 1.0, now: float = None) -> float:
+        """Seconds until `count` tokens will be available."""
+        self._refill(time.monotonic() if now is None else now)
+        if self.tokens >= count:
+            return 0.0
+        return (count - self.tokens) / self.rate
+
+
+class DestinationStats:
+    __slots__ = ("delivered", "queued", "dropped", "errors")
+
+    def __init__(self):
+        self.delivered = 0
+        self.queued = 0      # events that had to wait for a token
+        self.dropped = 0
+        self.errors = 0
+
+
+class RateLimiter:
+    """Per-destination token buckets feeding a sink without blocking the caller."""
+
+    def __init__(self, rate: float = CHAT_RATE, burst: float = CHAT_BURST,
+                 destination_rates: dict = None, max_pending: int = MAX_PENDING):
+        self.rate = rate
+        self.burst = burst
+        self.destination_rates = dict(destination_rates or {})  # destination -> (rate, burst)
+        self.max_pending = max_pending
+        self.buckets = {}
+        self.pending = {}
+        self.stats = {}
+        self._drain_tasks = {}
+        self._deliveries = set()
+
+    def set_rate(self, destination, rate: float, burst: float = None):
+        """Override the long-term rate (and optionally the burst) of one destination."""
+        burst = self.burst if burst is None else burst
+        self.destination_rates[destination] = (rate, burst)
+        if destination in self.buckets:
+            self.buckets[destination].rate = rate
+            self.buckets[destination].burst = burst
+
+    def _bucket(self, destination) -> TokenBucket:
+        bucket = self.buckets.get(destination)
+        if bucket is None:
+            rate, burst = self.destination_rates.get(destination, (self.rate, self.burst))
+            bucket = self.buckets[destination] = TokenBucket(rate, burst)
+            self.pending[destination] = deque()
+            self.stats[destination] = DestinationStats()
+        return bucket
+
+    def submit(self, destination, data, sink) -> asyncio.Future:
+        """
+        Send `data` to `sink` as soon as the destination's bucket allows.
+
+        Args:
+            destination: Rate limit key (e.g. chat room name)
+            data: Event to deliver
+            sink: Callable taking `data`, may be a coroutine function (e.g. tx_queue.put)
+
+        Returns:
+            asyncio.Future: Resolves to True when delivered, False if dropped
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        bucket = self._bucket(destination)
+        pending = self.pending[destination]
+        stats = self.stats[destination]
+
+        if not pending and bucket.try_acquire():
+            self._start_delivery(destination, data, sink, future)
+            return future
+
+        if len(pending) >= self.max_pending:
+            stats.dropped += 1
+            logger.warning("Rate limiter backlog full for %s, dropping event", destination)
+            future.set_result(False)
+            return future
+
+        stats.queued += 1
+        pending.append((data, sink, future))
+        task = self._drain_tasks.get(destination)
+        if task is None or task.done():
+            self._drain_tasks[destination] = loop.create_task(self._drain(destination))
+        return future
+
+    def _start_delivery(self, destination, data, sink, future):
+        task = asyncio.get_running_loop().create_task(self._deliver(destination, data, sink, future))
+        # keep a reference until done, the loop only holds weak references to tasks
+        self._deliveries.add(task)
+        task.add_done_callback(self._deliveries.discard)
+
+    async def _deliver(self, destination, data, sink, future):
+        stats = self.stats[destination]
+        try:
+            result = sink(data)
+            if inspect.isawaitable(result):
+                await result
+            stats.delivered += 1
+            if not future.done():
+                future.set_result(True)
+        except Exception as e:
+            stats.errors += 1
+            if not future.done():
+                future.set_exception(e)
+
+    async def _drain(self, destination):
+        bucket = self.buckets[destination]
+        pending = self.pending[destination]
+        while pending:
+            wait = bucket.delay()
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+            bucket.try_acquire()
+            data, sink, future = pending.popleft()
+            # deliver in order: wait for this one before taking the next token
+            await self._deliver(destination, data, sink, future)
+
+    def backlog(self, destination) -> int:
+        return len(self.pending.get(destination, ()))
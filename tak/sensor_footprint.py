@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Ground footprint of the camera frustum for the CoT sensor cone.
+
+The four corner rays and the boresight of the camera are rotated by the
+gimbal and vehicle attitude in one batched NumPy product and intersected with
+a flat ground plane AGL meters below the aircraft. Rays that miss the ground
+(above the horizon) or hit it beyond max_range are clipped to max_range.
+
+The projection only depends on the attitude, not on the position, so the
+north/east offsets are cached in an LRU keyed on the quantized inputs. At
+high update rates with a steady attitude only the offset to lat/lon is left.
+"""
+import math
+from functools import lru_cache
+from typing import List, NamedTuple, Tuple
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+ANGLE_STEP = 0.5       # degrees, attitude quantization of the cache key
+AGL_STEP = 1.0         # meters, altitude quantization of the cache key
+CACHE_SIZE = 4096
+SENSOR_RANGE = 2000.0  # meters, rays are clipped to this slant range
+MIN_AGL = 1.0          # meters, below this the footprint collapses to the aircraft
+
+EARTH_RADIUS_M = 6371000.0
+
+
+class Footprint(NamedTuple):
+    center: Tuple[float, float]         # (lat, lon) where the boresight meets the ground
+    corners: List[Tuple[float, float]]  # (lat, lon) of the frustum corners, clockwise from top left
+    clipped: bool                       # True if any ray was clipped to the sensor range
+
+
+def rotation_matrix(yaw: float, pitch: float, roll: float) -> np.ndarray:
+    """Body (x forward, y right, z down) to NED rotation for yaw/pitch/roll in degrees (ZYX order)."""
+    cy, sy = math.cos(math.radians(yaw)), math.sin(math.radians(yaw))
+    cp, sp = math.cos(math.radians(pitch)), math.sin(math.radians(pitch))
+    cr, sr = math.cos(math.radians(roll)), math.sin(math.radians(roll))
+    return np.array([
+        [cy * cp, cy * sp * sr - sy * cr, cy * sp * cr + sy * sr],
+        [sy * cp, sy * sp * sr + cy * cr, sy * sp * cr - cy * sr],
+        [-sp, cp * sr, cp * cr],
+    ])
+
+
+def camera_rays(hfov: float, vfov: float) -> np.ndarray:
+    """Unit rays in the camera frame: boresight then the four corners, clockwise from top left."""
+    th = math.tan(math.radians(hfov) / 2.0)
+    tv = math.tan(math.radians(vfov) / 2.0)
+    rays = np.array([
+        [1.0, 0.0, 0.0],
+        [1.0, -th, -tv],
+        [1.0, th, -tv],
+        [1.0, th, tv],
+        [1.0, -th, tv],
+    ])
+    return rays / np.linalg.norm(rays, axis=1, keepdims=True)
+
+
+def project_offsets(agl: float, yaw: float, pitch: float, roll: float, gimbal_az: float, gimbal_el: float,
+                    hfov: float, vfov: float, max_range: float = SENSOR_RANGE, stabilized: bool = True):
+    """
+    North/east ground offsets of the boresight and corner rays from the aircraft.
+
+    Args:
+        agl: Height above ground in meters
+        yaw, pitch, roll: Vehicle attitude in degrees
+        gimbal_az: Camera azimuth relative to the vehicle heading in degrees
+        gimbal_el: Camera elevation in degrees (negative = down)
+        hfov, vfov: Horizontal and vertical field of view in degrees
+        max_range: Slant range the rays are clipped to in meters
+        stabilized: The gimbal holds the camera level, vehicle roll and pitch are ignored
+
+    Returns:
+        tuple: ((5, 2) array of north/east offsets in meters, clipped flag)
+    """
+    if stabilized:
+        rotation = rotation_matrix(yaw + gimbal_az, gimbal_el, 0.0)
+    else:
+        rotation = rotation_matrix(yaw, pitch, roll) @ rotation_matrix(gimbal_az, gimbal_el, 0.0)
+    rays = camera_rays(hfov, vfov) @ rotation.T  # (5, 3) in NED
+
+    down = rays[:, 2]
+    hits = down > 1e-6
+    # slant distance to the ground plane, rays that miss it go out to max_range
+    slant = np.where(hits, max(agl, MIN_AGL) / np.where(hits, down, 1.0), max_range)
+    clipped = ~hits | (slant > max_range)
+    slant = np.minimum(slant, max_range)
+    offsets = rays[:, :2] * slant[:, None]
+    return offsets, bool(clipped.any())
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _cached_offsets(agl_q: int, yaw_q: int, pitch_q: int, roll_q: int, az_q: int, el_q: int,
+                    hfov: float, vfov: float, max_range: float, stabilized: bool):
+    offsets, clipped = project_offsets(agl_q * AGL_STEP, yaw_q * ANGLE_STEP, pitch_q * ANGLE_STEP,
+                                       roll_q * ANGLE_STEP, az_q * ANGLE_STEP, el_q * ANGLE_STEP,
+                                       hfov, vfov, max_range, stabilized)
+    offsets.setflags(write=False)
+    return offsets, clipped
+
+
+def sensor_footprint(lat: float, lon: float, agl: float, yaw: float, pitch: float, roll: float,
+                     gimbal_az: float, gimbal_el: float, hfov: float, vfov: float,
+                     max_range: float = SENSOR_RANGE, stabilized: bool = True) -> Footprint:
+    """
+    Project the camera frustum onto the ground around (lat, lon).
+
+    Attitude and altitude are quantized (ANGLE_STEP, AGL_STEP) and the
+    offsets cached, see project_offsets for the arguments.
+
+    Returns:
+        Footprint: center point, corner polygon and clipped flag
+    """
+    offsets, clipped = _cached_offsets(round(agl / AGL_STEP), round((yaw % 360.0) / ANGLE_STEP),
+                                       round(pitch / ANGLE_STEP), round(roll / ANGLE_STEP),
+                                       round((gimbal_az % 360.0) / ANGLE_STEP), round(gimbal_el / ANGLE_STEP),
+                                       float(hfov), float(vfov), float(max_range), stabilized)
+    lats = lat + np.degrees(offsets[:, 0] / EARTH_RADIUS_M)
+    lons = lon + np.degrees(offsets[:, 1] / (EARTH_RADIUS_M * math.cos(math.radians(lat))))
+    points = list(zip(lats.tolist(), lons.tolist()))
+    return Footprint(center=points[0], corners=points[1:], clipped=clipped)
+
+
+def append_footprint(shape: ET.Element, footprint: Footprint, owner_uid: str) -> ET.Element:
+    """
+    Add the footprint as a closed <polyline> to a CoT <shape> element.
+
+    Returns:
+        ET.Element: The polyline
+    """
+    poly = ET.SubElement(shape, "polyline", {"closed": "true", "ownerUID": owner_uid})
+    for lat, lon in footprint.corners:
+        ET.SubElement(poly, "vertex", {"lat": f"{lat:.6f}", "lon": f"{lon:.6f}"})
+    return poly
+
+
+def cache_stats() -> dict:
+    info = _cached_offsets.cache_info()
+    return {"hits": info.hits, "misses": info.misses, "size": info.currsize}
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Multi-vehicle TAK gateway.
+
+Hosts many vehicle identities on a single asyncio event loop instead of one
+AtakChat (thread + event loop + TLS connection + connection monitor) per
+aircraft. Presence events for all vehicles are produced by one scheduler tick
+that shares the CoT timestamps and a pre-serialized per-vehicle detail block,
+and are multiplexed over a small pool of server connections (TAK servers
+accept several UIDs on one stream). Inbound chat is parsed once and routed to
+the inbox of every vehicle it is addressed to.
+
+Usage from another program:
+
+    gateway = TakGateway(client_cert, server_cert, server_url="argustak.com", pool_size=2)
+    for vehicle_id in range(1, 41):
+        gateway.add_vehicle(vehicle_id)
+    gateway.start()                       # one background thread for all vehicles
+    gateway.update_position(7, 27.95, -81.62, alt=120.0, course=90.0, speed=22.0)
+    gateway.send_message_threadsafe(7, "on station")
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+import xml.etree.ElementTree as ET
+from typing import Dict, Optional
+
+import pytak
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "testing"))
+
+# custom modules
+from atak_chat import ChatMessageHandler, build_chat_event, build_connection_configs
+from cot_fanout import StreamSink
+from rate_limiter import RateLimiter
+import toolkit_logging
+
+TICK_INTERVAL = 0.1              # scheduler resolution (seconds)
+POSITION_MIN_INTERVAL = 0.5      # minimum time between presence updates of one vehicle
+KEEPALIVE_INTERVAL = 15.0        # presence refresh when the position has not changed
+PRESENCE_STALE = 600             # seconds
+CONNECTION_QUEUE_SIZE = 256      # events buffered per pooled connection
+INBOX_SIZE = 100                 # chat messages buffered per vehicle
+
+logger = logging.getLogger("tak_gateway")
+
+
+class VehicleIdentity:
+    """State of one vehicle hosted by the gateway."""
+
+    __slots__ = ("vehicle_id", "identity", "position", "dirty", "last_sent",
+                 "detail_bytes", "connection", "inbox")
+
+    def __init__(self, vehicle_id: int, callsign: Optional[str] = None, team_color: str = "Blue"):
+        self.vehicle_id = vehicle_id
+        # Same identity scheme as AtakChat so a vehicle can move between the two
+        self.identity = {
+            "uid": f"PYTHON-CHAT-{vehicle_id}",
+            "callsign": callsign or f"Pilot_{vehicle_id}",
+            "team_color": team_color,
+            "team_name": "Python Team",
+            "role": "Team Member",
+            "device": "Python Client"
+        }
+        # (lat, lon, hae, ce, le, course, speed), replaced as a whole so another
+        # thread can update it without a lock
+        self.position = (38.897957, -77.036560, 100.0, 10.0, 10.0, 0.0, 0.0)
+        self.dirty = True
+        self.last_sent = 0.0
+        self.detail_bytes = self._serialize_static_detail()
+        self.connection = None
+        self.inbox = asyncio.Queue(maxsize=INBOX_SIZE)
+
+    def _serialize_static_detail(self) -> bytes:
+        """Serialize the parts of the presence detail that never change."""
+        detail = ET.Element("detail")
+        ET.SubElement(detail, "contact", {"callsign": self.identity["callsign"], "endpoint": "*:-1:stcp"})
+        ET.SubElement(detail, "group", {"role": self.identity["role"], "name": self.identity["team_name"]})
+        ET.SubElement(detail, "__group", {"name": self.identity["team_color"]})
+        ET.SubElement(detail, "usericon", {"iconsetpath": "34ae1613-9645-4222-a9d2-e5f243dea2865/Service/PYTHON.png"})
+        ET.SubElement(detail, "status", {"battery": "100"})
+        ET.SubElement(detail, "precisionlocation", {"altsrc": "GPS", "geopointsrc": "GPS"})
+        ET.SubElement(detail, "takv", {"device": self.identity["device"], "platform": "Python",
+                                       "os": "Python", "version": "1.0"})
+        # strip the closing tag, the track element is appended per event
+        return ET.tostring(detail)[:-len(b"</detail>")]
+
+
+class PresenceSerializer:
+    """
+    Builds presence events for many vehicles with shared timestamps.
+
+    The static detail block of each vehicle is serialized once; per event only
+    the header, point and track are formatted.
+    """
+
+    def __init__(self, stale: int = PRESENCE_STALE):
+        self.stale = stale
+        self.time_str = b""
+        self.stale_str = b""
+
+    def begin_tick(self):
+        """Compute the CoT timestamps shared by every event of this tick."""
+        self.time_str = pytak.cot_time().encode()
+        self.stale_str = pytak.cot_time(self.stale).encode()
+
+    def serialize(self, vehicle: VehicleIdentity) -> bytes:
+        lat, lon, hae, ce, le, course, speed = vehicle.position
+        return b"".join((
+            b'<event version="2.0" type="a-f-G-U-C" uid="', vehicle.identity["uid"].encode(),
+            b'" how="m-g" time="', self.time_str, b'" start="', self.time_str,
+            b'" stale="', self.stale_str, b'">',
+            b'<point lat="%s" lon="%s" hae="%s" ce="%s" le="%s" />' % (
+                str(lat).encode(), str(lon).encode(), str(hae).encode(), str(ce).encode(), str(le).encode()),
+            vehicle.detail_bytes,
+            b'<track course="%s" speed="%s" /></detail></event>' % (str(course).encode(), str(speed).encode()),
+        ))
+
+
+class GatewayConnection(StreamSink):
+    """Pooled TAK server connection that also reads and dispatches inbound CoT."""
+
+    def __init__(self, url: str, conf: dict, gateway: "TakGateway"):
+        super().__init__(url, queue_size=CONNECTION_QUEUE_SIZE, conf=conf)
+        self.gateway = gateway
+        self._rx_task = None
+
+    def submit(self, data: bytes, now: float = None, trace=None) -> bool:
+        # A pooled connection carries several vehicles, so there is no per-sink
+        # rate policy; events are only dropped when the queue overflows.
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.stats.dropped += 1
+        self.queue.put_nowait((data, trace))
+        return True
+
+    async def open(self):
+        await super().open()
+        self._rx_task = asyncio.create_task(self._read_loop(self.reader, self.writer))
+
+    def close(self):
+        if self._rx_task is not None:
+            self._rx_task.cancel()
+            self._rx_task = None
+        super().close()
+
+    async def _read_loop(self, reader, writer):
+        buf = b""
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                logger.warning("Connection %s closed by server", self.url)
+                # the next send on this writer fails and the sink reconnects
+                writer.close()
+                return
+            buf += data
+            while b"</event>" in buf:
+                packet, buf = buf.split(b"</event>", 1)
+                self.gateway.handle_inbound(packet + b"</event>")
+
+
+class TakGateway:
+    """Hosts many vehicle identities on one event loop and a small connection pool."""
+
+    def __init__(self, client_cert: str, server_cert: str, server_url: str = "argustak.com",
+                 ssl_port: int = 8089, tcp_port: int = 8087, client_password: str = "argustak",
+                 pool_size: int = 1, use_tls: bool = True):
+        self.server_url = server_url
+        self.pool_size = max(1, pool_size)
+        configs = build_connection_configs(server_url, ssl_port, tcp_port,
+                                           client_cert, server_cert, client_password)
+        if not use_tls and tcp_port is None:
+            raise ValueError("use_tls=False needs a tcp_port")
+        self.connection_config = configs[0] if use_tls else configs[1]
+
+        self.vehicles: Dict[int, VehicleIdentity] = {}
+        self.vehicles_by_uid: Dict[str, VehicleIdentity] = {}
+        self.connections = []
+        self.serializer = PresenceSerializer()
+        self.message_handler = ChatMessageHandler()
+        self.rate_limiter = RateLimiter()
+        self.loop = None
+        self.thread = None
+        self.running = False
+        self.events_sent = 0
+
+    def add_vehicle(self, vehicle_id: int, callsign: Optional[str] = None, team_color: str = "Blue") -> VehicleIdentity:
+        """Register a vehicle identity. Must be called before start()/run()."""
+        vehicle = VehicleIdentity(vehicle_id, callsign, team_color)
+        self.vehicles[vehicle_id] = vehicle
+        self.vehicles_by_uid[vehicle.identity["uid"]] = vehicle
+        return vehicle
+
+    def update_position(self, vehicle_id: int, lat: float, lon: float, alt: float = None,
+                        course: float = None, speed: float = None) -> None:
+        """Update a vehicle position. Safe to call from any thread."""
+        vehicle = self.vehicles[vehicle_id]
+        _, _, hae, ce, le, old_course, old_speed = vehicle.position
+        vehicle.position = (lat, lon,
+                            hae if alt is None else alt, ce, le,
+                            old_course if course is None else course,
+                            old_speed if speed is None else speed)
+        vehicle.dirty = True
+
+    def _assign_connections(self):
+        name = self.connection_config["name"]
+        url = self.connection_config["config"]["COT_URL"]
+        pool = min(self.pool_size, max(1, len(self.vehicles)))
+        self.connections = [GatewayConnection(url, self.connection_config["config"], self) for _ in range(pool)]
+        for index, vehicle in enumerate(self.vehicles.values()):
+            vehicle.connection = self.connections[index % pool]
+        logger.info("Gateway hosting %d vehicles over %d %s connection(s)", len(self.vehicles), pool, name)
+
+    async def _scheduler(self):
+        """Single tick loop that sends presence for every vehicle that is due."""
+        while self.running:
+            now = time.monotonic()
+            due = [v for v in self.vehicles.values()
+                   if (v.dirty and now - v.last_sent >= POSITION_MIN_INTERVAL)
+                   or now - v.last_sent >= KEEPALIVE_INTERVAL]
+            if due:
+                self.serializer.begin_tick()
+                for vehicle in due:
+                    vehicle.dirty = False
+                    vehicle.last_sent = now
+                    vehicle.connection.submit(self.serializer.serialize(vehicle))
+                self.events_sent += len(due)
+            await asyncio.sleep(TICK_INTERVAL)
+
+    def handle_inbound(self, data: bytes):
+        """Parse an inbound event once and route chat to the addressed vehicles."""
+        message_info = self.message_handler.parse_chat_message(data)
+        if not message_info:
+            return
+
+        destination = message_info["chatroom"]
+        if destination in self.vehicles_by_uid:
+            targets = [self.vehicles_by_uid[destination]]
+        else:
+            targets = self.vehicles.values()
+
+        for vehicle in targets:
+            # never echo a vehicle's own message back to it
+            if message_info["sender_uid"] == vehicle.identity["uid"]:
+                continue
+            if vehicle.inbox.full():
+                vehicle.inbox.get_nowait()
+            vehicle.inbox.put_nowait(message_info)
+
+    async def send_message(self, vehicle_id: int, message: str, chat_room: str = "All Chat Rooms") -> bool:
+        """Send a chat message as the given vehicle."""
+        vehicle = self.vehicles[vehicle_id]
+        if vehicle.connection is None:
+            logger.error("Gateway not running, cannot send message for vehicle %d", vehicle_id)
+            return False
+        data = build_chat_event(vehicle.identity, message, chat_room, uuid.uuid4().hex)
+        # one shared limiter, each vehicle gets its own bucket per chat room
+        self.rate_limiter.submit((vehicle_id, chat_room), data, vehicle.connection.submit)
+        return True
+
+    def send_message_threadsafe(self, vehicle_id: int, message: str, chat_room: str = "All Chat Rooms"):
+        """Send a chat message from outside the gateway thread."""
+        return asyncio.run_coroutine_threadsafe(self.send_message(vehicle_id, message, chat_room), self.loop)
+
+    async def receive_message(self, vehicle_id: int, timeout: float = 5.0) -> Optional[dict]:
+        """Receive one chat message addressed to the given vehicle."""
+        try:
+            return await asyncio.wait_for(self.vehicles[vehicle_id].inbox.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def stats(self) -> dict:
+        return {
+            "vehicles": len(self.vehicles),
+            "events_sent": self.events_sent,
+            "connections": [c.stats.as_dict() for c in self.connections],
+        }
+
+    async def run(self):
+        """Run the gateway until cancelled."""
+        self.running = True
+        self._assign_connections()
+        tasks = [asyncio.create_task(c.run()) for c in self.connections]
+        try:
+            await self._scheduler()
+        finally:
+            self.running = False
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def start(self) -> None:
+        """Run the gateway on one background thread for all vehicles."""
+        if self.running:
+            return
+        self.loop = asyncio.new_event_loop()
+
+        def run_loop():
+            asyncio.set_event_loop(self.loop)
+            try:
+                self.loop.run_until_complete(self.run())
+            except Exception as e:
+                logger.error("Gateway loop stopped: %s", e)
+            finally:
+                self.loop.close()
+
+        self.thread = threading.Thread(target=run_loop, daemon=True)
+        self.thread.start()
+        # run() sets running on the loop thread, wait for it so callers can send
+        while not self.running and self.thread.is_alive():
+            time.sleep(0.01)
+
+    def stop(self) -> None:
+        """Stop the gateway thread."""
+        if not self.running or not self.loop:
+            return
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Host many vehicle identities on one TAK connection pool.")
+    parser.add_argument("client_cert", help="Client certificate (p12/pem) used for the TLS connection")
+    parser.add_argument("server_cert", help="Server CA certificate")
+    parser.add_argument("--server", default="argustak.com", help="TAK server hostname")
+    parser.add_argument("--vehicles", type=int, default=10, help="Number of vehicle identities to host")
+    parser.add_argument("--pool-size", type=int, default=1, help="Number of pooled server connections")
+    parser.add_argument("--tcp", action="store_true", help="Use the plain TCP port instead of SSL")
+    args = parser.parse_args()
+
+    toolkit_logging.setup_logging()
+
+    gateway = TakGateway(args.client_cert, args.server_cert, server_url=args.server,
+                         pool_size=args.pool_size, use_tls=not args.tcp)
+    for vehicle_id in range(1, args.vehicles + 1):
+        gateway.add_vehicle(vehicle_id)
+
+    try:
+        asyncio.run(gateway.run())
+    except KeyboardInterrupt:
+        print("\nProgram terminated by user")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,9 +6,139 @@ import logging
 import uuid
 import time
 import socket
+import sys
+from collections import OrderedDict
 from typing import Optional, Dict, Any
 import threading
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "common"))
+
+# custom modules
+import metrics
+from contact_table import ContactTable, parse_cot_time
+from cot_parse_pool import BATCH_SIZE, CotParsePool, extract_chat
+from cot_prefilter import CotPreFilter, peek_position
+from rate_limiter import RateLimiter
+
+SENDER_HISTORY_MAX = 256  # callsign -> UID pairs remembered for replies
+SEEN_MESSAGE_IDS_MAX = 1024  # recently seen chat message IDs kept for deduplication
+MESSAGE_QUEUE_MAX = 200  # inbound chat messages buffered for the application
+
+# What to do when the inbound chat queue is full
+OVERFLOW_DROP_OLDEST = "drop_oldest"  # make room by discarding the oldest message
+OVERFLOW_DROP_NEWEST = "drop_newest"  # discard the incoming message
+OVERFLOW_BLOCK = "block"              # wait for the application to consume (back-pressures the receiver)
+
+def build_connection_configs(server_url: str, ssl_port: int, tcp_port: int, client_cert: str,
+                             server_cert: str, client_password: str) -> list:
+    """
+    Build the pytak connection configurations to try, SSL first then TCP.
+
+    A tcp_port of None leaves out the plain TCP fallback, for servers that
+    only speak TLS (tak/testing/mock_tak_server.py).
+
+    Returns:
+        list: Dicts with a human readable "name" and the pytak "config"
+    """
+    configs = [
+        {
+            "name": "SSL on port " + str(ssl_port),
+            "config": {
+                "COT_URL": f"ssl://{server_url}:{ssl_port}",
+                "PYTAK_TLS_CLIENT_CERT": client_cert,
+                "PYTAK_TLS_CLIENT_KEY": client_cert,
+                "PYTAK_TLS_CLIENT_PASSWORD": client_password,
+                "PYTAK_TLS_DONT_VERIFY": "true",
+                "PYTAK_TLS_DONT_CHECK_HOSTNAME": "true",
+                "PYTAK_TLS_CA_CERT": server_cert,
+                "PYTAK_CONNECTION_TIMEOUT": "15",  # Shorter timeout
+                "PYTAK_LINGER_TIME": "0",  # Disable socket lingering
+                # no FTS_COMPAT key: pytak treats any value, "false" included, as
+                # on and sleeps up to 5 s before every event
+            }
+        },
+        {
+            "name": "TCP on port " + str(tcp_port),
+            "config": {
+                "COT_URL": f"tcp://{server_url}:{tcp_port}",
+                "PYTAK_CONNECTION_TIMEOUT": "15",  # Shorter timeout
+                "PYTAK_LINGER_TIME": "0",  # Disable socket lingering
+                # no FTS_COMPAT key: pytak treats any value, "false" included, as
+                # on and sleeps up to 5 s before every event
+            }
+        }
+    ]
+    return configs if tcp_port is not None else configs[:1]
+
+def build_chat_event(identity: Dict[str, str], message: str, chat_room: str, message_id: str) -> bytes:
+    """
+    Build a GeoChat (b-t-f) CoT event.
+
+    Args:
+        identity: Sender identity dict (uid, callsign)
+        message: Message text
+        chat_room: Destination chat room
+        message_id: Unique message ID
+
+    Returns:
+        bytes: Serialized CoT event
+    """
+    root = ET.Element("event")
+    root.set("version", "2.0")
+    root.set("type", "b-t-f")  # Chat/free text message
+    root.set("uid", f"GeoChat.{identity['uid']}.{chat_room}.{message_id}")
+    root.set("how", "h-g-i-g-o")  # Human input
+    root.set("time", pytak.cot_time())
+    root.set("start", pytak.cot_time())
+    root.set("stale", pytak.cot_time(300))  # 5 minutes
+
+    # Point information (use 0,0 for chat messages)
+    point = ET.SubElement(root, "point")
+    point.set("lat", "0.0")
+    point.set("lon", "0.0")
+    point.set("hae", "9999999.0")
+    point.set("ce", "9999999.0")
+    point.set("le", "9999999.0")
+
+    # Detail section
+    detail = ET.SubElement(root, "detail")
+
+    # Chat metadata - using __chat as seen in working example
+    chat = ET.SubElement(detail, "__chat")
+    chat.set("chatroom", chat_room)
+    chat.set("groupOwner", "false")
+    chat.set("messageId", message_id)
+    chat.set("id", chat_room)
+    chat.set("senderCallsign", identity["callsign"])
+    chat.set("parent", "RootContactGroup")
+
+    # Add chatgrp element as seen in the working example
+    chatgrp = ET.SubElement(chat, "chatgrp")
+    chatgrp.set("uid0", identity["uid"])
+    chatgrp.set("uid1", chat_room)
+    chatgrp.set("id", chat_room)
+
+    # Link to sender
+    link = ET.SubElement(detail, "link")
+    link.set("uid", identity["uid"])
+    link.set("type", "a-f-G-U-C")
+    link.set("relation", "p-p")
+
+    # Message text with source and destination
+    remarks = ET.SubElement(detail, "remarks")
+    remarks.set("source", f"BAO.F.Python.{identity['uid']}")
+    remarks.set("to", chat_room)
+    remarks.set("time", pytak.cot_time())
+    remarks.text = message
+
+    # Additional marti destination info
+    marti = ET.SubElement(detail, "marti")
+    dest = ET.SubElement(marti, "dest")
+    dest.set("callsign", chat_room)
+
+    return ET.tostring(root)
+
 class ChatWorker(pytak.QueueWorker):
     """Worker class to handle chat message processing."""
     
@@ -24,7 +154,7 @@ class ChatWorker(pytak.QueueWorker):
             await self.put_queue(data)
             self.logger.debug("Data sent to queue successfully")
         except Exception as e:
-            self.logger.error(f"Error in handle_data: {str(e)}")
+            self.logger.error("Error in handle_data: %s", e)
             if isinstance(e, ConnectionResetError):
                 self.logger.warning("Connection reset detected")
                 self.chat_client.connection_lost = True
@@ -40,85 +170,166 @@ class ChatWorker(pytak.QueueWorker):
             await asyncio.sleep(2)  # Wait a moment before allowing messages
             self.logger.info("ChatWorker initialization complete")
         except Exception as e:
-            self.logger.error(f"Error in ChatWorker run: {str(e)}")
+            self.logger.error("Error in ChatWorker run: %s", e)
             import traceback
-            self.logger.error(f"Traceback: {traceback.format_exc()}")
+            self.logger.error("Traceback: %s", traceback.format_exc())
 
 class ChatMessageHandler:
-    """Handles processing of received chat messages."""
+    """
+    Handles processing of received chat messages.
+
+    TAK servers resend the same messageId after reconnects and federation
+    loops, so recently seen IDs are remembered in a bounded LRU and duplicates
+    are dropped. The inbound queue is bounded too, see the OVERFLOW_* policies.
+    """
     
-    def __init__(self):
+    def __init__(self, contacts: Optional[ContactTable] = None, queue_size: int = MESSAGE_QUEUE_MAX,
+                 overflow_policy: str = OVERFLOW_DROP_OLDEST, keep_raw_xml: bool = True):
         self.logger = logging.getLogger('atak_chat.message_handler')
-        self.message_queue = asyncio.Queue()
+        self.message_queue = asyncio.Queue(maxsize=queue_size)
+        self.overflow_policy = overflow_policy
+        self.keep_raw_xml = keep_raw_xml  # False drops the raw XML once the message is parsed
         self.last_sender = None
-        self.sender_history = {}  # Maps sender callsigns to their UIDs
+        self.sender_history = OrderedDict()  # Maps sender callsigns to their UIDs, most recent last
+        self.seen_message_ids = OrderedDict()  # Recently seen message IDs, most recent last
+        self.duplicates = 0
+        self.dropped = 0
+        self.received = 0
+        self.contacts = contacts if contacts is not None else ContactTable()  # Positions of other units
+        self.prefilter = CotPreFilter(("b-t-f",))  # Types that get a full XML parse
+
+    def is_duplicate(self, message_id: Optional[str]) -> bool:
+        """Check a message ID against the recently seen ones and remember it."""
+        if not message_id:
+            return False
+        if message_id in self.seen_message_ids:
+            self.seen_message_ids.move_to_end(message_id)
+            self.duplicates += 1
+            return True
+        self.seen_message_ids[message_id] = None
+        if len(self.seen_message_ids) > SEEN_MESSAGE_IDS_MAX:
+            self.seen_message_ids.popitem(last=False)
+        return False
+
+    async def put(self, message_info: dict) -> bool:
+        """
+        Queue a parsed message for the application, applying the overflow policy.
+
+        Returns:
+            bool: True if the message was queued, False if it was dropped
+        """
+        if self.overflow_policy == OVERFLOW_BLOCK:
+            await self.message_queue.put(message_info)
+            self.received += 1
+            return True
+        if self.message_queue.full():
+            self.dropped += 1
+            if self.overflow_policy == OVERFLOW_DROP_NEWEST:
+                self.logger.warning("Chat queue full, dropping message from %s", message_info["sender"])
+                return False
+            dropped = self.message_queue.get_nowait()
+            self.logger.warning("Chat queue full, dropping oldest message from %s", dropped["sender"])
+        self.message_queue.put_nowait(message_info)
+        self.received += 1
+        return True
+
+    def update_contact(self, raw: bytes) -> None:
+        """Update the contact table from a raw position event without parsing the XML."""
+        fields = peek_position(raw)
+        if fields and fields["uid"]:
+            self.contacts.update(fields["uid"], fields["type"], fields["lat"], fields["lon"], fields["hae"],
+                                 stale=parse_cot_time(fields["stale"]), callsign=fields["callsign"])
+
+    def accept_chat(self, message_info: dict, event_uid: Optional[str]) -> Optional[dict]:
+        """Drop duplicates and remember the sender of an extracted chat message."""
+        # Drop resends of a message we already delivered
+        if self.is_duplicate(message_info["message_id"] or event_uid):
+            self.logger.debug("Dropping duplicate chat message %s", message_info["message_id"])
+            return None
+
+        # Store sender information
+        if message_info["sender"] != "Unknown" and message_info["sender_uid"]:
+            self.last_sender = message_info["sender"]
+            self.sender_history[message_info["sender"]] = message_info["sender_uid"]
+            self.sender_history.move_to_end(message_info["sender"])
+            if len(self.sender_history) > SENDER_HISTORY_MAX:
+                self.sender_history.popitem(last=False)
+
+        return message_info
+
+    def apply_records(self, records: list) -> list:
+        """
+        Apply records parsed by the CotParsePool workers.
+
+        Returns:
+            list: Chat messages to deliver, in order
+        """
+        messages = []
+        for record in records:
+            if record[0] == "pos":
+                fields = record[1]
+                self.contacts.update(fields["uid"], fields["type"], fields["lat"], fields["lon"], fields["hae"],
+                                     stale=parse_cot_time(fields["stale"]), callsign=fields["callsign"])
+            elif record[0] == "chat":
+                message_info = self.accept_chat(record[2], record[1])
+                if message_info:
+                    messages.append(message_info)
+        return messages
 
     def parse_chat_message(self, data):
         """Parse a CoT message and extract chat information."""
         try:
+            raw = data if isinstance(data, bytes) else data.encode()
+
+            # Only subscribed types (chat) get a full XML parse, positions of
+            # other units go to the contact table straight from the bytes
+            wanted, cot_type, _ = self.prefilter.check(raw)
+            if not wanted:
+                if cot_type.startswith("a-"):
+                    self.update_contact(raw)
+                return None
+
             # Decode and parse the XML data
-            data_str = data.decode() if isinstance(data, bytes) else data
+            data_str = raw.decode()
             root = ET.fromstring(data_str)
             
             # Check if it's a chat message
             if root.get("type") == "b-t-f":
-                detail = root.find("detail")
-                if detail is not None:
-                    # Extract message components
-                    message_info = {
-                        "text": None,
-                        "sender": "Unknown",
-                        "chatroom": "Unknown",
-                        "sender_uid": None,
-                        "raw_xml": data_str
-                    }
-                    
-                    # Get message text
-                    remarks = detail.find("remarks")
-                    if remarks is not None:
-                        message_info["text"] = remarks.text
-                    
-                    # Get chat metadata
-                    chat = detail.find("__chat") or detail.find("chat")
-                    if chat is not None:
-                        message_info["chatroom"] = chat.get("chatroom", "Unknown")
-                        message_info["sender"] = chat.get("senderCallsign", "Unknown")
-                    
-                    # Get sender UID
-                    link = detail.find("link")
-                    if link is not None:
-                        message_info["sender_uid"] = link.get("uid")
-                        
-                    # Store sender information
-                    if message_info["sender"] != "Unknown" and message_info["sender_uid"]:
-                        self.last_sender = message_info["sender"]
-                        self.sender_history[message_info["sender"]] = message_info["sender_uid"]
-                    
-                    return message_info
+                message_info = extract_chat(root, data_str, self.keep_raw_xml)
+                if message_info is not None:
+                    return self.accept_chat(message_info, root.get("uid"))
+
+            # Anything else with a position is another unit, keep it in the contact table
+            if root.get("type", "").startswith("a-"):
+                self.contacts.update_from_event(root)
             
             return None
         except Exception as e:
-            self.logger.error(f"Error parsing chat message: {str(e)}")
+            self.logger.error("Error parsing chat message: %s", e)
             return None
 
 class ChatReceiver(pytak.QueueWorker):
     """Handles receiving chat messages."""
     
-    def __init__(self, rx_queue, config, message_handler):
+    def __init__(self, rx_queue, config, message_handler, parse_pool: Optional[CotParsePool] = None):
         super().__init__(rx_queue, config)
         self.logger = logging.getLogger('atak_chat.receiver')
         self.message_handler = message_handler
+        self.parse_pool = parse_pool  # Parse in worker processes instead of on this loop
         self.monitoring = False
 
     async def handle_data(self, data):
         """Handle data from the receive queue."""
         try:
+            if self.parse_pool is not None:
+                await self.parse_pool.submit(data if isinstance(data, bytes) else data.encode())
+                return
             message_info = self.message_handler.parse_chat_message(data)
             if message_info:
-                await self.message_handler.message_queue.put(message_info)
-                self.logger.debug(f"Received chat message from {message_info['sender']}: {message_info['text']}")
+                if await self.message_handler.put(message_info):
+                    self.logger.debug("Received chat message from %s: %s", message_info['sender'], message_info['text'])
         except Exception as e:
-            self.logger.error(f"Error handling received data: {str(e)}")
+            self.logger.error("Error handling received data: %s", e)
 
     async def run(self):
         """Process messages from the receive queue."""
@@ -131,16 +342,15 @@ class ChatReceiver(pytak.QueueWorker):
                 self.logger.info("Chat receiver cancelled")
                 break
             except Exception as e:
-                self.logger.error(f"Error in receiver run loop: {str(e)}")
+                self.logger.error("Error in receiver run loop: %s", e)
 
 class AtakChat:
     def __init__(self, vehicle_id: int, client_cert: str, server_cert: str, server_url="argustak.com", 
-                 ssl_port=8089, tcp_port=8087, client_password="argustak"):
-        # Configure logging first
-        logging.basicConfig(
-            level=logging.DEBUG,  # Set to DEBUG for more detailed logs
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        )
+                 ssl_port=8089, tcp_port=8087, client_password="argustak", keep_raw_xml=True,
+                 message_queue_size=MESSAGE_QUEUE_MAX, overflow_policy=OVERFLOW_DROP_OLDEST,
+                 parse_workers=0, parse_batch_size=BATCH_SIZE, metrics_port=None):
+        # Logging is configured by the application (toolkit_logging.setup_logging),
+        # for debug output set OI_LOG_LEVELS=atak_chat=DEBUG
         self.logger = logging.getLogger('atak_chat')
         
         self.vehicle_id = vehicle_id
@@ -189,14 +399,59 @@ class AtakChat:
             "device": "Python Client"
         }
         
-        self.logger.info(f"AtakChat initialized with vehicle_id: {vehicle_id}")
-        self.logger.debug(f"Using certificates - Client: {client_cert}, Server: {server_cert}")
-        self.logger.debug(f"Using server: {server_url} (SSL: {ssl_port}, TCP: {tcp_port})")
+        self.logger.info("AtakChat initialized with vehicle_id: %s", vehicle_id)
+        self.logger.debug("Using certificates - Client: %s, Server: %s", client_cert, server_cert)
+        self.logger.debug("Using server: %s (SSL: %s, TCP: %s)", server_url, ssl_port, tcp_port)
+
+        # Outbound chat rate limiting (bursts allowed, long-term rate per chat room)
+        self.rate_limiter = RateLimiter()
 
         # Add message handling
-        self.message_handler = ChatMessageHandler()
+        self.message_handler = ChatMessageHandler(queue_size=message_queue_size, overflow_policy=overflow_policy,
+                                                  keep_raw_xml=keep_raw_xml)
         self.chat_receiver = None
 
+        # Optional process pool for inbound parsing on busy servers (0 = parse on the event loop)
+        self.parse_pool = None
+        if parse_workers > 0:
+            self.parse_pool = CotParsePool(self._apply_parsed_records, workers=parse_workers,
+                                           batch_size=parse_batch_size, prefixes=self.message_handler.prefilter.prefixes,
+                                           keep_raw_xml=keep_raw_xml)
+
+        # Counters and queue depths for the metrics endpoint (served if metrics_port is set)
+        self.metrics_port = metrics_port
+        self._register_metrics()
+
+    def _register_metrics(self) -> None:
+        """Export this client's counters and queue depths in the metrics registry."""
+        labels = {"vehicle": str(self.vehicle_id)}
+        handler = self.message_handler
+        metrics.counter("atak_chat_received_total", "Chat messages queued for the application",
+                        labels).set_function(lambda: handler.received)
+        metrics.counter("atak_chat_duplicates_total", "Inbound chat messages dropped as duplicates",
+                        labels).set_function(lambda: handler.duplicates)
+        metrics.counter("atak_chat_rx_dropped_total", "Inbound chat messages dropped by the overflow policy",
+                        labels).set_function(lambda: handler.dropped)
+        metrics.counter("atak_chat_cot_events_total", "Inbound CoT events seen by the receive path",
+                        labels).set_function(lambda: handler.prefilter.seen)
+        metrics.gauge("atak_chat_rx_queue_depth", "Chat messages waiting for the application",
+                      labels).set_function(handler.message_queue.qsize)
+        metrics.gauge("atak_chat_tx_queue_depth", "Events waiting in the pytak tx queue",
+                      labels).set_function(lambda: self.clitool.tx_queue.qsize() if self.clitool else 0)
+        metrics.gauge("atak_chat_rate_limiter_backlog", "Chat messages waiting for a rate limiter token",
+                      labels).set_function(lambda: sum(len(p) for p in self.rate_limiter.pending.values()))
+        metrics.gauge("atak_chat_connected", "1 while connected to the TAK server",
+                      labels).set_function(lambda: int(self.connection_established and not self.connection_lost))
+        metrics.gauge("atak_chat_contacts", "Other units in the contact table",
+                      labels).set_function(lambda: len(handler.contacts.contacts))
+        self.metric_sent = metrics.counter("atak_chat_sent_total", "Chat messages handed to the tx queue", labels)
+        self.metric_send_dropped = metrics.counter("atak_chat_send_dropped_total",
+                                                   "Chat messages dropped by the rate limiter", labels)
+        self.metric_send_errors = metrics.counter("atak_chat_send_errors_total", "Chat send failures", labels)
+        self.metric_reconnects = metrics.counter("atak_chat_reconnects_total", "Reconnect attempts", labels)
+        self.metric_send_latency = metrics.histogram("atak_chat_send_latency_seconds",
+                                                     "Time from queue_message to the tx queue", labels)
+
     def update_position(self, lat: float, lon: float, alt: float = None, course: float = None, speed: float = None) -> None:
         """
         Update the current position.
@@ -218,7 +473,7 @@ class AtakChat:
             if speed is not None:
                 self.current_position["speed"] = speed
             self.position_updated = True
-            self.logger.debug(f"Position updated to: lat={lat:.6f}, lon={lon:.6f}, alt={self.current_position['hae']:.1f}m")
+            self.logger.debug("Position updated to: lat=%.6f, lon=%.6f, alt=%.1fm", lat, lon, self.current_position['hae'])
 
     def create_presence_message(self) -> bytes:
         """Create a presence message with current position."""
@@ -287,7 +542,7 @@ class AtakChat:
     def _force_socket_cleanup(self):
         """Force cleanup of any lingering sockets"""
         try:
-            self.logger.info(f"Attempting to force socket cleanup for vehicle {self.vehicle_id}")
+            self.logger.info("Attempting to force socket cleanup for vehicle %s", self.vehicle_id)
             # Try to find and close any sockets that might be using our ports
             ssl_port = 8089
             tcp_port = 8087
@@ -301,16 +556,16 @@ class AtakChat:
                                 sock_info = obj.getsockname()
                                 if sock_info and len(sock_info) >= 2:
                                     if sock_info[1] in (ssl_port, tcp_port):
-                                        self.logger.info(f"Closing socket on port {sock_info[1]}")
+                                        self.logger.info("Closing socket on port %s", sock_info[1])
                                         obj.close()
                         except:
                             pass
         except Exception as e:
-            self.logger.error(f"Error during force socket cleanup: {str(e)}")
+            self.logger.error("Error during force socket cleanup: %s", e)
 
     async def connect(self) -> bool:
         """Connect to the TAK server with improved reliability."""
-        self.logger.info(f"Attempting to connect to TAK server (vehicle {self.vehicle_id})")
+        self.logger.info("Attempting to connect to TAK server (vehicle %s)", self.vehicle_id)
         
         # Track connection attempts for this round
         self.connection_attempts += 1
@@ -321,7 +576,7 @@ class AtakChat:
             try:
                 await self.clitool.cleanup()
             except Exception as e:
-                self.logger.warning(f"Error during cleanup: {str(e)}")
+                self.logger.warning("Error during cleanup: %s", e)
             self.clitool = None
             
         # Attempt to forcibly clean up any lingering sockets
@@ -331,32 +586,8 @@ class AtakChat:
         await asyncio.sleep(0.5)
         
         # Connection configurations with timeouts
-        connection_attempts = [
-            {
-                "name": "SSL on port " + str(self.ssl_port),
-                "config": {
-                    "COT_URL": f"ssl://{self.server_url}:{self.ssl_port}",
-                    "PYTAK_TLS_CLIENT_CERT": self.client_cert,
-                    "PYTAK_TLS_CLIENT_KEY": self.client_cert,
-                    "PYTAK_TLS_CLIENT_PASSWORD": self.client_password,
-                    "PYTAK_TLS_DONT_VERIFY": "true",
-                    "PYTAK_TLS_DONT_CHECK_HOSTNAME": "true",
-                    "PYTAK_TLS_CA_CERT": self.server_cert,
-                    "PYTAK_CONNECTION_TIMEOUT": "15",  # Shorter timeout
-                    "PYTAK_LINGER_TIME": "0",  # Disable socket lingering
-                    "FTS_COMPAT": "false"  # Disable FTS compatibility mode for faster updates
-                }
-            },
-            {
-                "name": "TCP on port " + str(self.tcp_port),
-                "config": {
-                    "COT_URL": f"tcp://{self.server_url}:{self.tcp_port}",
-                    "PYTAK_CONNECTION_TIMEOUT": "15",  # Shorter timeout
-                    "PYTAK_LINGER_TIME": "0",  # Disable socket lingering
-                    "FTS_COMPAT": "false"  # Disable FTS compatibility mode for faster updates
-                }
-            }
-        ]
+        connection_attempts = build_connection_configs(self.server_url, self.ssl_port, self.tcp_port,
+                                                       self.client_cert, self.server_cert, self.client_password)
 
         # Add some randomness to the connection attempt order based on vehicle ID
         if self.vehicle_id % 2 == 1:
@@ -364,7 +595,7 @@ class AtakChat:
 
         # Try connection methods until one works
         for attempt in connection_attempts:
-            self.logger.info(f"Vehicle {self.vehicle_id} trying connection method: {attempt['name']}")
+            self.logger.info("Vehicle %s trying connection method: %s", self.vehicle_id, attempt['name'])
             try:
                 # Create new connection with a timeout
                 self.logger.debug("Creating new CLITool instance")
@@ -378,20 +609,21 @@ class AtakChat:
                 try:
                     await asyncio.wait_for(setup_task, timeout=20)  # 20 second timeout
                 except asyncio.TimeoutError:
-                    self.logger.warning(f"Connection setup timed out for {attempt['name']}")
+                    self.logger.warning("Connection setup timed out for %s", attempt['name'])
                     # Clean up the failed connection attempt
                     if self.clitool:
                         try:
                             await self.clitool.cleanup()
                         except Exception as e:
-                            self.logger.warning(f"Error during cleanup after timeout: {str(e)}")
+                            self.logger.warning("Error during cleanup after timeout: %s", e)
                         self.clitool = None
                     continue
                 
-                self.logger.info(f"Vehicle {self.vehicle_id} connected successfully using {attempt['name']}")
+                self.logger.info("Vehicle %s connected successfully using %s", self.vehicle_id, attempt['name'])
                 
                 # Add the chat workers
-                self.chat_receiver = ChatReceiver(self.clitool.rx_queue, attempt["config"], self.message_handler)
+                self.chat_receiver = ChatReceiver(self.clitool.rx_queue, attempt["config"], self.message_handler,
+                                                  parse_pool=self.parse_pool)
                 self.clitool.add_tasks(set([
                     ChatWorker(self.clitool.tx_queue, attempt["config"], self),
                     self.chat_receiver
@@ -404,23 +636,23 @@ class AtakChat:
                 return True
                 
             except Exception as e:
-                self.logger.error(f"Connection attempt failed: {str(e)}")
+                self.logger.error("Connection attempt failed: %s", e)
                 import traceback
-                self.logger.error(f"Traceback: {traceback.format_exc()}")
+                self.logger.error("Traceback: %s", traceback.format_exc())
                 
                 # Clean up after failed attempt
                 if self.clitool:
                     try:
                         await self.clitool.cleanup()
                     except Exception as cleanup_error:
-                        self.logger.warning(f"Error during cleanup after failed connection: {str(cleanup_error)}")
+                        self.logger.warning("Error during cleanup after failed connection: %s", cleanup_error)
                     self.clitool = None
                 
                 # Wait before next attempt
                 await asyncio.sleep(1)
                 continue
 
-        self.logger.error(f"All connection attempts failed for vehicle {self.vehicle_id}")
+        self.logger.error("All connection attempts failed for vehicle %s", self.vehicle_id)
         
         # Add a delay before allowing another connection attempt
         await asyncio.sleep(self.connection_retry_delay)
@@ -429,7 +661,7 @@ class AtakChat:
 
     async def persistent_connect(self) -> bool:
         """Persistently try to connect until successful or timeout occurs."""
-        self.logger.info(f"Starting persistent connection for vehicle {self.vehicle_id} with {self.initial_connection_timeout}s timeout")
+        self.logger.info("Starting persistent connection for vehicle %s with %ss timeout", self.vehicle_id, self.initial_connection_timeout)
         
         # Reset connection event
         self.connection_event.clear()
@@ -442,18 +674,19 @@ class AtakChat:
             # Check for timeout
             elapsed_time = time.time() - start_time
             if elapsed_time > self.initial_connection_timeout:
-                self.logger.error(f"Connection timeout after {elapsed_time:.1f} seconds for vehicle {self.vehicle_id}")
+                self.logger.error("Connection timeout after %.1f seconds for vehicle %s", elapsed_time, self.vehicle_id)
                 return False
                 
             # Try to connect
             if await self.connect():
-                self.logger.info(f"Vehicle {self.vehicle_id} successfully connected after {elapsed_time:.1f} seconds")
+                self.logger.info("Vehicle %s successfully connected after %.1f seconds", self.vehicle_id, elapsed_time)
                 return True
                 
             # Log the attempt and remaining time
             remaining_time = self.initial_connection_timeout - elapsed_time
-            self.logger.warning(f"Connection attempt {self.connection_attempts} failed for vehicle {self.vehicle_id}. "
-                              f"Retrying... ({remaining_time:.1f} seconds remaining until timeout)")
+            self.logger.warning("Connection attempt %d failed for vehicle %s. "
+                                "Retrying... (%.1f seconds remaining until timeout)",
+                                self.connection_attempts, self.vehicle_id, remaining_time)
             
             # Wait before next attempt with adaptive backoff
             # Start with short delays but gradually increase
@@ -462,14 +695,15 @@ class AtakChat:
 
     async def reconnect(self) -> bool:
         """Attempt to reconnect if the connection is lost."""
-        self.logger.info(f"Attempting to reconnect vehicle {self.vehicle_id}")
+        self.logger.info("Attempting to reconnect vehicle %s", self.vehicle_id)
+        self.metric_reconnects.inc()
         
         # Perform thorough cleanup
         if self.clitool:
             try:
                 await self.clitool.cleanup()
             except Exception as e:
-                self.logger.warning(f"Error cleaning up during reconnect: {str(e)}")
+                self.logger.warning("Error cleaning up during reconnect: %s", e)
             self.clitool = None
         
         # Wait before attempting reconnect
@@ -479,95 +713,74 @@ class AtakChat:
         return await self.persistent_connect()
 
     async def send_message(self, message: str, chat_room: str = "All Chat Rooms") -> bool:
-        """Send a message to the specified chat room."""
+        """
+        Send a message to the specified chat room.
+
+        Returns as soon as the message is handed to the rate limiter, it does not
+        wait for delivery. Use queue_message() to get the delivery future.
+        """
+        return self.queue_message(message, chat_room) is not None
+
+    def queue_message(self, message: str, chat_room: str = "All Chat Rooms") -> Optional[asyncio.Future]:
+        """
+        Queue a message for the specified chat room through the rate limiter.
+
+        Must be called from the client's event loop.
+
+        Returns:
+            asyncio.Future: Resolves to True once the message is on the tx queue,
+            False if the rate limiter dropped it. None if the message could not be queued.
+        """
         if not self.clitool or not self.running:
             self.logger.error("Not connected or not running")
-            return False
+            return None
 
         try:
-            self.logger.debug(f"Preparing to send message to {chat_room}: {message}")
+            self.logger.debug("Preparing to send message to %s: %s", chat_room, message)
             
             # Generate a unique message ID
             message_id = uuid.uuid4().hex
-            self.logger.debug(f"Generated message ID: {message_id}")
+            self.logger.debug("Generated message ID: %s", message_id)
             
             # Create the message XML
-            root = ET.Element("event")
-            root.set("version", "2.0")
-            root.set("type", "b-t-f")  # Chat/free text message
-            root.set("uid", f"GeoChat.{self.identity['uid']}.{chat_room}.{message_id}")
-            root.set("how", "h-g-i-g-o")  # Human input
-            root.set("time", pytak.cot_time())
-            root.set("start", pytak.cot_time())
-            root.set("stale", pytak.cot_time(300))  # 5 minutes
-
-            # Point information (use 0,0 for chat messages)
-            point = ET.SubElement(root, "point")
-            point.set("lat", "0.0")
-            point.set("lon", "0.0")
-            point.set("hae", "9999999.0")
-            point.set("ce", "9999999.0")
-            point.set("le", "9999999.0")
-
-            # Detail section
-            detail = ET.SubElement(root, "detail")
-            
-            # Chat metadata - using __chat as seen in working example
-            chat = ET.SubElement(detail, "__chat")
-            chat.set("chatroom", chat_room)
-            chat.set("groupOwner", "false")
-            chat.set("messageId", message_id)
-            chat.set("id", chat_room)
-            chat.set("senderCallsign", self.identity["callsign"])
-            chat.set("parent", "RootContactGroup")
-            
-            # Add chatgrp element as seen in the working example
-            chatgrp = ET.SubElement(chat, "chatgrp")
-            chatgrp.set("uid0", self.identity["uid"])
-            chatgrp.set("uid1", chat_room)
-            chatgrp.set("id", chat_room)
-            
-            # Link to sender
-            link = ET.SubElement(detail, "link")
-            link.set("uid", self.identity["uid"])
-            link.set("type", "a-f-G-U-C")
-            link.set("relation", "p-p")
-            
-            # Message text with source and destination
-            remarks = ET.SubElement(detail, "remarks")
-            remarks.set("source", f"BAO.F.Python.{self.identity['uid']}")
-            remarks.set("to", chat_room)
-            remarks.set("time", pytak.cot_time())
-            remarks.text = message
-            
-            # Additional marti destination info
-            marti = ET.SubElement(detail, "marti")
-            dest = ET.SubElement(marti, "dest")
-            dest.set("callsign", chat_room)
-
-            # Convert to bytes and send
-            data = ET.tostring(root)
+            data = build_chat_event(self.identity, message, chat_room, message_id)
             self.logger.debug("Message XML created successfully")
             
-            # Send the message
-            self.logger.info(f"Sending chat message to {chat_room}: {message}")
-            await self.clitool.tx_queue.put(data)
-            self.logger.debug("Message sent to queue successfully")
-            
-            # Brief pause to avoid overwhelming the server
-            await asyncio.sleep(0.5)
-            return True
+            # Hand the message to the rate limiter, resolved against the current
+            # connection at delivery time so queued messages survive a reconnect
+            self.logger.info("Sending chat message to %s: %s", chat_room, message)
+            submitted = time.perf_counter()
+            future = self.rate_limiter.submit(chat_room, data, lambda d: self.clitool.tx_queue.put(d))
+            future.add_done_callback(lambda f: self._on_message_delivered(f, submitted))
+            return future
 
         except Exception as e:
-            self.logger.error(f"Error sending message: {str(e)}")
+            self.logger.error("Error sending message: %s", e)
             import traceback
-            self.logger.error(f"Traceback: {traceback.format_exc()}")
-            if isinstance(e, ConnectionResetError):
-                self.logger.warning("Connection reset detected during send")
-                self.connection_lost = True
-                # Attempt to reconnect in the background
-                asyncio.create_task(self.reconnect())
-            return False
+            self.logger.error("Traceback: %s", traceback.format_exc())
+            return None
+
+    def _on_message_delivered(self, future: asyncio.Future, submitted: float = None) -> None:
+        """Check the outcome of a rate limited chat message."""
+        if future.cancelled():
+            return
+        e = future.exception()
+        if e is None:
+            if future.result():
+                self.metric_sent.inc()
+                if submitted is not None:
+                    self.metric_send_latency.observe(time.perf_counter() - submitted)
+                self.logger.debug("Message sent to queue successfully")
+            else:
+                self.metric_send_dropped.inc()
+            return
+        self.metric_send_errors.inc()
+        self.logger.error("Error sending message: %s", e)
+        if isinstance(e, ConnectionResetError):
+            self.logger.warning("Connection reset detected during send")
+            self.connection_lost = True
+            # Attempt to reconnect in the background
+            asyncio.create_task(self.reconnect())
 
     async def send_position_update(self) -> bool:
         """Send a position update to the TAK server."""
@@ -576,12 +789,12 @@ class AtakChat:
             return False
 
         try:
-            self.logger.debug(f"Sending position update: lat={self.current_position['lat']:.6f}, lon={self.current_position['lon']:.6f}")
+            self.logger.debug("Sending position update: lat=%.6f, lon=%.6f", self.current_position['lat'], self.current_position['lon'])
             presence_data = self.create_presence_message()
             await self.clitool.tx_queue.put(presence_data)
             return True
         except Exception as e:
-            self.logger.error(f"Error sending position update: {str(e)}")
+            self.logger.error("Error sending position update: %s", e)
             if isinstance(e, ConnectionResetError):
                 self.logger.warning("Connection reset detected during position update")
                 self.connection_lost = True
@@ -605,7 +818,7 @@ class AtakChat:
                 # Enforce a minimum time between position updates to prevent flooding
                 elapsed = current_time - self.last_position_update_time
                 if elapsed < self.position_update_min_interval:
-                    self.logger.debug(f"Skipping position update (too soon: {elapsed:.3f}s < {self.position_update_min_interval:.3f}s)")
+                    self.logger.debug("Skipping position update (too soon: %.3fs < %.3fs)", elapsed, self.position_update_min_interval)
                     return True  # Pretend success but skip this update
                 
                 # Update the timestamp
@@ -624,14 +837,14 @@ class AtakChat:
                 # Non-blocking put - we're already in an async context
                 await tx_queue.put(presence_data)
                 
-                self.logger.debug(f"Direct position update sent: lat={self.current_position['lat']:.6f}, lon={self.current_position['lon']:.6f}")
+                self.logger.debug("Direct position update sent: lat=%.6f, lon=%.6f", self.current_position['lat'], self.current_position['lon'])
                 return True
             else:
                 # Fall back to regular method if tx_queue isn't available
                 return await self.send_position_update()
                 
         except Exception as e:
-            self.logger.error(f"Error in direct position update: {str(e)}")
+            self.logger.error("Error in direct position update: %s", e)
             if isinstance(e, ConnectionResetError):
                 self.logger.warning("Connection reset detected during direct position update")
                 self.connection_lost = True
@@ -639,28 +852,30 @@ class AtakChat:
 
     async def _connection_monitor(self):
         """Monitor connection status and attempt reconnection if needed."""
-        self.logger.info(f"Starting connection monitor for vehicle {self.vehicle_id}")
+        self.logger.info("Starting connection monitor for vehicle %s", self.vehicle_id)
         while self.running:
             try:
                 if self.connection_lost:
-                    self.logger.warning(f"Vehicle {self.vehicle_id} detected disconnection, attempting reconnect")
+                    self.logger.warning("Vehicle %s detected disconnection, attempting reconnect", self.vehicle_id)
                     self.connection_lost = False
                     if await self.reconnect():
-                        self.logger.info(f"Vehicle {self.vehicle_id} successfully reconnected")
+                        self.logger.info("Vehicle %s successfully reconnected", self.vehicle_id)
                     else:
-                        self.logger.error(f"Vehicle {self.vehicle_id} failed to reconnect")
+                        self.logger.error("Vehicle %s failed to reconnect", self.vehicle_id)
                         self.connection_lost = True
                 
                 # Send periodic presence updates to keep connection alive
                 if self.clitool and not self.connection_lost:
                     await self.send_position_update()
+
+                self.logger.info("Receive stats for vehicle %s: %s", self.vehicle_id, self.receive_stats()['prefilter'])
                 
                 await asyncio.sleep(15)  # Check every 15 seconds
             except asyncio.CancelledError:
                 self.logger.info("Connection monitor cancelled")
                 break
             except Exception as e:
-                self.logger.error(f"Error in connection monitor: {str(e)}")
+                self.logger.error("Error in connection monitor: %s", e)
                 await asyncio.sleep(5)  # Sleep on error
 
     def start(self) -> bool:
@@ -675,17 +890,19 @@ class AtakChat:
             self.logger.warning("Already running")
             return True
 
-        self.logger.info(f"Starting chat client for vehicle {self.vehicle_id}")
+        self.logger.info("Starting chat client for vehicle %s", self.vehicle_id)
         self.running = True
+        if self.metrics_port:
+            metrics.start_metrics_server("atak_chat", self.metrics_port)
         self.connection_established = False
 
         async def _run():
             try:
-                self.logger.info(f"Initiating persistent connection for vehicle {self.vehicle_id}")
+                self.logger.info("Initiating persistent connection for vehicle %s", self.vehicle_id)
                 
                 # Use persistent connect to keep trying until timeout
                 if await self.persistent_connect():
-                    self.logger.info(f"Connection established for vehicle {self.vehicle_id}, starting main loop")
+                    self.logger.info("Connection established for vehicle %s, starting main loop", self.vehicle_id)
                     
                     # Start connection monitor
                     monitor_task = asyncio.create_task(self._connection_monitor())
@@ -702,16 +919,16 @@ class AtakChat:
                             except asyncio.CancelledError:
                                 pass
                 else:
-                    self.logger.error(f"Failed to establish connection for vehicle {self.vehicle_id} after timeout")
+                    self.logger.error("Failed to establish connection for vehicle %s after timeout", self.vehicle_id)
                     self.running = False
                     self.connection_event.set()  # Signal that we've given up
                 
             except asyncio.CancelledError:
-                self.logger.info(f"Main task cancelled for vehicle {self.vehicle_id}, shutting down...")
+                self.logger.info("Main task cancelled for vehicle %s, shutting down...", self.vehicle_id)
             except Exception as e:
-                self.logger.error(f"Error in run loop for vehicle {self.vehicle_id}: {str(e)}")
+                self.logger.error("Error in run loop for vehicle %s: %s", self.vehicle_id, e)
                 import traceback
-                self.logger.error(f"Traceback: {traceback.format_exc()}")
+                self.logger.error("Traceback: %s", traceback.format_exc())
                 self.connection_event.set()  # Signal that we've encountered an error
 
         self.loop = asyncio.new_event_loop()
@@ -720,14 +937,14 @@ class AtakChat:
         # Run the event loop in a separate thread
         import threading
         def run_loop():
-            self.logger.info(f"Starting event loop for vehicle {self.vehicle_id}")
+            self.logger.info("Starting event loop for vehicle %s", self.vehicle_id)
             asyncio.set_event_loop(self.loop)
             try:
                 self.loop.run_forever()
             except Exception as e:
-                self.logger.error(f"Error in event loop for vehicle {self.vehicle_id}: {str(e)}")
+                self.logger.error("Error in event loop for vehicle %s: %s", self.vehicle_id, e)
                 import traceback
-                self.logger.error(f"Traceback: {traceback.format_exc()}")
+                self.logger.error("Traceback: %s", traceback.format_exc())
             finally:
                 try:
                     # Cancel all remaining tasks
@@ -738,11 +955,11 @@ class AtakChat:
                     self.loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
                     self.loop.close()
                 except Exception as e:
-                    self.logger.error(f"Error during final cleanup for vehicle {self.vehicle_id}: {e}")
+                    self.logger.error("Error during final cleanup for vehicle %s: %s", self.vehicle_id, e)
         
         self.event_loop_thread = threading.Thread(target=run_loop, daemon=True)
         self.event_loop_thread.start()
-        self.logger.info(f"Chat client started for vehicle {self.vehicle_id}")
+        self.logger.info("Chat client started for vehicle %s", self.vehicle_id)
         
         # Block until connection is established or timeout
         # We'll use a separate event loop to wait for the connection event
@@ -759,7 +976,7 @@ class AtakChat:
                     
                     # Check for timeout
                     if time.time() - start_time > self.initial_connection_timeout:
-                        self.logger.error(f"Timeout waiting for connection for vehicle {self.vehicle_id}")
+                        self.logger.error("Timeout waiting for connection for vehicle %s", self.vehicle_id)
                         return False
                     
                     # Sleep briefly
@@ -768,34 +985,34 @@ class AtakChat:
                     # Print progress every 10 seconds
                     elapsed = time.time() - start_time
                     if int(elapsed) % 10 == 0:
-                        self.logger.info(f"Still waiting for connection for vehicle {self.vehicle_id} "
-                                       f"({elapsed:.0f}s elapsed, {self.initial_connection_timeout - elapsed:.0f}s remaining)")
+                        self.logger.info("Still waiting for connection for vehicle %s (%.0fs elapsed, %.0fs remaining)",
+                                         self.vehicle_id, elapsed, self.initial_connection_timeout - elapsed)
             except Exception as e:
-                self.logger.error(f"Error waiting for connection: {str(e)}")
+                self.logger.error("Error waiting for connection: %s", e)
                 return False
         
         # Wait for connection
-        self.logger.info(f"Waiting for vehicle {self.vehicle_id} to connect (timeout: {self.initial_connection_timeout}s)")
+        self.logger.info("Waiting for vehicle %s to connect (timeout: %ss)", self.vehicle_id, self.initial_connection_timeout)
         connected = wait_for_connection()
         
         # If we couldn't connect after timeout, stop the client
         if not connected:
-            self.logger.error(f"Connection failed for vehicle {self.vehicle_id} after timeout")
+            self.logger.error("Connection failed for vehicle %s after timeout", self.vehicle_id)
             self.stop()
             return False
             
-        self.logger.info(f"Vehicle {self.vehicle_id} connected successfully")
+        self.logger.info("Vehicle %s connected successfully", self.vehicle_id)
         return True
 
     async def _cleanup(self):
         """Internal cleanup method."""
         try:
-            self.logger.debug(f"Starting cleanup for vehicle {self.vehicle_id}")
+            self.logger.debug("Starting cleanup for vehicle %s", self.vehicle_id)
             if self.clitool:
                 # Cancel all tasks
                 tasks = [t for t in asyncio.all_tasks(self.loop) if t is not asyncio.current_task(self.loop)]
                 for task in tasks:
-                    self.logger.debug(f"Cancelling task: {task}")
+                    self.logger.debug("Cancelling task: %s", task)
                     task.cancel()
                 
                 # Wait for tasks to complete
@@ -805,23 +1022,26 @@ class AtakChat:
                 try:
                     await self.clitool.cleanup()
                 except Exception as e:
-                    self.logger.warning(f"Error during CLITool cleanup: {str(e)}")
+                    self.logger.warning("Error during CLITool cleanup: %s", e)
                 
                 # Clear the reference to CLITool
                 self.clitool = None
+
+            if self.parse_pool:
+                await self.parse_pool.close()
                 
-            self.logger.debug(f"Cleanup completed for vehicle {self.vehicle_id}")
+            self.logger.debug("Cleanup completed for vehicle %s", self.vehicle_id)
         except Exception as e:
-            self.logger.error(f"Error during cleanup for vehicle {self.vehicle_id}: {str(e)}")
+            self.logger.error("Error during cleanup for vehicle %s: %s", self.vehicle_id, e)
             import traceback
-            self.logger.error(f"Traceback: {traceback.format_exc()}")
+            self.logger.error("Traceback: %s", traceback.format_exc())
 
     def stop(self) -> None:
         """Stop the chat client."""
         if not self.running:
             return
 
-        self.logger.info(f"Stopping chat client for vehicle {self.vehicle_id}")
+        self.logger.info("Stopping chat client for vehicle %s", self.vehicle_id)
         self.running = False
 
         if not self.loop or not self.loop.is_running():
@@ -845,11 +1065,11 @@ class AtakChat:
             self.loop = None
             self.task = None
             
-            self.logger.info(f"Chat client stopped for vehicle {self.vehicle_id}")
+            self.logger.info("Chat client stopped for vehicle %s", self.vehicle_id)
         except Exception as e:
-            self.logger.error(f"Error during stop for vehicle {self.vehicle_id}: {str(e)}")
+            self.logger.error("Error during stop for vehicle %s: %s", self.vehicle_id, e)
             import traceback
-            self.logger.error(f"Traceback: {traceback.format_exc()}")
+            self.logger.error("Traceback: %s", traceback.format_exc())
             # Force cleanup if normal shutdown fails
             if self.loop and self.loop.is_running():
                 self.loop.stop()
@@ -858,6 +1078,38 @@ class AtakChat:
             self.loop = None
             self.task = None 
 
+    async def _apply_parsed_records(self, records: list) -> None:
+        """Apply a batch parsed by the parse pool and queue its chat messages."""
+        for message_info in self.message_handler.apply_records(records):
+            await self.message_handler.put(message_info)
+
+    def receive_stats(self) -> dict:
+        """Receive path counters: pre-filter parse counts and CPU saved, dedup and contacts."""
+        handler = self.message_handler
+        return {
+            "prefilter": handler.prefilter.stats(),
+            "parse_pool": self.parse_pool.stats() if self.parse_pool else None,
+            "duplicates": handler.duplicates,
+            "dropped": handler.dropped,
+            "contacts": handler.contacts.stats(),
+        }
+
+    def contacts_within(self, radius_m: float, cot_prefix: str = "") -> list:
+        """
+        Contacts received from the server within radius_m of our current position.
+
+        Args:
+            radius_m: Search radius in meters
+            cot_prefix: Optional CoT type prefix filter (e.g. "a-h" for hostile)
+
+        Returns:
+            list: (distance in meters, Contact) tuples, nearest first
+        """
+        with self.position_lock:
+            lat = self.current_position["lat"]
+            lon = self.current_position["lon"]
+        return self.message_handler.contacts.within(lat, lon, radius_m, cot_prefix)
+
     async def receive_message(self, timeout: float = 5.0) -> Optional[dict]:
         """
         Receive a single chat message with timeout.
@@ -873,7 +1125,7 @@ class AtakChat:
             return None
             
         try:
-            self.logger.debug(f"Waiting for message (timeout: {timeout}s)")
+            self.logger.debug("Waiting for message (timeout: %ss)", timeout)
             message = await asyncio.wait_for(
                 self.message_handler.message_queue.get(),
                 timeout=timeout
@@ -883,7 +1135,7 @@ class AtakChat:
             self.logger.debug("No message received within timeout")
             return None
         except Exception as e:
-            self.logger.error(f"Error receiving message: {str(e)}")
+            self.logger.error("Error receiving message: %s", e)
             return None
 
     async def monitor_chat(self, callback=None):
@@ -898,26 +1150,26 @@ class AtakChat:
             return
             
         try:
-            self.logger.info(f"Starting chat monitoring for vehicle {self.vehicle_id}")
+            self.logger.info("Starting chat monitoring for vehicle %s", self.vehicle_id)
             while self.running:
                 try:
                     message = await self.message_handler.message_queue.get()
-                    self.logger.info(f"Message from {message['sender']}: {message['text']}")
+                    self.logger.info("Message from %s: %s", message['sender'], message['text'])
                     
                     if callback:
                         try:
                             await callback(message)
                         except Exception as e:
-                            self.logger.error(f"Error in message callback: {str(e)}")
+                            self.logger.error("Error in message callback: %s", e)
                             
                 except asyncio.CancelledError:
                     self.logger.info("Chat monitoring cancelled")
                     break
                 except Exception as e:
-                    self.logger.error(f"Error in monitor loop: {str(e)}")
+                    self.logger.error("Error in monitor loop: %s", e)
                     await asyncio.sleep(1)  # Brief pause on error
                     
         except Exception as e:
-            self.logger.error(f"Error in chat monitor: {str(e)}")
+            self.logger.error("Error in chat monitor: %s", e)
         finally:
-            self.logger.info(f"Chat monitoring stopped for vehicle {self.vehicle_id}") 
\ No newline at end of file
+            self.logger.info("Chat monitoring stopped for vehicle %s", self.vehicle_id) 
\ No newline at end of file
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Measure the CPU a position update spends on logging, before and after toolkit_logging.
+
+Each simulated event does the logging of one AtakChat position update
+(three debug lines) plus the per-event output of cot_broadcast.py (the full
+CoT XML). The styles compared:
+
+    before      basicConfig(DEBUG) as AtakChat used to set, f-strings, a
+                StreamHandler writing in the caller, and print() of the XML
+    after       toolkit_logging at INFO, %-style: the debug lines are dropped
+                after a level check, nothing is formatted
+    after-debug toolkit_logging with DEBUG enabled: the caller only queues the
+                records, the listener thread formats and writes them
+
+The output goes to /dev/null so the terminal speed does not count. The
+caller column is thread CPU of the event loop (what the hot path pays), the
+process column includes the listener thread.
+
+Usage:
+    python3 bench_logging.py --events 20000
+"""
+import argparse
+import contextlib
+import logging
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "common"))
+
+# custom modules
+from cot_broadcast import create_cot_message
+import toolkit_logging
+
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+
+def events_before(logger: logging.Logger, devnull, count: int):
+    position = {"lat": 27.95, "lon": -81.62, "hae": 10.0}
+    elapsed, interval = 0.2, 0.1
+    for i in range(count):
+        lat = position["lat"] + i * 1e-6
+        lon = position["lon"]
+        logger.debug(f"Position updated to: lat={lat:.6f}, lon={lon:.6f}, alt={position['hae']:.1f}m")
+        logger.debug(f"Sending position update: lat={lat:.6f}, lon={lon:.6f}")
+        logger.debug(f"Direct position update sent: lat={lat:.6f}, lon={lon:.6f} ({elapsed:.3f}s > {interval:.3f}s)")
+        message = create_cot_message(lat, lon, position["hae"])
+        print("Broadcasted CoT message:", file=devnull)
+        print(message, file=devnull)
+        print("-" * 50, file=devnull)
+
+
+def events_after(logger: logging.Logger, count: int):
+    position = {"lat": 27.95, "lon": -81.62, "hae": 10.0}
+    elapsed, interval = 0.2, 0.1
+    for i in range(count):
+        lat = position["lat"] + i * 1e-6
+        lon = position["lon"]
+        logger.debug("Position updated to: lat=%.6f, lon=%.6f, alt=%.1fm", lat, lon, position["hae"])
+        logger.debug("Sending position update: lat=%.6f, lon=%.6f", lat, lon)
+        logger.debug("Direct position update sent: lat=%.6f, lon=%.6f (%.3fs > %.3fs)", lat, lon, elapsed, interval)
+        message = create_cot_message(lat, lon, position["hae"])
+        logger.debug("Broadcasted CoT message:\n%s", message)
+
+
+def events_baseline(count: int):
+    """Only the CoT build, subtracted from the other runs."""
+    for i in range(count):
+        create_cot_message(27.95 + i * 1e-6, -81.62, 10.0)
+
+
+def measure(run, count: int, flush: bool = False) -> tuple:
+    """Caller thread CPU and process CPU per event in microseconds."""
+    t0, p0 = time.thread_time(), time.process_time()
+    run(count)
+    t1 = time.thread_time()
+    if flush:
+        # wait for the listener to write everything so its CPU is counted
+        toolkit_logging.stop_logging()
+    p1 = time.process_time()
+    return (t1 - t0) / count * 1e6, (p1 - p0) / count * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CPU per event of the old and new logging styles.")
+    parser.add_argument("--events", type=int, default=20000, help="Events per run")
+    args = parser.parse_args()
+
+    devnull = open(os.devnull, "w")
+    results = {}
+
+    results["baseline"] = measure(events_baseline, args.events)
+
+    # before: the root logger at DEBUG with a handler writing in the caller
+    before = logging.getLogger("bench.before")
+    before.propagate = False
+    handler = logging.StreamHandler(devnull)
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    before.addHandler(handler)
+    before.setLevel(logging.DEBUG)
+    with contextlib.redirect_stdout(devnull):
+        results["before"] = measure(lambda n: events_before(before, devnull, n), args.events)
+
+    # after: toolkit_logging at INFO, debug lines only cost a level check
+    toolkit_logging.setup_logging(level=logging.INFO, config_path=None, stream=devnull)
+    after = logging.getLogger("bench.after")
+    results["after"] = measure(lambda n: events_after(after, n), args.events)
+
+    # after-debug: debug enabled, formatting and I/O on the listener thread
+    after.setLevel(logging.DEBUG)
+    for rate_limit in logging.getLogger().handlers[0].filters:
+        rate_limit.burst = args.events  # measure the queueing, not the rate limit
+    results["after-debug"] = measure(lambda n: events_after(after, n), args.events, flush=True)
+
+    base_caller, base_process = results["baseline"]
+    print(f"{args.events} events, logging CPU per event (CoT build of {base_caller:.1f} us subtracted)")
+    print(f"{'style':>12} {'caller us':>10} {'process us':>11}")
+    for name in ("before", "after", "after-debug"):
+        caller, process = results[name]
+        print(f"{name:>12} {caller - base_caller:10.1f} {process - base_process:11.1f}")
+    saved = results["before"][0] - results["after"][0]
+    print(f"hot path saves {saved:.1f} us per event at INFO "
+          f"({saved / max(results['before'][0] - base_caller, 1e-9) * 100:.0f}% of the logging cost)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Benchmark: inbound CoT parsing on the event loop vs. in the CotParsePool.
+
+Feeds a synthetic flood of CoT (positions of many units plus some chat) into
+the receive path and measures the event loop lag with a 10 ms ticker, the
+same loop that sends our own position updates in AtakChat.
+
+Usage:
+    python3 bench_parse_pool.py --rate 2000 --duration 10 --workers 2
+    python3 bench_parse_pool.py --rate 1000 --full-parse   # positions subscribed for a full parse too
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+import uuid
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# custom modules
+from atak_chat import ChatMessageHandler
+from cot_parse_pool import CotParsePool
+
+TICK = 0.01          # lag monitor interval (s)
+FEED_INTERVAL = 0.01  # the flood arrives in chunks this far apart (s)
+
+
+def pct(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100.0 * len(values)))] if values else 0.0
+
+
+def make_position_event(index: int) -> bytes:
+    lat = 38.0 + random.random()
+    lon = -77.0 + random.random()
+    return (f'<event version="2.0" uid="UNIT-{index}" type="a-f-G-U-C" how="m-g" '
+            f'time="2025-01-01T00:00:00.000Z" start="2025-01-01T00:00:00.000Z" stale="2099-01-01T00:00:00.000Z">'
+            f'<point lat="{lat:.6f}" lon="{lon:.6f}" hae="120.0" ce="10.0" le="10.0"/>'
+            f'<detail><contact callsign="Unit {index}"/><__group name="Cyan" role="Team Member"/>'
+            f'<track course="90.0" speed="12.0"/><status battery="80"/></detail></event>').encode()
+
+
+def make_chat_event(index: int) -> bytes:
+    message_id = str(uuid.uuid4())
+    return (f'<event version="2.0" uid="GeoChat.UNIT-{index}.All Chat Rooms.{message_id}" type="b-t-f" how="h-g-i-g-o" '
+            f'time="2025-01-01T00:00:00.000Z" start="2025-01-01T00:00:00.000Z" stale="2099-01-01T00:00:00.000Z">'
+            f'<point lat="0.0" lon="0.0" hae="0.0" ce="9999999.0" le="9999999.0"/>'
+            f'<detail><__chat parent="RootContactGroup" groupOwner="false" messageId="{message_id}" '
+            f'chatroom="All Chat Rooms" id="All Chat Rooms" senderCallsign="Unit {index}">'
+            f'<chatgrp uid0="UNIT-{index}" uid1="All Chat Rooms" id="All Chat Rooms"/></__chat>'
+            f'<link uid="UNIT-{index}" type="a-f-G-U-C" relation="p"/>'
+            f'<remarks source="BAO.F.ATAK.UNIT-{index}" to="All Chat Rooms" time="2025-01-01T00:00:00.000Z">'
+            f'flood message {index}</remarks></detail></event>').encode()
+
+
+async def lag_monitor(lags: list, stop: asyncio.Event):
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(time.perf_counter() - t0 - TICK)
+
+
+async def flood(rx_queue: asyncio.Queue, args, stop: asyncio.Event):
+    per_chunk = max(1, int(args.rate * FEED_INTERVAL))
+    sent = 0
+    next_feed = time.perf_counter()
+    while not stop.is_set():
+        for _ in range(per_chunk):
+            index = random.randrange(args.units)
+            event = make_chat_event(index) if random.random() < args.chat_fraction else make_position_event(index)
+            rx_queue.put_nowait(event)
+            sent += 1
+        next_feed += FEED_INTERVAL
+        await asyncio.sleep(max(0.0, next_feed - time.perf_counter()))
+    return sent
+
+
+async def run_mode(args, use_pool: bool) -> dict:
+    handler = ChatMessageHandler(queue_size=100000)
+    if args.full_parse:
+        handler.prefilter.subscribe("a-")
+    rx_queue = asyncio.Queue()
+    processed = 0
+    pool = None
+
+    async def apply(records):
+        for message_info in handler.apply_records(records):
+            await handler.put(message_info)
+
+    if use_pool:
+        pool = CotParsePool(apply, workers=args.workers, batch_size=args.batch_size,
+                            prefixes=handler.prefilter.prefixes)
+        pool.start()
+        # let the worker processes come up before the flood starts
+        await pool.submit(make_position_event(0))
+        await pool.flush()
+        await asyncio.sleep(1.0)
+
+    async def consume():
+        nonlocal processed
+        while True:
+            data = await rx_queue.get()
+            if pool is not None:
+                await pool.submit(data)
+            else:
+                message_info = handler.parse_chat_message(data)
+                if message_info:
+                    await handler.put(message_info)
+            processed += 1
+
+    stop = asyncio.Event()
+    lags = []
+    monitor = asyncio.create_task(lag_monitor(lags, stop))
+    consumer = asyncio.create_task(consume())
+    producer = asyncio.create_task(flood(rx_queue, args, stop))
+    start = time.perf_counter()
+    await asyncio.sleep(args.duration)
+    stop.set()
+    sent = await producer
+    await monitor
+    # drain what is left, the backlog counts against the mode that fell behind
+    while rx_queue.qsize():
+        await asyncio.sleep(0.01)
+    if pool is not None:
+        await pool.flush()
+        while pool.applied < pool.batches:
+            await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - start
+    consumer.cancel()
+    pool_stats = pool.stats() if pool is not None else None
+    if pool is not None:
+        await pool.close()
+
+    return {
+        "sent": sent,
+        "processed": processed,
+        "elapsed": elapsed,
+        "lags": lags,
+        "chat": handler.message_queue.qsize(),
+        "contacts": len(handler.contacts.contacts),
+        "pool": pool_stats,
+    }
+
+
+def report(name: str, result: dict):
+    lags = result["lags"]
+    print(f"  {name:<14} loop lag p50 {pct(lags, 50) * 1000:7.2f} ms  p99 {pct(lags, 99) * 1000:7.2f} ms"
+          f"  max {max(lags) * 1000:7.2f} ms   {result['processed'] / result['elapsed']:7.0f} ev/s"
+          f"  chat {result['chat']}  contacts {result['contacts']}")
+    if result["pool"]:
+        print(f"  {'':<14} worker {result['pool']['worker_ms_per_event'] * 1000:.1f} us/event"
+              f" in {result['pool']['batches']} batches")
+
+
+async def async_main(args):
+    print(f"Flood of {args.rate} events/s for {args.duration:.0f} s, {args.units} units, "
+          f"{args.chat_fraction:.0%} chat{', positions fully parsed' if args.full_parse else ''}")
+    report("event loop", await run_mode(args, use_pool=False))
+    report(f"pool x{args.workers}", await run_mode(args, use_pool=True))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark inbound CoT parsing on the loop vs. a process pool.")
+    parser.add_argument("--rate", type=int, default=2000, help="Inbound events per second")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per mode")
+    parser.add_argument("--units", type=int, default=500, help="Distinct units in the feed")
+    parser.add_argument("--chat-fraction", type=float, default=0.02, help="Share of chat events")
+    parser.add_argument("--workers", type=int, default=2, help="Parse pool worker processes")
+    parser.add_argument("--batch-size", type=int, default=64, help="Events per parse batch")
+    parser.add_argument("--full-parse", action="store_true", help="Subscribe positions for a full XML parse")
+    asyncio.run(async_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
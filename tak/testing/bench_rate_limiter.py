@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark: token-bucket rate limiter vs. the old fixed 0.5 s sleep in AtakChat.send_message.
+
+Measures, for a burst of messages sent back to back by one caller:
+    - how long the caller is held up
+    - delivery latency of each message (submit -> on the tx queue)
+and the sustained throughput over a longer run.
+
+Usage:
+    python3 bench_rate_limiter.py --burst 10 --rate 2 --bucket 5 --duration 10
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# custom modules
+from rate_limiter import RateLimiter
+
+OLD_SEND_SLEEP = 0.5  # the fixed pause AtakChat.send_message used to take after every message
+
+
+def pct(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100.0 * len(values)))] if values else 0.0
+
+
+async def old_send(tx_queue, data):
+    await tx_queue.put(data)
+    await asyncio.sleep(OLD_SEND_SLEEP)
+
+
+async def bench_burst_old(count: int):
+    tx_queue = asyncio.Queue()
+    latencies = []
+    start = time.monotonic()
+    for i in range(count):
+        t0 = time.monotonic()
+        await old_send(tx_queue, b"msg")
+        # the message is on the queue right away, but the next one waits 0.5 s
+        latencies.append(t0 - start)
+    return time.monotonic() - start, latencies
+
+
+async def bench_burst_limiter(count: int, rate: float, burst: float):
+    tx_queue = asyncio.Queue()
+    limiter = RateLimiter(rate=rate, burst=burst, max_pending=count)
+    start = time.monotonic()
+    futures = [limiter.submit("All Chat Rooms", b"msg", tx_queue.put) for _ in range(count)]
+    caller_time = time.monotonic() - start
+    latencies = []
+    for future in futures:
+        await future
+        latencies.append(time.monotonic() - start)
+    return caller_time, latencies
+
+
+async def bench_sustained_old(duration: float):
+    tx_queue = asyncio.Queue()
+    start = time.monotonic()
+    while time.monotonic() - start < duration:
+        await old_send(tx_queue, b"msg")
+    return tx_queue.qsize() / duration
+
+
+async def bench_sustained_limiter(duration: float, rate: float, burst: float):
+    tx_queue = asyncio.Queue()
+    limiter = RateLimiter(rate=rate, burst=burst)
+    start = time.monotonic()
+    while time.monotonic() - start < duration:
+        # keep a small backlog so the bucket is always the limit
+        if limiter.backlog("room") < 10:
+            limiter.submit("room", b"msg", tx_queue.put)
+        await asyncio.sleep(0.001)
+    return tx_queue.qsize() / duration
+
+
+async def async_main(args):
+    print(f"Burst of {args.burst} messages")
+    caller, lat = await bench_burst_old(args.burst)
+    print(f"  old sleep(0.5):  caller held {caller * 1000:8.1f} ms   delivery p50 {pct(lat, 50) * 1000:7.1f} ms"
+          f"  max {max(lat) * 1000:7.1f} ms")
+    caller, lat = await bench_burst_limiter(args.burst, args.rate, args.bucket)
+    print(f"  token bucket:    caller held {caller * 1000:8.3f} ms   delivery p50 {pct(lat, 50) * 1000:7.1f} ms"
+          f"  max {max(lat) * 1000:7.1f} ms  (rate {args.rate}/s, burst {args.bucket})")
+
+    print(f"Sustained throughput over {args.duration:.0f} s")
+    print(f"  old sleep(0.5):  {await bench_sustained_old(args.duration):6.2f} msg/s")
+    print(f"  token bucket:    {await bench_sustained_limiter(args.duration, args.rate, args.bucket):6.2f} msg/s"
+          f"  (configured {args.rate}/s + initial burst {args.bucket})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the chat rate limiter.")
+    parser.add_argument("--burst", type=int, default=10, help="Messages in the burst test")
+    parser.add_argument("--rate", type=float, default=2.0, help="Long-term rate (msg/s)")
+    parser.add_argument("--bucket", type=float, default=5, help="Bucket size (burst allowance)")
+    parser.add_argument("--duration", type=float, default=10.0, help="Sustained test duration (s)")
+    asyncio.run(async_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
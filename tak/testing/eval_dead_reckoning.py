@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Replay a mission log and measure the dead-reckoning prediction error.
+
+For every logged sample and each horizon (seconds), the position is predicted
+forward with dead_reckoning and compared with the logged position that many
+seconds later. The "hold" column is the error of simply showing the old
+sample, which is what the CoT senders did before.
+
+The log is the mavlink-data.csv that mavlink-reader.py appends to when it is
+given a log folder. Logs without the position_time column fall back to the
+1 s resolution UTC_Date_Time column.
+
+Usage:
+    python3 eval_dead_reckoning.py /path/to/mission/mavlink-data.csv --horizons 1 2 3 5
+    python3 eval_dead_reckoning.py --simulate   # synthetic loiter track, no log needed
+"""
+import argparse
+import csv
+import math
+import os
+import sys
+from datetime import datetime, timezone
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# custom modules
+from contact_table import distance_m
+from dead_reckoning import extrapolate_row, offset_position
+
+MATCH_TOLERANCE = 0.3  # seconds, a logged sample must be this close to t + horizon
+
+
+def pct(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100.0 * len(values)))] if values else 0.0
+
+
+def load_log(path: str) -> list:
+    """Load a mission log into a list of rows sorted by sample time."""
+    rows = []
+    with open(path, newline='') as csvfile:
+        for raw in csv.DictReader(csvfile):
+            row = {}
+            for key, value in raw.items():
+                try:
+                    row[key] = float(value)
+                except (TypeError, ValueError):
+                    row[key] = value
+            if not row.get("position_time"):
+                try:
+                    row["position_time"] = datetime.strptime(row["UTC_Date_Time"], '%Y-%m-%d %H:%M:%S') \
+                        .replace(tzinfo=timezone.utc).timestamp()
+                except (KeyError, TypeError, ValueError):
+                    continue
+            if row.get("lat") or row.get("lon"):
+                rows.append(row)
+    rows.sort(key=lambda r: r["position_time"])
+    return rows
+
+
+def simulate_track(duration: float = 600.0, rate: float = 1.0, speed: float = 22.0,
+                   turn_rate: float = 3.0) -> list:
+    """Synthetic fixed-wing track: straight legs and constant rate turns, sampled at `rate` Hz."""
+    rows = []
+    lat, lon = 27.95, -81.62
+    heading = 0.0
+    step = 0.05
+    t = 0.0
+    next_sample = 0.0
+    while t < duration:
+        # alternate 60 s straight legs and 30 s turns
+        turning = (t % 90.0) >= 60.0
+        if turning:
+            heading = (heading + turn_rate * step) % 360.0
+        vn = speed * math.cos(math.radians(heading))
+        ve = speed * math.sin(math.radians(heading))
+        if t >= next_sample:
+            rows.append({"lat": lat, "lon": lon, "vn": vn, "ve": ve, "ground_speed": speed,
+                         "heading": heading, "position_time": 1.7e9 + t})
+            next_sample += 1.0 / rate
+        lat, lon = offset_position(lat, lon, vn * step, ve * step)
+        t += step
+    return rows
+
+
+def evaluate(rows: list, horizons: list) -> dict:
+    """
+    Returns:
+        dict: horizon -> (dead reckoning errors, hold-last-sample errors) in meters
+    """
+    times = [row["position_time"] for row in rows]
+    results = {}
+    for horizon in horizons:
+        predicted_errors, hold_errors = [], []
+        j = 0
+        for i, row in enumerate(rows):
+            target = row["position_time"] + horizon
+            while j < len(rows) - 1 and times[j] < target - MATCH_TOLERANCE:
+                j += 1
+            if j <= i or abs(times[j] - target) > MATCH_TOLERANCE:
+                continue
+            actual = rows[j]
+            lat, lon, _ = extrapolate_row(row, now=actual["position_time"])
+            predicted_errors.append(distance_m(lat, lon, actual["lat"], actual["lon"]))
+            hold_errors.append(distance_m(row["lat"], row["lon"], actual["lat"], actual["lon"]))
+        results[horizon] = (predicted_errors, hold_errors)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure dead-reckoning error against a replayed mission log.")
+    parser.add_argument("log", nargs="?", help="mavlink-data.csv mission log")
+    parser.add_argument("--horizons", type=float, nargs="+", default=[1.0, 2.0, 3.0, 5.0],
+                        help="Prediction horizons in seconds")
+    parser.add_argument("--simulate", action="store_true", help="Use a synthetic track instead of a log")
+    args = parser.parse_args()
+
+    if args.simulate:
+        rows = simulate_track()
+        source = "synthetic track"
+    elif args.log:
+        rows = load_log(args.log)
+        source = args.log
+    else:
+        parser.error("give a mission log or --simulate")
+
+    print(f"{len(rows)} samples from {source}")
+    print(f"{'horizon':>8} {'n':>6} {'DR p50':>9} {'DR p95':>9} {'hold p50':>9} {'hold p95':>9}   (meters)")
+    for horizon, (predicted, hold) in evaluate(rows, args.horizons).items():
+        print(f"{horizon:7.1f}s {len(predicted):6d} {pct(predicted, 50):9.1f} {pct(predicted, 95):9.1f}"
+              f" {pct(hold, 50):9.1f} {pct(hold, 95):9.1f}")
+
+
+if __name__ == "__main__":
+    main()
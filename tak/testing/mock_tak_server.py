@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Local mock TAK server for testing the tak/ clients without the real server.
+
+Accepts CoT streams over TLS (self-signed certs generated on first use) or
+plain TCP, records every event it receives, routes chat (b-t-f) back to the
+sender and to every other connected client, and can drop all clients
+periodically to exercise reconnect logic.
+
+Usage:
+    python3 mock_tak_server.py --port 8089 --cert-dir ./mock-certs --record received.jsonl
+    python3 mock_tak_server.py --port 8087 --no-tls --drop-every 60
+"""
+import argparse
+import asyncio
+import collections
+import json
+import logging
+import os
+import re
+import ssl
+import subprocess
+import time
+
+DEFAULT_CERT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mock-certs")
+CERT_DAYS = 365
+RECEIVED_HISTORY = 100000   # events kept in memory, use --record for the full log
+
+# cheap attribute extraction for the record, a mock server does not need a parser
+TYPE_RE = re.compile(rb'\btype="([^"]*)"')
+UID_RE = re.compile(rb'\buid="([^"]*)"')
+
+logger = logging.getLogger("mock_tak_server")
+
+
+def generate_self_signed_certs(cert_dir: str = DEFAULT_CERT_DIR) -> dict:
+    """
+    Generate a CA, a server certificate and a client certificate with openssl.
+
+    Existing files are reused. The client key and certificate are also written
+    combined into one PEM, which is what atak_chat expects for
+    PYTAK_TLS_CLIENT_CERT / PYTAK_TLS_CLIENT_KEY.
+
+    Returns:
+        dict: Paths of ca, server_cert, server_key, client_cert, client_key and client_combined
+    """
+    os.makedirs(cert_dir, exist_ok=True)
+    paths = {name: os.path.join(cert_dir, filename) for name, filename in (
+        ("ca", "ca.pem"), ("ca_key", "ca.key"),
+        ("server_cert", "server.pem"), ("server_key", "server.key"),
+        ("client_cert", "client.pem"), ("client_key", "client.key"),
+        ("client_combined", "client_combined.pem"),
+    )}
+    if all(os.path.exists(p) for p in paths.values()):
+        return paths
+
+    def openssl(*args):
+        subprocess.run(["openssl", *args], check=True, capture_output=True)
+
+    openssl("req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", str(CERT_DAYS),
+            "-subj", "/CN=Mock TAK CA", "-keyout", paths["ca_key"], "-out", paths["ca"])
+    for role, cn in (("server", "localhost"), ("client", "mock-client")):
+        csr = os.path.join(cert_dir, f"{role}.csr")
+        openssl("req", "-newkey", "rsa:2048", "-nodes", "-subj", f"/CN={cn}",
+                "-keyout", paths[f"{role}_key"], "-out", csr)
+        openssl("x509", "-req", "-in", csr, "-CA", paths["ca"], "-CAkey", paths["ca_key"],
+                "-CAcreateserial", "-days", str(CERT_DAYS), "-out", paths[f"{role}_cert"])
+        os.remove(csr)
+
+    with open(paths["client_combined"], "wb") as combined:
+        for name in ("client_cert", "client_key"):
+            with open(paths[name], "rb") as f:
+                combined.write(f.read())
+    return paths
+
+
+def build_server_ssl_context(paths: dict, require_client_cert: bool = True) -> ssl.SSLContext:
+    """Create the server side TLS context from generate_self_signed_certs() paths."""
+    ctx = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    ctx.load_cert_chain(paths["server_cert"], paths["server_key"])
+    ctx.load_verify_locations(paths["ca"])
+    ctx.verify_mode = ssl.CERT_REQUIRED if require_client_cert else ssl.CERT_OPTIONAL
+    return ctx
+
+
+class MockTakServer:
+    """asyncio TAK server stand-in that records and routes CoT."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8089, ssl_context: ssl.SSLContext = None,
+                 record_path: str = None, echo_chat: bool = True, route_all: bool = False,
+                 drop_every: float = 0.0):
+        self.host = host
+        self.port = port
+        self.ssl_context = ssl_context
+        self.record_path = record_path
+        self.echo_chat = echo_chat
+        self.route_all = route_all      # also relay non-chat CoT to other clients, like a real server
+        self.drop_every = drop_every
+
+        self.clients = {}               # peer -> StreamWriter
+        self.received = collections.deque(maxlen=RECEIVED_HISTORY)  # (receive time, peer, type, uid, size)
+        self.connections = 0
+        self.disconnects = 0
+        self.events = 0
+        self.bytes_received = 0
+        self.server = None
+        self._record_file = None
+
+    async def start(self):
+        if self.record_path:
+            self._record_file = open(self.record_path, "a")
+        self.server = await asyncio.start_server(self._handle_client, self.host, self.port, ssl=self.ssl_context)
+        # port 0 picks a free port, report the real one
+        self.port = self.server.sockets[0].getsockname()[1]
+        logger.info("Mock TAK server listening on %s:%d (%s)", self.host, self.port,
+                    "TLS" if self.ssl_context else "TCP")
+
+    async def stop(self):
+        for writer in list(self.clients.values()):
+            writer.close()
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+        if self._record_file:
+            self._record_file.close()
+            self._record_file = None
+
+    def record(self, peer: str, event: bytes):
+        now = time.time()
+        type_match = TYPE_RE.search(event)
+        uid_match = UID_RE.search(event)
+        cot_type = type_match.group(1).decode(errors="replace") if type_match else ""
+        uid = uid_match.group(1).decode(errors="replace") if uid_match else ""
+        self.events += 1
+        self.bytes_received += len(event)
+        self.received.append((now, peer, cot_type, uid, len(event)))
+        if self._record_file:
+            self._record_file.write(json.dumps({"time": now, "peer": peer, "type": cot_type, "uid": uid,
+                                                "xml": event.decode(errors="replace")}) + "\n")
+        return cot_type
+
+    def route(self, sender: str, event: bytes, cot_type: str):
+        is_chat = cot_type == "b-t-f"
+        if not (self.route_all or (is_chat and self.echo_chat)):
+            return
+        for peer, writer in list(self.clients.items()):
+            if peer == sender and not is_chat:
+                continue
+            try:
+                writer.write(event)
+            except Exception as e:
+                logger.warning("Error routing to %s: %s", peer, e)
+
+    async def _handle_client(self, reader, writer):
+        peer = "%s:%d" % writer.get_extra_info("peername")[:2]
+        self.clients[peer] = writer
+        self.connections += 1
+        logger.info("Client connected: %s", peer)
+        buf = b""
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                buf += data
+                while b"</event>" in buf:
+                    packet, buf = buf.split(b"</event>", 1)
+                    event = packet.strip() + b"</event>"
+                    # drop any XML declaration in front of the event
+                    start = event.find(b"<event")
+                    if start > 0:
+                        event = event[start:]
+                    cot_type = self.record(peer, event)
+                    self.route(peer, event, cot_type)
+        except (ConnectionResetError, ssl.SSLError, asyncio.IncompleteReadError) as e:
+            logger.debug("Client %s error: %s", peer, e)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self.clients.pop(peer, None)
+            self.disconnects += 1
+            writer.close()
+            logger.info("Client disconnected: %s", peer)
+
+    async def drop_clients_loop(self):
+        """Periodically drop every client to test reconnect behaviour."""
+        while True:
+            await asyncio.sleep(self.drop_every)
+            logger.info("Dropping %d client(s)", len(self.clients))
+            for writer in list(self.clients.values()):
+                writer.transport.abort()
+
+    async def serve_forever(self):
+        await self.start()
+        tasks = []
+        if self.drop_every > 0:
+            tasks.append(asyncio.create_task(self.drop_clients_loop()))
+        try:
+            await self.server.serve_forever()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await self.stop()
+
+    def stats(self) -> dict:
+        return {
+            "connections": self.connections,
+            "disconnects": self.disconnects,
+            "clients": len(self.clients),
+            "events": self.events,
+            "bytes_received": self.bytes_received,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local mock TAK server for testing.")
+    parser.add_argument("--host", default="127.0.0.1", help="Listen address")
+    parser.add_argument("--port", type=int, default=8089, help="Listen port")
+    parser.add_argument("--no-tls", action="store_true", help="Plain TCP instead of TLS")
+    parser.add_argument("--cert-dir", default=DEFAULT_CERT_DIR, help="Directory for the generated certificates")
+    parser.add_argument("--record", help="Append every received event to this JSON-lines file")
+    parser.add_argument("--route-all", action="store_true", help="Relay all CoT to the other clients, not just chat")
+    parser.add_argument("--drop-every", type=float, default=0.0, help="Drop all clients every N seconds")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    ssl_context = None
+    if not args.no_tls:
+        paths = generate_self_signed_certs(args.cert_dir)
+        ssl_context = build_server_ssl_context(paths)
+        logger.info("Client cert: %s  CA: %s", paths["client_combined"], paths["ca"])
+
+    server = MockTakServer(args.host, args.port, ssl_context, record_path=args.record,
+                           route_all=args.route_all, drop_every=args.drop_every)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        print(f"\nMock server stopped: {server.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,9 +5,16 @@ from configparser import ConfigParser
 import pytak
 import subprocess
 import csv
+import os
+import sys
 import uuid
 from typing import Optional, Tuple
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# custom modules
+from cot_prefilter import CotPreFilter
+
 # Configuration settings
 #SERVER_URL = "tls://45.32.196.115:8089" # vector server
 SERVER_URL = "tls://tak.overheadintel.com:8089"   # OI google cloud server
@@ -18,6 +25,9 @@ CALLSIGN   = "Magpie"
 TEAM_COLOR = "Cyan"
 ROLE       = "Team Member"
 
+# only chat events get a full XML parse
+CHAT_PREFILTER = CotPreFilter(("b-t-f",))
+
 # Launch the mavlink-reader.py script
 CSV_FILE = "/home/droneman/oi-cm4-toolkit/mavlink-reader/mavlink-data.csv"
 mavlink_reader_script = "/home/droneman/oi-cm4-toolkit/mavlink-reader/mavlink-reader.py"
@@ -199,6 +209,11 @@ def parse_incoming_chat_event(xml: bytes) -> Optional[Tuple[ET.Element, str, str
     or None if this event isn't a free-text chat.
     """
     try:
+        # cheap check on the raw bytes first, most traffic is position updates
+        wanted, _, _ = CHAT_PREFILTER.check(xml)
+        if not wanted:
+            return None
+
         root = ET.fromstring(xml)
         if root.get("type") != "b-t-f":
             return None
@@ -311,8 +326,14 @@ async def async_main():
                 print(f"Error processing data: {e}")
                 continue
     
+    # report how many full parses the pre-filter saved
+    async def stats_loop():
+        while enabled:
+            await asyncio.sleep(60)
+            print(f"[INFO] Receive pre-filter: {CHAT_PREFILTER.stats()}")
+
     # run presence + chat loops concurrently
-    await asyncio.gather(presence_loop(), chat_loop())
+    await asyncio.gather(presence_loop(), chat_loop(), stats_loop())
 
 # Entry point
 if __name__ == "__main__":
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Multi-client load test for the tak/ clients against the mock TAK server.
+
+Spins up N simulated clients and measures:
+    - events per second sent by the clients and received by the server
+    - end-to-end chat latency percentiles (client -> server -> echo -> client)
+    - reconnect count and time to reconnect when the server drops clients
+    - resident memory growth of this process over long runs
+
+Client modes:
+    pytak      N PytakClient-style streams (pytak.protocol_factory + raw writer)
+    atak_chat  N AtakChat instances (one thread + event loop each, as deployed today)
+    gateway    one TakGateway hosting N vehicles over --pool-size connections
+
+Usage:
+    python3 tak_load_test.py --mode pytak --clients 20 --duration 300
+    python3 tak_load_test.py --mode atak_chat --clients 10 --drop-every 60 --duration 1800
+    python3 tak_load_test.py --mode gateway --clients 50 --pool-size 2
+"""
+import argparse
+import asyncio
+import collections
+import logging
+import os
+import re
+import sys
+import time
+
+import pytak
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# custom modules
+from atak_chat import AtakChat, build_chat_event
+from cot_broadcast import create_cot_message
+from mock_tak_server import MockTakServer, build_server_ssl_context, generate_self_signed_certs, DEFAULT_CERT_DIR
+import toolkit_logging
+
+LATENCY_SAMPLES = 100000     # most recent latency samples kept for the percentiles
+REPORT_INTERVAL = 10.0       # seconds between progress reports
+RECONNECT_DELAY = 1.0        # seconds before a simulated pytak client reconnects
+
+# chat text carries the sender, a sequence number and the monotonic send time
+LOADTEST_RE = re.compile(rb"<remarks[^>]*>LOADTEST (\S+) (\d+) (\d+)</remarks>")
+
+logger = logging.getLogger("tak_load_test")
+
+
+def percentile(sorted_values, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def read_rss_kb() -> int:
+    """Resident set size of this process in kB (Linux only)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+class LoadStats:
+    """Counters shared by all simulated clients."""
+
+    def __init__(self):
+        self.events_sent = 0
+        self.chats_sent = 0
+        self.chats_received = 0        # distinct chats that came back
+        self.chat_deliveries = 0       # every copy received, several per chat in gateway mode
+        self._recent_chats = collections.OrderedDict()  # (sender, seq) of the last LATENCY_SAMPLES chats
+        self.latencies_ms = collections.deque(maxlen=LATENCY_SAMPLES)
+        self.reconnects = 0
+        self.reconnect_times = []
+        self.rss_samples = []          # (elapsed seconds, rss kB)
+
+    def record_echo(self, text: bytes, own_uid: str = None):
+        """Record the latency of a load test chat, only our own echo unless own_uid is None."""
+        match = LOADTEST_RE.search(text)
+        if match and (own_uid is None or match.group(1).decode() == own_uid):
+            self.chat_deliveries += 1
+            self.latencies_ms.append((time.monotonic_ns() - int(match.group(3))) / 1e6)
+            key = match.group(1, 2)
+            if key not in self._recent_chats:
+                self._recent_chats[key] = None
+                if len(self._recent_chats) > LATENCY_SAMPLES:
+                    self._recent_chats.popitem(last=False)
+                self.chats_received += 1
+
+    def record_echo_text(self, text: str, own_uid: str = None):
+        self.record_echo(b"<remarks>" + text.encode() + b"</remarks>", own_uid)
+
+
+def chat_text(uid: str, seq: int) -> str:
+    return f"LOADTEST {uid} {seq} {time.monotonic_ns()}"
+
+
+class PytakSimClient:
+    """A PytakClient-style stream: presence at a fixed rate plus periodic chat."""
+
+    def __init__(self, index: int, conf: dict, stats: LoadStats, rate: float, chat_every: int):
+        self.uid = f"LOAD-PYTAK-{index}"
+        self.identity = {"uid": self.uid, "callsign": f"Load_{index}"}
+        self.conf = conf
+        self.stats = stats
+        self.rate = rate
+        self.chat_every = chat_every
+
+    async def _read_loop(self, reader):
+        buf = b""
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                raise ConnectionResetError("Connection closed by server")
+            buf += data
+            while b"</event>" in buf:
+                packet, buf = buf.split(b"</event>", 1)
+                self.stats.record_echo(packet, self.uid)
+
+    async def run(self):
+        seq = 0
+        first = True
+        while True:
+            lost_at = time.monotonic()
+            try:
+                reader, writer = await pytak.protocol_factory(self.conf)
+                if not first:
+                    self.stats.reconnects += 1
+                    self.stats.reconnect_times.append(time.monotonic() - lost_at)
+                first = False
+                rx_task = asyncio.create_task(self._read_loop(reader))
+                try:
+                    while not rx_task.done():
+                        seq += 1
+                        writer.write(create_cot_message(27.95, -81.62, 10.0, uid=self.uid,
+                                                        callsign=self.identity["callsign"]).encode())
+                        self.stats.events_sent += 1
+                        if self.chat_every and seq % self.chat_every == 0:
+                            writer.write(build_chat_event(self.identity, chat_text(self.uid, seq),
+                                                          "All Chat Rooms", f"{self.uid}-{seq}"))
+                            self.stats.chats_sent += 1
+                        await writer.drain()
+                        await asyncio.sleep(1.0 / self.rate)
+                    rx_task.result()
+                finally:
+                    rx_task.cancel()
+                    writer.close()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.debug("%s connection lost: %s", self.uid, e)
+                await asyncio.sleep(RECONNECT_DELAY)
+
+
+class AtakChatSimClient:
+    """A real AtakChat instance driven from the load test loop."""
+
+    def __init__(self, index: int, cert_paths: dict, host: str, port: int, stats: LoadStats,
+                 rate: float, chat_every: int):
+        self.chat = AtakChat(index, cert_paths["client_combined"], cert_paths["ca"], server_url=host,
+                             ssl_port=port, tcp_port=None, client_password="")  # the mock only speaks TLS
+        self.uid = self.chat.identity["uid"]
+        self.stats = stats
+        self.rate = rate
+        self.chat_every = chat_every
+
+    def _call(self, coro):
+        return asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self.chat.loop))
+
+    async def _read_loop(self):
+        while True:
+            message = await self._call(self.chat.receive_message(timeout=1.0))
+            if message and message.get("text"):
+                self.stats.record_echo_text(message["text"], self.uid)
+
+    async def run(self):
+        if not await asyncio.to_thread(self.chat.start):
+            logger.error("%s failed to connect", self.uid)
+            return
+        rx_task = asyncio.create_task(self._read_loop())
+        seq = 0
+        try:
+            while True:
+                seq += 1
+                self.chat.update_position(27.95, -81.62 + seq * 1e-5, 10.0)
+                await self._call(self.chat.send_direct_position_update())
+                self.stats.events_sent += 1
+                if self.chat_every and seq % self.chat_every == 0:
+                    await self._call(self.chat.send_message(chat_text(self.uid, seq)))
+                    self.stats.chats_sent += 1
+                await asyncio.sleep(1.0 / self.rate)
+        finally:
+            rx_task.cancel()
+            await asyncio.to_thread(self.chat.stop)
+
+
+class GatewaySimClients:
+    """N vehicles hosted by one TakGateway."""
+
+    def __init__(self, count: int, cert_paths: dict, host: str, port: int, stats: LoadStats,
+                 rate: float, chat_every: int, pool_size: int):
+        from tak_gateway import TakGateway
+        self.gateway = TakGateway(cert_paths["client_combined"], cert_paths["ca"], server_url=host,
+                                  ssl_port=port, tcp_port=None, client_password="", pool_size=pool_size)
+        self.vehicle_ids = list(range(1, count + 1))
+        for vehicle_id in self.vehicle_ids:
+            self.gateway.add_vehicle(vehicle_id)
+        self.stats = stats
+        self.rate = rate
+        self.chat_every = chat_every
+
+    async def _read_loop(self, vehicle_id: int):
+        # the gateway never hands a vehicle its own message, so latency is
+        # measured on delivery to the other hosted vehicles
+        while True:
+            message = await self.gateway.receive_message(vehicle_id, timeout=1.0)
+            if message and message.get("text"):
+                self.stats.record_echo_text(message["text"])
+
+    async def _drive(self):
+        seq = 0
+        while True:
+            seq += 1
+            for vehicle_id in self.vehicle_ids:
+                self.gateway.update_position(vehicle_id, 27.95, -81.62 + seq * 1e-5, 10.0)
+                if self.chat_every and seq % self.chat_every == 0:
+                    uid = self.gateway.vehicles[vehicle_id].identity["uid"]
+                    await self.gateway.send_message(vehicle_id, chat_text(uid, seq))
+                    self.stats.chats_sent += 1
+            await asyncio.sleep(1.0 / self.rate)
+
+    async def run(self):
+        tasks = [asyncio.create_task(self._drive())]
+        tasks += [asyncio.create_task(self._read_loop(v)) for v in self.vehicle_ids]
+        last_sent = 0
+        try:
+            gateway_task = asyncio.create_task(self.gateway.run())
+            while not gateway_task.done():
+                await asyncio.sleep(1.0)
+                self.stats.events_sent += self.gateway.events_sent - last_sent
+                last_sent = self.gateway.events_sent
+                self.stats.reconnects = sum(c.stats.reconnects for c in self.gateway.connections)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+def report(stats: LoadStats, server: MockTakServer, start: float, last: dict):
+    now = time.monotonic()
+    elapsed = now - start
+    interval = max(now - last["time"], 1e-6)
+    latencies = sorted(stats.latencies_ms)
+    rss = read_rss_kb()
+    stats.rss_samples.append((elapsed, rss))
+
+    line = (f"[{elapsed:7.0f}s] sent {(stats.events_sent - last['sent']) / interval:8.1f} ev/s"
+            f"  chat rtt p50 {percentile(latencies, 50):6.1f} p95 {percentile(latencies, 95):6.1f}"
+            f" p99 {percentile(latencies, 99):6.1f} max {latencies[-1] if latencies else 0.0:6.1f} ms"
+            f"  reconnects {stats.reconnects}  rss {rss / 1024:.1f} MB")
+    if server is not None:
+        line += f"  server rx {(server.events - last['server']) / interval:8.1f} ev/s"
+        last["server"] = server.events
+    print(line, flush=True)
+    last["time"] = now
+    last["sent"] = stats.events_sent
+
+
+def summary(stats: LoadStats, server: MockTakServer, elapsed: float):
+    latencies = sorted(stats.latencies_ms)
+    print("=" * 60)
+    print(f"Duration:            {elapsed:.1f} s")
+    print(f"Events sent:         {stats.events_sent} ({stats.events_sent / elapsed:.1f} ev/s)")
+    if server is not None:
+        print(f"Events received:     {server.events} ({server.events / elapsed:.1f} ev/s)")
+        print(f"Server connections:  {server.connections} (disconnects {server.disconnects})")
+    print(f"Chats sent/echoed:   {stats.chats_sent}/{stats.chats_received}"
+          f" ({stats.chat_deliveries} deliveries)")
+    for pct in (50, 90, 95, 99):
+        print(f"Chat RTT p{pct}:         {percentile(latencies, pct):.2f} ms")
+    print(f"Reconnects:          {stats.reconnects}")
+    if stats.reconnect_times:
+        print(f"Mean reconnect time: {sum(stats.reconnect_times) / len(stats.reconnect_times):.2f} s")
+    if len(stats.rss_samples) >= 2:
+        (t0, rss0), (t1, rss1) = stats.rss_samples[0], stats.rss_samples[-1]
+        growth_mb = (rss1 - rss0) / 1024
+        per_hour = growth_mb / max(t1 - t0, 1e-6) * 3600
+        print(f"RSS:                 {rss0 / 1024:.1f} -> {rss1 / 1024:.1f} MB ({per_hour:+.2f} MB/h)")
+
+
+async def async_main(args):
+    cert_paths = generate_self_signed_certs(args.cert_dir)
+    server = None
+    host, port = args.host, args.port
+    if args.start_server:
+        server = MockTakServer(host, port, build_server_ssl_context(cert_paths), drop_every=args.drop_every)
+        await server.start()
+        port = server.port
+        if args.drop_every > 0:
+            asyncio.create_task(server.drop_clients_loop())
+
+    stats = LoadStats()
+    conf = {
+        "COT_URL": f"tls://{host}:{port}",
+        "PYTAK_TLS_CLIENT_CERT": cert_paths["client_cert"],
+        "PYTAK_TLS_CLIENT_KEY": cert_paths["client_key"],
+        "PYTAK_TLS_CLIENT_CAFILE": cert_paths["ca"],
+        "PYTAK_TLS_DONT_VERIFY": "1",
+        "PYTAK_TLS_DONT_CHECK_HOSTNAME": "1",
+    }
+
+    if args.mode == "pytak":
+        runners = [PytakSimClient(i, conf, stats, args.rate, args.chat_every).run()
+                   for i in range(1, args.clients + 1)]
+    elif args.mode == "atak_chat":
+        runners = [AtakChatSimClient(i, cert_paths, host, port, stats, args.rate, args.chat_every).run()
+                   for i in range(1, args.clients + 1)]
+    else:
+        runners = [GatewaySimClients(args.clients, cert_paths, host, port, stats, args.rate,
+                                     args.chat_every, args.pool_size).run()]
+
+    tasks = [asyncio.create_task(r) for r in runners]
+    start = time.monotonic()
+    last = {"time": start, "sent": 0, "server": 0}
+    try:
+        while time.monotonic() - start < args.duration:
+            await asyncio.sleep(min(args.report_interval, args.duration))
+            report(stats, server, start, last)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        summary(stats, server, time.monotonic() - start)
+        if server is not None:
+            await server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the TAK clients against the mock TAK server.")
+    parser.add_argument("--mode", choices=("pytak", "atak_chat", "gateway"), default="pytak")
+    parser.add_argument("--clients", type=int, default=10, help="Number of simulated clients / vehicles")
+    parser.add_argument("--rate", type=float, default=1.0, help="Presence events per second per client")
+    parser.add_argument("--chat-every", type=int, default=5, help="Send a chat every N presence events (0 = never)")
+    parser.add_argument("--duration", type=float, default=60.0, help="Test duration in seconds")
+    parser.add_argument("--report-interval", type=float, default=REPORT_INTERVAL)
+    parser.add_argument("--pool-size", type=int, default=1, help="Gateway connection pool size")
+    parser.add_argument("--host", default="127.0.0.1", help="Mock server address")
+    parser.add_argument("--port", type=int, default=0, help="Mock server port (0 = any free port)")
+    parser.add_argument("--no-server", dest="start_server", action="store_false",
+                        help="Use an already running mock server at --host/--port")
+    parser.add_argument("--drop-every", type=float, default=0.0, help="Drop all clients every N seconds")
+    parser.add_argument("--cert-dir", default=DEFAULT_CERT_DIR)
+    args = parser.parse_args()
+
+    toolkit_logging.setup_logging(level=logging.WARNING)
+
+    try:
+        asyncio.run(async_main(args))
+    except KeyboardInterrupt:
+        print("\nLoad test interrupted")
+
+
+if __name__ == "__main__":
+    main()